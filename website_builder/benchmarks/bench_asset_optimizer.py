@@ -0,0 +1,70 @@
+"""Asset optimizer throughput and page weight across sites built from the shipped templates.
+
+Usage:
+    python benchmarks/bench_asset_optimizer.py [--sites 8] [--scale 20] [--workers 1 4] [--json]
+
+Each synthetic site holds the templates' HTML, CSS and JS repeated
+``scale`` times, roughly the size of a generated page.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from common import add_output_arguments, document, emit
+from website_builder.utils.asset_optimizer import AssetOptimizer
+
+TEMPLATES = Path(__file__).resolve().parent.parent / 'src' / 'website_builder' / 'templates'
+
+
+def make_sites(root: Path, sites: int, scale: int) -> List[str]:
+    html = (TEMPLATES / 'base.html').read_text(encoding='utf-8').replace(
+        '{content}', '<section>\n    <p>Generated content.</p>\n</section>\n' * scale)
+    css = (TEMPLATES / 'base.css').read_text(encoding='utf-8') * scale
+    js = (TEMPLATES / 'base.js').read_text(encoding='utf-8') * scale
+    site_dirs = []
+    for i in range(sites):
+        site_dir = root / f"site-{i}"
+        for relative, content in (('html/index.html', html), ('css/style.css', css), ('js/script.js', js)):
+            (site_dir / relative).parent.mkdir(parents=True, exist_ok=True)
+            (site_dir / relative).write_text(content, encoding='utf-8')
+        site_dirs.append(str(site_dir))
+    return site_dirs
+
+
+def run(sites: int = 8, scale: int = 20, workers: List[int] = (1, 4)) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        site_dirs = make_sites(Path(tmpdirname), sites, scale)
+        for count in workers:
+            with AssetOptimizer(workers=count) as optimizer:
+                start = time.perf_counter()
+                reports = optimizer.optimize_many(site_dirs)
+                seconds = time.perf_counter() - start
+            assets = [report for site_reports in reports.values() for report in site_reports]
+            original = sum(report.original_bytes for report in assets)
+            results.append({
+                'name': f"optimize/sites={sites}/workers={count}",
+                'seconds': seconds,
+                'sites_per_second': sites / seconds,
+                'original_bytes': original,
+                'minified_ratio': sum(report.minified_bytes for report in assets) / original,
+                'gzip_ratio': sum(report.gzip_bytes for report in assets) / original,
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sites', type=int, default=8, help='Sites to optimize')
+    parser.add_argument('--scale', type=int, default=20, help='Times the templates are repeated per asset')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4], help='Worker process counts to measure')
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    params = {'sites': args.sites, 'scale': args.scale, 'workers': args.workers}
+    emit(document('asset_optimizer', params, run(args.sites, args.scale, args.workers)), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""End-to-end build time with fake LLM and search tools.
+
+Separates the framework's own overhead (config loading, prompt
+formatting, crew assembly, file I/O) from time spent waiting on the
+simulated LLM and tools. The ``pages`` cases build an 8-page site, one
+task at a time and with every page at once.
+
+Usage:
+    python benchmarks/bench_build.py [--llm-latency 0.05] [--tool-calls 1] [--repeat 3] [--json]
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+from typing import Any, Dict, Iterator, List
+
+from common import add_output_arguments, best_of, document, emit
+from website_builder.crew import BuilderResources, WebsiteBuilder
+from website_builder.testing import fake_resources
+from website_builder.utils.metrics import RunMetrics
+
+
+@contextlib.contextmanager
+def scratch_dir() -> Iterator[str]:
+    """Work in a temporary directory; the sequential crew writes relative to the cwd."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        os.chdir(tmpdirname)
+        try:
+            yield tmpdirname
+        finally:
+            os.chdir(cwd)
+
+
+def build_once(resources: BuilderResources, mode: str, output_dir: str) -> RunMetrics:
+    """Build one site and return its metrics."""
+    metrics = RunMetrics("Benchmarking")
+    with metrics.activate():
+        builder = WebsiteBuilder(topic="Benchmarking", output_dir=output_dir, resources=resources)
+        if mode == 'sequential':
+            builder.crew().kickoff()
+        elif mode.startswith('pages'):
+            workers = mode.split('=')[1]
+            builder.run_pipeline(max_workers=None if workers == 'all' else int(workers), pages=True)
+        else:
+            builder.run_pipeline(max_workers=int(mode.split('=')[1]))
+    metrics.finish()
+    return metrics
+
+
+def measure_build(resources: BuilderResources, mode: str, repeat: int) -> Dict[str, Any]:
+    best = None
+    for _ in range(max(repeat, 1)):
+        with scratch_dir() as tmpdirname:
+            metrics = build_once(resources, mode, os.path.join(tmpdirname, 'output'))
+        if best is None or metrics.wall_seconds < best.wall_seconds:
+            best = metrics
+    totals = best.totals()
+    return {
+        'name': f"build/{mode}",
+        'seconds': best.wall_seconds,
+        'llm_seconds': totals['llm_seconds'],
+        'tool_seconds': totals['tool_seconds'],
+        'overhead_seconds': max(best.wall_seconds - totals['llm_seconds'] - totals['tool_seconds'], 0.0),
+        'llm_calls': totals['llm_calls'],
+        'tool_calls': totals['tool_calls'],
+        'bytes_written': totals['bytes_written'],
+    }
+
+
+def run(llm_latency: float = 0.0, response_size: int = 2000, tool_calls: int = 1,
+        tool_latency: float = 0.0, repeat: int = 3) -> List[Dict[str, Any]]:
+    def make_resources() -> BuilderResources:
+        return fake_resources(llm_latency=llm_latency, response_size=response_size,
+                              tool_calls=tool_calls, tool_latency=tool_latency, sitemap_pages=8)
+
+    resources = make_resources()
+    results = [
+        {'name': 'setup/load_resources', 'seconds': best_of(repeat, make_resources)},
+        {'name': 'setup/format_configs', 'seconds': best_of(
+            repeat, lambda: WebsiteBuilder(topic="Benchmarking", output_dir=tempfile.gettempdir(),
+                                           resources=resources))},
+    ]
+    with scratch_dir() as tmpdirname:
+        builder = WebsiteBuilder(topic="Benchmarking", output_dir=tmpdirname, resources=resources)
+        results.append({'name': 'setup/assemble_crew', 'seconds': best_of(repeat, builder.crew)})
+
+    for mode in ('sequential', 'pipeline=1', 'pipeline=4', 'pages=1', 'pages=all'):
+        results.append(measure_build(resources, mode, repeat))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='Seconds per fake LLM call')
+    parser.add_argument('--response-size', type=int, default=2000, help='Characters per fake LLM answer')
+    parser.add_argument('--tool-calls', type=int, default=1, help='Tool calls per task before answering')
+    parser.add_argument('--tool-latency', type=float, default=0.0, help='Seconds per fake search call')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the fastest is reported')
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    params = {
+        'llm_latency': args.llm_latency,
+        'response_size': args.response_size,
+        'tool_calls': args.tool_calls,
+        'tool_latency': args.tool_latency,
+        'repeat': args.repeat,
+    }
+    # Agents are verbose; keep stdout for the results
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(**params)
+    emit(document('build', params, results), args)
+
+
+if __name__ == '__main__':
+    main()
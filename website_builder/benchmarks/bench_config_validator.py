@@ -0,0 +1,102 @@
+"""ConfigValidator cost on large generated agent and task configurations.
+
+Usage:
+    python benchmarks/bench_config_validator.py [--sizes 100 1000 10000] [--json]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import yaml
+
+from common import add_output_arguments, document, emit
+from website_builder.utils.config_validator import ConfigValidator
+
+
+def synthetic_configs(size: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Generate valid configs with ``size`` agents and ``size`` tasks.
+
+    Each task depends on the previous task and on the one at half its
+    index, so the dependency graph is connected and deep.
+    """
+    agents = {
+        f"agent_{i}": {
+            'role': f"Specialist Number {i}",
+            'goal': f"Produce high quality deliverable number {i} for the site.",
+            'backstory': f"A seasoned specialist who has shipped {i} projects and reviews every detail twice.",
+            'allow_delegation': False,
+            'verbose': True,
+        }
+        for i in range(size)
+    }
+    tasks = {}
+    for i in range(size):
+        dependencies = sorted({f"task_{j}" for j in (i - 1, i // 2) if 0 <= j < i})
+        tasks[f"task_{i}"] = {
+            'description': f"Create deliverable number {i} using the outputs of earlier tasks.",
+            'expected_output': f"A complete deliverable number {i} in markdown format.",
+            'agent': f"agent_{i}",
+            'output_file': f"output/deliverable_{i}.md",
+            'context': dependencies,
+            'dependencies': dependencies,
+        }
+    return agents, tasks
+
+
+def measure(size: int) -> List[Dict[str, Any]]:
+    agents, tasks = synthetic_configs(size)
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        agents_path = Path(tmpdirname) / 'agents.yaml'
+        tasks_path = Path(tmpdirname) / 'tasks.yaml'
+        agents_path.write_text(yaml.safe_dump(agents), encoding='utf-8')
+        tasks_path.write_text(yaml.safe_dump(tasks), encoding='utf-8')
+
+        start = time.perf_counter()
+        ConfigValidator.load_yaml(str(agents_path))
+        ConfigValidator.load_yaml(str(tasks_path))
+        results.append({'name': f"load_yaml/size={size}", 'seconds': time.perf_counter() - start})
+
+        start = time.perf_counter()
+        errors = ConfigValidator.validate_agents_config(agents) + ConfigValidator.validate_tasks_config(tasks, agents)
+        results.append({'name': f"validate_parsed/size={size}", 'seconds': time.perf_counter() - start,
+                        'errors': len(errors)})
+
+        start = time.perf_counter()
+        ConfigValidator.validate_configs(str(agents_path), str(tasks_path))
+        results.append({'name': f"validate_files/size={size}", 'seconds': time.perf_counter() - start})
+
+        start = time.perf_counter()
+        ConfigValidator.validate_configs(str(agents_path), str(tasks_path))
+        results.append({'name': f"revalidate_unchanged/size={size}", 'seconds': time.perf_counter() - start})
+
+        # Edit one agent; only its entry is parsed and checked again
+        agents_path.write_text(agents_path.read_text(encoding='utf-8').replace(
+            'deliverable number 0 for', 'deliverable zero for', 1), encoding='utf-8')
+        start = time.perf_counter()
+        ConfigValidator.validate_configs(str(agents_path), str(tasks_path))
+        results.append({'name': f"revalidate_one_edit/size={size}", 'seconds': time.perf_counter() - start})
+    return results
+
+
+def run(sizes: List[int]) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        results.extend(measure(size))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='Numbers of agents and tasks to generate')
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    emit(document('config_validator', {'sizes': args.sizes}, run(args.sizes)), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Prompt tokens and LLM latency per task with and without context compression.
+
+Builds the same site twice with a fake LLM whose calls take longer the
+longer their prompt is, like a provider's prompt processing: once passing
+every upstream output in full, once with --compress-context. Each task is
+reported with the context it received, its prompt tokens and its LLM
+time, and the ``saved`` cases give the difference per task. The
+``digest`` cases time the one-off digest of the research.
+
+Usage:
+    python benchmarks/bench_context_compression.py [--response-size 24000] [--prompt-token-latency 0.0002] [--json]
+"""
+import argparse
+import contextlib
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+from common import add_output_arguments, best_of, document, emit
+from website_builder.crew import WebsiteBuilder
+from website_builder.testing import FakeLLM, fake_resources
+from website_builder.utils.context_compressor import ContextBudget, ContextCompressor
+from website_builder.utils.metrics import RunMetrics
+
+TASKS = ('html_creation_task', 'css_design_task', 'js_development_task')
+
+
+def build(response_size: int, prompt_token_latency: float, compress_context: bool) -> RunMetrics:
+    """Build one site and return its metrics."""
+    resources = fake_resources(response_size=response_size, research_sections=8,
+                               prompt_token_latency=prompt_token_latency)
+    metrics = RunMetrics("Benchmarking")
+    with tempfile.TemporaryDirectory() as tmpdirname, metrics.activate():
+        builder = WebsiteBuilder(topic="Benchmarking", output_dir=tmpdirname, resources=resources)
+        builder.run_pipeline(compress_context=compress_context)
+    metrics.finish()
+    return metrics
+
+
+def run(response_size: int = 24000, prompt_token_latency: float = 0.0002, repeat: int = 3) -> List[Dict[str, Any]]:
+    research = FakeLLM(response_size=response_size, research_sections=8)._research("Benchmarking")
+    budgets = ContextBudget()
+    results = [{
+        'name': 'digest/research',
+        'seconds': best_of(repeat, lambda: ContextCompressor(budgets).digest('research.md', research)),
+        'tokens': ContextCompressor(budgets).digest('research.md', research).tokens,
+    }]
+
+    stages = {}
+    for mode, compress_context in (('full', False), ('compressed', True)):
+        metrics = build(response_size, prompt_token_latency, compress_context)
+        stages[mode] = metrics.stages
+        for task in TASKS:
+            counters = metrics.stages[task]
+            results.append({
+                'name': f"{mode}/{task}",
+                'seconds': counters['llm_seconds'],
+                'context_tokens': counters['context_tokens'],
+                'prompt_tokens': counters['prompt_tokens'],
+                'compress_seconds': counters['compress_seconds'],
+            })
+        results.append({'name': f"{mode}/build", 'seconds': metrics.wall_seconds,
+                        'prompt_tokens': metrics.totals()['prompt_tokens']})
+
+    for task in TASKS:
+        full, compressed = stages['full'][task], stages['compressed'][task]
+        results.append({
+            'name': f"saved/{task}",
+            'seconds': full['llm_seconds'] - compressed['llm_seconds'],
+            'prompt_tokens': full['prompt_tokens'] - compressed['prompt_tokens'],
+            'context_tokens': compressed['context_tokens_saved'],
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--response-size', type=int, default=24000, help='Characters per fake LLM answer')
+    parser.add_argument('--prompt-token-latency', type=float, default=0.0002,
+                        help='Seconds per prompt token of each fake LLM call')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of the digest case; the fastest is reported')
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    params = {
+        'response_size': args.response_size,
+        'prompt_token_latency': args.prompt_token_latency,
+        'repeat': args.repeat,
+    }
+    # Agents are verbose; keep stdout for the results
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(**params)
+    emit(document('context_compression', params, results), args)
+
+
+if __name__ == '__main__':
+    main()
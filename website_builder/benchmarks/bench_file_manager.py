@@ -0,0 +1,97 @@
+"""FileManager write, build commit, backup and version throughput at growing history sizes.
+
+Usage:
+    python benchmarks/bench_file_manager.py [--revisions 10 1000 10000] [--json]
+"""
+import argparse
+import contextlib
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from bench_version_store import synthetic_revisions
+from common import add_output_arguments, document, emit
+from website_builder.utils.file_manager import FileManager
+
+
+def measure(count: int) -> List[Dict[str, Any]]:
+    revisions = synthetic_revisions(count)
+    raw_bytes = sum(len(r.encode('utf-8')) for r in revisions)
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        file_manager = FileManager(tmpdirname)
+
+        start = time.perf_counter()
+        for content in revisions:
+            file_manager.write_file('index.html', content)
+        seconds = time.perf_counter() - start
+        results.append({
+            'name': f"write/revisions={count}",
+            'seconds': seconds,
+            'ops_per_second': count / seconds,
+            'mb_per_second': raw_bytes / seconds / 1e6,
+        })
+
+        # A build writes four files; compare one write_file per file with one transaction per build
+        site = ['research.md', 'html/index.html', 'css/style.css', 'js/script.js']
+        for mode in ('per_file', 'transaction'):
+            start = time.perf_counter()
+            for i, content in enumerate(revisions):
+                with file_manager.transaction() if mode == 'transaction' else contextlib.nullcontext():
+                    for name in site:
+                        file_manager.write_file(f"{mode}/{name}", f"{name} {i}\n{content}")
+            seconds = time.perf_counter() - start
+            results.append({'name': f"build_{mode}/revisions={count}", 'seconds': seconds,
+                            'builds_per_second': count / seconds})
+
+        start = time.perf_counter()
+        for _ in range(count):
+            file_manager.create_backup('index.html')
+        seconds = time.perf_counter() - start
+        results.append({'name': f"backup/revisions={count}", 'seconds': seconds, 'ops_per_second': count / seconds,
+                        'stored_bytes': file_manager.backup_archive.stored_bytes()})
+
+        start = time.perf_counter()
+        backups = file_manager.list_backups('index.html')
+        results.append({'name': f"list_backups/revisions={count}", 'seconds': time.perf_counter() - start,
+                        'backups': len(backups)})
+
+        start = time.perf_counter()
+        file_manager.restore_backup(backups[len(backups) // 2])
+        results.append({'name': f"restore_backup/revisions={count}", 'seconds': time.perf_counter() - start})
+
+        start = time.perf_counter()
+        reopened = FileManager(tmpdirname)
+        versions = reopened.get_file_versions('index.html')
+        results.append({'name': f"open_history/revisions={count}", 'seconds': time.perf_counter() - start,
+                        'versions': len(versions)})
+
+        start = time.perf_counter()
+        latest = versions[-1]['content']
+        results.append({'name': f"read_latest/revisions={count}", 'seconds': time.perf_counter() - start,
+                        'bytes': len(latest)})
+
+        start = time.perf_counter()
+        reopened.restore_version('index.html', count // 2)
+        results.append({'name': f"restore_middle/revisions={count}", 'seconds': time.perf_counter() - start})
+    return results
+
+
+def run(revisions: List[int]) -> List[Dict[str, Any]]:
+    results = []
+    for count in revisions:
+        results.extend(measure(count))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--revisions', type=int, nargs='+', default=[10, 1000, 10000],
+                        help='History sizes to measure')
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    emit(document('file_manager', {'revisions': args.revisions}, run(args.revisions)), args)
+
+
+if __name__ == '__main__':
+    main()
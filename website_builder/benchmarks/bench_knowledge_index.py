@@ -0,0 +1,98 @@
+"""Knowledge index upserts, searches and the web searches it saves a build.
+
+Fills a knowledge index with synthetic documents drawn from a Zipf-like
+vocabulary, one chunk each, and times upserts and searches at each size.
+Searches are timed both exhaustively and through the index's postings
+lookup; ``recall`` is the share of queries whose best exhaustive hit the
+postings lookup also ranks first. The ``build`` cases build the same
+topic twice with a slow fake search tool, with and without the index,
+and report the searches that reached the tool.
+
+Usage:
+    python benchmarks/bench_knowledge_index.py [--sizes 1000 10000] [--queries 50] [--json]
+"""
+import argparse
+import contextlib
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from common import add_output_arguments, document, emit
+from website_builder.crew import WebsiteBuilder
+from website_builder.testing import fake_resources
+from website_builder.utils.vector_index import VectorIndex
+
+VOCABULARY = 20000
+WORDS_PER_DOCUMENT = 100
+
+
+def documents(count: int, seed: int = 0) -> List[str]:
+    """Generate ``count`` documents of words drawn from a Zipf-like vocabulary."""
+    rng = random.Random(seed)
+    words = [f"w{i}x" for i in range(VOCABULARY)]
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY)]
+    return [' '.join(rng.choices(words, weights, k=WORDS_PER_DOCUMENT)) for _ in range(count)]
+
+
+def build(tool_latency: float, knowledge_index: bool) -> Dict[str, Any]:
+    """Build the same topic twice and return the wall time and the searches that reached the tool."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        index_path = str(Path(tmpdirname) / 'knowledge.sqlite3') if knowledge_index else None
+        resources = fake_resources(tool_calls=1, tool_latency=tool_latency, research_sections=2,
+                                   knowledge_index_path=index_path)
+        start = time.perf_counter()
+        for run in range(2):
+            WebsiteBuilder(topic="Benchmarking", output_dir=f"{tmpdirname}/{run}", resources=resources).run_pipeline()
+        seconds = time.perf_counter() - start
+        stats = resources.knowledge_search.stats() if knowledge_index else {'answered': 0, 'searched': 2}
+    return {'seconds': seconds, **stats}
+
+
+def run(sizes: List[int], queries: int = 50, tool_latency: float = 0.2) -> List[Dict[str, Any]]:
+    results = []
+    rng = random.Random(1)
+    for size in sizes:
+        texts = documents(size)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            index = VectorIndex(str(Path(tmpdirname) / 'knowledge.sqlite3'))
+            start = time.perf_counter()
+            for i, text in enumerate(texts):
+                index.upsert(f"doc-{i}", text)
+            results.append({'name': f"upsert/{size}", 'seconds': (time.perf_counter() - start) / size})
+
+            probes = [' '.join(rng.sample(text.split(), 8)) for text in rng.sample(texts, min(queries, size))]
+            best = {}
+            for mode, limit in (('exhaustive', size), ('postings', 0)):
+                index.EXACT_SEARCH_LIMIT = limit
+                start = time.perf_counter()
+                best[mode] = [index.search(query, k=1)[0].source for query in probes]
+                results.append({'name': f"search_{mode}/{size}",
+                                'seconds': (time.perf_counter() - start) / len(probes)})
+            results[-1]['recall'] = sum(a == b for a, b in zip(best['exhaustive'], best['postings'])) / len(probes)
+            index.close()
+
+    for mode, knowledge_index in (('web', False), ('indexed', True)):
+        results.append({'name': f"build/{mode}", **build(tool_latency, knowledge_index)})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='Documents in the index')
+    parser.add_argument('--queries', type=int, default=50, help='Searches timed at each size')
+    parser.add_argument('--tool-latency', type=float, default=0.2, help='Seconds each fake web search takes')
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    params = {'sizes': args.sizes, 'queries': args.queries, 'tool_latency': args.tool_latency}
+    # Agents are verbose; keep stdout for the results
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(**params)
+    emit(document('knowledge_index', params, results), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Throughput against a quota-enforcing provider, with and without the rate limiter.
+
+Usage:
+    python benchmarks/bench_rate_limiter.py [--quota 100] [--calls 200] [--workers 16] [--json]
+
+The simulated provider admits ``quota`` requests per second and answers
+the rest with a 429. Without the limiter, workers retry after a short fixed
+pause, like a client library's default retry loop; with it, calls are
+admitted at the quota and rejections should be rare.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from common import add_output_arguments, document, emit
+from website_builder.utils.rate_limiter import LocalCoordinator, ProviderLimits, RateLimiter
+
+
+class QuotaExceeded(Exception):
+    status_code = 429
+
+
+class QuotaProvider:
+    """Provider that admits ``quota`` requests per second with a one-second burst."""
+
+    def __init__(self, quota: float, latency: float):
+        self.quota = quota
+        self.latency = latency
+        self.accepted = 0
+        self.rejected = 0
+        self._level = quota
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def call(self) -> str:
+        with self._lock:
+            now = time.monotonic()
+            self._level = min(self.quota, self._level + (now - self._updated) * self.quota)
+            self._updated = now
+            if self._level < 1:
+                self.rejected += 1
+                raise QuotaExceeded("429 Too Many Requests")
+            self._level -= 1
+            self.accepted += 1
+        time.sleep(self.latency)
+        return 'ok'
+
+
+def naive_call(provider: QuotaProvider, pause: float) -> str:
+    while True:
+        try:
+            return provider.call()
+        except QuotaExceeded:
+            time.sleep(pause)
+
+
+def measure(mode: str, quota: float, calls: int, workers: int, latency: float) -> Dict[str, Any]:
+    provider = QuotaProvider(quota, latency)
+    # Start from an exhausted burst so both modes face the steady-state quota
+    provider._level = 0
+    if mode == 'limited':
+        limiter = RateLimiter('provider', ProviderLimits(requests_per_minute=quota * 60, burst_seconds=0.01,
+                                                         initial_backoff=0.05, max_retries=100),
+                              LocalCoordinator())
+        # The limiter's own bucket starts full; drain it to match the provider
+        limiter.coordinator.reserve('provider', limiter._buckets(0))
+        call = lambda: limiter.run(provider.call)
+    else:
+        call = lambda: naive_call(provider, pause=0.005)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda _: call(), range(calls)))
+    seconds = time.perf_counter() - start
+    return {
+        'name': f"{mode}/quota={quota:g}/calls={calls}",
+        'seconds': seconds,
+        'calls_per_second': calls / seconds,
+        'rejected': provider.rejected,
+    }
+
+
+def run(quota: float = 100, calls: int = 200, workers: int = 16, latency: float = 0.01) -> List[Dict[str, Any]]:
+    return [measure(mode, quota, calls, workers, latency) for mode in ('naive', 'limited')]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quota', type=float, default=100, help='Requests per second the provider admits')
+    parser.add_argument('--calls', type=int, default=200, help='Calls to make')
+    parser.add_argument('--workers', type=int, default=16, help='Threads making calls')
+    parser.add_argument('--latency', type=float, default=0.01, help='Seconds each admitted call takes')
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    params = {'quota': args.quota, 'calls': args.calls, 'workers': args.workers, 'latency': args.latency}
+    emit(document('rate_limiter', params, run(args.quota, args.calls, args.workers, args.latency)), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Page rendering throughput and LLM output size of template builds.
+
+Usage:
+    python benchmarks/bench_template_engine.py [--pages 1000 10000] [--json]
+
+Compares rendering base.html with the precompiled TemplateEngine against
+reading the file and substituting every slot per page, and the size of
+the JSON the LLM writes in a template build against the full page it
+writes otherwise.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from common import add_output_arguments, document, emit
+from website_builder.pages import PageContent, parse_page_content, render_page
+from website_builder.utils.template_engine import SLOT_PATTERN, TemplateEngine, escape
+
+TEMPLATES = Path(__file__).resolve().parent.parent / 'src' / 'website_builder' / 'templates'
+
+
+def page_content(i: int) -> Dict[str, Any]:
+    return {
+        'title': f"Topic {i}",
+        'description': f"Everything about topic {i}",
+        'sections': [{'id': f"part-{n}", 'heading': f"Part {n}",
+                      'html': f"<p>{'Generated content about the topic. ' * 20}</p>"} for n in range(5)],
+        'footer_about': f"A site about topic {i}",
+        'footer_contact': 'hello@example.com',
+    }
+
+
+class NaiveEngine:
+    """Reads the template and substitutes its slots on every render."""
+
+    def render(self, name: str, context: Dict[str, Any]) -> str:
+        source = (TEMPLATES / name).read_text(encoding='utf-8')
+        return SLOT_PATTERN.sub(lambda m: str(escape(context[m.group(1)])), source)
+
+
+def run(pages: List[int]) -> List[Dict[str, Any]]:
+    results = []
+    engine = TemplateEngine(str(TEMPLATES))
+    contents = [PageContent.from_dict(page_content(i)) for i in range(100)]
+    for count in pages:
+        for mode, renderer in (('engine', engine), ('naive', NaiveEngine())):
+            start = time.perf_counter()
+            for i in range(count):
+                render_page(contents[i % len(contents)], 'Site', engine=renderer, year=2024)
+            seconds = time.perf_counter() - start
+            results.append({'name': f"render_{mode}/pages={count}", 'seconds': seconds,
+                            'pages_per_second': count / seconds})
+
+    # What the LLM has to write for one page in each mode
+    output = json.dumps(page_content(0))
+    start = time.perf_counter()
+    page = render_page(parse_page_content(output), 'Site', engine=engine, year=2024)
+    seconds = time.perf_counter() - start
+    json_bytes, page_bytes = len(output.encode('utf-8')), len(page.encode('utf-8'))
+    results.append({'name': 'llm_output', 'seconds': seconds, 'json_bytes': json_bytes, 'page_bytes': page_bytes,
+                    'saved_ratio': 1 - json_bytes / page_bytes})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[1000, 10000], help='Numbers of pages to render')
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    emit(document('template_engine', {'pages': args.pages}, run(args.pages)), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Bytes stored per version for full copies versus delta chains.
+
+Usage:
+    python benchmarks/bench_version_store.py [--revisions 1000] [--json] [--output FILE]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from common import add_output_arguments, document, emit
+from website_builder.utils.version_store import VersionStore
+
+
+def synthetic_revisions(count: int, seed: int = 0) -> List[str]:
+    """
+    Generate page revisions that look like successive LLM regenerations.
+
+    Each revision rewrites a handful of lines of the previous one and
+    occasionally inserts or drops a section.
+    """
+    rng = random.Random(seed)
+    lines = [f"<section id='s{i}'><p>Paragraph {i} about the topic.</p></section>\n" for i in range(300)]
+    revisions = []
+    for n in range(count):
+        for _ in range(rng.randint(1, 5)):
+            i = rng.randrange(len(lines))
+            lines[i] = f"<section id='s{i}'><p>Paragraph {i}, revision {n}.</p></section>\n"
+        if rng.random() < 0.05:
+            lines.insert(rng.randrange(len(lines)), f"<aside>Note added in revision {n}.</aside>\n")
+        if rng.random() < 0.05 and len(lines) > 10:
+            del lines[rng.randrange(len(lines))]
+        revisions.append("".join(lines))
+    return revisions
+
+
+def measure(revisions: List[str], keyframe_interval: int, compression: str) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        store = VersionStore(Path(tmpdirname), compression=compression, keyframe_interval=keyframe_interval)
+        start = time.perf_counter()
+        for content in revisions:
+            store.append("index.html", content)
+        write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.read("index.html", len(revisions) - 1)
+        read_seconds = time.perf_counter() - start
+
+        stored = store.stored_bytes()
+    return {
+        'keyframe_interval': keyframe_interval,
+        'compression': compression,
+        'stored_bytes': stored,
+        'bytes_per_version': stored / len(revisions),
+        'write_seconds': write_seconds,
+        'read_latest_seconds': read_seconds,
+    }
+
+
+def run(count: int) -> List[Dict[str, float]]:
+    revisions = synthetic_revisions(count)
+    raw_bytes = sum(len(r.encode('utf-8')) for r in revisions)
+    results = []
+    for keyframe_interval, compression in ((1, 'none'), (1, 'zlib'), (32, 'none'), (32, 'zlib')):
+        result = measure(revisions, keyframe_interval=keyframe_interval, compression=compression)
+        results.append({
+            'name': f"keyframes={keyframe_interval}/compression={compression}",
+            'seconds': result['write_seconds'],
+            'raw_bytes_per_version': raw_bytes / count,
+            **result,
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--revisions', type=int, default=1000)
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    emit(document('version_store', {'revisions': args.revisions}, run(args.revisions)), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Shared helpers for the benchmark scripts.
+
+Every script emits the same JSON document so results of different
+releases can be compared with compare.py:
+
+    {
+      "benchmark": "file_manager",
+      "environment": {"python": "...", "platform": "...", "website_builder": "0.1.0", ...},
+      "params": {...},
+      "results": [{"name": "write/revisions=1000", "seconds": 1.23, ...}, ...]
+    }
+
+Each result has a unique name within its benchmark and a ``seconds``
+figure (lower is better); other fields are informational.
+"""
+import argparse
+import json
+import os
+import platform
+import time
+from datetime import datetime
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Callable, Dict, List
+
+# Keep crewai from sending telemetry while benchmarking
+os.environ.setdefault('OTEL_SDK_DISABLED', 'true')
+os.environ.setdefault('CREWAI_DISABLE_TELEMETRY', 'true')
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the interpreter and package versions the results were produced with."""
+    packages = {}
+    for name in ('website_builder', 'crewai'):
+        try:
+            packages[name] = version(name)
+        except PackageNotFoundError:
+            packages[name] = None
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'timestamp': datetime.now().isoformat(),
+        **packages,
+    }
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    """Run ``func`` ``repeat`` times and return the fastest wall time in seconds."""
+    timings = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def document(benchmark: str, params: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap benchmark results in the common JSON format."""
+    return {
+        'benchmark': benchmark,
+        'environment': environment(),
+        'params': params,
+        'results': results,
+    }
+
+
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --json and --output options shared by every script."""
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+
+
+def emit(doc: Dict[str, Any], args: argparse.Namespace) -> None:
+    """Print a benchmark document as JSON or as a table, and save it if requested."""
+    encoded = json.dumps(doc, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(encoded + '\n')
+    if args.json:
+        print(encoded)
+        return
+
+    print(f"{doc['benchmark']}:")
+    for result in doc['results']:
+        extras = ", ".join(
+            f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}"
+            for k, v in result.items() if k not in ('name', 'seconds')
+        )
+        print(f"  {result['name']:<40} {result['seconds']:>10.4f}s  {extras}")
@@ -0,0 +1,58 @@
+"""Compare two benchmark results files and flag regressions.
+
+Usage:
+    python benchmarks/compare.py baseline.json current.json [--threshold 0.10]
+
+Accepts files written by run_all.py or by a single script's --output.
+Exits with status 1 if any case got slower by more than the threshold.
+"""
+import argparse
+import json
+import sys
+from typing import Dict
+
+
+def load_cases(path: str) -> Dict[str, float]:
+    """Map 'benchmark/case' to seconds for every result in a results file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    documents = data['benchmarks'] if 'benchmarks' in data else [data]
+    return {
+        f"{doc['benchmark']}/{result['name']}": result['seconds']
+        for doc in documents for result in doc['results']
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown reported as a regression (default 0.10 = 10%%)')
+    parser.add_argument('--min-seconds', type=float, default=0.001,
+                        help='Ignore cases faster than this in both files; they are mostly noise')
+    args = parser.parse_args()
+
+    baseline = load_cases(args.baseline)
+    current = load_cases(args.current)
+    regressions = 0
+    print(f"{'case':<60} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline or name not in current:
+            print(f"{name:<60} {baseline.get(name, float('nan')):>10.4f} {current.get(name, float('nan')):>10.4f}")
+            continue
+        before, after = baseline[name], current[name]
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > args.threshold and max(before, after) >= args.min_seconds:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"{name:<60} {before:>10.4f} {after:>10.4f} {change:>+8.1%}{flag}")
+
+    if regressions:
+        print(f"\n{regressions} case(s) slower by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Run every benchmark and write one combined JSON results file.
+
+Usage:
+    python benchmarks/run_all.py --output results/0.1.0.json [--quick]
+
+Compare two results files with compare.py.
+"""
+import argparse
+import contextlib
+import json
+import sys
+
+import bench_asset_optimizer
+import bench_build
+import bench_config_validator
+import bench_context_compression
+import bench_file_manager
+import bench_knowledge_index
+import bench_rate_limiter
+import bench_template_engine
+import bench_version_store
+from common import document, environment
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', required=True, help='File to write the combined results to')
+    parser.add_argument('--quick', action='store_true', help='Use small sizes, e.g. for a smoke test in CI')
+    args = parser.parse_args()
+
+    revisions = [10, 1000] if args.quick else [10, 1000, 10000]
+    sizes = [100, 1000] if args.quick else [100, 1000, 10000]
+    repeat = 1 if args.quick else 3
+
+    benchmarks = []
+    # Agents are verbose; keep stdout for progress
+    with contextlib.redirect_stdout(sys.stderr):
+        benchmarks.append(document('build', {'repeat': repeat}, bench_build.run(repeat=repeat)))
+        benchmarks.append(document('build_with_latency', {'llm_latency': 0.05, 'tool_latency': 0.05, 'repeat': 1},
+                                   bench_build.run(llm_latency=0.05, tool_latency=0.05, repeat=1)))
+        benchmarks.append(document('context_compression', {'repeat': repeat},
+                                   bench_context_compression.run(repeat=repeat)))
+        knowledge_sizes = [1000] if args.quick else [1000, 10000]
+        benchmarks.append(document('knowledge_index', {'sizes': knowledge_sizes},
+                                   bench_knowledge_index.run(knowledge_sizes)))
+    print("build done")
+    benchmarks.append(document('file_manager', {'revisions': revisions}, bench_file_manager.run(revisions)))
+    print("file_manager done")
+    benchmarks.append(document('config_validator', {'sizes': sizes}, bench_config_validator.run(sizes)))
+    print("config_validator done")
+    benchmarks.append(document('version_store', {'revisions': revisions[-1]},
+                               bench_version_store.run(revisions[-1])))
+    print("version_store done")
+    calls = 100 if args.quick else 200
+    benchmarks.append(document('rate_limiter', {'quota': 100, 'calls': calls},
+                               bench_rate_limiter.run(quota=100, calls=calls)))
+    print("rate_limiter done")
+    benchmarks.append(document('asset_optimizer', {'sites': 8, 'scale': 20},
+                               bench_asset_optimizer.run(sites=8, scale=20)))
+    print("asset_optimizer done")
+    pages = [1000] if args.quick else [1000, 10000]
+    benchmarks.append(document('template_engine', {'pages': pages}, bench_template_engine.run(pages)))
+    print("template_engine done")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'suite': 'website_builder', 'environment': environment(), 'benchmarks': benchmarks}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
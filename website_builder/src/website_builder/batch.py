@@ -0,0 +1,255 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, TextIO
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+
+
+@dataclass
+class BatchJob:
+    """A single topic to build in a batch run."""
+
+    topic: str
+    slug: str
+
+
+@dataclass
+class BatchResult:
+    """Outcome of building one topic."""
+
+    topic: str
+    slug: str
+    output_dir: str
+    status: str
+    seconds: float
+    error: Optional[str] = None
+
+
+def slugify(topic: str) -> str:
+    """
+    Turn a topic into a directory-safe name.
+
+    Args:
+        topic (str): Website topic
+
+    Returns:
+        str: Lowercase slug of letters, digits and dashes
+    """
+    slug = re.sub(r'[^a-z0-9]+', '-', topic.lower()).strip('-')
+    return slug[:80] or 'site'
+
+
+def read_topics(stream: TextIO) -> List[BatchJob]:
+    """
+    Read batch topics, one per line.
+
+    Lines starting with ``{`` are parsed as JSON objects with a ``topic`` key
+    and an optional ``slug``; any other non-blank line is a topic. Lines
+    starting with ``#`` are ignored. Slugs are made unique within the batch.
+
+    Args:
+        stream (TextIO): Text stream to read from
+
+    Returns:
+        List[BatchJob]: Jobs in input order
+
+    Raises:
+        ValueError: If a JSON line is invalid or has no topic
+    """
+    jobs = []
+    seen = set()
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        if line.startswith('{'):
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Line {line_number}: invalid JSON: {str(e)}")
+            topic = record.get('topic')
+            if not isinstance(topic, str) or not topic.strip():
+                raise ValueError(f"Line {line_number}: JSON record must have a non-empty 'topic'")
+            slug = slugify(record.get('slug') or topic)
+        else:
+            topic = line
+            slug = slugify(topic)
+
+        unique, n = slug, 2
+        while unique in seen:
+            unique = f"{slug}-{n}"
+            n += 1
+        seen.add(unique)
+        jobs.append(BatchJob(topic=topic.strip(), slug=unique))
+    return jobs
+
+
+class BatchJournal:
+    """
+    Append-only log of finished topics in a batch output directory.
+
+    Each finished topic is appended as a JSON line and synced to disk, so
+    after a crash a batch can be restarted and skip the topics that were
+    already built.
+    """
+
+    FILENAME = 'batch_journal.jsonl'
+
+    def __init__(self, output_root: str):
+        """
+        Initialize the BatchJournal.
+
+        Args:
+            output_root (str): Directory under which the batch builds its topics
+        """
+        self.path = Path(output_root) / self.FILENAME
+        self._lock = threading.Lock()
+
+    def completed(self) -> Dict[str, dict]:
+        """
+        Find the topics whose latest build succeeded.
+
+        Returns:
+            Dict[str, dict]: Slug to the journal record of its successful build
+        """
+        latest: Dict[str, dict] = {}
+        if not self.path.exists():
+            return latest
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line may be torn by a crash
+                    continue
+                if isinstance(record, dict) and 'slug' in record:
+                    latest[record['slug']] = record
+        return {slug: record for slug, record in latest.items() if record.get('status') == 'ok'}
+
+    def record(self, result: BatchResult) -> None:
+        """
+        Append the outcome of one topic.
+
+        Args:
+            result (BatchResult): The finished topic
+        """
+        line = json.dumps({**asdict(result), 'finished_at': datetime.now().isoformat()}) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a+b') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell():
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        # Start after a line torn by a crash
+                        line = "\n" + line
+                f.write(line.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def run_batch(jobs: Iterable[BatchJob], build: Callable[[BatchJob, Path], object],
+              output_root: str, workers: int = 4,
+              on_result: Optional[Callable[[BatchResult], None]] = None) -> List[BatchResult]:
+    """
+    Build many topics on a pool of worker threads.
+
+    A failing topic is recorded and does not stop the rest of the batch.
+
+    Args:
+        jobs (Iterable[BatchJob]): Topics to build
+        build (Callable[[BatchJob, Path], object]): Builds one topic into the given output directory
+        output_root (str): Directory under which each topic gets its own subdirectory
+        workers (int): Number of topics built at the same time
+        on_result (Optional[Callable[[BatchResult], None]]): Called as each topic finishes
+
+    Returns:
+        List[BatchResult]: Results in input order
+    """
+    root = Path(output_root)
+
+    def build_one(job: BatchJob) -> BatchResult:
+        output_dir = root / job.slug
+        start = time.perf_counter()
+        try:
+            build(job, output_dir)
+            result = BatchResult(job.topic, job.slug, str(output_dir), 'ok', time.perf_counter() - start)
+        except Exception as e:
+            result = BatchResult(job.topic, job.slug, str(output_dir), 'error',
+                                 time.perf_counter() - start, error=str(e))
+        if on_result:
+            on_result(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(build_one, jobs))
+
+
+async def async_batch(jobs: Iterable[BatchJob], build: Callable[[BatchJob, Path], Awaitable[object]],
+                      output_root: str, concurrency: int = 16,
+                      on_result: Optional[Callable[[BatchResult], None]] = None) -> List[BatchResult]:
+    """
+    Build many topics concurrently on the running event loop.
+
+    At most ``concurrency`` builds are in flight at once. A failing topic is
+    recorded and does not stop the rest of the batch.
+
+    Args:
+        jobs (Iterable[BatchJob]): Topics to build
+        build (Callable[[BatchJob, Path], Awaitable[object]]): Coroutine function building
+            one topic into the given output directory
+        output_root (str): Directory under which each topic gets its own subdirectory
+        concurrency (int): Maximum number of builds in flight
+        on_result (Optional[Callable[[BatchResult], None]]): Called as each topic finishes
+
+    Returns:
+        List[BatchResult]: Results in input order
+    """
+    root = Path(output_root)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def build_one(job: BatchJob) -> BatchResult:
+        output_dir = root / job.slug
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await build(job, output_dir)
+                result = BatchResult(job.topic, job.slug, str(output_dir), 'ok', time.perf_counter() - start)
+            except Exception as e:
+                result = BatchResult(job.topic, job.slug, str(output_dir), 'error',
+                                     time.perf_counter() - start, error=str(e))
+        if on_result:
+            on_result(result)
+        return result
+
+    return list(await asyncio.gather(*(build_one(job) for job in jobs)))
+
+
+def format_summary(results: List[BatchResult]) -> str:
+    """
+    Format a per-topic summary table of a batch run.
+
+    Args:
+        results (List[BatchResult]): Batch results
+
+    Returns:
+        str: Human-readable summary
+    """
+    lines = [f"{'status':<7} {'seconds':>8}  topic"]
+    for result in results:
+        line = f"{result.status:<7} {result.seconds:>8.2f}  {result.topic}"
+        if result.error:
+            line += f"  ({result.error})"
+        lines.append(line)
+
+    succeeded = sum(1 for r in results if r.status == 'ok')
+    total_seconds = sum(r.seconds for r in results)
+    lines.append(f"{succeeded}/{len(results)} topics built, {total_seconds:.2f}s of build time")
+    return "\n".join(lines)
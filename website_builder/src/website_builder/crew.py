@@ -1,5 +1,6 @@
 from crewai import Agent, Crew, Process, Task, LLM
 from crewai.project import CrewBase, agent, crew, task
+from crewai.tools import BaseTool
 from crewai_tools import (
     DirectoryReadTool,
     FileReadTool,
@@ -8,46 +9,248 @@ from crewai_tools import (
 )
 from pathlib import Path
 from website_builder.utils.file_manager import FileManager
-from website_builder.utils.config_validator import ConfigValidator
-import yaml
+from website_builder.utils.config_compiler import ConfigCompiler
+from website_builder.utils.task_graph import TaskGraph
+from website_builder.utils.response_cache import ResponseCache
+from website_builder.utils.build_manifest import BuildManifest
+from website_builder.utils.checkpoint import CheckpointStore
+from website_builder.utils.metrics import current_metrics, estimate_tokens
+from website_builder.utils.streaming import StreamingOutput
+from website_builder.utils.rate_limiter import ProviderLimits, build_rate_limiters, load_rate_limits
+from website_builder.utils.template_engine import TemplateEngine
+from website_builder.utils.context_compressor import ContextBudget, ContextCompressor
+from website_builder.utils.vector_index import VectorIndex
+from website_builder.pages import (
+    MultiPageConfig, PageTemplateConfig, SitemapPage, parse_page_content, parse_sitemap, render_page
+)
+from website_builder.llm import (
+    enable_metrics, enable_rate_limit, enable_response_cache, install_stream_listener, sampling_params
+)
+from website_builder.tools.cached_tool import CachedTool
+from website_builder.tools.indexed_search_tool import IndexedSearchTool
+from website_builder.tools.instrumented_tool import InstrumentedTool
+from website_builder.tools.lazy_tool import LazyTool
+from website_builder.tools.rate_limited_tool import RateLimitedTool
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Optional, Tuple
+import contextlib
+import contextvars
+import asyncio
+import functools
 import os
+import threading
+
+# Bytes between progress lines while an output file is streamed
+STREAM_PROGRESS_BYTES = 16 * 1024
+
+class BuilderResources:
+    """
+    Configuration and clients shared by every WebsiteBuilder in a process.
+
+    Parsing and validating the YAML configs and constructing the search tools
+    and LLM client happen once here instead of once per topic.
+    """
+
+    # Freshness windows of cached research results, in seconds
+    SEARCH_RESULTS_TTL = 24 * 3600
+    NEWS_RESULTS_TTL = 3600
+    WEBSITE_SEARCH_TTL = 7 * 24 * 3600
+
+    # Sections of rate_limits.yaml applying to each client
+    LLM_PROVIDER = 'gemini'
+    SEARCH_PROVIDER = 'serper'
+    WEBSITE_SEARCH_PROVIDER = 'website_search'
+
+    # Task given notes from the knowledge index, and whose output is added to it
+    RESEARCH_TASK = 'research_task'
+    # Indexed chunks given to the research task as notes
+    KNOWLEDGE_NOTES = 8
+
+    def __init__(self, config_dir: Optional[str] = None, cache_dir: Optional[str] = None,
+                 research_cache_path: Optional[str] = None, llm: Optional[LLM] = None,
+                 search_tool: Optional[BaseTool] = None, web_tool: Optional[BaseTool] = None,
+                 config_cache_dir: Optional[str] = None, stream: bool = False,
+                 rate_limits: Optional[Dict[str, ProviderLimits]] = None, rate_limit_dir: Optional[str] = None,
+                 knowledge_index_path: Optional[str] = None, knowledge_dir: Optional[str] = None,
+                 embedder: Any = None):
+        """
+        Load and validate the agent and task configurations.
+
+        Args:
+            config_dir (Optional[str]): Directory containing agents.yaml and tasks.yaml.
+                If None, uses the package's config directory.
+            cache_dir (Optional[str]): Directory for the LLM response cache. If None, caching is off.
+            research_cache_path (Optional[str]): SQLite file caching the researcher's search
+                results across topics and runs. If None, searches are not cached.
+            llm (Optional[LLM]): LLM to use instead of the configured Gemini client
+            search_tool (Optional[BaseTool]): Tool to use instead of SerperDevTool
+            web_tool (Optional[BaseTool]): Tool to use instead of WebsiteSearchTool
+            config_cache_dir (Optional[str]): Directory for compiled configs, so other
+                processes can skip parsing and validation. If None, they are cached in memory only.
+            stream (bool): Stream LLM tokens, so pipeline builds write output files incrementally
+            rate_limits (Optional[Dict[str, ProviderLimits]]): Quota of each provider. If None,
+                read from rate_limits.yaml in the config directory when it exists.
+            rate_limit_dir (Optional[str]): Directory for sharing the quotas with other
+                processes. If None, they are shared by the builders of this process.
+            knowledge_index_path (Optional[str]): SQLite file of the local knowledge index. If set,
+                searches are answered from it where it covers them and research outputs are added
+                to it. If None, every search goes to the search tool.
+            knowledge_dir (Optional[str]): Directory of notes (e.g. knowledge/) kept in the index
+            embedder: Embedder of the knowledge index; a HashingEmbedder if None
+
+        Raises:
+            ValueError: If the configuration is invalid
+            IOError: If the rate limit, page template, multi-page or context budget configuration
+                cannot be read
+        """
+        config_dir = Path(config_dir) if config_dir else Path(__file__).parent / 'config'
+        self.agents_config_path = str(config_dir / 'agents.yaml')
+        self.tasks_config_path = str(config_dir / 'tasks.yaml')
+
+        self.config = ConfigCompiler.shared().compile(
+            self.agents_config_path, self.tasks_config_path, cache_dir=config_cache_dir)
+        self.agents_config = self.config.agents_config
+        self.tasks_config = self.config.tasks_config
+
+        self.file_tool = FileReadTool()
+        # The search tools are only constructed if an agent actually calls them.
+        self.search_tool = search_tool if search_tool is not None else LazyTool.of(SerperDevTool)
+        self.web_tool = web_tool if web_tool is not None else LazyTool.of(WebsiteSearchTool)
+
+        if rate_limits is None:
+            rate_limits_path = config_dir / 'rate_limits.yaml'
+            rate_limits = load_rate_limits(str(rate_limits_path)) if rate_limits_path.exists() else {}
+        self.rate_limiters = build_rate_limiters(rate_limits, rate_limit_dir)
+
+        page_template_path = config_dir / 'page_template.yaml'
+        self.page_template = PageTemplateConfig.load(str(page_template_path)) if page_template_path.exists() else None
+        self.template_engine = TemplateEngine.shared()
+        multipage_path = config_dir / 'multipage.yaml'
+        self.multipage = MultiPageConfig.load(str(multipage_path)) if multipage_path.exists() else None
+        context_budget_path = config_dir / 'context_budget.yaml'
+        self.context_budget = ContextBudget.load(str(context_budget_path)) if context_budget_path.exists() else None
+        # Inside the research cache, so cached results do not use the quota
+        if self.SEARCH_PROVIDER in self.rate_limiters:
+            self.search_tool = RateLimitedTool.wrap(self.search_tool, self.rate_limiters[self.SEARCH_PROVIDER])
+        if self.WEBSITE_SEARCH_PROVIDER in self.rate_limiters:
+            self.web_tool = RateLimitedTool.wrap(self.web_tool, self.rate_limiters[self.WEBSITE_SEARCH_PROVIDER])
+
+        self.research_cache = None
+        if research_cache_path:
+            self.research_cache = ResponseCache(research_cache_path)
+            self.search_tool = CachedTool.wrap(self.search_tool, self.research_cache, ttl=self._search_ttl)
+            self.web_tool = CachedTool.wrap(self.web_tool, self.research_cache, ttl=self.WEBSITE_SEARCH_TTL)
+
+        # Outside the research cache and quota: queries the index covers never reach them
+        self.knowledge_index = None
+        self.knowledge_search = None
+        if knowledge_index_path:
+            self.knowledge_index = VectorIndex(knowledge_index_path, embedder)
+            if knowledge_dir and Path(knowledge_dir).is_dir():
+                self.knowledge_index.sync_directory(knowledge_dir)
+            self.knowledge_search = IndexedSearchTool.wrap(self.search_tool, self.knowledge_index,
+                                                           max_age=self._search_ttl)
+            self.search_tool = self.knowledge_search
+
+        self.file_tool = InstrumentedTool.wrap(self.file_tool)
+        self.search_tool = InstrumentedTool.wrap(self.search_tool)
+        self.web_tool = InstrumentedTool.wrap(self.web_tool)
+
+        self.response_cache = None
+        if cache_dir:
+            self.response_cache = ResponseCache(str(Path(cache_dir) / 'llm_responses.sqlite3'))
+
+        self.stream = stream
+        self._llm = None
+        self._llm_override = llm
+        self._llm_lock = threading.Lock()
+
+    @classmethod
+    def _search_ttl(cls, arguments: Dict) -> float:
+        """News results go stale faster than general web results."""
+        if arguments.get('search_type') == 'news':
+            return cls.NEWS_RESULTS_TTL
+        return cls.SEARCH_RESULTS_TTL
+
+    def llm(self) -> LLM:
+        """Return the shared Gemini LLM, creating it on first use."""
+        with self._llm_lock:
+            if self._llm is None:
+                llm = self._llm_override if self._llm_override is not None else build_llm()
+                if self.stream:
+                    llm.stream = True
+                    install_stream_listener()
+                if self.LLM_PROVIDER in self.rate_limiters:
+                    enable_rate_limit(llm, self.rate_limiters[self.LLM_PROVIDER])
+                if self.response_cache is not None:
+                    enable_response_cache(llm, self.response_cache)
+                self._llm = enable_metrics(llm)
+            return self._llm
+
+
+def build_llm() -> LLM:
+    """
+    Create the Gemini LLM used by all agents.
+
+    Returns:
+        LLM: The configured LLM
+
+    Raises:
+        ValueError: If the LLM cannot be configured
+    """
+    try:
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY environment variable is not set")
+        
+        return LLM(
+            model="gemini-pro",
+            api_key=api_key,
+            provider="google",
+            temperature=0.7,
+            max_tokens=4000
+        )
+    except Exception as e:
+        raise ValueError(f"Failed to configure LLM: {str(e)}")
+
 
 @CrewBase
 class WebsiteBuilder():
     """WebsiteBuilder crew for creating complete websites with multiple specialized agents"""
 
-    def __init__(self, topic: str = None):
+    def __init__(self, topic: str = None, output_dir: Optional[str] = None,
+                 resources: Optional[BuilderResources] = None):
         if not topic:
             raise ValueError("Topic is required. Please provide a topic for the website.")
             
-        config_dir = Path(__file__).parent / 'config'
-        self.agents_config_path = str(config_dir / 'agents.yaml')
-        self.tasks_config_path = str(config_dir / 'tasks.yaml')
-        
-        with open(self.agents_config_path, 'r') as f:
-            self.agents_config = yaml.safe_load(f)
-        with open(self.tasks_config_path, 'r') as f:
-            self.tasks_config = yaml.safe_load(f)
+        self.resources = resources or BuilderResources()
+        self.agents_config_path = self.resources.agents_config_path
+        self.tasks_config_path = self.resources.tasks_config_path
         
-        self.file_manager = FileManager()
-        self.docs_tool = DirectoryReadTool(directory=str(self.file_manager.output_dir))
-        self.file_tool = FileReadTool()
-        self.search_tool = SerperDevTool()
-        self.web_tool = WebsiteSearchTool()
+        self.file_manager = FileManager(output_dir)
+        self.docs_tool = InstrumentedTool.wrap(DirectoryReadTool(directory=str(self.file_manager.output_dir)))
+        self.file_tool = self.resources.file_tool
+        self.search_tool = self.resources.search_tool
+        self.web_tool = self.resources.web_tool
         
         self.topic = topic
-        
-        for agent_name, agent_config in self.agents_config.items():
-            for key, value in agent_config.items():
-                if isinstance(value, str):
-                    agent_config[key] = value.format(topic=self.topic)
-        
-        for task_name, task_config in self.tasks_config.items():
-            for key, value in task_config.items():
-                if isinstance(value, str):
-                    task_config[key] = value.format(topic=self.topic)
-        
-        ConfigValidator.validate_configs(self.agents_config_path, self.tasks_config_path)
+        self.config = self.resources.config
+        self.agents_config, self.tasks_config = self.config.render(topic=self.topic)
+
+        # CrewBase reloads agents_config/tasks_config after __init__ and replaces
+        # agent and context names with objects; keep the name-based copies.
+        self.agent_specs, self.task_specs = self.config.render(topic=self.topic)
+
+        # Serve that reload from the compiled config instead of re-reading the YAML files.
+        self.load_configurations = self._load_rendered_configurations
+
+    def _load_rendered_configurations(self) -> None:
+        """Render the compiled configs for this topic in place of CrewBase's YAML loading."""
+        self.agents_config, self.tasks_config = self.config.render(topic=self.topic)
+
+    def close(self) -> None:
+        """Release the files held open by the builder's file manager."""
+        self.file_manager.close()
 
     def save_file(self, content: str, filename: str):
         """Save content to a file in the output directory."""
@@ -55,12 +258,8 @@ class WebsiteBuilder():
 
     @agent
     def web_researcher(self) -> Agent:
-        config = self.agents_config['web_researcher'].copy()
-        config['role'] = config['role'].format(topic=self.topic)
-        config['goal'] = config['goal'].format(topic=self.topic)
-        config['backstory'] = config['backstory'].format(topic=self.topic)
         return Agent(
-            config=config,
+            config=self.agents_config['web_researcher'].copy(),
             verbose=True,
             tools=[self.search_tool, self.web_tool],
             context=[f"Topic: {self.topic}"]
@@ -68,12 +267,8 @@ class WebsiteBuilder():
 
     @agent
     def html_creator(self) -> Agent:
-        config = self.agents_config['html_creator'].copy()
-        config['role'] = config['role'].format(topic=self.topic)
-        config['goal'] = config['goal'].format(topic=self.topic)
-        config['backstory'] = config['backstory'].format(topic=self.topic)
         return Agent(
-            config=config,
+            config=self.agents_config['html_creator'].copy(),
             verbose=True,
             tools=[self.file_tool, self.docs_tool],
             context=[f"Topic: {self.topic}"]
@@ -81,12 +276,8 @@ class WebsiteBuilder():
 
     @agent
     def css_designer(self) -> Agent:
-        config = self.agents_config['css_designer'].copy()
-        config['role'] = config['role'].format(topic=self.topic)
-        config['goal'] = config['goal'].format(topic=self.topic)
-        config['backstory'] = config['backstory'].format(topic=self.topic)
         return Agent(
-            config=config,
+            config=self.agents_config['css_designer'].copy(),
             verbose=True,
             tools=[self.file_tool],
             context=[f"Topic: {self.topic}"]
@@ -94,12 +285,8 @@ class WebsiteBuilder():
 
     @agent
     def js_developer(self) -> Agent:
-        config = self.agents_config['js_developer'].copy()
-        config['role'] = config['role'].format(topic=self.topic)
-        config['goal'] = config['goal'].format(topic=self.topic)
-        config['backstory'] = config['backstory'].format(topic=self.topic)
         return Agent(
-            config=config,
+            config=self.agents_config['js_developer'].copy(),
             verbose=True,
             tools=[self.file_tool],
             context=[f"Topic: {self.topic}"]
@@ -108,8 +295,6 @@ class WebsiteBuilder():
     @task
     def research_task(self) -> Task:
         task_config = self.tasks_config['research_task']
-        task_config['description'] = task_config['description'].format(topic=self.topic)
-        task_config['expected_output'] = task_config['expected_output'].format(topic=self.topic)
         return Task(
             description=task_config['description'],
             expected_output=task_config['expected_output'],
@@ -121,8 +306,6 @@ class WebsiteBuilder():
     @task
     def html_creation_task(self) -> Task:
         task_config = self.tasks_config['html_creation_task']
-        task_config['description'] = task_config['description'].format(topic=self.topic)
-        task_config['expected_output'] = task_config['expected_output'].format(topic=self.topic)
         return Task(
             description=task_config['description'],
             expected_output=task_config['expected_output'],
@@ -135,8 +318,6 @@ class WebsiteBuilder():
     @task
     def css_design_task(self) -> Task:
         task_config = self.tasks_config['css_design_task']
-        task_config['description'] = task_config['description'].format(topic=self.topic)
-        task_config['expected_output'] = task_config['expected_output'].format(topic=self.topic)
         return Task(
             description=task_config['description'],
             expected_output=task_config['expected_output'],
@@ -149,8 +330,6 @@ class WebsiteBuilder():
     @task
     def js_development_task(self) -> Task:
         task_config = self.tasks_config['js_development_task']
-        task_config['description'] = task_config['description'].format(topic=self.topic)
-        task_config['expected_output'] = task_config['expected_output'].format(topic=self.topic)
         return Task(
             description=task_config['description'],
             expected_output=task_config['expected_output'],
@@ -160,23 +339,354 @@ class WebsiteBuilder():
             output_file='output/script.js'
         )
 
+    def _build_llm(self) -> LLM:
+        """Return the LLM shared by all agents."""
+        return self.resources.llm()
+
+    def _pipeline_agent(self, agent_name: str, llm: LLM) -> Agent:
+        """
+        Create a fresh agent for one pipeline task.
+
+        Every task gets its own agent instance so sibling tasks can run
+        concurrently. Agents without an @agent method get no tools.
+        """
+        template = getattr(self, agent_name, None)
+        tools = template().tools if callable(template) else []
+        return Agent(
+            config=self.agent_specs[agent_name],
+            verbose=True,
+            tools=tools,
+            llm=llm
+        )
+
+    def _output_filename(self, task_name: str, task_config: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Map a task's configured output_file to a path relative to the FileManager output dir."""
+        output_file = (task_config or self.task_specs[task_name]).get('output_file')
+        if not output_file:
+            return None
+        return output_file[len('output/'):] if output_file.startswith('output/') else output_file
+
+    def run_pipeline(self, max_workers: Optional[int] = None, incremental: bool = False,
+                     resume: bool = False, template: bool = False, pages: bool = False,
+                     compress_context: bool = False) -> Dict[str, str]:
+        """
+        Run the tasks declared in tasks.yaml as a dependency graph.
+
+        Tasks whose dependencies have all finished run concurrently on a pool
+        of at most ``max_workers`` threads. Each task receives the outputs of
+        the tasks named in its ``context`` and its output is written through
+        the FileManager inside one transaction: the output files of the build
+        are staged and only moved into place, together, once every task has
+        finished, so readers never see a half-written site and a failed
+        build leaves the previous one intact.
+
+        In incremental mode each task's inputs (formatted description and
+        expected output, agent config, upstream context and model settings)
+        are fingerprinted. A task whose fingerprint matches the last run
+        reuses its existing output file instead of calling the LLM.
+
+        Every completed task is checkpointed under ``.checkpoints/`` with its
+        raw output and input fingerprint. With ``resume``, tasks whose
+        checkpoint matches their current inputs are skipped, so a run that
+        was interrupted continues after the last completed task; a missing
+        output file, or one left over from an earlier build, is restored from
+        its checkpoint.
+
+        When a RunMetrics collector is active, each task is timed as a stage
+        of its own.
+
+        If the resources stream, each output file is written incrementally
+        to ``<file>.partial`` as the final answer arrives and the partial
+        file is discarded when its task completes.
+
+        With ``template``, the task named in page_template.yaml only writes
+        the page's structured content (title, description, sections) as
+        JSON, and its output file is rendered from the site template, so
+        the LLM no longer writes the page skeleton. Downstream tasks receive
+        the rendered page.
+
+        With ``pages``, the site has a page per entry of a sitemap, following
+        multipage.yaml: a sitemap task plans the pages from the research,
+        then one task per page writes ``html/<slug>.html`` in place of the
+        single-page HTML task, while the CSS and JS are written once for all
+        pages from the sitemap. The page tasks and the shared tasks all run
+        at once, so the build takes as long as its slowest page rather than
+        the sum of its pages. Combined with ``template``, every page is
+        rendered from the site template, with navigation between the pages.
+
+        With a knowledge index in the resources, the research task first
+        receives what the index holds on the topic as notes, its searches
+        are answered from the index where it covers them, and its output is
+        added to the index once the build is committed.
+
+        With ``compress_context``, each task receives digests of its upstream
+        outputs within its token budget from context_budget.yaml instead of
+        the outputs in full: the facts of the research most relevant to the
+        task, the outline of pages and the inventory of stylesheets. Each
+        output is digested once, however many tasks receive it, and the
+        tokens sent and saved are reported for every task.
+
+        Args:
+            max_workers (Optional[int]): Maximum number of tasks running at the same time;
+                if None, one, or in multi-page mode every page at once
+            incremental (bool): Reuse outputs of tasks whose inputs are unchanged
+            resume (bool): Skip tasks completed by an earlier, interrupted run
+            template (bool): Render the page from the site template and LLM-written content
+            pages (bool): Build a multi-page site from a sitemap
+            compress_context (bool): Give tasks digests of their upstream outputs within a token budget
+
+        Returns:
+            Dict[str, str]: Raw output of each task
+
+        Raises:
+            ValueError: If the task dependencies contain a cycle, the LLM cannot be configured,
+                template, multi-page or compressed-context builds are not configured, or the
+                LLM's page content or sitemap is invalid
+        """
+        specs = dict(self.task_specs)
+        site_plan = self.resources.multipage if pages else None
+        if pages:
+            if site_plan is None:
+                raise ValueError("Multi-page builds need a multipage.yaml in the config directory")
+            for name in (site_plan.replaces, *site_plan.shared_context):
+                if name not in specs:
+                    raise ValueError(f"multipage.yaml names unknown task '{name}'")
+            for agent_name in (site_plan.sitemap_task['agent'], site_plan.page_task['agent']):
+                if agent_name not in self.agent_specs:
+                    raise ValueError(f"multipage.yaml names unknown agent '{agent_name}'")
+            del specs[site_plan.replaces]
+            specs[MultiPageConfig.SITEMAP_TASK] = site_plan.sitemap_spec(self.topic)
+            specs.update(site_plan.shared_specs(self.task_specs, self.topic))
+        graph = TaskGraph.from_tasks_config(specs)
+        graph.topological_order()
+        page_template = self.resources.page_template if template else None
+        if template:
+            if page_template is None:
+                raise ValueError("Template builds need a page_template.yaml in the config directory")
+            if not pages and page_template.task not in specs:
+                raise ValueError(f"page_template.yaml names unknown task '{page_template.task}'")
+            template_digest = page_template.template_digest(self.resources.template_engine)
+        compressor = None
+        if compress_context:
+            if self.resources.context_budget is None:
+                raise ValueError("Compressed-context builds need a context_budget.yaml in the config directory")
+            compressor = ContextCompressor(self.resources.context_budget)
+        # Page of each page task, once the sitemap is known
+        site_pages: Dict[str, SitemapPage] = {}
+        llm = self._build_llm()
+        manifest = BuildManifest(self.file_manager.output_dir)
+        checkpoints = CheckpointStore(self.file_manager.output_dir)
+        if resume:
+            completed = checkpoints.completed()
+            if completed:
+                print(f"Resuming: checkpoints found for {', '.join(completed)}")
+        model_settings = {'model': getattr(llm, 'model', None), **sampling_params(llm)}
+        metrics = current_metrics()
+        # Manifest entries are only valid once the files they describe are committed
+        produced: Dict[str, Tuple[str, Optional[str]]] = {}
+
+        def execute(task_name: str, upstream: Dict[str, str]) -> str:
+            # Worker threads do not inherit the caller's context, so re-activate the collector.
+            with metrics.stage(task_name) if metrics is not None else contextlib.nullcontext():
+                return execute_task(task_name, upstream)
+
+        def execute_task(task_name: str, upstream: Dict[str, str]) -> str:
+            task_config = specs[task_name]
+            page = site_pages.get(task_name)
+            templated = page_template is not None and (page is not None if pages else task_name == page_template.task)
+            if templated:
+                prompt = page_template.prompt(self.topic)
+                if page is not None:
+                    prompt['description'] = f"{prompt['description']}\n\n{task_config['brief']}"
+                task_config = {**task_config, **prompt}
+            upstream_names = [name for name in task_config.get('context') or [] if name in upstream]
+            if compressor is not None and upstream_names:
+                compressed = compressor.compress(
+                    task_name, f"{task_config['description']}\n{task_config['expected_output']}",
+                    [(self._output_filename(name, specs[name]) or name, upstream[name]) for name in upstream_names])
+                context = compressed.text
+                if metrics is not None:
+                    metrics.record_context(task_name, compressed.tokens, compressed.saved_tokens, compressed.seconds)
+                if compressed.saved_tokens:
+                    print(f"Compressed context of {task_name}: {compressed.original_tokens} -> "
+                          f"{compressed.tokens} tokens ({compressed.seconds * 1000:.1f} ms)")
+            else:
+                context = "\n\n----------\n\n".join(upstream[name] for name in upstream_names)
+                if metrics is not None and upstream_names:
+                    metrics.record_context(task_name, estimate_tokens(context), 0, 0.0)
+            filename = self._output_filename(task_name, task_config)
+            fingerprint = BuildManifest.fingerprint(
+                task_config['description'],
+                task_config['expected_output'],
+                self.agent_specs[task_config['agent']],
+                context,
+                model_settings,
+                *([template_digest] if templated else [])
+            )
+            if incremental and filename and manifest.lookup(task_name, fingerprint) \
+                    and self.file_manager.file_exists(filename):
+                print(f"Reusing {filename} for {task_name}: inputs unchanged")
+                return self.file_manager.read_file(filename)
+            checkpoint = checkpoints.lookup(task_name, fingerprint) if resume else None
+            if checkpoint is not None:
+                print(f"Skipping {task_name}: completed at {checkpoint['completed_at']}")
+                if filename and (not self.file_manager.file_exists(filename)
+                                 or self.file_manager.read_file(filename) != checkpoint['output']):
+                    self.save_file(checkpoint['output'], filename)
+                produced[task_name] = (fingerprint, filename)
+                return checkpoint['output']
+            # Knowledge notes are left out of the fingerprint: the index grows with every build
+            # and search, so they would change the research's inputs on almost every run
+            if self.resources.knowledge_index is not None and task_name == self.resources.RESEARCH_TASK:
+                notes = self._knowledge_notes()
+                if notes:
+                    context = f"{notes}\n\n----------\n\n{context}" if context else notes
+
+            agent = self._pipeline_agent(task_config['agent'], llm)
+            pipeline_task = Task(
+                description=task_config['description'],
+                expected_output=task_config['expected_output'],
+                agent=agent
+            )
+            if filename and self.resources.stream and not templated:
+                output_stream = self.file_manager.open_stream(filename, on_progress=self._stream_progress(filename))
+                try:
+                    with output_stream.activate():
+                        output = pipeline_task.execute_sync(agent=agent, context=context or None).raw
+                except BaseException:
+                    output_stream.abort()
+                    raise
+                self.file_manager.commit_stream(filename, output_stream, output)
+            else:
+                output = pipeline_task.execute_sync(agent=agent, context=context or None).raw
+                if templated:
+                    output = render_page(parse_page_content(output), self.topic, page_template.template,
+                                         engine=self.resources.template_engine,
+                                         site_pages=list(site_pages.values()) if page is not None else None,
+                                         current=page.slug if page is not None else None)
+                if filename:
+                    self.save_file(output, filename)
+            checkpoints.save(task_name, fingerprint, output, filename)
+            produced[task_name] = (fingerprint, filename)
+            return output
+
+        # Streamed files are renamed into place as each task finishes, so a streaming
+        # build does not hold its files back for one commit at the end
+        with self.file_manager.transaction() if not self.resources.stream else contextlib.nullcontext():
+            if site_plan is None:
+                outputs = graph.run(execute, max_workers=max_workers or 1)
+            else:
+                outputs = self._run_pages(graph, specs, site_plan, site_pages, execute, max_workers)
+        manifest.record_many(produced)
+        index = self.resources.knowledge_index
+        if index is not None and self.resources.RESEARCH_TASK in outputs:
+            index.upsert(self._research_source(), outputs[self.resources.RESEARCH_TASK],
+                         title=f"Research: {self.topic}")
+        return outputs
+
+    def _research_source(self) -> str:
+        """Return the path of this build's research output, its source in the knowledge index."""
+        research = self.resources.RESEARCH_TASK
+        filename = (self._output_filename(research) if research in self.task_specs else None) or 'research.md'
+        return str((self.file_manager.output_dir / filename).resolve())
+
+    def _knowledge_notes(self) -> str:
+        """Return what the knowledge index holds on the topic, as notes for the research task."""
+        index = self.resources.knowledge_index
+        hits = [hit for hit in index.search(self.topic, k=self.resources.KNOWLEDGE_NOTES,
+                                            exclude=[self._research_source()])
+                if hit.score >= index.min_score]
+        if not hits:
+            return ''
+        print(f"Knowledge index: {len(hits)} notes on '{self.topic}' for {self.resources.RESEARCH_TASK}")
+        notes = "\n\n".join(f"[{hit.title}]\n{hit.text}" for hit in hits)
+        return (f"Notes on {self.topic} already in the local knowledge index, from knowledge files, earlier "
+                f"research and searches. Build on them and search only for what they do not cover:\n\n{notes}")
+
+    def _run_pages(self, graph: TaskGraph, specs: Dict[str, Dict[str, Any]], site_plan: MultiPageConfig,
+                   site_pages: Dict[str, SitemapPage], execute: Callable[[str, Dict[str, str]], str],
+                   max_workers: Optional[int]) -> Dict[str, str]:
+        """
+        Run a multi-page build: the sitemap and its inputs first, then every page and shared task.
+
+        ``specs`` and ``site_pages`` are filled in with the page tasks once
+        the sitemap is known.
+        """
+        sitemap_task = MultiPageConfig.SITEMAP_TASK
+        first = graph.ancestors(sitemap_task) | {sitemap_task}
+        outputs = TaskGraph({name: graph.dependencies[name] for name in first}).run(
+            execute, max_workers=max_workers or 1)
+
+        pages = parse_sitemap(outputs[sitemap_task], site_plan.max_pages)
+        print(f"Sitemap: {len(pages)} pages ({', '.join(page.slug for page in pages)})")
+        page_specs = site_plan.page_specs(self.topic, pages)
+        specs.update(page_specs)
+        site_pages.update(zip(page_specs, pages))
+
+        # Tasks of the first stage are done; later tasks get their outputs as upstream results
+        dependencies = TaskGraph.from_tasks_config(specs).dependencies
+        rest = TaskGraph({
+            name: [dep for dep in deps if dep not in outputs]
+            for name, deps in dependencies.items() if name not in outputs
+        })
+        outputs.update(rest.run(lambda name, upstream: execute(name, {**outputs, **upstream}),
+                                max_workers=max_workers or len(rest.dependencies)))
+        return outputs
+
+    def _stream_progress(self, filename: str) -> Callable[[StreamingOutput], None]:
+        """Report the first byte and then every STREAM_PROGRESS_BYTES of a streamed file."""
+        reported = {'bytes': None}
+
+        def report(stream: StreamingOutput) -> None:
+            if reported['bytes'] is None:
+                print(f"Streaming {filename}: first byte after {stream.first_byte_seconds:.2f}s")
+                metrics = current_metrics()
+                if metrics is not None:
+                    metrics.record_first_byte(filename, stream.first_byte_seconds)
+            elif stream.bytes_written - reported['bytes'] < STREAM_PROGRESS_BYTES:
+                return
+            else:
+                print(f"Streaming {filename}: {stream.bytes_written / 1024:.1f} KB")
+            reported['bytes'] = stream.bytes_written
+
+        return report
+
+    async def akickoff(self, max_workers: Optional[int] = None, incremental: bool = False,
+                       executor: Optional[Executor] = None, resume: bool = False, template: bool = False,
+                       pages: bool = False, compress_context: bool = False):
+        """
+        Build the website without blocking the event loop.
+
+        Many builders can be awaited concurrently on one loop; each blocking
+        LLM round-trip runs on a worker thread while the loop serves the others.
+
+        Args:
+            max_workers (Optional[int]): If set, run the task graph with this many
+                concurrent tasks (see ``run_pipeline``); otherwise kick off the sequential crew
+            incremental (bool): Reuse outputs of unchanged tasks (task graph mode only)
+            executor (Optional[Executor]): Executor for the blocking work; the loop's default if None
+            resume (bool): Skip tasks completed by an interrupted run (task graph mode only)
+            template (bool): Render the page from the site template (task graph mode only)
+            pages (bool): Build a multi-page site from a sitemap (task graph mode only)
+            compress_context (bool): Give tasks digests of their upstream outputs (task graph mode only)
+
+        Returns:
+            The crew output, or a dict of task outputs when max_workers is set
+        """
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context (e.g. an active RunMetrics) onto the worker threads.
+        context = contextvars.copy_context()
+        if max_workers or incremental or resume or template or pages or compress_context:
+            return await loop.run_in_executor(executor, context.run, functools.partial(
+                self.run_pipeline, max_workers=max_workers, incremental=incremental, resume=resume,
+                template=template, pages=pages, compress_context=compress_context))
+        crew = await loop.run_in_executor(executor, context.run, self.crew)
+        return await loop.run_in_executor(executor, context.run, crew.kickoff)
+
     @crew
     def crew(self) -> Crew:
         """Creates the WebsiteBuilder crew"""
-        try:
-            api_key = os.getenv("GEMINI_API_KEY")
-            if not api_key:
-                raise ValueError("GEMINI_API_KEY environment variable is not set")
-            
-            llm = LLM(
-                model="gemini-pro",
-                api_key=api_key,
-                provider="google",
-                temperature=0.7,
-                max_tokens=4000
-            )
-        except Exception as e:
-            raise ValueError(f"Failed to configure LLM: {str(e)}")
+        llm = self._build_llm()
 
         tasks = [
             self.research_task(),
@@ -185,6 +695,9 @@ class WebsiteBuilder():
             self.js_development_task(),
         ]
 
+        for crew_agent in self.agents:
+            crew_agent.llm = llm
+
         # Ensure output directory exists
         output_dir = Path('output')
         output_dir.mkdir(exist_ok=True)
@@ -0,0 +1,255 @@
+from typing import Any, Dict, Optional
+from website_builder.utils.response_cache import ResponseCache
+from website_builder.utils.metrics import current_metrics, current_stage, estimate_tokens
+from website_builder.utils.streaming import current_stream
+from website_builder.utils.rate_limiter import RateLimiter
+import threading
+import time
+
+_stream_listener_lock = threading.Lock()
+_stream_listener_installed = False
+
+SAMPLING_PARAMS = ('temperature', 'top_p', 'max_tokens', 'seed', 'frequency_penalty', 'presence_penalty', 'n')
+
+
+def sampling_params(llm: Any) -> Dict[str, Any]:
+    """
+    Collect the sampling parameters of an LLM that affect its output.
+
+    Args:
+        llm (Any): LLM instance
+
+    Returns:
+        Dict[str, Any]: Parameter name to value, omitting unset parameters
+    """
+    params = {}
+    for name in SAMPLING_PARAMS:
+        value = getattr(llm, name, None)
+        if value is not None:
+            params[name] = value
+    return params
+
+
+def _caller_identity(kwargs: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Describe the task and agent an LLM call is made for, when crewai passes them."""
+    task = kwargs.get('from_task')
+    agent = kwargs.get('from_agent')
+    return {
+        'task': getattr(task, 'description', None),
+        'expected_output': getattr(task, 'expected_output', None),
+        'role': getattr(agent, 'role', None),
+        'goal': getattr(agent, 'goal', None),
+        'backstory': getattr(agent, 'backstory', None),
+    }
+
+
+def enable_response_cache(llm: Any, cache: ResponseCache) -> Any:
+    """
+    Serve repeated LLM calls from an on-disk response cache.
+
+    The LLM's bound ``call`` method is wrapped in place rather than subclassed,
+    so the provider-specific class crewai chose keeps its own behavior. The
+    cache key covers the model, its sampling parameters and stop words,
+    the full message list (which embeds the formatted task description and
+    the agent's role, goal and backstory) and, when crewai passes them, the
+    calling task and agent. Only plain-text responses are cached; results of
+    tool executions are always recomputed.
+
+    Args:
+        llm (Any): LLM instance whose ``call``/``acall`` methods are replaced
+        cache (ResponseCache): Cache to read from and write to
+
+    Returns:
+        Any: The same LLM instance
+    """
+    call = llm.call
+    acall = getattr(llm, 'acall', None)
+
+    def cache_key(messages: Any, kwargs: Dict[str, Any]) -> str:
+        stop = getattr(llm, 'stop_sequences', None) or getattr(llm, 'stop', None)
+        return cache.make_key(
+            getattr(llm, 'model', None),
+            sampling_params(llm),
+            list(stop or []),
+            messages,
+            _caller_identity(kwargs),
+        )
+
+    def cached_call(messages: Any, *args: Any, **kwargs: Any) -> Any:
+        key = cache_key(messages, kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        result = call(messages, *args, **kwargs)
+        if isinstance(result, str):
+            cache.set(key, result)
+        return result
+
+    llm.call = cached_call
+
+    if acall is not None:
+        async def cached_acall(messages: Any, *args: Any, **kwargs: Any) -> Any:
+            key = cache_key(messages, kwargs)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            result = await acall(messages, *args, **kwargs)
+            if isinstance(result, str):
+                cache.set(key, result)
+            return result
+
+        llm.acall = cached_acall
+
+    return llm
+
+
+def enable_rate_limit(llm: Any, limiter: RateLimiter) -> Any:
+    """
+    Admit LLM calls through a provider's rate limiter and retry them on rate-limit errors.
+
+    Wrap before enabling the cache and metrics, so cache hits do not use the
+    quota and the metrics see one call per request, including its waits and
+    backoff. Each call reserves its estimated prompt tokens up front and is
+    charged for the completion afterwards. Backoff retries are recorded in
+    the active RunMetrics.
+
+    Args:
+        llm (Any): LLM instance whose ``call``/``acall`` methods are replaced
+        limiter (RateLimiter): Limiter of the LLM's provider
+
+    Returns:
+        Any: The same LLM instance
+    """
+    call = llm.call
+    acall = getattr(llm, 'acall', None)
+
+    def on_retry(attempt: int, pause: float, error: Exception) -> None:
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.record_retry(current_stage())
+
+    def charge(result: Any) -> Any:
+        if isinstance(result, str):
+            limiter.charge(estimate_tokens(result))
+        return result
+
+    def limited_call(messages: Any, *args: Any, **kwargs: Any) -> Any:
+        return charge(limiter.run(lambda: call(messages, *args, **kwargs),
+                                  tokens=estimate_tokens(messages), on_retry=on_retry))
+
+    llm.call = limited_call
+
+    if acall is not None:
+        async def limited_acall(messages: Any, *args: Any, **kwargs: Any) -> Any:
+            return charge(await limiter.arun(lambda: acall(messages, *args, **kwargs),
+                                             tokens=estimate_tokens(messages), on_retry=on_retry))
+
+        llm.acall = limited_acall
+
+    return llm
+
+
+def _usage_counts(llm: Any) -> Optional[Dict[str, int]]:
+    """Read the provider-reported cumulative token usage of an LLM, if it tracks one."""
+    usage = getattr(llm, '_token_usage', None)
+    if not isinstance(usage, dict):
+        return None
+    return {
+        'prompt_tokens': usage.get('prompt_tokens', 0),
+        'completion_tokens': usage.get('completion_tokens', 0),
+    }
+
+
+def enable_metrics(llm: Any) -> Any:
+    """
+    Record latency and token usage of LLM calls in the active RunMetrics.
+
+    Like ``enable_response_cache`` this wraps ``call``/``acall`` in place, so it
+    composes with the cache: wrap after enabling the cache and cache hits are
+    recorded as near-zero-latency calls. Calls are attributed to the current
+    pipeline stage, or to the calling task when crewai passes one. Token
+    counts come from the provider's usage counters when they advance during
+    the call and fall back to an estimate otherwise. Calls made outside an
+    active collector are not recorded.
+
+    Args:
+        llm (Any): LLM instance whose ``call``/``acall`` methods are replaced
+
+    Returns:
+        Any: The same LLM instance
+    """
+    call = llm.call
+    acall = getattr(llm, 'acall', None)
+
+    def record(metrics: Any, kwargs: Dict[str, Any], messages: Any, result: Any,
+               before: Optional[Dict[str, int]], elapsed: float, error: bool) -> None:
+        stage = current_stage() or getattr(kwargs.get('from_task'), 'name', None)
+        after = _usage_counts(llm)
+        prompt_tokens = completion_tokens = 0
+        if before is not None and after is not None:
+            prompt_tokens = after['prompt_tokens'] - before['prompt_tokens']
+            completion_tokens = after['completion_tokens'] - before['completion_tokens']
+        if prompt_tokens <= 0 and completion_tokens <= 0:
+            prompt_tokens = estimate_tokens(messages)
+            completion_tokens = estimate_tokens(result) if isinstance(result, str) else 0
+        metrics.record_llm_call(stage, elapsed, prompt_tokens, completion_tokens, error=error)
+
+    def timed_call(messages: Any, *args: Any, **kwargs: Any) -> Any:
+        metrics = current_metrics()
+        if metrics is None:
+            return call(messages, *args, **kwargs)
+        before = _usage_counts(llm)
+        start = time.perf_counter()
+        try:
+            result = call(messages, *args, **kwargs)
+        except Exception:
+            record(metrics, kwargs, messages, None, before, time.perf_counter() - start, True)
+            raise
+        record(metrics, kwargs, messages, result, before, time.perf_counter() - start, False)
+        return result
+
+    llm.call = timed_call
+
+    if acall is not None:
+        async def timed_acall(messages: Any, *args: Any, **kwargs: Any) -> Any:
+            metrics = current_metrics()
+            if metrics is None:
+                return await acall(messages, *args, **kwargs)
+            before = _usage_counts(llm)
+            start = time.perf_counter()
+            try:
+                result = await acall(messages, *args, **kwargs)
+            except Exception:
+                record(metrics, kwargs, messages, None, before, time.perf_counter() - start, True)
+                raise
+            record(metrics, kwargs, messages, result, before, time.perf_counter() - start, False)
+            return result
+
+        llm.acall = timed_acall
+
+    return llm
+
+
+def install_stream_listener() -> None:
+    """
+    Forward streamed LLM chunks to the StreamingOutput of the task that requested them.
+
+    crewai emits stream chunk events synchronously on the thread making the
+    call, so the task's output is found through the active context even when
+    several tasks stream at once. Chunks of tool calls are ignored. Safe to
+    call more than once.
+    """
+    global _stream_listener_installed
+    with _stream_listener_lock:
+        if _stream_listener_installed:
+            return
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+
+        @crewai_event_bus.on(LLMStreamChunkEvent)
+        def forward_chunk(source: Any, event: Any) -> None:
+            stream = current_stream()
+            if stream is None or event.tool_call is not None:
+                return
+            stream.feed(event.chunk, event.response_id or event.call_id)
+
+        _stream_listener_installed = True
@@ -1,36 +1,461 @@
 import sys
 import warnings
 import argparse
+from contextlib import closing
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, TYPE_CHECKING
 from pathlib import Path
-from dotenv import load_dotenv
-from website_builder.crew import WebsiteBuilder
 import click
 
-load_dotenv()
+# Heavy dependencies (crewai, crewai_tools and the provider SDKs) are imported
+# inside the commands that need them so --help and usage errors stay fast.
+if TYPE_CHECKING:
+    from website_builder.crew import BuilderResources
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
+def load_environment() -> None:
+    """Load API keys from .env; called by commands right before they need them."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
 @click.group()
 def cli():
     pass
 
+def cache_options(command):
+    """Add the LLM response and research cache options to a command."""
+    command = click.option('--cache-dir', default='.cache', show_default=True,
+                           help='Directory holding the LLM response, research and compiled config caches.')(command)
+    command = click.option('--research-cache/--no-research-cache', default=False, show_default=True,
+                           help='Reuse recent search results across topics and runs, within their '
+                                'freshness windows.')(command)
+    command = click.option('--cache/--no-cache', default=False, show_default=True,
+                           help='Reuse LLM responses for identical prompts and settings.')(command)
+    return command
+
+def rate_limit_options(command):
+    """Add the provider rate limit options to a command."""
+    command = click.option('--rate-limit-dir', type=click.Path(file_okay=False), default=None,
+                           help='Share provider quotas with other processes through lock files in this '
+                                'directory.')(command)
+    command = click.option('--rate-limits', type=click.Path(exists=True, dir_okay=False), default=None,
+                           help='YAML file with per-provider quotas, instead of config/rate_limits.yaml.')(command)
+    return command
+
+def embedder_option(command):
+    """Add the knowledge index embedder option to a command."""
+    return click.option('--embedder', default='hashing', show_default=True,
+                        help="Embeddings of the knowledge index: 'hashing' (offline, no model) or "
+                             "'sentence-transformers:<model>' for a local model.")(command)
+
+def knowledge_options(command):
+    """Add the local knowledge index options to a command."""
+    command = embedder_option(command)
+    command = click.option('--knowledge-dir', default='knowledge', show_default=True,
+                           help='Directory of notes kept in the knowledge index.')(command)
+    command = click.option('--knowledge-index/--no-knowledge-index', default=False, show_default=True,
+                           help='Answer searches from knowledge files and earlier research where they cover '
+                                'the query, searching the web only for the gaps.')(command)
+    return command
+
+def knowledge_index_path(cache_dir: str) -> str:
+    """Return the path of the knowledge index in a cache directory."""
+    return str(Path(cache_dir) / 'knowledge.sqlite3')
+
+def build_resources(cache: bool, research_cache: bool, cache_dir: str, stream: bool = False,
+                    rate_limits: Optional[str] = None, rate_limit_dir: Optional[str] = None,
+                    knowledge_index: bool = False, knowledge_dir: Optional[str] = None,
+                    embedder: str = 'hashing') -> 'BuilderResources':
+    """Create the shared builder resources with the caches, quotas and index selected on the command line."""
+    from website_builder.crew import BuilderResources
+    from website_builder.utils.rate_limiter import load_rate_limits
+    from website_builder.utils.vector_index import build_embedder
+    return BuilderResources(
+        cache_dir=cache_dir if cache else None,
+        research_cache_path=str(Path(cache_dir) / 'research.sqlite3') if research_cache else None,
+        config_cache_dir=cache_dir,
+        stream=stream,
+        rate_limits=load_rate_limits(rate_limits) if rate_limits else None,
+        rate_limit_dir=rate_limit_dir,
+        knowledge_index_path=knowledge_index_path(cache_dir) if knowledge_index else None,
+        knowledge_dir=knowledge_dir,
+        embedder=build_embedder(embedder) if knowledge_index else None
+    )
+
+def print_cache_stats(resources: 'BuilderResources') -> None:
+    """Print the hit ratio of each enabled cache."""
+    for label, cache in (('LLM cache', resources.response_cache), ('Research cache', resources.research_cache)):
+        if cache is None:
+            continue
+        stats = cache.stats()
+        print(f"{label}: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_ratio']:.1%} hit ratio)")
+
+def print_knowledge_stats(resources: 'BuilderResources') -> None:
+    """Print how many searches the knowledge index answered, and its size."""
+    if resources.knowledge_search is None:
+        return
+    searches = resources.knowledge_search.stats()
+    size = resources.knowledge_index.stats()
+    print(f"Knowledge index: {searches['answered']} searches answered locally, {searches['searched']} sent "
+          f"to the search API ({size['documents']} documents, {size['chunks']} chunks)")
+
+def print_rate_limit_stats(resources: 'BuilderResources') -> None:
+    """Print time spent waiting for each provider's quota and its rate-limit errors."""
+    for name, limiter in resources.rate_limiters.items():
+        stats = limiter.stats()
+        if stats['throttled_seconds'] >= 0.1 or stats['rate_limited']:
+            print(f"Rate limit {name}: waited {stats['throttled_seconds']:.1f}s, "
+                  f"{stats['rate_limited']} rate-limit errors")
+
+def critical_css_option(command):
+    """Add the critical CSS option to a command."""
+    return click.option('--critical-css', is_flag=True,
+                        help='Inline above-the-fold CSS into each page, load stylesheets asynchronously and '
+                             'defer scripts.')(command)
+
+def optimize_option(command):
+    """Add the asset optimization options to a command."""
+    command = critical_css_option(command)
+    return click.option('--optimize', is_flag=True,
+                        help="Minify, hash and pre-compress the generated assets into each site's dist/ "
+                             "directory.")(command)
+
+def optimize_sites(site_dirs, workers: Optional[int] = None, critical_css: bool = False) -> None:
+    """Optimize the assets of each site and print its size report."""
+    from website_builder.utils.asset_optimizer import AssetOptimizer, format_asset_report
+
+    with AssetOptimizer(workers=workers, critical_css=critical_css) as optimizer:
+        reports = optimizer.optimize_many(site_dirs)
+    for site_dir, site_reports in reports.items():
+        print(f"Optimized assets in {Path(site_dir) / AssetOptimizer.DIST_DIRNAME}:")
+        print(format_asset_report(site_reports))
+
+def metrics_option(command):
+    """Add the Prometheus metrics file option to a command."""
+    return click.option('--metrics-file', type=click.Path(dir_okay=False), default=None,
+                        help='Also write run metrics in Prometheus text format to this file.')(command)
+
 @cli.command()
 @click.argument('topic')
-def run(topic):
+@click.option('--parallel', type=click.IntRange(min=1), default=None,
+              help='Run tasks as a dependency graph with up to N tasks at once.')
+@click.option('--incremental', is_flag=True,
+              help='Rerun only tasks whose inputs changed since the last build.')
+@click.option('--stream', is_flag=True,
+              help='Write output files incrementally as the LLM streams them.')
+@click.option('--resume', is_flag=True,
+              help='Skip tasks completed by an interrupted run with the same inputs (implies task-graph mode).')
+@click.option('--template', is_flag=True,
+              help='Have the LLM write only the page content and render the page from the site template '
+                   '(implies task-graph mode).')
+@click.option('--pages', is_flag=True,
+              help='Build a multi-page site from a sitemap, writing all pages at once unless --parallel '
+                   'is given (implies task-graph mode).')
+@click.option('--compress-context', is_flag=True,
+              help='Give each task digests of its upstream outputs within the token budgets of '
+                   'context_budget.yaml (implies task-graph mode).')
+@optimize_option
+@cache_options
+@knowledge_options
+@rate_limit_options
+@metrics_option
+def run(
+    topic,
+    parallel,
+    incremental,
+    stream,
+    resume,
+    template,
+    pages,
+    compress_context,
+    optimize,
+    critical_css,
+    cache,
+    research_cache,
+    cache_dir,
+    knowledge_index,
+    knowledge_dir,
+    embedder,
+    rate_limits,
+    rate_limit_dir,
+    metrics_file,
+):
     """Run the website builder with a specific topic"""
+    load_environment()
+    from website_builder.crew import WebsiteBuilder
+    from website_builder.utils.metrics import RunMetrics, write_prometheus
+
     print(f"Running crew for topic: {topic}")
+    metrics = RunMetrics(topic)
     try:
-        builder = WebsiteBuilder(topic=topic)
-        crew = builder.crew()
-        result = crew.kickoff()
+        resources = build_resources(cache, research_cache, cache_dir, stream=stream,
+                                    rate_limits=rate_limits, rate_limit_dir=rate_limit_dir,
+                                    knowledge_index=knowledge_index, knowledge_dir=knowledge_dir,
+                                    embedder=embedder)
+        builder = WebsiteBuilder(topic=topic, resources=resources)
+        with closing(builder), metrics.track(builder.file_manager.output_dir):
+            if parallel or incremental or stream or resume or template or pages or compress_context:
+                result = builder.run_pipeline(max_workers=parallel, incremental=incremental, resume=resume,
+                                              template=template, pages=pages, compress_context=compress_context)
+            else:
+                crew = builder.crew()
+                result = crew.kickoff()
         print("Website building completed successfully!")
+        print(f"Run report written to {builder.file_manager.output_dir / RunMetrics.REPORT_FILENAME}")
+        if optimize or critical_css:
+            optimize_sites([builder.file_manager.output_dir], critical_css=critical_css)
+        print_cache_stats(resources)
+        print_knowledge_stats(resources)
+        print_rate_limit_stats(resources)
         return result
     except Exception as e:
         print(f"Error during 'run': {str(e)}")
         print("Please check your configuration and try again.")
         sys.exit(1)
+    finally:
+        if metrics_file:
+            write_prometheus(metrics_file, [metrics])
+
+@cli.command()
+@click.argument('topics_file', type=click.File('r'), default='-')
+@click.option('--workers', type=click.IntRange(min=1), default=4,
+              help='Number of topics built at the same time.')
+@click.option('--output-dir', default='output', show_default=True,
+              help='Directory under which each topic gets its own subdirectory.')
+@click.option('--parallel', type=click.IntRange(min=1), default=None,
+              help='Tasks run at once within each topic; one, or all pages with --pages, by default.')
+@click.option('--async', 'use_async', is_flag=True,
+              help='Multiplex builds on one event loop; --workers bounds the builds in flight.')
+@click.option('--incremental', is_flag=True,
+              help='Rerun only tasks whose inputs changed since the last build of each topic.')
+@click.option('--stream', is_flag=True,
+              help='Write output files incrementally as the LLM streams them.')
+@click.option('--resume', is_flag=True,
+              help='Skip topics an earlier run of this batch built, and resume partly built ones.')
+@click.option('--template', is_flag=True,
+              help='Have the LLM write only the page content and render pages from the site template.')
+@click.option('--pages', is_flag=True, help='Build a multi-page site from a sitemap for each topic.')
+@click.option('--compress-context', is_flag=True,
+              help='Give each task digests of its upstream outputs within the budgets of context_budget.yaml.')
+@optimize_option
+@cache_options
+@knowledge_options
+@rate_limit_options
+@metrics_option
+def batch(
+    topics_file,
+    workers: int,
+    output_dir: str,
+    parallel: int,
+    use_async: bool,
+    incremental: bool,
+    stream: bool,
+    resume: bool,
+    template: bool,
+    pages: bool,
+    compress_context: bool,
+    optimize: bool,
+    critical_css: bool,
+    cache: bool,
+    research_cache: bool,
+    cache_dir: str,
+    knowledge_index: bool,
+    knowledge_dir: str,
+    embedder: str,
+    rate_limits: Optional[str],
+    rate_limit_dir: Optional[str],
+    metrics_file: Optional[str],
+) -> None:
+    """Build a website for every topic in TOPICS_FILE (one per line or JSONL; '-' for stdin)."""
+    load_environment()
+    from concurrent.futures import ThreadPoolExecutor
+    import asyncio
+    from website_builder.batch import BatchJournal, read_topics, run_batch, async_batch, format_summary
+    from website_builder.crew import WebsiteBuilder
+    from website_builder.utils.metrics import RunMetrics, write_prometheus
+
+    try:
+        jobs = read_topics(topics_file)
+        resources = build_resources(cache, research_cache, cache_dir, stream=stream,
+                                    rate_limits=rate_limits, rate_limit_dir=rate_limit_dir,
+                                    knowledge_index=knowledge_index, knowledge_dir=knowledge_dir,
+                                    embedder=embedder)
+    except Exception as e:
+        print(f"Error during 'batch': {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    journal = BatchJournal(output_dir)
+    if resume:
+        completed = journal.completed()
+        skipped = [job for job in jobs if job.slug in completed]
+        jobs = [job for job in jobs if job.slug not in completed]
+        if skipped:
+            print(f"Skipping {len(skipped)} topics built by an earlier run")
+
+    print(f"Building {len(jobs)} topics with {workers} workers into '{output_dir}'...")
+
+    runs = []
+
+    def build(job, site_dir):
+        metrics = RunMetrics(job.topic)
+        runs.append(metrics)
+        with metrics.track(site_dir):
+            builder = WebsiteBuilder(topic=job.topic, output_dir=str(site_dir), resources=resources)
+            with closing(builder):
+                return builder.run_pipeline(max_workers=parallel, incremental=incremental, resume=resume,
+                                            template=template, pages=pages, compress_context=compress_context)
+
+    def report(result):
+        journal.record(result)
+        print(f"[{result.status}] {result.topic} ({result.seconds:.2f}s)")
+
+    if use_async:
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+        async def abuild(job, site_dir):
+            metrics = RunMetrics(job.topic)
+            runs.append(metrics)
+            with metrics.track(site_dir):
+                builder = WebsiteBuilder(topic=job.topic, output_dir=str(site_dir), resources=resources)
+                with closing(builder):
+                    # Without --parallel, akickoff would fall back to the sequential crew
+                    return await builder.akickoff(max_workers=parallel or (None if pages else 1),
+                                                  incremental=incremental, executor=executor, resume=resume,
+                                                  template=template, pages=pages,
+                                                  compress_context=compress_context)
+
+        with executor:
+            results = asyncio.run(async_batch(jobs, abuild, output_dir, concurrency=workers, on_result=report))
+    else:
+        results = run_batch(jobs, build, output_dir, workers=workers, on_result=report)
+    print()
+    print(format_summary(results))
+    if optimize or critical_css:
+        built = [r.output_dir for r in results if r.status == 'ok']
+        if built:
+            optimize_sites(built, critical_css=critical_css)
+    print_cache_stats(resources)
+    print_knowledge_stats(resources)
+    print_rate_limit_stats(resources)
+    if metrics_file:
+        write_prometheus(metrics_file, runs)
+    if any(r.status != 'ok' for r in results):
+        sys.exit(1)
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help='Interface to listen on.')
+@click.option('--port', type=int, default=8000, show_default=True, help='Port to listen on.')
+@click.option('--workers', type=click.IntRange(min=1), default=2, show_default=True,
+              help='Builds running at the same time.')
+@click.option('--queue-size', type=click.IntRange(min=1), default=100, show_default=True,
+              help='Jobs allowed to wait for a worker before new ones are refused.')
+@click.option('--output-dir', default='output/jobs', show_default=True,
+              help='Directory under which each job gets its own subdirectory.')
+@click.option('--parallel', type=click.IntRange(min=1), default=1, show_default=True,
+              help='Tasks run at once within each build.')
+@click.option('--stream', is_flag=True,
+              help='Write output files incrementally as the LLM streams them.')
+@click.option('--verbose', is_flag=True, help='Log every request.')
+@cache_options
+@knowledge_options
+@rate_limit_options
+def serve(host: str, port: int, workers: int, queue_size: int, output_dir: str, parallel: int, stream: bool,
+          verbose: bool, cache: bool, research_cache: bool, cache_dir: str, knowledge_index: bool,
+          knowledge_dir: str, embedder: str, rate_limits: Optional[str], rate_limit_dir: Optional[str]) -> None:
+    """Serve builds over HTTP: POST /jobs, GET /jobs/<id>, GET /jobs/<id>/files/<path>."""
+    load_environment()
+    from website_builder.server import BuildService, make_server
+
+    try:
+        resources = build_resources(cache, research_cache, cache_dir, stream=stream,
+                                    rate_limits=rate_limits, rate_limit_dir=rate_limit_dir,
+                                    knowledge_index=knowledge_index, knowledge_dir=knowledge_dir,
+                                    embedder=embedder)
+        resources.llm()
+        service = BuildService(resources, output_dir, workers=workers, max_queued=queue_size, parallel=parallel)
+        server = make_server(service, host=host, port=port, verbose=verbose)
+    except Exception as e:
+        print(f"Error during 'serve': {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Serving builds on http://{host}:{server.server_address[1]} with {workers} workers "
+          f"(output in '{output_dir}')")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down; waiting for running builds to finish...")
+    finally:
+        server.server_close()
+        service.close()
+
+@cli.command()
+@click.argument('site_dirs', nargs=-1, required=True, type=click.Path(exists=True, file_okay=False))
+@click.option('--workers', type=click.IntRange(min=1), default=None,
+              help='Worker processes shared by all sites; one per CPU by default.')
+@critical_css_option
+def optimize(site_dirs, workers: Optional[int], critical_css: bool) -> None:
+    """Minify, hash and pre-compress the assets of built sites into their dist/ directories."""
+    try:
+        optimize_sites(site_dirs, workers=workers, critical_css=critical_css)
+    except Exception as e:
+        print(f"Error during 'optimize': {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+@cli.command()
+@click.argument('directories', nargs=-1, type=click.Path(exists=True, file_okay=False))
+@click.option('--workers', type=click.IntRange(min=1), default=None,
+              help='Worker processes checking config sets in parallel; one per CPU by default.')
+def validate(directories, workers: Optional[int]) -> None:
+    """
+    Validate config sets: directories holding agents.yaml and tasks.yaml, or their subdirectories.
+
+    Defaults to the package's own config directory.
+    """
+    from website_builder.utils.config_validator import find_config_sets, validate_config_sets
+
+    directories = directories or (str(Path(__file__).parent / 'config'),)
+    config_sets = [config_set for directory in directories for config_set in find_config_sets(directory)]
+    if not config_sets:
+        print("No config sets found (directories with agents.yaml and tasks.yaml).", file=sys.stderr)
+        sys.exit(1)
+    results = validate_config_sets(config_sets, workers=workers)
+    invalid = {config_set: errors for config_set, errors in results.items() if errors}
+    for config_set, errors in invalid.items():
+        print(f"{config_set}: {errors}\n", file=sys.stderr)
+    print(f"{len(results) - len(invalid)} of {len(results)} config sets are valid.")
+    if invalid:
+        sys.exit(1)
+
+@cli.command()
+@click.argument('directories', nargs=-1, type=click.Path(exists=True, file_okay=False))
+@click.option('--cache-dir', default='.cache', show_default=True, help='Directory holding the knowledge index.')
+@click.option('--knowledge-dir', default='knowledge', show_default=True,
+              help='Directory of notes kept in the knowledge index.')
+@embedder_option
+def index(directories, cache_dir: str, knowledge_dir: str, embedder: str) -> None:
+    """
+    Bring the knowledge index up to date with the knowledge directory and earlier research.
+
+    Indexes the research.md of every site under DIRECTORIES, 'output' by default.
+    """
+    from website_builder.utils.vector_index import VectorIndex, build_embedder
+
+    try:
+        knowledge_index = VectorIndex(knowledge_index_path(cache_dir), build_embedder(embedder))
+        embedded = 0
+        if Path(knowledge_dir).is_dir():
+            embedded += knowledge_index.sync_directory(knowledge_dir)
+        for directory in directories or [path for path in ('output',) if Path(path).is_dir()]:
+            embedded += knowledge_index.sync_directory(directory, names=['research.md'])
+        size = knowledge_index.stats()
+        knowledge_index.close()
+    except Exception as e:
+        print(f"Error during 'index': {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Embedded {embedded} new chunks; the knowledge index holds {size['documents']} documents "
+          f"({size['chunks']} chunks).")
 
 @cli.command()
 @click.argument('iterations', type=int)
@@ -48,12 +473,16 @@ def train(iterations: int, filename: str, topic: str) -> None:
     Raises:
         Exception: If there's an error during training
     """
+    load_environment()
+    from website_builder.crew import WebsiteBuilder
+
     inputs: Dict[str, str] = {
         "topic": topic
     }
     print(f"Training crew for topic '{topic}' with {iterations} iterations, saving to '{filename}'...")
     try:
-        WebsiteBuilder(topic=topic).crew().train(n_iterations=iterations, filename=filename, inputs=inputs)
+        with closing(WebsiteBuilder(topic=topic)) as builder:
+            builder.crew().train(n_iterations=iterations, filename=filename, inputs=inputs)
         print("Crew training finished successfully.")
     except Exception as e:
         print(f"Error during 'train': {str(e)}", file=sys.stderr)
@@ -64,6 +493,9 @@ def train(iterations: int, filename: str, topic: str) -> None:
 @click.argument('task_id')
 def replay(task_id: str) -> None:
     """Replay the crew execution from a specific task."""
+    load_environment()
+    from website_builder.crew import WebsiteBuilder
+
     print(f"Replaying crew execution starting from task: {task_id}")
     try:
         WebsiteBuilder().crew().replay(task_id=task_id)
@@ -79,6 +511,9 @@ def replay(task_id: str) -> None:
 @click.argument('topic')
 def test(iterations: int, model_name: str, topic: str) -> Optional[Dict[str, Any]]:
     """Test the crew execution and returns the results."""
+    load_environment()
+    from website_builder.crew import WebsiteBuilder
+
     inputs: Dict[str, str] = {
         "topic": topic,
         "current_year": str(datetime.now().year)
@@ -0,0 +1,412 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import re
+
+import yaml
+
+from website_builder.batch import slugify
+from website_builder.utils.template_engine import Markup, TemplateEngine, escape
+
+
+# Marks the navigation link of the page being viewed
+CURRENT_PAGE = ' aria-current="page"'
+
+
+@dataclass
+class Section:
+    """One section of a page's main content."""
+
+    id: str
+    heading: str
+    html: str
+
+
+@dataclass
+class PageContent:
+    """The structured content the LLM writes for a template build."""
+
+    title: str
+    description: str
+    sections: List[Section]
+    footer_about: str = ''
+    footer_contact: str = ''
+    social_links: List[Dict[str, str]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Any) -> 'PageContent':
+        """
+        Validate parsed page content.
+
+        Section ids are slugified and made unique; a missing id is derived
+        from the heading.
+
+        Args:
+            data (Any): Parsed JSON
+
+        Returns:
+            PageContent: The page content
+
+        Raises:
+            ValueError: If a required field is missing or has the wrong type
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Page content must be a JSON object")
+        for key in ('title', 'description'):
+            if not isinstance(data.get(key), str) or not data[key].strip():
+                raise ValueError(f"Page content needs a non-empty string '{key}'")
+        raw_sections = data.get('sections')
+        if not isinstance(raw_sections, list) or not raw_sections:
+            raise ValueError("Page content needs a non-empty list of 'sections'")
+
+        sections = []
+        seen = set()
+        for index, section in enumerate(raw_sections, start=1):
+            if not isinstance(section, dict) or not isinstance(section.get('heading'), str) \
+                    or not isinstance(section.get('html'), str):
+                raise ValueError(f"Section {index} needs string 'heading' and 'html' fields")
+            base = slugify(str(section.get('id') or section['heading']))
+            section_id, n = base, 2
+            while section_id in seen:
+                section_id = f"{base}-{n}"
+                n += 1
+            seen.add(section_id)
+            sections.append(Section(id=section_id, heading=section['heading'].strip(), html=section['html']))
+
+        social_links = data.get('social_links') or []
+        if not isinstance(social_links, list) or not all(
+                isinstance(link, dict) and isinstance(link.get('name'), str) and isinstance(link.get('url'), str)
+                for link in social_links):
+            raise ValueError("'social_links' must be a list of objects with 'name' and 'url'")
+        return cls(
+            title=data['title'].strip(),
+            description=data['description'].strip(),
+            sections=sections,
+            footer_about=str(data.get('footer_about') or ''),
+            footer_contact=str(data.get('footer_contact') or ''),
+            social_links=social_links
+        )
+
+
+def _parse_json_object(output: str, what: str) -> Any:
+    """Parse the JSON object in an LLM answer, ignoring code fences and surrounding text."""
+    text = re.sub(r'^\s*```(?:json)?\s*|\s*```\s*$', '', output.strip())
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end < start:
+        raise ValueError(f"{what} is not a JSON object")
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise ValueError(f"{what} is not valid JSON: {str(e)}")
+
+
+def parse_page_content(output: str) -> PageContent:
+    """
+    Parse the JSON page content out of an LLM answer.
+
+    Markdown code fences and text around the JSON object are ignored.
+
+    Args:
+        output (str): Raw LLM output
+
+    Returns:
+        PageContent: The page content
+
+    Raises:
+        ValueError: If the output holds no valid page content
+    """
+    return PageContent.from_dict(_parse_json_object(output, "Page content"))
+
+
+@dataclass
+class SitemapPage:
+    """One page of a multi-page site."""
+
+    slug: str
+    title: str
+    summary: str
+
+
+def parse_sitemap(output: str, max_pages: Optional[int] = None) -> List[SitemapPage]:
+    """
+    Parse the sitemap the researcher writes for a multi-page build.
+
+    Slugs are slugified and made unique. The first page becomes the home
+    page, ``index``, unless another page already has that slug, and it is
+    always listed first.
+
+    Args:
+        output (str): Raw LLM output, a JSON object with a ``pages`` list
+        max_pages (Optional[int]): Pages to keep at most; all if None
+
+    Returns:
+        List[SitemapPage]: The pages, home page first
+
+    Raises:
+        ValueError: If the output holds no valid sitemap
+    """
+    data = _parse_json_object(output, "Sitemap")
+    raw_pages = data.get('pages') if isinstance(data, dict) else None
+    if not isinstance(raw_pages, list) or not raw_pages:
+        raise ValueError("Sitemap needs a non-empty list of 'pages'")
+    raw_pages = raw_pages[:max_pages] if max_pages else raw_pages
+
+    pages = []
+    seen = set()
+    for index, page in enumerate(raw_pages, start=1):
+        if not isinstance(page, dict) or not isinstance(page.get('title'), str) or not page['title'].strip():
+            raise ValueError(f"Sitemap page {index} needs a non-empty string 'title'")
+        base = slugify(str(page.get('slug') or page['title']))
+        slug, n = base, 2
+        while slug in seen:
+            slug = f"{base}-{n}"
+            n += 1
+        seen.add(slug)
+        pages.append(SitemapPage(slug=slug, title=page['title'].strip(), summary=str(page.get('summary') or '').strip()))
+
+    if 'index' not in seen:
+        pages[0].slug = 'index'
+    pages.sort(key=lambda page: page.slug != 'index')
+    return pages
+
+
+def render_page(content: PageContent, site_name: str, template: str = 'base.html',
+                engine: Optional[TemplateEngine] = None, url: str = '', image: str = '',
+                year: Optional[int] = None, site_pages: Optional[List[SitemapPage]] = None,
+                current: Optional[str] = None) -> str:
+    """
+    Render a page from its content and the site template.
+
+    Navigation links are generated from the section headings, or from the
+    site's pages for multi-page sites. Headings and other text are escaped;
+    section bodies are inserted as HTML.
+
+    Args:
+        content (PageContent): The page content
+        site_name (str): Name shown in the logo and footer
+        template (str): Template file, relative to the engine's directory
+        engine (Optional[TemplateEngine]): Engine to load the template with; the shared one if None
+        url (str): Canonical URL of the page, for social cards
+        image (str): Image URL for social cards
+        year (Optional[int]): Copyright year; the current year if None
+        site_pages (Optional[List[SitemapPage]]): Pages of a multi-page site, linked from the navigation
+        current (Optional[str]): Slug of the page being rendered, marked as the current page
+
+    Returns:
+        str: The rendered page
+
+    Raises:
+        IOError: If the template cannot be read
+        ValueError: If the template has slots this page cannot fill
+    """
+    engine = engine or TemplateEngine.shared()
+    if site_pages:
+        nav_links = '\n'.join(
+            f'<li><a href="{escape(page.slug)}.html"{CURRENT_PAGE if page.slug == current else ""}>'
+            f'{escape(page.title)}</a></li>' for page in site_pages
+        )
+    else:
+        nav_links = '\n'.join(
+            f'<li><a href="#{escape(section.id)}">{escape(section.heading)}</a></li>' for section in content.sections
+        )
+    sections = '\n'.join(
+        f'<section id="{escape(section.id)}">\n<h2>{escape(section.heading)}</h2>\n{section.html}\n</section>'
+        for section in content.sections
+    )
+    social_links = '\n'.join(
+        f'<a href="{escape(link["url"])}" rel="noopener">{escape(link["name"])}</a>' for link in content.social_links
+    )
+    return engine.render(template, {
+        'title': content.title,
+        'description': content.description,
+        'url': url,
+        'image': image,
+        'logo': site_name,
+        'site_name': site_name,
+        'nav_links': Markup(nav_links),
+        'content': Markup(sections),
+        'footer_about': content.footer_about,
+        'footer_contact': content.footer_contact,
+        'social_links': Markup(social_links),
+        'year': year or datetime.now().year,
+    })
+
+
+@dataclass
+class PageTemplateConfig:
+    """Settings of template builds, from page_template.yaml."""
+
+    task: str
+    template: str
+    description: str
+    expected_output: str
+
+    @classmethod
+    def load(cls, path: str) -> 'PageTemplateConfig':
+        """
+        Load the template build settings.
+
+        Args:
+            path (str): Path to page_template.yaml
+
+        Returns:
+            PageTemplateConfig: The settings
+
+        Raises:
+            IOError: If the file cannot be read
+            ValueError: If a setting is missing
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = yaml.safe_load(f)
+        except (IOError, yaml.YAMLError) as e:
+            raise IOError(f"Error reading page template config {path}: {str(e)}")
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} must map settings to values")
+        missing = [key for key in ('task', 'template', 'description', 'expected_output')
+                   if not isinstance(data.get(key), str)]
+        if missing:
+            raise ValueError(f"{path} is missing: {', '.join(missing)}")
+        return cls(data['task'], data['template'], data['description'], data['expected_output'])
+
+    def prompt(self, topic: str) -> Dict[str, str]:
+        """Return the task's description and expected output for a topic."""
+        return {
+            'description': self.description.replace('{topic}', topic),
+            'expected_output': self.expected_output.replace('{topic}', topic),
+        }
+
+    def template_digest(self, engine: TemplateEngine) -> str:
+        """Return a digest of the template file, so builds rerender when it changes."""
+        return hashlib.sha256((Path(engine.directory) / self.template).read_bytes()).hexdigest()
+
+
+def _fill(text: str, values: Dict[str, str]) -> str:
+    """Replace ``{name}`` placeholders, leaving other braces (e.g. JSON examples) alone."""
+    for name, value in values.items():
+        text = text.replace('{' + name + '}', value)
+    return text
+
+
+@dataclass
+class MultiPageConfig:
+    """Settings of multi-page builds, from multipage.yaml."""
+
+    SITEMAP_TASK = 'sitemap_task'
+
+    max_pages: int
+    replaces: str
+    sitemap_task: Dict[str, Any]
+    page_task: Dict[str, Any]
+    page_brief: str
+    shared_context: Dict[str, List[str]]
+    shared_note: str
+
+    @classmethod
+    def load(cls, path: str) -> 'MultiPageConfig':
+        """
+        Load the multi-page build settings.
+
+        Args:
+            path (str): Path to multipage.yaml
+
+        Returns:
+            MultiPageConfig: The settings
+
+        Raises:
+            IOError: If the file cannot be read
+            ValueError: If a setting is missing or invalid
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = yaml.safe_load(f)
+        except (IOError, yaml.YAMLError) as e:
+            raise IOError(f"Error reading multi-page config {path}: {str(e)}")
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} must map settings to values")
+        missing = [key for key in ('replaces', 'page_brief', 'shared_note') if not isinstance(data.get(key), str)]
+        for key, fields in (('sitemap_task', ('description', 'expected_output', 'agent', 'output_file')),
+                            ('page_task', ('description', 'expected_output', 'agent'))):
+            task = data.get(key)
+            if not isinstance(task, dict):
+                missing.append(key)
+            else:
+                missing += [f"{key}.{field}" for field in fields if not isinstance(task.get(field), str)]
+        if missing:
+            raise ValueError(f"{path} is missing: {', '.join(missing)}")
+        max_pages = data.get('max_pages', 12)
+        if not isinstance(max_pages, int) or max_pages < 1:
+            raise ValueError(f"{path}: max_pages must be a positive integer")
+        shared_context = data.get('shared_context') or {}
+        if not isinstance(shared_context, dict) or not all(isinstance(v, list) for v in shared_context.values()):
+            raise ValueError(f"{path}: shared_context must map task names to lists of task names")
+        return cls(max_pages, data['replaces'], data['sitemap_task'], data['page_task'], data['page_brief'],
+                   shared_context, data['shared_note'])
+
+    @staticmethod
+    def page_task_name(page: SitemapPage) -> str:
+        """Return the name of the task writing a page."""
+        return f"page_{page.slug}"
+
+    def sitemap_spec(self, topic: str) -> Dict[str, Any]:
+        """Return the task spec of the sitemap task for a topic."""
+        context = list(self.sitemap_task.get('context') or [])
+        return {
+            **self.sitemap_task,
+            'description': _fill(self.sitemap_task['description'], {'topic': topic}),
+            'expected_output': _fill(self.sitemap_task['expected_output'], {'topic': topic}),
+            'context': context,
+            'dependencies': context,
+        }
+
+    def page_specs(self, topic: str, pages: List[SitemapPage]) -> Dict[str, Dict[str, Any]]:
+        """
+        Return a task spec for every page of the sitemap.
+
+        Args:
+            topic (str): Website topic
+            pages (List[SitemapPage]): The site's pages
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Spec of each page's task, by task name
+        """
+        sitemap = '\n'.join(f"- {page.title} ({page.slug}.html): {page.summary}" for page in pages)
+        context = list(self.page_task.get('context') or [])
+        specs = {}
+        for page in pages:
+            values = {'topic': topic, 'page_title': page.title, 'page_slug': page.slug,
+                      'page_summary': page.summary, 'sitemap': sitemap}
+            specs[self.page_task_name(page)] = {
+                'agent': self.page_task['agent'],
+                'description': _fill(self.page_task['description'], values),
+                'expected_output': _fill(self.page_task['expected_output'], values),
+                'brief': _fill(self.page_brief, values),
+                'output_file': f"output/html/{page.slug}.html",
+                'context': context,
+                'dependencies': context,
+            }
+        return specs
+
+    def shared_specs(self, task_specs: Dict[str, Dict[str, Any]], topic: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the specs of the tasks written once for all pages.
+
+        Their context is replaced, so they run alongside the page tasks
+        instead of after a page.
+
+        Args:
+            task_specs (Dict[str, Dict[str, Any]]): Rendered specs from tasks.yaml
+            topic (str): Website topic
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Spec of each shared task, by task name
+        """
+        note = _fill(self.shared_note, {'topic': topic})
+        return {
+            name: {**task_specs[name], 'context': list(context), 'dependencies': list(context),
+                   'description': f"{task_specs[name]['description']}\n\n{note}"}
+            for name, context in self.shared_context.items()
+        }
@@ -0,0 +1,315 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote, urlsplit
+import collections
+import json
+import mimetypes
+import shutil
+import threading
+import uuid
+
+from website_builder.batch import slugify
+from website_builder.crew import BuilderResources, WebsiteBuilder
+from website_builder.utils.metrics import RunMetrics
+
+# Directories of the FileManager output tree that are bookkeeping, not artifacts
+INTERNAL_DIRS = ('backups', 'versions')
+
+
+class QueueFull(RuntimeError):
+    """Raised when a job is submitted while the maximum number of jobs is waiting."""
+
+
+@dataclass
+class Job:
+    """A website build requested through the service."""
+
+    id: str
+    topic: str
+    slug: str
+    output_dir: str
+    incremental: bool = False
+    status: str = 'queued'
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    files: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the job for API responses."""
+        data = asdict(self)
+        del data['output_dir']
+        data['links'] = {
+            'self': f"/jobs/{self.id}",
+            'files': {name: f"/jobs/{self.id}/files/{name}" for name in self.files},
+        }
+        return data
+
+
+class BuildService:
+    """
+    Queue of website builds run by a bounded pool of worker threads.
+
+    Every job shares one BuilderResources, so configs are compiled and the
+    LLM client and search tools are created once for the life of the service.
+    """
+
+    def __init__(self, resources: BuilderResources, output_root: str, workers: int = 2,
+                 max_queued: int = 100, parallel: int = 1, max_finished: int = 1000):
+        """
+        Initialize the BuildService.
+
+        Args:
+            resources (BuilderResources): Warm resources shared by all builds
+            output_root (str): Directory under which each job gets its own output directory
+            workers (int): Builds running at the same time
+            max_queued (int): Jobs allowed to wait for a worker before submissions are refused
+            parallel (int): Tasks run at once within each build
+            max_finished (int): Finished jobs remembered for status queries; their files stay on disk
+        """
+        self.resources = resources
+        self.output_root = Path(output_root)
+        self.output_root.mkdir(parents=True, exist_ok=True)
+        self.max_queued = max_queued
+        self.parallel = parallel
+        self.max_finished = max_finished
+        self._jobs: 'collections.OrderedDict[str, Job]' = collections.OrderedDict()
+        self._queued = 0
+        self._running = 0
+        self._directory_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='build')
+
+    def submit(self, topic: str, incremental: bool = False) -> Job:
+        """
+        Queue a build.
+
+        Args:
+            topic (str): Topic of the website
+            incremental (bool): Reuse outputs of unchanged tasks from an earlier job with the same topic
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            ValueError: If the topic is missing, not a string or empty
+            QueueFull: If max_queued jobs are already waiting
+        """
+        if topic is not None and not isinstance(topic, str):
+            raise ValueError("Topic must be a string.")
+        topic = (topic or '').strip()
+        if not topic:
+            raise ValueError("Topic is required. Please provide a topic for the website.")
+        slug = slugify(topic)
+        job_id = uuid.uuid4().hex
+        # Incremental jobs build into a per-topic directory so they can reuse earlier outputs
+        output_dir = self.output_root / (slug if incremental else f"{slug}-{job_id[:12]}")
+        job = Job(id=job_id, topic=topic, slug=slug, output_dir=str(output_dir), incremental=incremental)
+        with self._lock:
+            if self._queued >= self.max_queued:
+                raise QueueFull(f"Build queue is full ({self.max_queued} jobs waiting)")
+            self._queued += 1
+            self._jobs[job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond max_finished."""
+        finished = [j.id for j in self._jobs.values() if j.status in ('ok', 'error')]
+        for job_id in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            job.status = 'running'
+            job.started_at = datetime.now().isoformat()
+        try:
+            # Jobs sharing an incremental directory must not build concurrently
+            with self._directory_lock(job.output_dir):
+                metrics = RunMetrics(job.topic)
+                with metrics.track(job.output_dir):
+                    builder = WebsiteBuilder(topic=job.topic, output_dir=job.output_dir, resources=self.resources)
+                    with closing(builder):
+                        builder.run_pipeline(max_workers=self.parallel, incremental=job.incremental)
+            status, error = 'ok', None
+        except Exception as e:
+            status, error = 'error', str(e)
+        files = self._list_files(Path(job.output_dir))
+        with self._lock:
+            self._running -= 1
+            job.status = status
+            job.error = error
+            job.files = files
+            job.finished_at = datetime.now().isoformat()
+
+    def _directory_lock(self, output_dir: str) -> threading.Lock:
+        with self._lock:
+            return self._directory_locks.setdefault(output_dir, threading.Lock())
+
+    @staticmethod
+    def _list_files(output_dir: Path) -> List[str]:
+        """List the artifacts of a build, relative to its output directory."""
+        if not output_dir.exists():
+            return []
+        files = []
+        for path in sorted(output_dir.rglob('*')):
+            relative = path.relative_to(output_dir)
+            if not path.is_file() or relative.parts[0] in INTERNAL_DIRS:
+                continue
+            if any(part.startswith('.') for part in relative.parts) or path.suffix == '.partial':
+                continue
+            files.append(relative.as_posix())
+        return files
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        """Return all remembered jobs, oldest first."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def stats(self) -> Dict[str, int]:
+        """Count queued, running and remembered jobs."""
+        with self._lock:
+            return {'queued': self._queued, 'running': self._running, 'jobs': len(self._jobs)}
+
+    def artifact_path(self, job: Job, name: str) -> Optional[Path]:
+        """
+        Resolve a file of a job's output tree.
+
+        Args:
+            job (Job): The job
+            name (str): Path relative to the job's output directory
+
+        Returns:
+            Optional[Path]: The file, or None if it is not an artifact of the job
+        """
+        if name not in job.files:
+            return None
+        root = Path(job.output_dir).resolve()
+        path = (root / name).resolve()
+        if root not in path.parents or not path.is_file():
+            return None
+        return path
+
+    def close(self) -> None:
+        """Wait for running and queued builds to finish."""
+        self._executor.shutdown(wait=True)
+
+
+class BuildRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of the build service.
+
+    POST /jobs                    queue a build: {"topic": "...", "incremental": false}
+    GET  /jobs                    list jobs
+    GET  /jobs/<id>               job status and artifact links
+    GET  /jobs/<id>/files/<path>  download an artifact
+    GET  /health                  queue statistics
+    """
+
+    server_version = 'WebsiteBuilder'
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def service(self) -> BuildService:
+        return self.server.service
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if getattr(self.server, 'verbose', False):
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send_json(status, {'error': message})
+
+    def do_GET(self) -> None:
+        parts = [unquote(p) for p in urlsplit(self.path).path.split('/') if p]
+        if parts == ['health']:
+            self._send_json(HTTPStatus.OK, {'status': 'ok', **self.service.stats()})
+        elif parts == ['jobs']:
+            self._send_json(HTTPStatus.OK, {'jobs': [job.to_dict() for job in self.service.jobs()]})
+        elif len(parts) >= 2 and parts[0] == 'jobs':
+            job = self.service.get(parts[1])
+            if job is None:
+                self._send_error(HTTPStatus.NOT_FOUND, f"Unknown job {parts[1]}")
+            elif len(parts) == 2:
+                self._send_json(HTTPStatus.OK, job.to_dict())
+            elif parts[2] == 'files' and len(parts) > 3:
+                self._send_file(job, '/'.join(parts[3:]))
+            else:
+                self._send_error(HTTPStatus.NOT_FOUND, "Not found")
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, "Not found")
+
+    def _send_file(self, job: Job, name: str) -> None:
+        path = self.service.artifact_path(job, name)
+        if path is None:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Job {job.id} has no file {name}")
+            return
+        content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(path.stat().st_size))
+        self.end_headers()
+        with open(path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile)
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path.rstrip('/') != '/jobs':
+            self._send_error(HTTPStatus.NOT_FOUND, "Not found")
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            job = self.service.submit(request.get('topic'), incremental=bool(request.get('incremental')))
+        except QueueFull as e:
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+            return
+        except ValueError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        self._send_json(HTTPStatus.ACCEPTED, job.to_dict())
+
+
+def make_server(service: BuildService, host: str = '127.0.0.1', port: int = 8000,
+                verbose: bool = False) -> ThreadingHTTPServer:
+    """
+    Create the HTTP server for a build service.
+
+    Args:
+        service (BuildService): Service handling the requests
+        host (str): Interface to listen on
+        port (int): Port to listen on; 0 picks a free one
+        verbose (bool): Log every request to stderr
+
+    Returns:
+        ThreadingHTTPServer: The server, not yet serving
+    """
+    server = ThreadingHTTPServer((host, port), BuildRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
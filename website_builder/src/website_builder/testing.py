@@ -0,0 +1,255 @@
+from crewai import BaseLLM
+from crewai.llms.base_llm import llm_call_context
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional, Type
+import hashlib
+import json
+import threading
+import time
+
+from website_builder.crew import BuilderResources
+from website_builder.utils.metrics import estimate_tokens
+
+STREAM_CHUNK_SIZE = 16
+
+
+def _filler(seed: str, size: int) -> str:
+    """Return ``size`` characters of deterministic text derived from ``seed``."""
+    words = []
+    length = 0
+    counter = 0
+    while length < size:
+        digest = hashlib.sha256(f"{seed}:{counter}".encode('utf-8')).hexdigest()
+        words.append(digest[:8])
+        length += 9
+        counter += 1
+    return " ".join(words)[:size]
+
+
+class FakeLLM(BaseLLM):
+    """
+    LLM stand-in that answers from a hash of the prompt after a fixed delay.
+
+    With ``tool_calls`` set, an agent that has tools is first asked to call
+    its first tool that many times before the final answer, so the tool
+    path is exercised too. With ``stream`` set, the final answer is also
+    emitted as stream chunk events, like a streaming provider. A prompt
+    asking for page content with ``"sections"`` (a template build) is
+    answered with page content JSON, and one asking for a sitemap with
+    ``"pages"`` (a multi-page build) with a sitemap of ``sitemap_pages``
+    pages. With ``research_sections`` set, a prompt asking for research in
+    markdown format is answered with a markdown document of that many
+    sections, and with ``prompt_token_latency`` set, each call also takes
+    that long per prompt token, like a provider's prompt processing.
+    """
+
+    latency: float = 0.0
+    response_size: int = 200
+    tool_calls: int = 0
+    sitemap_pages: int = 4
+    research_sections: int = 0
+    prompt_token_latency: float = 0.0
+
+    def __init__(self, model: str = 'fake-llm', latency: float = 0.0, response_size: int = 200,
+                 tool_calls: int = 0, sitemap_pages: int = 4, research_sections: int = 0,
+                 prompt_token_latency: float = 0.0, **kwargs: Any):
+        """
+        Initialize the FakeLLM.
+
+        Args:
+            model (str): Model name reported to crewai
+            latency (float): Seconds each call sleeps before answering
+            response_size (int): Length of the final answer in characters
+            tool_calls (int): Tool calls requested per task before answering
+            sitemap_pages (int): Pages listed in sitemap answers
+            research_sections (int): Sections of markdown research answers; 0 answers research
+                with plain text like any other prompt
+            prompt_token_latency (float): Seconds each call takes per prompt token, on top of ``latency``
+        """
+        super().__init__(model=model, **kwargs)
+        self.latency = latency
+        self.response_size = response_size
+        self.tool_calls = tool_calls
+        self.sitemap_pages = sitemap_pages
+        self.research_sections = research_sections
+        self.prompt_token_latency = prompt_token_latency
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def call_count(self) -> int:
+        """Number of calls answered so far."""
+        return self._calls
+
+    def call(self, messages: Any, tools: Optional[List[dict]] = None, callbacks: Optional[List[Any]] = None,
+             available_functions: Optional[Dict[str, Any]] = None, **kwargs: Any) -> str:
+        with self._lock:
+            self._calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.prompt_token_latency:
+            time.sleep(estimate_tokens(messages) * self.prompt_token_latency)
+
+        prompt = json.dumps(messages, sort_keys=True, default=str)
+        agent_tools = getattr(kwargs.get('from_agent'), 'tools', None) or []
+        # crewai feeds each action and its observation back as an assistant message
+        actions_taken = sum(
+            1 for m in messages if isinstance(m, dict) and m.get('role') == 'assistant'
+        ) if isinstance(messages, list) else 0
+        if agent_tools and actions_taken < self.tool_calls:
+            tool = agent_tools[0]
+            argument = next(iter(getattr(tool.args_schema, 'model_fields', {}) or {'query': None}))
+            return (
+                "Thought: I should look this up\n"
+                f"Action: {tool.name}\n"
+                f"Action Input: {json.dumps({argument: 'fake query'})}"
+            )
+        text = ' '.join(str(m.get('content', '')) if isinstance(m, dict) else str(m) for m in messages) \
+            if isinstance(messages, list) else str(messages)
+        if '"pages"' in text:
+            final = self._sitemap(prompt)
+        elif '"sections"' in text:
+            final = self._page_content(prompt)
+        elif self.research_sections and 'markdown format' in text:
+            final = self._research(prompt)
+        else:
+            final = _filler(prompt, self.response_size)
+        answer = f"Thought: I now know the final answer\nFinal Answer: {final}"
+        if self.stream:
+            with llm_call_context() as call_id:
+                for start in range(0, len(answer), STREAM_CHUNK_SIZE):
+                    self._emit_stream_chunk_event(
+                        answer[start:start + STREAM_CHUNK_SIZE],
+                        from_task=kwargs.get('from_task'),
+                        from_agent=kwargs.get('from_agent'),
+                        response_id=call_id
+                    )
+        return answer
+
+    def _page_content(self, prompt: str) -> str:
+        """Return page content JSON of about ``response_size`` characters."""
+        size = max(self.response_size // 3, 20)
+        return json.dumps({
+            'title': _filler(f"title:{prompt}", 40).title(),
+            'description': _filler(f"description:{prompt}", 120),
+            'sections': [
+                {'id': f"section-{i}", 'heading': _filler(f"heading{i}:{prompt}", 24).title(),
+                 'html': f"<p>{_filler(f'body{i}:{prompt}', size)}</p>"}
+                for i in range(1, 4)
+            ],
+            'footer_about': _filler(f"about:{prompt}", 60),
+            'footer_contact': 'hello@example.com',
+        })
+
+    def _sitemap(self, prompt: str) -> str:
+        """Return a sitemap JSON listing ``sitemap_pages`` pages, the home page first."""
+        return json.dumps({'pages': [
+            {'slug': 'index' if i == 0 else f"page-{i}", 'title': _filler(f"page{i}:{prompt}", 24).title(),
+             'summary': _filler(f"summary{i}:{prompt}", 80)}
+            for i in range(self.sitemap_pages)
+        ]})
+
+    def _research(self, prompt: str) -> str:
+        """Return a markdown research document of about ``response_size`` characters."""
+        # Each section has a summary paragraph, a key term, an example and as many points as sentences
+        sentences = max(self.response_size // self.research_sections // 150, 1)
+        parts = [f"# {_filler(f'research:{prompt}', 24).title()}"]
+        for i in range(self.research_sections):
+            seed = f"section{i}:{prompt}"
+            parts.append(f"## {_filler(seed, 24).title()}")
+            parts.append(' '.join(f"{_filler(f'{seed}:sentence{j}', 70).capitalize()}." for j in range(sentences)))
+            parts.append('\n'.join([
+                f"- **{_filler(f'{seed}:term', 12).title()}**: {_filler(f'{seed}:definition', 60)}.",
+                f"- For example, {_filler(f'{seed}:example', 60)}.",
+                *(f"- {_filler(f'{seed}:point{j}', 70).capitalize()}." for j in range(sentences)),
+            ]))
+        return '\n\n'.join(parts)
+
+
+class FakeSearchInput(BaseModel):
+    """Input of the fake search tool."""
+
+    search_query: str = Field(..., description="Query to search the internet with")
+
+
+class FakeSearchTool(BaseTool):
+    """Stand-in for SerperDevTool that returns generated organic results."""
+
+    name: str = "Search the internet with Serper"
+    description: str = "Searches the internet and returns organic results for a query."
+    args_schema: Type[BaseModel] = FakeSearchInput
+    latency: float = 0.0
+    results: int = 10
+    snippet_size: int = 160
+
+    def _run(self, search_query: str, **kwargs: Any) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        return {
+            'searchParameters': {'q': search_query},
+            'organic': [
+                {
+                    'title': f"Result {i} for {search_query}",
+                    'link': f"https://example.com/{i}",
+                    'snippet': _filler(f"{search_query}:{i}", self.snippet_size),
+                    'position': i + 1,
+                }
+                for i in range(self.results)
+            ],
+        }
+
+
+class FakeWebsiteSearchInput(BaseModel):
+    """Input of the fake website search tool."""
+
+    search_query: str = Field(..., description="Query to search the website content with")
+    website: str = Field("https://example.com", description="Website to search")
+
+
+class FakeWebsiteSearchTool(BaseTool):
+    """Stand-in for WebsiteSearchTool that returns generated page excerpts."""
+
+    name: str = "Search in a specific website"
+    description: str = "Searches the content of a website for a query."
+    args_schema: Type[BaseModel] = FakeWebsiteSearchInput
+    latency: float = 0.0
+    payload_size: int = 2000
+
+    def _run(self, search_query: str, website: str = "https://example.com", **kwargs: Any) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return f"Relevant content from {website}:\n{_filler(f'{website}:{search_query}', self.payload_size)}"
+
+
+def fake_resources(llm_latency: float = 0.0, response_size: int = 200, tool_calls: int = 0,
+                   tool_latency: float = 0.0, payload_size: int = 2000, sitemap_pages: int = 4,
+                   research_sections: int = 0, prompt_token_latency: float = 0.0,
+                   **kwargs: Any) -> BuilderResources:
+    """
+    Create BuilderResources wired to the fake LLM and search tools.
+
+    Args:
+        llm_latency (float): Seconds each LLM call takes
+        response_size (int): Length of each LLM answer in characters
+        tool_calls (int): Tool calls the LLM requests per task before answering
+        tool_latency (float): Seconds each search tool call takes
+        payload_size (int): Size of each website search result in characters
+        sitemap_pages (int): Pages the LLM lists in multi-page builds' sitemaps
+        research_sections (int): Sections of the LLM's markdown research; 0 for plain text
+        prompt_token_latency (float): Seconds each LLM call takes per prompt token
+        **kwargs: Passed on to BuilderResources (e.g. config_dir, cache_dir). Rate limits
+            are off unless ``rate_limits`` is given.
+
+    Returns:
+        BuilderResources: Resources that never touch the network
+    """
+    kwargs.setdefault('rate_limits', {})
+    return BuilderResources(
+        llm=FakeLLM(latency=llm_latency, response_size=response_size, tool_calls=tool_calls,
+                    sitemap_pages=sitemap_pages, research_sections=research_sections,
+                    prompt_token_latency=prompt_token_latency),
+        search_tool=FakeSearchTool(latency=tool_latency, snippet_size=max(payload_size // 10, 1)),
+        web_tool=FakeWebsiteSearchTool(latency=tool_latency, payload_size=payload_size),
+        **kwargs
+    )
@@ -0,0 +1,7 @@
+from .cached_tool import CachedTool
+from .indexed_search_tool import IndexedSearchTool
+from .instrumented_tool import InstrumentedTool
+from .lazy_tool import LazyTool
+from .rate_limited_tool import RateLimitedTool
+
+__all__ = ['CachedTool', 'IndexedSearchTool', 'InstrumentedTool', 'LazyTool', 'RateLimitedTool']
@@ -0,0 +1,119 @@
+from crewai.tools import BaseTool
+from typing import Any, Callable, Dict, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import json
+import re
+
+from website_builder.utils.response_cache import ResponseCache
+
+URL_ARGUMENTS = ('website', 'url', 'website_url')
+TRACKING_PARAMETERS = re.compile(r'^(utm_\w+|gclid|fbclid)$')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query so trivially different phrasings share a cache entry.
+
+    Args:
+        query (str): Search query
+
+    Returns:
+        str: Lowercased query with collapsed whitespace and no trailing punctuation
+    """
+    return re.sub(r'\s+', ' ', query).strip().lower().rstrip('?.!')
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL for use as a cache key.
+
+    Lowercases the scheme and host, drops the fragment, tracking parameters
+    and a trailing slash, and sorts the query string.
+
+    Args:
+        url (str): URL to normalize
+
+    Returns:
+        str: Normalized URL
+    """
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMETERS.match(k)
+    ))
+    path = parts.path.rstrip('/') or ''
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
+
+def normalize_arguments(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize tool arguments for use as a cache key.
+
+    Args:
+        arguments (Dict[str, Any]): Keyword arguments of a tool call
+
+    Returns:
+        Dict[str, Any]: Arguments with URLs and queries normalized
+    """
+    normalized = {}
+    for name, value in arguments.items():
+        if isinstance(value, str) and name in URL_ARGUMENTS:
+            value = normalize_url(value)
+        elif isinstance(value, str) and 'query' in name:
+            value = normalize_query(value)
+        normalized[name] = value
+    return normalized
+
+
+class CachedTool(BaseTool):
+    """
+    Research tool wrapper that serves repeated calls from a SQLite cache.
+
+    Calls are keyed by the wrapped tool's name and its normalized arguments,
+    and each entry stays fresh for the tool's freshness window.
+    """
+
+    name: str = "Cached tool"
+    description: str = "Serves repeated calls to a wrapped tool from a local cache."
+    tool: Any
+    cache: Any
+    ttl: Union[float, Callable[[Dict[str, Any]], float], None] = None
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, cache: ResponseCache,
+             ttl: Union[float, Callable[[Dict[str, Any]], float], None] = None) -> 'CachedTool':
+        """
+        Wrap a tool with a cache.
+
+        Args:
+            tool (BaseTool): Tool to wrap
+            cache (ResponseCache): Cache holding previous results
+            ttl (Union[float, Callable, None]): Freshness window in seconds, or a function
+                of the call arguments returning one; None uses the cache default
+
+        Returns:
+            CachedTool: Tool with the same name, description and arguments as ``tool``
+        """
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            tool=tool,
+            cache=cache,
+            ttl=ttl
+        )
+
+    def _run(self, **kwargs: Any) -> Any:
+        key = self.cache.make_key(self.name, normalize_arguments(kwargs))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+        result = self.tool.run(**kwargs)
+        try:
+            encoded = json.dumps(result)
+        except TypeError:
+            return result
+        ttl = self.ttl(kwargs) if callable(self.ttl) else self.ttl
+        self.cache.set(key, encoded, ttl=ttl)
+        return result
@@ -0,0 +1,127 @@
+from crewai.tools import BaseTool
+from pydantic import PrivateAttr
+from typing import Any, Callable, Dict, List, Optional, Union
+import threading
+import time
+
+from website_builder.tools.cached_tool import normalize_url
+from website_builder.utils.vector_index import SearchHit, VectorIndex, content_words
+
+QUERY_ARGUMENTS = ('search_query', 'query', 'q')
+# Search types answered from and added to the index; news and other time-sensitive types always go live
+INDEXED_SEARCH_TYPES = (None, 'search')
+
+
+class IndexedSearchTool(BaseTool):
+    """
+    Search tool wrapper that answers from the local knowledge index first.
+
+    A query is answered from the index when at least ``min_hits`` indexed
+    chunks are similar enough to it, each holding at least half of the
+    query's terms and together ``min_coverage`` of them; only the other
+    queries, the gaps in what is known, go to the wrapped search tool.
+    Their organic results are added to the index, so later builds on
+    nearby topics find them. Indexed search results older than
+    ``max_age`` do not count, and news and other non-web searches are
+    never answered from or added to the index.
+    """
+
+    name: str = "Indexed search tool"
+    description: str = "Answers searches from a local knowledge index before searching the web."
+    tool: Any
+    index: Any
+    min_hits: int = 3
+    results: int = 5
+    min_coverage: float = 0.8
+    max_age: Union[float, Callable[[Dict[str, Any]], float], None] = None
+    _stats: Dict[str, int] = PrivateAttr(default_factory=lambda: {'answered': 0, 'searched': 0})
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, index: VectorIndex, min_hits: int = 3, results: int = 5,
+             max_age: Union[float, Callable[[Dict[str, Any]], float], None] = None) -> 'IndexedSearchTool':
+        """
+        Wrap a search tool with a knowledge index.
+
+        Args:
+            tool (BaseTool): Search tool to wrap, returning Serper-style results
+            index (VectorIndex): Index of knowledge files, earlier research and search results
+            min_hits (int): Similar chunks needed to answer a query locally
+            results (int): Results returned for a query answered locally
+            max_age (Union[float, Callable, None]): Seconds an indexed search result stays usable,
+                or a function of the call arguments returning them; None keeps them indefinitely
+
+        Returns:
+            IndexedSearchTool: Tool with the same name, description and arguments as ``tool``
+        """
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            tool=tool,
+            index=index,
+            min_hits=min_hits,
+            results=max(results, min_hits),
+            max_age=max_age
+        )
+
+    def _is_fresh(self, hit: SearchHit, arguments: Dict[str, Any]) -> bool:
+        """Knowledge files and research never expire; search results do after ``max_age``."""
+        if hit.link is None or self.max_age is None:
+            return True
+        max_age = self.max_age(arguments) if callable(self.max_age) else self.max_age
+        return time.time() - hit.updated_at <= max_age
+
+    def _lookup(self, query: str, arguments: Dict[str, Any]) -> Optional[List[SearchHit]]:
+        """Return the index's hits for a query, or None if it does not cover the query."""
+        terms = set(content_words(query))
+        if not terms:
+            return None
+        hits, covered = [], set()
+        for hit in self.index.search(query, k=self.results):
+            if hit.score < self.index.min_score or not self._is_fresh(hit, arguments):
+                continue
+            matched = terms & set(content_words(f"{hit.title}\n{hit.text}"))
+            if len(matched) * 2 >= len(terms):
+                hits.append(hit)
+                covered |= matched
+        if len(hits) < self.min_hits or len(covered) < self.min_coverage * len(terms):
+            return None
+        return hits
+
+    def _run(self, **kwargs: Any) -> Any:
+        indexed = kwargs.get('search_type') in INDEXED_SEARCH_TYPES
+        query = next((kwargs[name] for name in QUERY_ARGUMENTS if isinstance(kwargs.get(name), str)), None)
+        hits = self._lookup(query, kwargs) if query and indexed else None
+        if hits is not None:
+            with self._lock:
+                self._stats['answered'] += 1
+            return {
+                'searchParameters': {'q': query, 'source': 'knowledge index'},
+                'organic': [
+                    {'title': hit.title, 'link': hit.link or hit.source, 'snippet': hit.text,
+                     'position': position, 'score': round(hit.score, 3)}
+                    for position, hit in enumerate(hits, 1)
+                ],
+            }
+
+        with self._lock:
+            self._stats['searched'] += 1
+        result = self.tool.run(**kwargs)
+        if indexed and isinstance(result, dict):
+            for item in result.get('organic') or []:
+                if isinstance(item, dict) and item.get('link') and item.get('snippet'):
+                    title = str(item.get('title') or item['link'])
+                    self.index.upsert(normalize_url(str(item['link'])), str(item['snippet']),
+                                      title=title, link=str(item['link']))
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report how queries were answered in this process.
+
+        Returns:
+            Dict[str, int]: queries answered from the index and queries sent to the search tool
+        """
+        with self._lock:
+            return dict(self._stats)
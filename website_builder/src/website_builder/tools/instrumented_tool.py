@@ -0,0 +1,48 @@
+from crewai.tools import BaseTool
+from typing import Any
+import time
+
+from website_builder.utils.metrics import current_metrics, current_stage
+
+
+class InstrumentedTool(BaseTool):
+    """
+    Tool wrapper that records the duration of each call in the active RunMetrics.
+
+    Calls made outside an active collector go straight to the wrapped tool.
+    """
+
+    name: str = "Instrumented tool"
+    description: str = "Times calls to a wrapped tool."
+    tool: Any
+
+    @classmethod
+    def wrap(cls, tool: BaseTool) -> 'InstrumentedTool':
+        """
+        Wrap a tool with timing.
+
+        Args:
+            tool (BaseTool): Tool to wrap
+
+        Returns:
+            InstrumentedTool: Tool with the same name, description and arguments as ``tool``
+        """
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            tool=tool
+        )
+
+    def _run(self, **kwargs: Any) -> Any:
+        metrics = current_metrics()
+        if metrics is None:
+            return self.tool.run(**kwargs)
+        start = time.perf_counter()
+        try:
+            result = self.tool.run(**kwargs)
+        except Exception:
+            metrics.record_tool_call(current_stage(), self.name, time.perf_counter() - start, error=True)
+            raise
+        metrics.record_tool_call(current_stage(), self.name, time.perf_counter() - start)
+        return result
@@ -0,0 +1,58 @@
+from crewai.tools import BaseTool
+from pydantic import PrivateAttr
+from typing import Any, Callable, Optional, Type
+import functools
+import threading
+
+
+class LazyTool(BaseTool):
+    """
+    Placeholder that creates the real tool on its first call.
+
+    Agents only need a tool's name, description and argument schema, which
+    are read from the tool class's defaults. Constructing tools such as
+    WebsiteSearchTool sets up an embedding stack, so builds whose agents
+    never search skip that cost entirely.
+    """
+
+    name: str = "Lazy tool"
+    description: str = "Creates the wrapped tool on first use."
+    factory: Callable[[], BaseTool]
+    _tool: Optional[BaseTool] = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @classmethod
+    def of(cls, tool_class: Type[BaseTool], **kwargs: Any) -> 'LazyTool':
+        """
+        Defer construction of a tool.
+
+        Args:
+            tool_class (Type[BaseTool]): Tool class to instantiate on first use
+            **kwargs: Arguments for the tool's constructor
+
+        Returns:
+            LazyTool: Tool with the class's default name, description and arguments
+        """
+        fields = tool_class.model_fields
+        return cls(
+            name=fields['name'].default,
+            description=fields['description'].default,
+            args_schema=fields['args_schema'].default,
+            factory=functools.partial(tool_class, **kwargs)
+        )
+
+    @property
+    def tool(self) -> BaseTool:
+        """The real tool, created on first access."""
+        with self._lock:
+            if self._tool is None:
+                self._tool = self.factory()
+            return self._tool
+
+    @property
+    def created(self) -> bool:
+        """Whether the real tool has been created yet."""
+        return self._tool is not None
+
+    def _run(self, **kwargs: Any) -> Any:
+        return self.tool.run(**kwargs)
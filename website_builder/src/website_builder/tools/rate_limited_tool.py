@@ -0,0 +1,49 @@
+from crewai.tools import BaseTool
+from typing import Any
+
+from website_builder.utils.metrics import current_metrics, current_stage
+from website_builder.utils.rate_limiter import RateLimiter
+
+
+class RateLimitedTool(BaseTool):
+    """
+    Tool wrapper that admits calls through a provider's rate limiter.
+
+    Calls wait for the provider's request budget and a free in-flight slot,
+    and are retried with backoff when the provider answers with a rate-limit
+    error.
+    """
+
+    name: str = "Rate limited tool"
+    description: str = "Throttles calls to a wrapped tool."
+    tool: Any
+    limiter: Any
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, limiter: RateLimiter) -> 'RateLimitedTool':
+        """
+        Wrap a tool with a rate limiter.
+
+        Args:
+            tool (BaseTool): Tool to wrap
+            limiter (RateLimiter): Limiter of the tool's provider
+
+        Returns:
+            RateLimitedTool: Tool with the same name, description and arguments as ``tool``
+        """
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            tool=tool,
+            limiter=limiter
+        )
+
+    def _run(self, **kwargs: Any) -> Any:
+        return self.limiter.run(lambda: self.tool.run(**kwargs), on_retry=self._record_retry)
+
+    @staticmethod
+    def _record_retry(attempt: int, pause: float, error: Exception) -> None:
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.record_retry(current_stage())
@@ -1,4 +1,12 @@
 from .file_manager import FileManager
 from .config_validator import ConfigValidator
+from .config_compiler import ConfigCompiler, CompiledConfig
+from .version_store import VersionStore
+from .metrics import RunMetrics
+from .rate_limiter import RateLimiter, ProviderLimits
+from .asset_optimizer import AssetOptimizer
+from .template_engine import TemplateEngine
+from .context_compressor import ContextCompressor
+from .vector_index import VectorIndex
 
-__all__ = ['FileManager', 'ConfigValidator'] 
\ No newline at end of file
+__all__ = ['FileManager', 'ConfigValidator', 'ConfigCompiler', 'CompiledConfig', 'VersionStore', 'RunMetrics', 'RateLimiter', 'ProviderLimits', 'AssetOptimizer', 'TemplateEngine', 'ContextCompressor', 'VectorIndex'] 
\ No newline at end of file
@@ -0,0 +1,583 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+# Extensions handled by the optimizer, by asset kind
+ASSET_KINDS = {'.html': 'html', '.htm': 'html', '.css': 'css', '.js': 'js'}
+# Build bookkeeping that is never part of the published site
+SKIPPED_DIRS = {'backups', 'versions', 'dist'}
+# Hex digits of the content hash added to CSS and JS filenames
+HASH_LENGTH = 10
+
+_JS_WORD = re.compile(r'[\w$\u0080-\uffff]')
+# Keywords after which a slash starts a regular expression, not a division
+_JS_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'instanceof', 'new', 'delete',
+                      'void', 'throw', 'yield', 'await'}
+_HTML_RAW_TEXT = re.compile(r'(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)', re.IGNORECASE | re.DOTALL)
+_HTML_COMMENT = re.compile(r'<!--(?!\[if|<!)(.*?)-->', re.DOTALL)
+_HTML_TAG = re.compile(r'(<[^>]*>)')
+_HTML_REFERENCE = re.compile(r'''(\b(?:href|src)\s*=\s*)(["'])([^"']*)\2''', re.IGNORECASE)
+_JS_TYPES = {'', 'text/javascript', 'application/javascript', 'module'}
+# Elements around which whitespace never renders
+_HTML_BLOCK_TAGS = {'html', 'head', 'body', 'title', 'meta', 'link', 'script', 'style', 'base', 'header', 'footer',
+                    'main', 'nav', 'section', 'article', 'aside', 'div', 'p', 'ul', 'ol', 'li', 'h1', 'h2', 'h3',
+                    'h4', 'h5', 'h6', 'table', 'thead', 'tbody', 'tr', 'td', 'th', 'form', 'figure', 'br', 'hr',
+                    '!doctype'}
+
+
+def _skip_string(text: str, start: int) -> int:
+    """Return the index just past the quoted string or template literal starting at ``start``."""
+    quote = text[start]
+    i = start + 1
+    while i < len(text):
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if c == '\n' and quote != '`':
+            return i
+        i += 1
+    return i
+
+
+def minify_css(text: str) -> str:
+    """
+    Remove comments and insignificant whitespace from a stylesheet.
+
+    Strings are kept verbatim. Whitespace before ``:`` and ``(`` is kept
+    because it is significant in selectors and media queries, and so is
+    whitespace around ``+``/``-`` for ``calc()``.
+
+    Args:
+        text (str): CSS source
+
+    Returns:
+        str: Minified CSS
+    """
+    out: List[str] = []
+    i, n = 0, len(text)
+    pending_space = False
+    while i < n:
+        c = text[i]
+        if c == '/' and text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            pending_space = True
+            continue
+        if c.isspace():
+            pending_space = True
+            i += 1
+            continue
+        if pending_space and out and out[-1][-1] not in '{};,>:(' and c not in '{};,>)!':
+            out.append(' ')
+        pending_space = False
+        if c in '"\'':
+            end = _skip_string(text, i)
+            out.append(text[i:end])
+            i = end
+            continue
+        if c == '}' and out and out[-1] == ';':
+            out.pop()
+        out.append(c)
+        i += 1
+    return ''.join(out)
+
+
+def _js_regex_allowed(out: List[str]) -> bool:
+    """Check whether a slash after the emitted code starts a regular expression literal."""
+    code = ''.join(out[-16:]).rstrip()
+    if not code:
+        return True
+    if code[-1] in '(,=:[!&|?{};+-*%<>~^\n':
+        return True
+    word = re.search(r'[\w$]+$', code)
+    return bool(word) and word.group(0) in _JS_REGEX_KEYWORDS
+
+
+def _skip_regex(text: str, start: int) -> int:
+    """Return the index just past the regular expression literal (and flags) starting at ``start``."""
+    i = start + 1
+    in_class = False
+    while i < len(text) and text[i] != '\n':
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            i += 1
+            while i < len(text) and _JS_WORD.match(text[i]):
+                i += 1
+            return i
+        i += 1
+    return i
+
+
+def minify_js(text: str) -> str:
+    """
+    Remove comments and insignificant whitespace from a script.
+
+    Strings, template literals and regular expression literals are kept
+    verbatim. Line breaks are kept wherever automatic semicolon insertion
+    could depend on them, so the minified script behaves like the source.
+
+    Args:
+        text (str): JavaScript source
+
+    Returns:
+        str: Minified JavaScript
+    """
+    out: List[str] = []
+    i, n = 0, len(text)
+    pending = ''
+    while i < n:
+        c = text[i]
+        if c == '/' and text.startswith('//', i):
+            end = text.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        if c == '/' and text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            comment = text[i:n if end == -1 else end]
+            i = n if end == -1 else end + 2
+            pending = '\n' if '\n' in comment or pending == '\n' else ' '
+            continue
+        if c.isspace():
+            if c == '\n' or pending != '\n':
+                pending = '\n' if c == '\n' else ' '
+            i += 1
+            continue
+
+        if pending and out:
+            last = out[-1][-1]
+            if pending == '\n' and last not in '{;,([' and c not in ')]},;':
+                out.append('\n')
+            elif _JS_WORD.match(last) and _JS_WORD.match(c) or last + c in ('++', '--', '+-', '-+'):
+                out.append(' ')
+        pending = ''
+
+        if c in '"\'`':
+            end = _skip_string(text, i)
+        elif c == '/' and _js_regex_allowed(out):
+            end = _skip_regex(text, i)
+        else:
+            end = i + 1
+        out.append(text[i:end])
+        i = end
+    return ''.join(out)
+
+
+def minify_html(text: str) -> str:
+    """
+    Remove comments and collapse whitespace in an HTML document.
+
+    Inline ``<style>`` and ``<script>`` bodies are minified as CSS and
+    JavaScript; ``<pre>`` and ``<textarea>`` content and tags themselves are
+    kept verbatim. Runs of whitespace between text and tags become a single
+    space, which renders the same.
+
+    Args:
+        text (str): HTML source
+
+    Returns:
+        str: Minified HTML
+    """
+    parts = []
+    position = 0
+    previous = ''
+    for match in _HTML_RAW_TEXT.finditer(text):
+        open_tag, name, body, close_tag = match.group(1), match.group(2).lower(), match.group(3), match.group(4)
+        parts.append(_collapse_html(text[position:match.start()], previous, open_tag))
+        if name == 'style':
+            body = minify_css(body)
+        elif name == 'script' and 'src=' not in open_tag.lower() and _script_type(open_tag) in _JS_TYPES:
+            body = minify_js(body)
+        parts.append(open_tag + body + close_tag)
+        position = match.end()
+        previous = close_tag
+    parts.append(_collapse_html(text[position:], previous, ''))
+    return ''.join(parts).strip()
+
+
+def _script_type(open_tag: str) -> str:
+    match = re.search(r'''\btype\s*=\s*["']?([^"'\s>]*)''', open_tag, re.IGNORECASE)
+    return match.group(1).lower() if match else ''
+
+
+def _collapse_html(text: str, before: str, after: str) -> str:
+    """Drop comments and collapse whitespace outside tags; ``before`` and ``after`` are the surrounding tags."""
+    text = _HTML_COMMENT.sub('', text)
+    pieces = [before] + _HTML_TAG.split(text) + [after]
+    for index in range(1, len(pieces) - 1, 2):
+        piece = re.sub(r'\s+', ' ', pieces[index])
+        if piece == ' ' and (_is_block_tag(pieces[index - 1]) or _is_block_tag(pieces[index + 1])):
+            piece = ''
+        pieces[index] = piece
+    return ''.join(pieces[1:-1])
+
+
+def _is_block_tag(tag: str) -> bool:
+    match = re.match(r'</?\s*([!\w-]+)', tag)
+    return bool(match) and match.group(1).lower() in _HTML_BLOCK_TAGS
+
+
+def hashed_name(relative_path: str, data: bytes) -> str:
+    """
+    Add a content hash to a filename, e.g. ``css/style.css`` to ``css/style.1a2b3c4d5e.css``.
+
+    Args:
+        relative_path (str): POSIX path of the asset within the site
+        data (bytes): Content the hash is taken from
+
+    Returns:
+        str: The hashed path
+    """
+    stem, ext = posixpath.splitext(relative_path)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def resolve_reference(url: str, page: str, assets: Iterable[str]) -> Optional[str]:
+    """
+    Find the site asset an ``href`` or ``src`` of a page refers to.
+
+    A reference is resolved relative to the page; one that resolves to no
+    asset but whose filename is unique among the assets, such as
+    ``style.css`` for ``css/style.css``, is matched by filename. Absolute
+    URLs, root-relative paths and fragments are never resolved.
+
+    Args:
+        url (str): Value of the attribute
+        page (str): POSIX path of the page within the site
+        assets (Iterable[str]): POSIX paths of the site's assets
+
+    Returns:
+        Optional[str]: Path of the asset, or None if the reference is not to one
+    """
+    if not url or re.match(r'^(?:[a-z][a-z0-9+.-]*:|//|/|#)', url, re.IGNORECASE):
+        return None
+    assets = set(assets)
+    path = re.match(r'[^?#]*', url).group(0)
+    target = posixpath.normpath(posixpath.join(posixpath.dirname(page), path))
+    if target in assets:
+        return target
+    candidates = [asset for asset in assets if posixpath.basename(asset) == posixpath.basename(path)]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def rewrite_references(html: str, page: str, renamed: Dict[str, str]) -> str:
+    """
+    Point ``href`` and ``src`` attributes of a page at renamed assets.
+
+    References are resolved as by ``resolve_reference``; query strings and
+    fragments are kept.
+
+    Args:
+        html (str): Content of the page
+        page (str): POSIX path of the page within the site
+        renamed (Dict[str, str]): New path of each renamed asset, by original path
+
+    Returns:
+        str: The page with its references rewritten
+    """
+    base = posixpath.dirname(page)
+
+    def replace(match: 're.Match') -> str:
+        url = match.group(3)
+        target = resolve_reference(url, page, renamed)
+        if target is None:
+            return match.group(0)
+        suffix = url[len(re.match(r'[^?#]*', url).group(0)):]
+        new_url = posixpath.relpath(renamed[target], base or '.')
+        return f"{match.group(1)}{match.group(2)}{new_url}{suffix}{match.group(2)}"
+
+    return _HTML_REFERENCE.sub(replace, html)
+
+
+@dataclass
+class AssetReport:
+    """Sizes of one optimized asset, in bytes."""
+
+    source: str
+    output: str
+    original_bytes: int
+    minified_bytes: int
+    gzip_bytes: int
+    brotli_bytes: Optional[int] = None
+    # Render-blocking requests and bytes of a page before and after critical CSS inlining
+    render_blocking: Optional[Dict[str, dict]] = None
+
+    @property
+    def saved_ratio(self) -> float:
+        """Fraction of the original size saved by the smallest encoding."""
+        smallest = min(size for size in (self.minified_bytes, self.gzip_bytes, self.brotli_bytes) if size is not None)
+        return 1 - smallest / self.original_bytes if self.original_bytes else 0.0
+
+
+def _optimize_asset(kind: str, source: str, text: str, renamed: Optional[Dict[str, str]], compress: bool,
+                    critical: Optional[Tuple[Dict[str, str], Dict[str, int], int]] = None) -> tuple:
+    """
+    Minify, name and compress one asset; runs in a worker process.
+
+    ``critical`` holds the site's stylesheets, the size of every asset and
+    the fold estimate for inlining critical CSS into a page.
+
+    Returns:
+        tuple: (output path, minified bytes, gzip bytes, brotli bytes, render-blocking report)
+    """
+    render_blocking = None
+    if kind == 'html':
+        if critical is not None:
+            from .critical_css import inline_critical_css, render_blocking_resources
+
+            stylesheets, sizes, fold_elements = critical
+            before = render_blocking_resources(text, source, sizes)
+            text = inline_critical_css(text, source, stylesheets, fold_elements)
+            render_blocking = {'before': before, 'after': render_blocking_resources(text, source, sizes)}
+        data = minify_html(rewrite_references(text, source, renamed or {})).encode('utf-8')
+        output = source
+    else:
+        data = (minify_css(text) if kind == 'css' else minify_js(text)).encode('utf-8')
+        output = hashed_name(source, data)
+    gzipped = gzip.compress(data, compresslevel=9, mtime=0) if compress else None
+    brotlied = brotli.compress(data, quality=11) if compress and brotli is not None else None
+    return output, data, gzipped, brotlied, render_blocking
+
+
+class AssetOptimizer:
+    """
+    Post-processing stage that prepares a generated site for publishing.
+
+    CSS, JavaScript and HTML files are minified; CSS and JavaScript get a
+    content hash in their filename and the references in the HTML pages
+    are rewritten to match; every asset gets pre-compressed ``.gz`` (and,
+    with the ``brotli`` package installed, ``.br``) siblings. The result is
+    written to ``dist/`` in the site directory, which is replaced as a whole
+    so a published copy is never half updated; the generated sources are
+    left untouched.
+
+    With ``critical_css`` each page also gets the CSS rules it needs above
+    the fold inlined, its stylesheets loaded asynchronously and its scripts
+    deferred (see ``critical_css.inline_critical_css``); the asset report
+    then counts the page's render-blocking bytes before and after.
+
+    Assets are processed on a pool of worker processes shared by every site
+    optimized with the same instance.
+    """
+
+    DIST_DIRNAME = 'dist'
+    REPORT_FILENAME = 'asset_report.json'
+
+    def __init__(self, workers: Optional[int] = None, compress: bool = True, critical_css: bool = False,
+                 fold_elements: Optional[int] = None):
+        """
+        Initialize the AssetOptimizer.
+
+        Args:
+            workers (Optional[int]): Worker processes; 1 processes assets in the calling process,
+                None uses one per CPU
+            compress (bool): Whether to write pre-compressed siblings
+            critical_css (bool): Whether to inline critical CSS and defer render-blocking resources
+            fold_elements (Optional[int]): Body elements counted as above the fold, if not the default
+        """
+        self.workers = workers
+        self.compress = compress
+        self.critical_css = critical_css
+        self.fold_elements = fold_elements
+        self._executor: Optional[Executor] = None
+
+    def __enter__(self) -> 'AssetOptimizer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _map(self, calls: List[tuple]) -> List[tuple]:
+        if self.workers == 1 or len(calls) < 2:
+            return [_optimize_asset(*call) for call in calls]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return list(self._executor.map(_optimize_asset, *zip(*calls)))
+
+    @classmethod
+    def find_assets(cls, site_dir: Path) -> Dict[str, str]:
+        """
+        Find the assets of a site.
+
+        Args:
+            site_dir (Path): Site directory
+
+        Returns:
+            Dict[str, str]: Asset kind by POSIX path relative to the site directory
+        """
+        assets = {}
+        for root, dirs, files in os.walk(site_dir):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.') and not
+                             (Path(root) == Path(site_dir) and d in SKIPPED_DIRS))
+            for name in sorted(files):
+                kind = ASSET_KINDS.get(posixpath.splitext(name)[1].lower())
+                if kind and not name.startswith('.'):
+                    relative = Path(root, name).relative_to(site_dir).as_posix()
+                    assets[relative] = kind
+        return assets
+
+    def optimize(self, site_dir: str) -> List[AssetReport]:
+        """
+        Optimize one site into its ``dist/`` directory.
+
+        Args:
+            site_dir (str): Site directory
+
+        Returns:
+            List[AssetReport]: Sizes of each asset
+
+        Raises:
+            IOError: If an asset cannot be read or the result cannot be written
+        """
+        return self.optimize_many([site_dir])[str(site_dir)]
+
+    def optimize_many(self, site_dirs: Iterable[str]) -> Dict[str, List[AssetReport]]:
+        """
+        Optimize several sites, processing the assets of all of them together.
+
+        Args:
+            site_dirs (Iterable[str]): Site directories
+
+        Returns:
+            Dict[str, List[AssetReport]]: Asset reports by site directory
+
+        Raises:
+            IOError: If an asset cannot be read or a result cannot be written
+        """
+        sites = {str(site_dir): Path(site_dir) for site_dir in site_dirs}
+        sources: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        for key, site_dir in sites.items():
+            sources[key] = {}
+            for relative, kind in self.find_assets(site_dir).items():
+                try:
+                    sources[key][relative] = (kind, (site_dir / relative).read_text(encoding='utf-8'))
+                except (IOError, UnicodeDecodeError) as e:
+                    raise IOError(f"Error reading asset {site_dir / relative}: {str(e)}")
+
+        # Stylesheets and scripts first, so pages can reference their hashed names
+        calls, owners = [], []
+        for key, assets in sources.items():
+            for relative, (kind, text) in assets.items():
+                if kind != 'html':
+                    calls.append((kind, relative, text, None, self.compress, None))
+                    owners.append((key, relative))
+        results = dict(zip(owners, self._map(calls)))
+
+        calls, owners = [], []
+        for key, assets in sources.items():
+            renamed = {relative: results[(key, relative)][0] for relative in assets if (key, relative) in results}
+            critical = None
+            if self.critical_css:
+                from .critical_css import DEFAULT_FOLD_ELEMENTS
+
+                critical = ({relative: text for relative, (kind, text) in assets.items() if kind == 'css'},
+                            {relative: len(text.encode('utf-8')) for relative, (_, text) in assets.items()},
+                            self.fold_elements or DEFAULT_FOLD_ELEMENTS)
+            for relative, (kind, text) in assets.items():
+                if kind == 'html':
+                    calls.append((kind, relative, text, renamed, self.compress, critical))
+                    owners.append((key, relative))
+        results.update(zip(owners, self._map(calls)))
+
+        reports = {}
+        for key, site_dir in sites.items():
+            outputs = {relative: results[(key, relative)] for relative in sources[key]}
+            reports[key] = self._write(site_dir, sources[key], outputs)
+        return reports
+
+    def _write(self, site_dir: Path, sources: Dict[str, Tuple[str, str]],
+               outputs: Dict[str, tuple]) -> List[AssetReport]:
+        """Write a site's optimized assets and report to a new ``dist/`` and swap it in."""
+        dist = site_dir / self.DIST_DIRNAME
+        staging = site_dir / f".{self.DIST_DIRNAME}.{os.getpid()}.tmp"
+        retired = site_dir / f".{self.DIST_DIRNAME}.{os.getpid()}.old"
+        reports = []
+        try:
+            if staging.exists():
+                shutil.rmtree(staging)
+            for relative, (output, data, gzipped, brotlied, render_blocking) in outputs.items():
+                target = staging / output
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(data)
+                if gzipped is not None:
+                    target.with_name(target.name + '.gz').write_bytes(gzipped)
+                if brotlied is not None:
+                    target.with_name(target.name + '.br').write_bytes(brotlied)
+                reports.append(AssetReport(
+                    source=relative,
+                    output=output,
+                    original_bytes=len(sources[relative][1].encode('utf-8')),
+                    minified_bytes=len(data),
+                    gzip_bytes=len(gzipped) if gzipped is not None else len(data),
+                    brotli_bytes=len(brotlied) if brotlied is not None else None,
+                    render_blocking=render_blocking
+                ))
+            (staging / self.REPORT_FILENAME).write_text(
+                json.dumps([asdict(report) for report in reports], indent=2), encoding='utf-8')
+            if dist.exists():
+                os.replace(dist, retired)
+            os.replace(staging, dist)
+        except OSError as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise IOError(f"Error writing optimized assets to {dist}: {str(e)}")
+        shutil.rmtree(retired, ignore_errors=True)
+        return reports
+
+
+def format_asset_report(reports: List[AssetReport]) -> str:
+    """
+    Format asset sizes as a table with a total line.
+
+    Args:
+        reports (List[AssetReport]): Asset reports of a site
+
+    Returns:
+        str: The table
+    """
+    def kb(size: Optional[int]) -> str:
+        return f"{size / 1024:.1f} KB" if size is not None else '-'
+
+    lines = [f"{'asset':<32} {'original':>10} {'minified':>10} {'gzip':>10} {'brotli':>10}"]
+    for report in reports:
+        lines.append(f"{report.output:<32} {kb(report.original_bytes):>10} {kb(report.minified_bytes):>10} "
+                     f"{kb(report.gzip_bytes):>10} {kb(report.brotli_bytes):>10}")
+    totals = [sum(getattr(r, field) for r in reports)
+              for field in ('original_bytes', 'minified_bytes', 'gzip_bytes')]
+    brotli_total = sum(r.brotli_bytes for r in reports) if reports and all(
+        r.brotli_bytes is not None for r in reports) else None
+    lines.append(f"{'total':<32} {kb(totals[0]):>10} {kb(totals[1]):>10} {kb(totals[2]):>10} {kb(brotli_total):>10}")
+    for report in reports:
+        if report.render_blocking:
+            before, after = report.render_blocking['before'], report.render_blocking['after']
+            lines.append(f"{report.output}: render-blocking {kb(before['bytes'])} in {before['requests']} requests "
+                         f"-> {kb(after['bytes'])} in {after['requests']} requests")
+    return '\n'.join(lines)
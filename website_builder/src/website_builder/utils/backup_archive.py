@@ -0,0 +1,383 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import collections
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+import time
+
+
+class BackupArchive:
+    """
+    Packed, append-only store for file backups.
+
+    Backup contents are appended to a single pack file and described by one
+    line each in an index log, which is loaded into memory on open, so
+    listing the backups of a file never scans the directory. Reads go
+    through a memory map of the pack.
+
+    A retention policy keeps at most ``keep`` backups per file and drops
+    backups older than ``max_age`` seconds. Dropped backups are recorded in
+    the index and their space is reclaimed by rewriting the pack into a new
+    generation once it holds more dropped than live bytes. The index names
+    the pack generation it describes, so replacing the index is the single
+    atomic step of a compaction.
+    """
+
+    INDEX_FILENAME = 'archive.idx'
+    LEGACY_PATTERN = re.compile(r'^(?P<file>.+)\.(?P<stamp>\d{8}_\d{6})\.bak$')
+    COPY_CHUNK_SIZE = 1 << 20
+    # Dropped bytes below this are not worth a compaction
+    COMPACT_MIN_BYTES = 1 << 20
+
+    def __init__(self, root: Path, keep: Optional[int] = None, max_age: Optional[float] = None):
+        """
+        Initialize the BackupArchive.
+
+        Args:
+            root (Path): Directory holding the pack and index files
+            keep (Optional[int]): Most recent backups kept per file; None keeps all
+            max_age (Optional[float]): Seconds after which backups are dropped; None keeps them
+
+        Raises:
+            ValueError: If the retention settings are not positive
+        """
+        if keep is not None and keep < 1:
+            raise ValueError("keep must be at least 1")
+        if max_age is not None and max_age <= 0:
+            raise ValueError("max_age must be positive")
+        self.root = Path(root)
+        self.index_file = self.root / self.INDEX_FILENAME
+        self.keep = keep
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._entries: 'collections.OrderedDict[str, dict]' = collections.OrderedDict()
+        self._by_file: Dict[str, List[str]] = {}
+        self._generation = 0
+        self._dead_bytes = 0
+        self._map: Optional[mmap.mmap] = None
+        self._map_file = None
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+        self._remove_stale_packs()
+
+    @property
+    def pack_file(self) -> Path:
+        """Pack file of the current generation."""
+        return self.root / f"archive.{self._generation}.pack"
+
+    def _load_index(self) -> None:
+        """Replay the index log into the in-memory index."""
+        if not self.index_file.exists():
+            self._write_header()
+            return
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted append; skip it.
+                    continue
+                op = record.get('op')
+                if op == 'pack':
+                    self._generation = record['generation']
+                elif op == 'add':
+                    self._entries[record['name']] = record
+                    self._by_file.setdefault(record['file'], []).append(record['name'])
+                elif op == 'drop' and record.get('name') in self._entries:
+                    self._forget(record['name'])
+
+    def _write_header(self) -> None:
+        with open(self.index_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'op': 'pack', 'generation': self._generation}) + '\n')
+
+    def _remove_stale_packs(self) -> None:
+        """Delete packs of other generations, left behind by an interrupted compaction."""
+        for path in self.root.glob('archive.*.pack'):
+            if path != self.pack_file:
+                path.unlink()
+
+    def _append_index(self, *records: dict) -> None:
+        with open(self.index_file, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(record) + '\n' for record in records))
+
+    def _forget(self, name: str) -> dict:
+        entry = self._entries.pop(name)
+        self._by_file[entry['file']].remove(name)
+        if not self._by_file[entry['file']]:
+            del self._by_file[entry['file']]
+        self._dead_bytes += entry['length']
+        return entry
+
+    def _unique_name(self, filename: str, now: datetime) -> str:
+        name = f"{filename}.{now.strftime('%Y%m%d_%H%M%S_%f')}.bak"
+        unique, n = name, 2
+        while unique in self._entries:
+            unique = f"{name[:-len('.bak')]}-{n}.bak"
+            n += 1
+        return unique
+
+    def add(self, filename: str, source: Path, created: Optional[datetime] = None,
+            name: Optional[str] = None) -> str:
+        """
+        Append a backup of a file to the pack, streaming it in chunks.
+
+        Args:
+            filename (str): Name of the backed up file, relative to the output directory
+            source (Path): File whose current content is backed up
+            created (Optional[datetime]): Time of the backup, defaults to now
+            name (Optional[str]): Backup name to use instead of a generated one
+
+        Returns:
+            str: Name identifying the backup
+
+        Raises:
+            IOError: If the source cannot be read or the pack cannot be written
+        """
+        created = created or datetime.now()
+        with self._lock:
+            name = name if name and name not in self._entries else self._unique_name(filename, created)
+            digest = hashlib.sha256()
+            try:
+                with open(source, 'rb') as src, open(self.pack_file, 'ab') as pack:
+                    offset = pack.seek(0, os.SEEK_END)
+                    for chunk in iter(lambda: src.read(self.COPY_CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                        pack.write(chunk)
+                    length = pack.tell() - offset
+            except (IOError, OSError) as e:
+                raise IOError(f"Error creating backup for {filename}: {str(e)}")
+
+            entry = {
+                'op': 'add',
+                'name': name,
+                'file': filename,
+                'offset': offset,
+                'length': length,
+                'sha256': digest.hexdigest(),
+                'created': created.isoformat(),
+                'time': created.timestamp(),
+            }
+            self._append_index(entry)
+            self._entries[name] = entry
+            self._by_file.setdefault(filename, []).append(name)
+            self._apply_retention([filename])
+        return name
+
+    def names(self, filename: Optional[str] = None) -> List[str]:
+        """
+        List backups, oldest first.
+
+        Args:
+            filename (Optional[str]): Only list backups of this file
+
+        Returns:
+            List[str]: Backup names
+        """
+        with self._lock:
+            if filename is not None:
+                return list(self._by_file.get(filename, ()))
+            return list(self._entries)
+
+    def entry(self, name: str) -> Optional[dict]:
+        """
+        Look up a backup.
+
+        Args:
+            name (str): Backup name
+
+        Returns:
+            Optional[dict]: The backed up ``file``, ``created`` time, ``length`` and
+                ``sha256``, or None if there is no such backup
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            return dict(entry) if entry else None
+
+    def _mapped(self, entry: dict) -> mmap.mmap:
+        """Return the memory-mapped pack, remapping it if it grew since it was mapped."""
+        if self._map is None or len(self._map) < entry['offset'] + entry['length']:
+            self._close_map()
+            self._map_file = open(self.pack_file, 'rb')
+            self._map = mmap.mmap(self._map_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _close_map(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._map_file is not None:
+            self._map_file.close()
+            self._map_file = None
+
+    def read(self, name: str) -> bytes:
+        """
+        Read the content of a backup.
+
+        Args:
+            name (str): Backup name
+
+        Returns:
+            bytes: Backed up content
+
+        Raises:
+            IOError: If there is no such backup or it is corrupt
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                raise IOError(f"Backup file {name} not found")
+            if not entry['length']:
+                return b''
+            end = entry['offset'] + entry['length']
+            with memoryview(self._mapped(entry)) as whole, whole[entry['offset']:end] as view:
+                data = bytes(view)
+        if hashlib.sha256(data).hexdigest() != entry['sha256']:
+            raise IOError(f"Backup {name} is corrupt")
+        return data
+
+    def restore(self, name: str, target: Path) -> Path:
+        """
+        Write the content of a backup to a file, replacing it atomically.
+
+        Args:
+            name (str): Backup name
+            target (Path): File to restore into
+
+        Returns:
+            Path: The restored file
+
+        Raises:
+            IOError: If there is no such backup, it is corrupt or the target cannot be written
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                raise IOError(f"Backup file {name} not found")
+            tmp_path = target.with_name(f"{target.name}.{os.getpid()}.restore")
+            digest = hashlib.sha256()
+            try:
+                with open(tmp_path, 'wb') as f:
+                    if entry['length']:
+                        end = entry['offset'] + entry['length']
+                        with memoryview(self._mapped(entry)) as whole, whole[entry['offset']:end] as view:
+                            for start in range(0, len(view), self.COPY_CHUNK_SIZE):
+                                chunk = view[start:start + self.COPY_CHUNK_SIZE]
+                                digest.update(chunk)
+                                f.write(chunk)
+                if digest.hexdigest() != entry['sha256']:
+                    raise IOError("checksum mismatch")
+                os.replace(tmp_path, target)
+            except (IOError, OSError, ValueError) as e:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+                raise IOError(f"Error restoring backup {name}: {str(e)}")
+        return target
+
+    def apply_retention(self) -> List[str]:
+        """
+        Drop the backups of every file that fall outside the retention policy.
+
+        Returns:
+            List[str]: Names of the dropped backups
+        """
+        with self._lock:
+            return self._apply_retention(list(self._by_file))
+
+    def _apply_retention(self, filenames: List[str]) -> List[str]:
+        expired = []
+        cutoff = time.time() - self.max_age if self.max_age else None
+        for filename in filenames:
+            names = self._by_file.get(filename, [])
+            excess = len(names) - self.keep if self.keep else 0
+            for position, name in enumerate(names):
+                if position < excess or (cutoff is not None and self._entries[name]['time'] < cutoff):
+                    expired.append(name)
+        if not expired:
+            return []
+        self._append_index(*({'op': 'drop', 'name': name} for name in expired))
+        for name in expired:
+            self._forget(name)
+        if self._dead_bytes >= self.COMPACT_MIN_BYTES and self._dead_bytes > self.live_bytes():
+            self.compact()
+        return expired
+
+    def live_bytes(self) -> int:
+        """Return the bytes of the pack used by backups that are kept."""
+        with self._lock:
+            return sum(entry['length'] for entry in self._entries.values())
+
+    def stored_bytes(self) -> int:
+        """Return the bytes used on disk by the pack and the index."""
+        with self._lock:
+            total = self.index_file.stat().st_size
+            return total + (self.pack_file.stat().st_size if self.pack_file.exists() else 0)
+
+    def compact(self) -> None:
+        """Rewrite the pack without dropped backups, as a new generation."""
+        with self._lock:
+            self._close_map()
+            old_pack = self.pack_file
+            new_generation = self._generation + 1
+            new_pack = self.root / f"archive.{new_generation}.pack"
+            records = [{'op': 'pack', 'generation': new_generation}]
+            with open(new_pack, 'wb') as dst:
+                if old_pack.exists():
+                    with open(old_pack, 'rb') as src:
+                        for entry in self._entries.values():
+                            src.seek(entry['offset'])
+                            record = dict(entry, offset=dst.tell())
+                            remaining = entry['length']
+                            while remaining:
+                                chunk = src.read(min(remaining, self.COPY_CHUNK_SIZE))
+                                if not chunk:
+                                    raise IOError(f"Backup pack is truncated at {entry['name']}")
+                                dst.write(chunk)
+                                remaining -= len(chunk)
+                            records.append(record)
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            tmp_index = self.index_file.with_name(f"{self.INDEX_FILENAME}.{os.getpid()}.tmp")
+            with open(tmp_index, 'w', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(record) + '\n' for record in records))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_index, self.index_file)
+
+            self._generation = new_generation
+            self._entries = collections.OrderedDict((r['name'], r) for r in records[1:])
+            self._dead_bytes = 0
+            if old_pack.exists():
+                old_pack.unlink()
+
+    def import_legacy(self, directory: Path) -> int:
+        """
+        Move loose ``<file>.<YYYYmmdd_HHMMSS>.bak`` copies into the archive.
+
+        Args:
+            directory (Path): Directory holding the legacy backup copies
+
+        Returns:
+            int: Number of backups imported
+        """
+        legacy = []
+        for path in Path(directory).rglob('*.bak'):
+            match = self.LEGACY_PATTERN.match(path.relative_to(directory).as_posix())
+            if match and path.is_file():
+                created = datetime.strptime(match.group('stamp'), '%Y%m%d_%H%M%S')
+                legacy.append((created, match.group('file'), path))
+        for created, filename, path in sorted(legacy):
+            self.add(filename, path, created=created, name=path.relative_to(directory).as_posix())
+            path.unlink()
+        return len(legacy)
+
+    def close(self) -> None:
+        """Release the memory map of the pack."""
+        with self._lock:
+            self._close_map()
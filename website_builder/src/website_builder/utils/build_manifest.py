@@ -0,0 +1,107 @@
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+
+
+class BuildManifest:
+    """
+    Record of the input fingerprint behind each task's last output.
+
+    Stored as JSON next to the generated site. A task whose fingerprint
+    matches the recorded one can reuse its output file instead of calling
+    the LLM again.
+    """
+
+    FILENAME = '.build_manifest.json'
+
+    def __init__(self, output_dir: Path):
+        """
+        Initialize the BuildManifest.
+
+        Args:
+            output_dir (Path): Output directory of the site the manifest describes
+        """
+        self.path = Path(output_dir) / self.FILENAME
+        self._lock = threading.Lock()
+        self.entries: Dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                # A corrupt manifest only costs a full rebuild.
+                self.entries = {}
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        """
+        Hash the inputs of a task.
+
+        Returns:
+            str: SHA-256 hex digest of the canonical JSON encoding of the parts
+        """
+        encoded = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def lookup(self, task_name: str, fingerprint: str) -> Optional[dict]:
+        """
+        Find the recorded entry for a task if its inputs are unchanged.
+
+        Args:
+            task_name (str): Name of the task
+            fingerprint (str): Fingerprint of the task's current inputs
+
+        Returns:
+            Optional[dict]: The entry, or None if the task must be rerun
+        """
+        entry = self.entries.get(task_name)
+        if entry and entry.get('fingerprint') == fingerprint:
+            return entry
+        return None
+
+    def record(self, task_name: str, fingerprint: str, output_file: Optional[str]) -> None:
+        """
+        Record the fingerprint a task's output was produced from and save the manifest.
+
+        Args:
+            task_name (str): Name of the task
+            fingerprint (str): Fingerprint of the task's inputs
+            output_file (Optional[str]): Output file relative to the output directory
+        """
+        with self._lock:
+            self.entries[task_name] = {
+                'fingerprint': fingerprint,
+                'output_file': output_file,
+                'updated_at': datetime.now().isoformat(),
+            }
+            self._save()
+
+    def record_many(self, records: Dict[str, Tuple[str, Optional[str]]]) -> None:
+        """
+        Record several tasks and save the manifest once.
+
+        Args:
+            records (Dict[str, Tuple[str, Optional[str]]]): (fingerprint, output_file) by task name
+        """
+        updated_at = datetime.now().isoformat()
+        with self._lock:
+            for task_name, (fingerprint, output_file) in records.items():
+                self.entries[task_name] = {
+                    'fingerprint': fingerprint,
+                    'output_file': output_file,
+                    'updated_at': updated_at,
+                }
+            if records:
+                self._save()
+
+    def _save(self) -> None:
+        """Write the manifest atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,135 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+
+
+def write_durably(path: Path, data: str, fsync: bool = True) -> None:
+    """
+    Replace a file with ``data`` so that a crash leaves either the old or the new content.
+
+    The data is written to a temporary file, flushed to disk and renamed
+    over ``path``.
+
+    Args:
+        path (Path): File to write
+        data (str): New content
+        fsync (bool): Flush the data to disk before the rename. Without it the
+            replacement still survives a crash of the process, but not
+            necessarily a power loss.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CheckpointStore:
+    """
+    Durable record of each completed pipeline task of a build.
+
+    Every task gets its own JSON file under ``.checkpoints/`` in the output
+    directory holding its raw output and the fingerprint of its inputs, so a
+    build interrupted part way can resume after the last completed task
+    without calling the LLM for it again.
+
+    Checkpoints are replaced atomically but not fsynced one by one, which
+    would cost a flush per task; a build committing its files in a
+    transaction flushes them with those. A power loss before that can only lose checkpoints, whose tasks
+    then run again, since torn checkpoints fail their hash check.
+    """
+
+    DIRNAME = '.checkpoints'
+
+    def __init__(self, output_dir: Path):
+        """
+        Initialize the CheckpointStore.
+
+        Args:
+            output_dir (Path): Output directory of the build
+        """
+        self.directory = Path(output_dir) / self.DIRNAME
+
+    def _path(self, task_name: str) -> Path:
+        return self.directory / f"{task_name}.json"
+
+    def load(self, task_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a task's checkpoint.
+
+        Args:
+            task_name (str): Name of the task
+
+        Returns:
+            Optional[Dict[str, Any]]: The checkpoint, or None if there is none or it is corrupt
+        """
+        try:
+            with open(self._path(task_name), 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (IOError, ValueError):
+            return None
+        output = checkpoint.get('output')
+        if not isinstance(output, str) or \
+                hashlib.sha256(output.encode('utf-8')).hexdigest() != checkpoint.get('sha256'):
+            return None
+        return checkpoint
+
+    def lookup(self, task_name: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a task's checkpoint if it was produced from the same inputs.
+
+        Args:
+            task_name (str): Name of the task
+            fingerprint (str): Fingerprint of the task's current inputs
+
+        Returns:
+            Optional[Dict[str, Any]]: The checkpoint, or None if the task must be run
+        """
+        checkpoint = self.load(task_name)
+        if checkpoint and checkpoint.get('fingerprint') == fingerprint:
+            return checkpoint
+        return None
+
+    def save(self, task_name: str, fingerprint: str, output: str, output_file: Optional[str] = None) -> Path:
+        """
+        Record a completed task.
+
+        Args:
+            task_name (str): Name of the task
+            fingerprint (str): Fingerprint of the task's inputs
+            output (str): Raw output of the task
+            output_file (Optional[str]): Output file relative to the output directory
+
+        Returns:
+            Path: Path to the checkpoint file
+
+        Raises:
+            IOError: If the checkpoint cannot be written
+        """
+        checkpoint = {
+            'task': task_name,
+            'fingerprint': fingerprint,
+            'output_file': output_file,
+            'sha256': hashlib.sha256(output.encode('utf-8')).hexdigest(),
+            'completed_at': datetime.now().isoformat(),
+            'output': output,
+        }
+        path = self._path(task_name)
+        try:
+            write_durably(path, json.dumps(checkpoint, indent=2), fsync=False)
+        except (IOError, OSError) as e:
+            raise IOError(f"Error writing checkpoint for {task_name}: {str(e)}")
+        return path
+
+    def completed(self) -> List[str]:
+        """Return the names of the tasks with a valid checkpoint."""
+        if not self.directory.exists():
+            return []
+        return sorted(path.stem for path in self.directory.glob('*.json') if self.load(path.stem))
+
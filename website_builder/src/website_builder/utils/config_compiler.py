@@ -0,0 +1,261 @@
+from pathlib import Path
+from string import Formatter
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import marshal
+import os
+import threading
+
+from .config_validator import AGENT_SCHEMA, TASK_SCHEMA, VALIDATOR_VERSION, ConfigValidator
+
+# Bump when the compiled representation changes so stale cache files are ignored
+COMPILER_VERSION = 1
+# Folded into every digest, so configs compiled under other validation rules are not reused
+RULES_FINGERPRINT = repr((COMPILER_VERSION, VALIDATOR_VERSION, AGENT_SCHEMA, TASK_SCHEMA)).encode('utf-8')
+
+
+def _compile_template(value: str) -> Any:
+    """
+    Pre-split a format string into literal text and fields.
+
+    Returns the string itself if it has no fields. Otherwise returns a tuple
+    whose items are literal strings or ``(field_name, format_spec)`` pairs;
+    strings using conversions, attribute or index lookups compile to
+    ``(None, value)`` and are rendered with ``str.format``. Tuples never
+    occur in parsed YAML, so they unambiguously mark templates.
+    """
+    parts = []
+    for literal, field, spec, conversion in Formatter().parse(value):
+        if literal:
+            parts.append(literal)
+        if field is None:
+            continue
+        if conversion or not field.isidentifier() or (spec and '{' in spec):
+            return (None, value)
+        parts.append((field, spec or ''))
+    if all(isinstance(part, str) for part in parts):
+        # No fields; only escaped braces may have changed
+        return ''.join(parts)
+    return tuple(parts)
+
+
+def _compile(node: Any) -> Any:
+    """Compile every string in a parsed config tree into a template."""
+    if isinstance(node, str):
+        return _compile_template(node)
+    if isinstance(node, dict):
+        return {key: _compile(value) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_compile(value) for value in node]
+    return node
+
+
+def _render(node: Any, variables: Dict[str, Any]) -> Any:
+    """Render a compiled config tree into fresh dicts and lists."""
+    if isinstance(node, tuple):
+        if node[0] is None:
+            return node[1].format(**variables)
+        return ''.join(
+            part if isinstance(part, str) else format(variables[part[0]], part[1])
+            for part in node
+        )
+    if isinstance(node, dict):
+        return {key: _render(value, variables) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_render(value, variables) for value in node]
+    return node
+
+
+class CompiledConfig:
+    """
+    Parsed and validated agent and task configurations.
+
+    Strings are pre-split into templates, so rendering for a topic neither
+    re-parses YAML nor re-validates nor re-scans the format strings.
+    """
+
+    def __init__(self, agents_config: Dict[str, Any], tasks_config: Dict[str, Any], digest: str):
+        """
+        Initialize the CompiledConfig.
+
+        Args:
+            agents_config (Dict[str, Any]): Parsed agents configuration
+            tasks_config (Dict[str, Any]): Parsed tasks configuration
+            digest (str): Hash of the source files the configuration was compiled from
+        """
+        self.agents_config = agents_config
+        self.tasks_config = tasks_config
+        self.digest = digest
+        self._agents = _compile(agents_config)
+        self._tasks = _compile(tasks_config)
+
+    def render(self, **variables: Any) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Fill in the template variables.
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, Any]]: New agents and tasks configurations,
+                safe to mutate
+
+        Raises:
+            KeyError: If a string references a variable that was not given
+        """
+        return _render(self._agents, variables), _render(self._tasks, variables)
+
+    def dumps(self) -> bytes:
+        """
+        Serialize with marshal, which handles the builtin types configs are usually made of.
+
+        Raises:
+            ValueError: If the config holds a value marshal cannot serialize, such as a YAML date
+        """
+        return marshal.dumps((COMPILER_VERSION, self.digest, self.agents_config, self.tasks_config,
+                              self._agents, self._tasks))
+
+    @classmethod
+    def loads(cls, data: bytes) -> 'CompiledConfig':
+        """
+        Deserialize a config written by ``dumps``.
+
+        Raises:
+            ValueError: If the data is corrupt or from another compiler version
+        """
+        try:
+            version, digest, agents_config, tasks_config, agents, tasks = marshal.loads(data)
+        except (EOFError, TypeError, ValueError) as e:
+            raise ValueError(f"Corrupt compiled config: {str(e)}")
+        if version != COMPILER_VERSION:
+            raise ValueError(f"Compiled config version {version} does not match {COMPILER_VERSION}")
+        compiled = cls.__new__(cls)
+        compiled.agents_config = agents_config
+        compiled.tasks_config = tasks_config
+        compiled.digest = digest
+        compiled._agents = agents
+        compiled._tasks = tasks
+        return compiled
+
+
+class ConfigCompiler:
+    """
+    Loads agents.yaml and tasks.yaml once per change.
+
+    Results are cached in memory, keyed by the files' modification time and
+    size with a content hash as fallback, and optionally on disk as marshal
+    files keyed by the content hash so new processes skip parsing too.
+    """
+
+    _shared: Optional['ConfigCompiler'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Initialize the ConfigCompiler.
+
+        Args:
+            cache_dir (Optional[str]): Directory for compiled configs on disk. If None,
+                results are only cached in memory.
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.compilations = 0
+        self._by_paths: Dict[Tuple[str, str], Tuple[Any, CompiledConfig]] = {}
+        self._by_digest: Dict[str, CompiledConfig] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'ConfigCompiler':
+        """Return the process-wide compiler used by BuilderResources."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def compile(self, agents_path: str, tasks_path: str, cache_dir: Optional[str] = None) -> CompiledConfig:
+        """
+        Load, validate and compile a pair of config files, reusing earlier results.
+
+        Args:
+            agents_path (str): Path to agents.yaml
+            tasks_path (str): Path to tasks.yaml
+            cache_dir (Optional[str]): Directory for compiled configs on disk, overriding
+                the compiler's own
+
+        Returns:
+            CompiledConfig: The compiled configuration
+
+        Raises:
+            IOError: If a file cannot be read
+            ValueError: If the configuration is invalid
+        """
+        key = (os.path.abspath(agents_path), os.path.abspath(tasks_path))
+        try:
+            signature = (self._signature(agents_path), self._signature(tasks_path))
+        except OSError as e:
+            raise IOError(f"Error reading config file: {str(e)}")
+
+        with self._lock:
+            cached = self._by_paths.get(key)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+            sources = []
+            for path in key:
+                try:
+                    with open(path, 'rb') as f:
+                        sources.append(f.read())
+                except IOError as e:
+                    raise IOError(f"Error reading config file {path}: {str(e)}")
+            digest = hashlib.sha256(
+                b'\0'.join([RULES_FINGERPRINT] + sources)
+            ).hexdigest()
+
+            compiled = self._by_digest.get(digest)
+            if compiled is None:
+                compiled = self._load_from_disk(digest, cache_dir)
+            if compiled is None:
+                compiled = self._compile_sources(key, sources, digest)
+                self._save_to_disk(compiled, cache_dir)
+            self._by_digest[digest] = compiled
+            self._by_paths[key] = (signature, compiled)
+            return compiled
+
+    def _compile_sources(self, paths: Tuple[str, str], sources: list, digest: str) -> CompiledConfig:
+        """Parse, validate and compile the file contents."""
+        # The validator reparses and rechecks only the entries that changed since its last load
+        agents_config, tasks_config = ConfigValidator.validate_files(
+            paths[0], paths[1], sources=(sources[0].decode('utf-8'), sources[1].decode('utf-8')))
+        self.compilations += 1
+        return CompiledConfig(agents_config, tasks_config, digest)
+
+    def _cache_path(self, digest: str, cache_dir: Optional[str]) -> Optional[Path]:
+        directory = Path(cache_dir) if cache_dir else self.cache_dir
+        return directory / 'configs' / f"{digest}.marshal" if directory else None
+
+    def _load_from_disk(self, digest: str, cache_dir: Optional[str]) -> Optional[CompiledConfig]:
+        path = self._cache_path(digest, cache_dir)
+        if path is None or not path.exists():
+            return None
+        try:
+            compiled = CompiledConfig.loads(path.read_bytes())
+        except (OSError, ValueError):
+            # A corrupt or outdated cache file only costs a recompile
+            return None
+        return compiled if compiled.digest == digest else None
+
+    def _save_to_disk(self, compiled: CompiledConfig, cache_dir: Optional[str]) -> None:
+        path = self._cache_path(compiled.digest, cache_dir)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(compiled.dumps())
+            os.replace(tmp_path, path)
+        except (OSError, ValueError):
+            # The on-disk cache is an optimization; failing to write it, or configs holding
+            # values marshal cannot serialize such as YAML dates, only cost a recompile
+            pass
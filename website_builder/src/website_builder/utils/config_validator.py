@@ -1,14 +1,157 @@
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import yaml
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, Iterable, List, Optional, Sequence, Tuple
+import os
 import sys
 import re
+import threading
+
+from .task_graph import TaskGraph
+
+# libyaml's loader parses several times faster when PyYAML was built with it
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Declarative rules for the entries of agents.yaml and tasks.yaml. Supported
+# keys: required, type, min_length, uppercase, period, prefix, items (type of
+# list items), references ((config, noun) of the entries the value names),
+# and label/item_label to use in messages instead of the field name.
+AGENT_SCHEMA: Dict[str, Dict[str, Any]] = {
+    'role': {'required': True, 'type': str, 'min_length': 3, 'uppercase': True},
+    'goal': {'required': True, 'type': str, 'min_length': 10, 'period': True},
+    'backstory': {'required': True, 'type': str, 'min_length': 50, 'period': True},
+    'allow_delegation': {'type': bool},
+    'verbose': {'type': bool},
+}
+TASK_SCHEMA: Dict[str, Dict[str, Any]] = {
+    'description': {'required': True, 'type': str, 'min_length': 20, 'period': True},
+    'expected_output': {'required': True, 'type': str, 'min_length': 20, 'period': True,
+                        'label': 'expected output'},
+    'agent': {'required': True, 'type': str, 'references': ('agents', 'agent')},
+    'output_file': {'required': True, 'type': str, 'prefix': 'output/'},
+    'context': {'required': True, 'type': list},
+    'dependencies': {'type': list, 'items': str, 'item_label': 'dependency',
+                     'references': ('tasks', 'dependency')},
+}
+
+# Bump when the checks change in ways the schemas above do not show, so compiled
+# configs cached on disk are validated again
+VALIDATOR_VERSION = 1
+
+TYPE_NAMES = {str: 'a string', bool: 'a boolean', list: 'a list', dict: 'a dictionary', int: 'an integer'}
+
+# A top-level YAML entry starts at a line that is neither indented nor a comment
+ENTRY_START = re.compile(r'^(?=[^\s#])', re.MULTILINE)
+
+# Check of one entry: (entry name, entry) -> errors
+EntryCheck = Callable[[Any, Any], List[str]]
+
+_MISSING = object()
+
+
+def _rule(failed: Callable[[Any], bool], message: str) -> Callable[[Any], Sequence[str]]:
+    """Make a check of a field's value reporting ``message`` when ``failed`` holds."""
+    failure = (message,)
+    return lambda value: failure if failed(value) else ()
+
+
+def _items_rule(item_type: type, message: str) -> Callable[[Any], Sequence[str]]:
+    """Make a check of a list's items reporting ``message`` for each item of another type."""
+    return lambda value: [message for item in value if not isinstance(item, item_type)]
+
+
+def compile_schema(kind: str, schema: Dict[str, Dict[str, Any]]) -> EntryCheck:
+    """
+    Compile a declarative schema into a check of one config entry.
+
+    Every rule becomes a small closure with its message prepared, so
+    checking an entry only loops over the closures of its fields.
+
+    Args:
+        kind (str): Entry kind used in messages, e.g. 'Agent'
+        schema (Dict[str, Dict[str, Any]]): Rules per field
+
+    Returns:
+        EntryCheck: Function of an entry's name and content returning its errors,
+            cross-references excluded
+
+    Raises:
+        ValueError: If a rule is not supported
+    """
+    required = [(field, f"' is missing required field '{field}'")
+                for field, rule in schema.items() if rule.get('required')]
+    # (field, type or None, message if the type is wrong, checks of a value of the right type)
+    fields: List[Tuple[str, Optional[type], str, List[Callable[[Any], Sequence[str]]]]] = []
+    for field, rule in schema.items():
+        unknown = set(rule) - {'required', 'type', 'min_length', 'uppercase', 'period', 'prefix', 'items',
+                               'references', 'label', 'item_label'}
+        if unknown:
+            raise ValueError(f"Unsupported rules for {kind} field '{field}': {', '.join(sorted(unknown))}")
+        label = rule.get('label', field)
+        type_message = ''
+        if 'type' in rule:
+            type_name = TYPE_NAMES.get(rule['type'], rule['type'].__name__)
+            # Required fields name the field in quotes, optional ones plainly
+            type_message = (f"' field '{field}' must be {type_name}" if rule.get('required')
+                            else f"' {field} must be {type_name}")
+        checks = []
+        if 'min_length' in rule:
+            checks.append(_rule(lambda value, min_length=int(rule['min_length']): len(value) < min_length,
+                                f"' {label} must be at least {rule['min_length']} characters long"))
+        if rule.get('uppercase'):
+            checks.append(_rule(lambda value: value.lower() == value,
+                                f"' {label} should contain at least one uppercase letter"))
+        if rule.get('period'):
+            checks.append(_rule(lambda value: not value.endswith('.'), f"' {label} should end with a period"))
+        if 'prefix' in rule:
+            prefix = rule['prefix']
+            checks.append(_rule(lambda value, prefix=prefix: not value.startswith(prefix),
+                                f"' {label} must start with '{prefix}'"))
+        if 'items' in rule:
+            item_type = rule['items']
+            checks.append(_items_rule(item_type, f"' {rule.get('item_label', field)} must be "
+                                                 f"{TYPE_NAMES.get(item_type, item_type.__name__)}"))
+        fields.append((field, rule.get('type'), type_message, checks))
+
+    def check(name: Any, entry: Any) -> List[str]:
+        start = f"{kind} '{name}"
+        if not isinstance(entry, dict):
+            return [f"{start}' configuration must be a dictionary"]
+        errors = [start + message for field, message in required if field not in entry]
+        for field, value_type, type_message, value_checks in fields:
+            value = entry.get(field, _MISSING)
+            if value is _MISSING:
+                continue
+            if value_type is not None and not isinstance(value, value_type):
+                errors.append(start + type_message)
+                continue
+            for value_check in value_checks:
+                errors.extend(start + message for message in value_check(value))
+        return errors
+
+    return check
+
+
+def _references(kind: str, schema: Dict[str, Dict[str, Any]]) -> List[Tuple[str, str, str, Any]]:
+    """List the (field, config, message, type) of a schema's cross-reference rules."""
+    return [
+        (field, rule['references'][0], f"references non-existent {rule['references'][1]}", rule.get('type'))
+        for field, rule in schema.items() if 'references' in rule
+    ]
+
 
 class ConfigValidator:
-    """Utility class for validating YAML configuration files."""
+    """
+    Utility class for validating YAML configuration files.
+
+    The schemas are compiled once into checks. Config files are split into
+    their top-level entries, and an edited file only has its changed
+    entries parsed and checked again; cross-references and dependency
+    cycles are rechecked in time linear in the size of the configs.
+    """
     
-    REQUIRED_AGENT_FIELDS = ['role', 'goal', 'backstory']
-    REQUIRED_TASK_FIELDS = ['description', 'expected_output', 'agent', 'output_file', 'context']
+    REQUIRED_AGENT_FIELDS = [field for field, rule in AGENT_SCHEMA.items() if rule.get('required')]
+    REQUIRED_TASK_FIELDS = [field for field, rule in TASK_SCHEMA.items() if rule.get('required')]
     
     URL_PATTERN = re.compile(
         r'^https?://'
@@ -17,6 +160,15 @@ class ConfigValidator:
         r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
         r'(?::\d+)?'
         r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
+    _checks: Dict[str, EntryCheck] = {
+        'Agent': compile_schema('Agent', AGENT_SCHEMA),
+        'Task': compile_schema('Task', TASK_SCHEMA),
+    }
+    _task_references = _references('Task', TASK_SCHEMA)
+    # (kind, path) -> (file signature, entry source -> (name, entry, errors), config, errors)
+    _files: Dict[Tuple[str, str], Tuple[Any, Dict[str, Any], Dict[str, Any], List[str]]] = {}
+    _files_lock = threading.Lock()
     
     @staticmethod
     def load_yaml(file_path: str) -> Dict[str, Any]:
@@ -35,12 +187,148 @@ class ConfigValidator:
         """
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=SafeLoader)
         except IOError as e:
             raise IOError(f"Error reading config file {file_path}: {str(e)}")
         except yaml.YAMLError as e:
             raise yaml.YAMLError(f"Error parsing YAML in {file_path}: {str(e)}")
     
+    @classmethod
+    def load_entries(cls, kind: str, file_path: str,
+                     source: Optional[str] = None) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Load a config file and check its entries, reusing unchanged ones.
+
+        The file is split into its top-level entries. Entries whose text is
+        the same as in the previous load of the file keep their parsed
+        content and errors; only the others are parsed and checked. Files
+        the split does not apply to, e.g. ones using anchors across
+        entries, are parsed and checked as a whole.
+
+        Args:
+            kind (str): 'Agent' or 'Task'
+            file_path (str): Path to the YAML file
+            source (Optional[str]): The file's content, if already read
+
+        Returns:
+            Tuple[Dict[str, Any], List[str]]: The parsed config, shared and not to be
+                modified, and the errors of its entries, cross-references excluded
+
+        Raises:
+            IOError: If there's an error reading the file
+            yaml.YAMLError: If there's an error parsing the YAML
+            ValueError: If the file does not map names to entries
+        """
+        check = cls._checks[kind]
+        key = (kind, os.path.abspath(file_path))
+        cached = cls._files.get(key)
+        signature = None
+        if source is None:
+            try:
+                stat = os.stat(file_path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if cached is not None and cached[0] == signature:
+                    return cached[2], list(cached[3])
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    source = f.read()
+            except (IOError, OSError) as e:
+                raise IOError(f"Error reading config file {file_path}: {str(e)}")
+
+        previous = cached[1] if cached is not None else {}
+        entries: Dict[str, Any] = {}
+        config: Dict[str, Any] = {}
+        errors: List[str] = []
+        for text in ENTRY_START.split(source):
+            if not text:
+                continue
+            entry = previous.get(text)
+            if entry is None:
+                try:
+                    data = yaml.load(text, Loader=SafeLoader)
+                except yaml.YAMLError:
+                    entries = None
+                    break
+                if data is None:
+                    # Only blank lines and comments
+                    entry = ()
+                elif isinstance(data, dict) and len(data) == 1:
+                    name, value = next(iter(data.items()))
+                    entry = (name, value, check(name, value))
+                else:
+                    entries = None
+                    break
+            entries[text] = entry
+            if entry:
+                if entry[0] in config:
+                    # Duplicate names; leave their resolution to the parser
+                    entries = None
+                    break
+                config[entry[0]] = entry[1]
+                errors.extend(entry[2])
+
+        if entries is None:
+            try:
+                config = yaml.load(source, Loader=SafeLoader)
+            except yaml.YAMLError as e:
+                raise yaml.YAMLError(f"Error parsing YAML in {file_path}: {str(e)}")
+            if not isinstance(config, dict):
+                raise ValueError(f"Config file {file_path} must map names to {kind.lower()} settings")
+            entries = {}
+            errors = [error for name, value in config.items() for error in check(name, value)]
+        with cls._files_lock:
+            cls._files[key] = (signature, entries, config, errors)
+        return config, list(errors)
+
+    @classmethod
+    def _check_references(cls, tasks_config: Dict[str, Any], agents_config: Dict[str, Any]) -> List[str]:
+        """Check that tasks only name agents and tasks that exist, and that they have no cycles."""
+        configs = {'agents': agents_config, 'tasks': tasks_config}
+        references = [(field, configs[target], message, expected or object)
+                      for field, target, message, expected in cls._task_references]
+        errors = []
+        for name, entry in tasks_config.items():
+            if not isinstance(entry, dict):
+                continue
+            for field, names, message, expected in references:
+                value = entry.get(field)
+                if value is None or not isinstance(value, expected):
+                    continue
+                if isinstance(value, list):
+                    missing = [reference for reference in value
+                               if isinstance(reference, str) and reference not in names]
+                elif isinstance(value, str) and value not in names:
+                    missing = [value]
+                else:
+                    continue
+                errors.extend(f"Task '{name}' {message} '{reference}'" for reference in missing)
+        cycle = cls.find_dependency_cycle(tasks_config)
+        if cycle:
+            errors.append(f"Task dependency cycle detected: {' -> '.join(str(name) for name in cycle)}")
+        return errors
+
+    @staticmethod
+    def find_dependency_cycle(config: Dict[str, Any]) -> Optional[List[str]]:
+        """
+        Find a cycle among the tasks' dependencies and context, in linear time.
+
+        References to unknown tasks are ignored; they are reported separately.
+
+        Args:
+            config (Dict[str, Any]): Tasks configuration dictionary
+
+        Returns:
+            Optional[List[str]]: Task names forming the cycle, first name repeated at the end
+        """
+        dependencies = {}
+        for name, entry in config.items():
+            names: List[str] = []
+            if isinstance(entry, dict):
+                for value in (entry.get('dependencies'), entry.get('context')):
+                    if isinstance(value, list):
+                        names += [dep for dep in value if isinstance(dep, str) and dep in config]
+            dependencies[name] = names
+        return TaskGraph(dependencies).find_cycle()
+
     @classmethod
     def validate_agents_config(cls, config: Dict[str, Any]) -> List[str]:
         """
@@ -52,48 +340,8 @@ class ConfigValidator:
         Returns:
             List[str]: List of validation errors, empty if valid
         """
-        errors = []
-        for agent_name, agent_config in config.items():
-            if not isinstance(agent_config, dict):
-                errors.append(f"Agent '{agent_name}' configuration must be a dictionary")
-                continue
-                
-            for field in cls.REQUIRED_AGENT_FIELDS:
-                if field not in agent_config:
-                    errors.append(f"Agent '{agent_name}' is missing required field '{field}'")
-                elif not isinstance(agent_config[field], str):
-                    errors.append(f"Agent '{agent_name}' field '{field}' must be a string")
-            
-            if 'role' in agent_config:
-                role = agent_config['role']
-                if len(role) < 3:
-                    errors.append(f"Agent '{agent_name}' role must be at least 3 characters long")
-                if not any(c.isupper() for c in role):
-                    errors.append(f"Agent '{agent_name}' role should contain at least one uppercase letter")
-            
-            if 'goal' in agent_config:
-                goal = agent_config['goal']
-                if len(goal) < 10:
-                    errors.append(f"Agent '{agent_name}' goal must be at least 10 characters long")
-                if not goal.endswith('.'):
-                    errors.append(f"Agent '{agent_name}' goal should end with a period")
-            
-            if 'backstory' in agent_config:
-                backstory = agent_config['backstory']
-                if len(backstory) < 50:
-                    errors.append(f"Agent '{agent_name}' backstory must be at least 50 characters long")
-                if not backstory.endswith('.'):
-                    errors.append(f"Agent '{agent_name}' backstory should end with a period")
-            
-            if 'allow_delegation' in agent_config:
-                if not isinstance(agent_config['allow_delegation'], bool):
-                    errors.append(f"Agent '{agent_name}' allow_delegation must be a boolean")
-            
-            if 'verbose' in agent_config:
-                if not isinstance(agent_config['verbose'], bool):
-                    errors.append(f"Agent '{agent_name}' verbose must be a boolean")
-        
-        return errors
+        check = cls._checks['Agent']
+        return [error for name, entry in config.items() for error in check(name, entry)]
     
     @classmethod
     def validate_tasks_config(cls, config: Dict[str, Any], agents_config: Dict[str, Any]) -> List[str]:
@@ -107,65 +355,44 @@ class ConfigValidator:
         Returns:
             List[str]: List of validation errors, empty if valid
         """
-        errors = []
-        for task_name, task_config in config.items():
-            if not isinstance(task_config, dict):
-                errors.append(f"Task '{task_name}' configuration must be a dictionary")
-                continue
-                
-            for field in cls.REQUIRED_TASK_FIELDS:
-                if field not in task_config:
-                    errors.append(f"Task '{task_name}' is missing required field '{field}'")
-                elif field in ['description', 'expected_output'] and not isinstance(task_config[field], str):
-                    errors.append(f"Task '{task_name}' field '{field}' must be a string")
-                elif field == 'agent' and not isinstance(task_config[field], str):
-                    errors.append(f"Task '{task_name}' field '{field}' must be a string")
-                elif field == 'context' and not isinstance(task_config[field], list):
-                    errors.append(f"Task '{task_name}' field '{field}' must be a list")
-            
-            if 'agent' in task_config:
-                agent_name = task_config['agent']
-                if agent_name not in agents_config:
-                    errors.append(f"Task '{task_name}' references non-existent agent '{agent_name}'")
-            
-            if 'description' in task_config:
-                description = task_config['description']
-                if len(description) < 20:
-                    errors.append(f"Task '{task_name}' description must be at least 20 characters long")
-                if not description.endswith('.'):
-                    errors.append(f"Task '{task_name}' description should end with a period")
-            
-            if 'expected_output' in task_config:
-                expected_output = task_config['expected_output']
-                if len(expected_output) < 20:
-                    errors.append(f"Task '{task_name}' expected output must be at least 20 characters long")
-                if not expected_output.endswith('.'):
-                    errors.append(f"Task '{task_name}' expected output should end with a period")
-            
-            if 'output_file' in task_config:
-                output_file = task_config['output_file']
-                if not isinstance(output_file, str):
-                    errors.append(f"Task '{task_name}' output_file must be a string")
-                elif not output_file.startswith('output/'):
-                    errors.append(f"Task '{task_name}' output_file must start with 'output/'")
-            
-            if 'dependencies' in task_config:
-                dependencies = task_config['dependencies']
-                if not isinstance(dependencies, list):
-                    errors.append(f"Task '{task_name}' dependencies must be a list")
-                else:
-                    for dep in dependencies:
-                        if not isinstance(dep, str):
-                            errors.append(f"Task '{task_name}' dependency must be a string")
-                        elif dep not in config:
-                            errors.append(f"Task '{task_name}' references non-existent dependency '{dep}'")
-        
-        return errors
+        check = cls._checks['Task']
+        errors = [error for name, entry in config.items() for error in check(name, entry)]
+        return errors + cls._check_references(config, agents_config)
+    
+    @classmethod
+    def validate_files(cls, agents_path: str, tasks_path: str,
+                       sources: Optional[Tuple[str, str]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Load and validate agents and tasks configuration files incrementally.
+
+        Args:
+            agents_path (str): Path to agents configuration file
+            tasks_path (str): Path to tasks configuration file
+            sources (Optional[Tuple[str, str]]): The files' contents, if already read
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, Any]]: The agents and tasks configurations,
+                shared and not to be modified
+
+        Raises:
+            IOError: If there's an error reading a file
+            yaml.YAMLError: If there's an error parsing the YAML
+            ValueError: If there are validation errors
+        """
+        agents_source, tasks_source = sources or (None, None)
+        agents_config, agent_errors = cls.load_entries('Agent', agents_path, agents_source)
+        tasks_config, task_errors = cls.load_entries('Task', tasks_path, tasks_source)
+        task_errors += cls._check_references(tasks_config, agents_config)
+        cls._raise_errors(agent_errors, task_errors)
+        return agents_config, tasks_config
     
     @classmethod
     def validate_configs(cls, agents_path: str, tasks_path: str) -> None:
         """
         Validate both agents and tasks configuration files.
+
+        Unchanged files are not parsed again, and in changed ones only the
+        changed entries are.
         
         Args:
             agents_path (str): Path to agents configuration file
@@ -174,16 +401,86 @@ class ConfigValidator:
         Raises:
             ValueError: If there are validation errors
         """
-        agents_config = cls.load_yaml(agents_path)
-        tasks_config = cls.load_yaml(tasks_path)
-        
-        agent_errors = cls.validate_agents_config(agents_config)
-        task_errors = cls.validate_tasks_config(tasks_config, agents_config)
+        cls.validate_files(agents_path, tasks_path)
+    
+    @classmethod
+    def validate(cls, agents_config: Dict[str, Any], tasks_config: Dict[str, Any]) -> None:
+        """
+        Validate already parsed agents and tasks configurations.
         
+        Args:
+            agents_config (Dict[str, Any]): Agents configuration dictionary
+            tasks_config (Dict[str, Any]): Tasks configuration dictionary
+            
+        Raises:
+            ValueError: If there are validation errors
+        """
+        cls._raise_errors(cls.validate_agents_config(agents_config),
+                          cls.validate_tasks_config(tasks_config, agents_config))
+
+    @staticmethod
+    def _raise_errors(agent_errors: List[str], task_errors: List[str]) -> None:
         if agent_errors or task_errors:
             error_msg = "Configuration validation failed:\n"
             if agent_errors:
                 error_msg += "\nAgent configuration errors:\n" + "\n".join(f"- {e}" for e in agent_errors)
             if task_errors:
                 error_msg += "\nTask configuration errors:\n" + "\n".join(f"- {e}" for e in task_errors)
-            raise ValueError(error_msg) 
\ No newline at end of file
+            raise ValueError(error_msg)
+
+
+def find_config_sets(directory: str) -> List[str]:
+    """
+    Find the config sets under a directory.
+
+    A config set is a directory holding agents.yaml and tasks.yaml; the
+    directory itself is one, or else each of its subdirectories that is.
+
+    Args:
+        directory (str): Directory to search
+
+    Returns:
+        List[str]: The config set directories, sorted
+    """
+    root = Path(directory)
+    if (root / 'agents.yaml').is_file() and (root / 'tasks.yaml').is_file():
+        return [str(root)]
+    return sorted(str(path.parent) for path in root.glob('*/agents.yaml') if (path.parent / 'tasks.yaml').is_file())
+
+
+def validate_config_set(directory: str) -> Optional[str]:
+    """
+    Validate the agents.yaml and tasks.yaml of one config set.
+
+    Args:
+        directory (str): The config set directory
+
+    Returns:
+        Optional[str]: The validation errors, or None if the set is valid
+    """
+    try:
+        ConfigValidator.validate_configs(os.path.join(directory, 'agents.yaml'),
+                                         os.path.join(directory, 'tasks.yaml'))
+    except (IOError, ValueError, yaml.YAMLError) as e:
+        return str(e)
+    return None
+
+
+def validate_config_sets(directories: Iterable[str], workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+    """
+    Validate many config sets, in parallel worker processes.
+
+    Args:
+        directories (Iterable[str]): Config set directories
+        workers (Optional[int]): Worker processes; 1 validates in the calling process,
+            None uses one per CPU
+
+    Returns:
+        Dict[str, Optional[str]]: Errors of each directory, None for valid sets, in input order
+    """
+    directories = list(directories)
+    if workers == 1 or len(directories) < 2:
+        return {directory: validate_config_set(directory) for directory in directories}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(directories) // ((workers or os.cpu_count() or 1) * 4))
+        return dict(zip(directories, executor.map(validate_config_set, directories, chunksize=chunksize)))
@@ -0,0 +1,544 @@
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from pathlib import PurePosixPath
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+import hashlib
+import math
+import re
+import threading
+import time
+import yaml
+
+from website_builder.utils.critical_css import Element, parse_css, parse_html, split_selectors
+from website_builder.utils.metrics import estimate_tokens
+
+# Kinds of research facts, in the order they are described in context_budget.yaml
+FACT_KINDS = ('outline', 'summary', 'term', 'example', 'point')
+# Weight of each kind of fact when ranking facts equally relevant to a task
+KIND_WEIGHTS = {'summary': 3.0, 'term': 2.5, 'example': 2.0, 'point': 1.0}
+DEFAULT_BUDGET = 1500
+# Facts longer than this are split, so unpunctuated text still fits a budget
+MAX_FACT_TOKENS = 80
+# Share of a task's budget kept for research when it also gets pages or stylesheets
+RESEARCH_SHARE = 0.5
+# Separator between upstream outputs, as in uncompressed context
+CONTEXT_SEPARATOR = "\n\n----------\n\n"
+TRUNCATED = "[... truncated]"
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_BOLD_HEADING = re.compile(r'^(?:\*\*|__)([^*_]{1,80})(?:\*\*|__):?$')
+_LIST_ITEM = re.compile(r'^(\s*)(?:[-*+]|\d{1,3}[.)])\s+(.*)$')
+_FENCE = re.compile(r'^\s*(```|~~~)')
+_TERM = re.compile(r'^(?:\*\*|__)?([A-Za-z0-9][^:*_]{0,58}?)(?:\*\*|__)?\s*(?::|\s[–—-]\s)\s*(\S.{9,})$')
+_EXAMPLE_CUE = re.compile(r'\b(?:for example|for instance|e\.g\.|such as|examples?|case stud(?:y|ies)|used by|'
+                          r'success stor(?:y|ies))\b', re.IGNORECASE)
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=["\'(\[]?[A-Z0-9])')
+_WORD = re.compile(r'[a-z0-9]+(?:[\'-][a-z0-9]+)*')
+_CUSTOM_PROPERTY = re.compile(r'(--[\w-]+)\s*:\s*([^;]+)')
+STOPWORDS = frozenset((
+    'a about above after all also an and any are as at be been being both but by can could did do does each '
+    'for from had has have how if in into is it its more most must no not of on only or other our should so '
+    'such than that the their them then there these they this those through to use used using was we were '
+    'what when where which while who will with within without would you your'
+).split())
+# Attributes kept in page outlines: what stylesheets and scripts select on, and what the page loads
+OUTLINE_ATTRIBUTES = ('id', 'class', 'type', 'role', 'rel', 'href', 'src', 'for', 'name')
+
+
+def _words(text: str) -> FrozenSet[str]:
+    """Return the distinct content words of a text."""
+    return frozenset(w for w in _WORD.findall(text.lower()) if w not in STOPWORDS and len(w) > 2)
+
+
+@dataclass
+class Fact:
+    """One statement of a research document and the section it belongs to."""
+
+    kind: str
+    section: str
+    text: str
+    position: int
+    tokens: int = 0
+    words: FrozenSet[str] = frozenset()
+    # Index of the heading the fact is under; a section name may occur more than once
+    block: int = 0
+
+
+@dataclass
+class ResearchFacts:
+    """The facts of a research document, extracted once and sliced per task."""
+
+    sections: List[str]
+    facts: List[Fact]
+    tokens: int
+    document_frequency: Dict[str, int] = field(default_factory=dict)
+
+    def select(self, query: str, budget: int, include: Sequence[str] = FACT_KINDS) -> str:
+        """
+        Return the facts most relevant to a task, within a token budget.
+
+        Facts are ranked by the weight of their kind and the rarity of the
+        words they share with the query, then chosen greedily until the
+        budget is spent and rendered in document order under their sections.
+
+        Args:
+            query (str): Text of the task, usually its description and expected output
+            budget (int): Tokens the slice may use
+            include (Sequence[str]): Kinds of facts to consider; 'outline' adds the section outline
+
+        Returns:
+            str: The slice as markdown
+        """
+        query_words = _words(query)
+        count = len(self.facts) or 1
+        lines: List[str] = []
+        remaining = budget
+        if 'outline' in include and self.sections:
+            outline = "Outline: " + "; ".join(self.sections)
+            if estimate_tokens(outline) > budget // 4:
+                outline = _truncate(outline, budget // 4)
+            lines.append(outline)
+            remaining -= estimate_tokens(outline) + 1
+
+        def score(fact: Fact) -> float:
+            shared = fact.words & query_words
+            relevance = sum(math.log(1 + count / self.document_frequency.get(w, 1)) for w in shared)
+            return KIND_WEIGHTS[fact.kind] * (1 + relevance / (1 + math.log(1 + len(fact.words))))
+
+        chosen: List[Fact] = []
+        blocks_used = set()
+        for fact in sorted((f for f in self.facts if f.kind in include), key=lambda f: (-score(f), f.position)):
+            cost = estimate_tokens(f"- {fact.text}") + 1
+            if fact.section and fact.block not in blocks_used:
+                cost += estimate_tokens(f"## {fact.section}") + 1
+            if cost > remaining:
+                continue
+            chosen.append(fact)
+            blocks_used.add(fact.block)
+            remaining -= cost
+
+        current = None
+        for fact in sorted(chosen, key=lambda f: f.position):
+            if fact.block != current:
+                current = fact.block
+                if fact.section:
+                    lines.append(f"## {fact.section}")
+            lines.append(f"- {fact.text}")
+        return "\n".join(lines)
+
+
+def _split_long(text: str) -> List[str]:
+    """Split text longer than MAX_FACT_TOKENS into word-aligned chunks."""
+    if estimate_tokens(text) <= MAX_FACT_TOKENS:
+        return [text]
+    chunks, current = [], ''
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > MAX_FACT_TOKENS * 4:
+            chunks.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def extract_facts(markdown: str) -> ResearchFacts:
+    """
+    Extract the facts of a research document.
+
+    Headings (and lines that are only bold text) give the sections; the
+    first sentence under a section is its summary, ``Term: definition``
+    lines are key terms, code blocks and statements citing examples or use
+    cases are examples, and every other sentence or list item is a point.
+
+    Args:
+        markdown (str): The research document
+
+    Returns:
+        ResearchFacts: The document's sections and facts
+    """
+    sections: List[str] = []
+    facts: List[Fact] = []
+    headings: List[Tuple[int, str]] = []
+    state = {'section': '', 'block': 0, 'summarized': False}
+    paragraph: List[str] = []
+    item: List[str] = []
+    code: Optional[List[str]] = None
+
+    def add(kind: str, text: str) -> None:
+        for chunk in _split_long(text):
+            facts.append(Fact(kind, state['section'], chunk, len(facts), estimate_tokens(chunk), _words(chunk),
+                              state['block']))
+
+    def classify(text: str) -> str:
+        term = _TERM.match(text)
+        if term and len(term.group(1).split()) <= 6:
+            return 'term'
+        return 'example' if _EXAMPLE_CUE.search(text) else 'point'
+
+    def flush() -> None:
+        if paragraph:
+            text = ' '.join(paragraph)
+            paragraph.clear()
+            for sentence in _SENTENCE_END.split(text):
+                if not state['summarized']:
+                    state['summarized'] = True
+                    add('summary', sentence)
+                else:
+                    add(classify(sentence), sentence)
+        if item:
+            text = ' '.join(item)
+            item.clear()
+            add(classify(text), text)
+
+    def open_section(level: int, title: str) -> None:
+        flush()
+        while headings and headings[-1][0] >= level:
+            headings.pop()
+        headings.append((level, title))
+        state['section'] = ' > '.join(t for _, t in headings)
+        state['block'] += 1
+        state['summarized'] = False
+        sections.append(state['section'])
+
+    for line in markdown.splitlines():
+        if code is not None:
+            code.append(line)
+            if _FENCE.match(line):
+                add('example', '\n'.join(code))
+                code = None
+            continue
+        if _FENCE.match(line):
+            flush()
+            code = [line]
+            continue
+        stripped = line.strip()
+        if not stripped:
+            flush()
+            continue
+        heading = _HEADING.match(stripped)
+        bold = _BOLD_HEADING.match(stripped) if not heading else None
+        list_item = _LIST_ITEM.match(line)
+        if heading:
+            open_section(len(heading.group(1)), heading.group(2).strip('*_ '))
+        elif bold and not item:
+            open_section(7, bold.group(1).strip())
+        elif list_item:
+            flush()
+            item.append(list_item.group(2).strip())
+        elif item and line[:1].isspace():
+            item.append(stripped)
+        else:
+            if item:
+                flush()
+            paragraph.append(stripped)
+    flush()
+    if code:
+        add('example', '\n'.join(code))
+
+    frequency: Dict[str, int] = {}
+    for fact in facts:
+        for word in fact.words:
+            frequency[word] = frequency.get(word, 0) + 1
+    return ResearchFacts(list(dict.fromkeys(sections)), facts, estimate_tokens(markdown), frequency)
+
+
+def _element_label(element: Element) -> str:
+    label = element.tag
+    attrs = element.attrs
+    if attrs.get('id'):
+        label += f"#{attrs['id']}"
+    if attrs.get('class'):
+        label += ''.join(f".{name}" for name in attrs['class'].split())
+    for name in OUTLINE_ATTRIBUTES[2:]:
+        # Link targets only matter for the stylesheets and scripts a page loads
+        if name in ('href', 'src') and element.tag not in ('link', 'script'):
+            continue
+        if attrs.get(name):
+            label += f'[{name}="{attrs[name]}"]'
+    for name, value in attrs.items():
+        if name.startswith('data-'):
+            label += f'[{name}="{value}"]' if value else f'[{name}]'
+    return label
+
+
+def _collapsed(lines: List[str], repeats: int) -> List[str]:
+    """Mark the first line of an element's outline with how many siblings share it."""
+    return [f"{lines[0]} (x{repeats + 1})", *lines[1:]] if repeats else lines
+
+
+def html_outline(html: str) -> str:
+    """
+    Reduce a page to its element outline, enough to style and script it.
+
+    Text and unlisted attributes are dropped, and runs of siblings with the
+    same outline are collapsed into one with a count.
+
+    Args:
+        html (str): The page
+
+    Returns:
+        str: One indented line per element, or an empty string if the text has no elements
+    """
+    def render(children: List[Element], depth: int) -> List[str]:
+        lines: List[str] = []
+        previous: Optional[List[str]] = None
+        repeats = 0
+        for child in children:
+            own = ['  ' * depth + _element_label(child)] + render(child.children, depth + 1)
+            if own == previous:
+                repeats += 1
+                continue
+            if previous is not None:
+                lines += _collapsed(previous, repeats)
+            previous, repeats = own, 0
+        if previous is not None:
+            lines += _collapsed(previous, repeats)
+        return lines
+
+    lines = render(parse_html(html).children, 0)
+    return "Page outline:\n" + "\n".join(lines) if lines else ''
+
+
+def css_inventory(css: str) -> str:
+    """
+    Reduce a stylesheet to its custom properties, selectors and at-rules.
+
+    Args:
+        css (str): The stylesheet
+
+    Returns:
+        str: The inventory, or an empty string if the text has no rules
+    """
+    properties: List[str] = []
+    selectors: Dict[str, List[str]] = {}
+    names: List[str] = []
+
+    def walk(statements: List[Tuple[str, Optional[str]]], context: str) -> None:
+        for prelude, block in statements:
+            if block is None:
+                continue
+            if prelude.startswith('@'):
+                keyword = prelude.split(None, 1)[0].lower()
+                if keyword in ('@media', '@supports', '@layer', '@container'):
+                    walk(parse_css(block), prelude)
+                else:
+                    names.append(prelude)
+                continue
+            declared = [f"{name}: {value.strip()}" for name, value in _CUSTOM_PROPERTY.findall(block)]
+            if declared:
+                properties.append(f"{prelude} {{ {'; '.join(declared)} }}")
+            selectors.setdefault(context, []).extend(
+                s for s in split_selectors(prelude) if s not in selectors.get(context, []))
+
+    walk(parse_css(css), '')
+    if not selectors and not names:
+        return ''
+    lines = ["Stylesheet inventory:"]
+    if properties:
+        lines.append("Custom properties: " + " ".join(properties))
+    for context, found in selectors.items():
+        lines.append(f"{context or 'Selectors'}: {', '.join(dict.fromkeys(found))}")
+    if names:
+        lines.append("Other rules: " + ", ".join(dict.fromkeys(names)))
+    return "\n".join(lines)
+
+
+def _truncate(text: str, tokens: int) -> str:
+    """Cut text to about ``tokens`` tokens at a line or word boundary."""
+    if estimate_tokens(text) <= tokens:
+        return text
+    limit = max(tokens * 4 - len(TRUNCATED) - 1, 0)
+    cut = text[:limit]
+    boundary = max(cut.rfind('\n'), cut.rfind(' '))
+    if boundary > limit // 2:
+        cut = cut[:boundary]
+    return f"{cut.rstrip()}\n{TRUNCATED}" if cut.strip() else TRUNCATED
+
+
+@dataclass
+class ContextBudget:
+    """Token budgets of compressed context, from context_budget.yaml."""
+
+    budget: int = DEFAULT_BUDGET
+    include: Tuple[str, ...] = FACT_KINDS
+    tasks: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> 'ContextBudget':
+        """
+        Load the context budgets.
+
+        Args:
+            path (str): Path to context_budget.yaml
+
+        Returns:
+            ContextBudget: The budgets
+
+        Raises:
+            IOError: If the file cannot be read
+            ValueError: If a budget or fact kind is invalid
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = yaml.safe_load(f)
+        except (IOError, yaml.YAMLError) as e:
+            raise IOError(f"Error reading context budget config {path}: {str(e)}")
+        if data is None:
+            return cls()
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} must map settings to values")
+        default = data.get('default') or {}
+        tasks = data.get('tasks') or {}
+        if not isinstance(default, dict) or not isinstance(tasks, dict) \
+                or not all(isinstance(settings, dict) for settings in tasks.values()):
+            raise ValueError(f"{path}: default and each entry of tasks must map settings to values")
+        for name, settings in [('default', default), *tasks.items()]:
+            budget = settings.get('budget', DEFAULT_BUDGET)
+            if not isinstance(budget, int) or budget < 1:
+                raise ValueError(f"{path}: budget of {name} must be a positive integer")
+            unknown = [kind for kind in settings.get('include') or [] if kind not in FACT_KINDS]
+            if unknown:
+                raise ValueError(f"{path}: unknown fact kinds for {name}: {', '.join(map(str, unknown))}")
+        return cls(default.get('budget', DEFAULT_BUDGET), tuple(default.get('include') or FACT_KINDS), tasks)
+
+    def for_task(self, task_name: str) -> Tuple[int, Tuple[str, ...]]:
+        """
+        Return the budget and fact kinds of a task.
+
+        Entries of ``tasks`` may be glob patterns such as ``page_*``; an exact
+        name wins over a pattern.
+
+        Args:
+            task_name (str): Name of the task
+
+        Returns:
+            Tuple[int, Tuple[str, ...]]: Token budget and fact kinds to include
+        """
+        settings = self.tasks.get(task_name)
+        if settings is None:
+            settings = next((s for pattern, s in self.tasks.items() if fnmatchcase(task_name, pattern)), {})
+        return settings.get('budget', self.budget), tuple(settings.get('include') or self.include)
+
+
+@dataclass
+class CompressedContext:
+    """The context given to one task, and what compressing it saved."""
+
+    text: str
+    original_tokens: int
+    tokens: int
+    seconds: float
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+class ContextCompressor:
+    """
+    Builds each task's context from digests of its upstream outputs.
+
+    Every upstream output is digested once per build, however many tasks
+    receive it: research markdown into facts, pages into their element
+    outline and stylesheets into their selector inventory. Each task then
+    gets only the slice of the digests that fits its token budget.
+    """
+
+    def __init__(self, budgets: ContextBudget):
+        """
+        Initialize the ContextCompressor.
+
+        Args:
+            budgets (ContextBudget): Token budget of each task
+        """
+        self.budgets = budgets
+        self._digests: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _kind(filename: str) -> str:
+        suffix = PurePosixPath(filename).suffix.lower()
+        if suffix in ('.md', '.markdown', '.txt'):
+            return 'research'
+        if suffix in ('.html', '.htm'):
+            return 'html'
+        return 'css' if suffix == '.css' else 'raw'
+
+    def digest(self, filename: str, output: str) -> Any:
+        """
+        Return the digest of an upstream output, computing it on first use.
+
+        Args:
+            filename (str): Output file of the upstream task (or its name); its suffix picks the digest
+            output (str): Raw output of the upstream task
+
+        Returns:
+            Any: ResearchFacts for research, the outline or inventory text for pages and
+                stylesheets, the output itself otherwise
+        """
+        kind = self._kind(filename)
+        key = (kind, hashlib.sha256(output.encode('utf-8')).hexdigest())
+        with self._lock:
+            if key not in self._digests:
+                if kind == 'research':
+                    digest = extract_facts(output)
+                elif kind == 'html':
+                    digest = html_outline(output) or output
+                elif kind == 'css':
+                    digest = css_inventory(output) or output
+                else:
+                    digest = output
+                if isinstance(digest, str) and estimate_tokens(digest) >= estimate_tokens(output):
+                    digest = output
+                self._digests[key] = digest
+            return self._digests[key]
+
+    def compress(self, task_name: str, query: str, upstream: List[Tuple[str, str]]) -> CompressedContext:
+        """
+        Build a task's context within its token budget.
+
+        Context that already fits the budget is passed on unchanged.
+        Otherwise pages, stylesheets and other outputs are replaced by their
+        digests, cut down if they alone would leave research less than
+        RESEARCH_SHARE of the budget, and the rest of the budget is shared by
+        the research documents' most relevant facts.
+
+        Args:
+            task_name (str): Name of the task, to look up its budget
+            query (str): Text of the task that research facts are ranked against
+            upstream (List[Tuple[str, str]]): (output file or task name, raw output) of
+                each upstream task, in context order
+
+        Returns:
+            CompressedContext: The context and its token counts
+        """
+        start = time.perf_counter()
+        original = CONTEXT_SEPARATOR.join(output for _, output in upstream)
+        original_tokens = estimate_tokens(original)
+        budget, include = self.budgets.for_task(task_name)
+        if original_tokens <= budget:
+            return CompressedContext(original, original_tokens, original_tokens, time.perf_counter() - start)
+
+        digests = [self.digest(filename, output) for filename, output in upstream]
+        research = [i for i, digest in enumerate(digests) if isinstance(digest, ResearchFacts)]
+        fixed = [i for i in range(len(digests)) if i not in research]
+        separators = estimate_tokens(CONTEXT_SEPARATOR) * (len(digests) - 1)
+        available = budget - separators
+        fixed_budget = available - int(available * RESEARCH_SHARE) if research else available
+        fixed_tokens = sum(estimate_tokens(digests[i]) for i in fixed)
+        parts: List[str] = [''] * len(digests)
+        for i in fixed:
+            text = digests[i]
+            if fixed_tokens > fixed_budget:
+                text = _truncate(text, max(fixed_budget * estimate_tokens(text) // fixed_tokens, 1))
+            parts[i] = text
+        if research:
+            share = (available - sum(estimate_tokens(parts[i]) for i in fixed)) // len(research)
+            for i in research:
+                parts[i] = digests[i].select(query, share, include)
+
+        text = CONTEXT_SEPARATOR.join(part for part in parts if part)
+        tokens = estimate_tokens(text)
+        return CompressedContext(text, original_tokens, tokens, time.perf_counter() - start)
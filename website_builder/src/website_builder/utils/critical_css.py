@@ -0,0 +1,494 @@
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Set, Tuple
+import posixpath
+import re
+
+from .asset_optimizer import resolve_reference
+
+
+# Elements of the body, in document order, assumed to be above the fold
+DEFAULT_FOLD_ELEMENTS = 60
+# Pseudo-classes that only apply after user interaction, so never needed for the first paint
+STATE_PSEUDO_CLASSES = {'hover', 'focus', 'focus-within', 'focus-visible', 'active', 'visited', 'target',
+                        'checked'}
+# At-rules whose content is never part of the first paint
+NON_CRITICAL_AT_RULES = {'font-face', 'keyframes', '-webkit-keyframes', 'page', 'import', 'charset', 'namespace'}
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track',
+                 'wbr'}
+
+_NOSCRIPT = re.compile(r'<noscript\b.*?</noscript\s*>', re.IGNORECASE | re.DOTALL)
+_LINK_TAG = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+_SCRIPT_TAG = re.compile(r'<script\b([^>]*)>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+_CSS_URL = re.compile(r'''url\(\s*(?:"([^"]*)"|'([^']*)'|([^'"()\s]*))\s*\)''', re.IGNORECASE)
+_ATTRIBUTE = re.compile(r'''([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?''')
+_COMPOUND_PART = re.compile(
+    r'''(\*|[\w-]+)|#([\w-]+)|\.([\w-]+)|\[\s*([\w-]+)\s*(?:([~|^$*]?=)\s*(?:"([^"]*)"|'([^']*)'|([^\]\s]+))\s*)?\]'''
+    r'''|(::?)([\w-]+)(\((?:[^()]|\([^()]*\))*\))?''')
+
+
+class Element:
+    """An element of a parsed page, enough to match selectors against."""
+
+    __slots__ = ('tag', 'attrs', 'parent', 'children')
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional['Element']):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children: List['Element'] = []
+
+    @property
+    def classes(self) -> Set[str]:
+        return set(self.attrs.get('class', '').split())
+
+    def previous_siblings(self) -> List['Element']:
+        """Return the element's earlier siblings, nearest first."""
+        if self.parent is None:
+            return []
+        siblings = self.parent.children
+        return list(reversed(siblings[:siblings.index(self)]))
+
+    def iter(self):
+        """Yield the element's descendants in document order."""
+        for child in self.children:
+            yield child
+            yield from child.iter()
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element('#document', {}, None)
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, {name: value or '' for name, value in attrs}, self._stack[-1])
+        self._stack[-1].children.append(element)
+        if tag not in VOID_ELEMENTS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self._stack.pop()
+
+    def handle_endtag(self, tag):
+        # Close up to the matching open element; stray end tags are ignored
+        for depth in range(len(self._stack) - 1, 0, -1):
+            if self._stack[depth].tag == tag:
+                del self._stack[depth:]
+                return
+
+
+def parse_html(html: str) -> Element:
+    """
+    Parse a page into a tree of elements.
+
+    Args:
+        html (str): The page
+
+    Returns:
+        Element: The document root
+    """
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def above_the_fold(root: Element, fold_elements: int = DEFAULT_FOLD_ELEMENTS) -> List[Element]:
+    """
+    Estimate the elements rendered in the first viewport.
+
+    Without a layout engine the estimate is the first ``fold_elements``
+    elements of the body in document order, together with their ancestors.
+
+    Args:
+        root (Element): Document root from ``parse_html``
+        fold_elements (int): Body elements counted as above the fold
+
+    Returns:
+        List[Element]: The elements, in document order
+    """
+    body = next((element for element in root.iter() if element.tag == 'body'), None)
+    visible = []
+    for element in (body.iter() if body is not None else root.iter()):
+        if len(visible) >= fold_elements:
+            break
+        visible.append(element)
+    selected = set()
+    for element in visible:
+        while element is not None and element not in selected:
+            selected.add(element)
+            element = element.parent
+    return [element for element in root.iter() if element in selected]
+
+
+def _split_selector(selector: str) -> List[str]:
+    """Split a complex selector into compounds and combinators, e.g. ``['nav', '>', 'a']``."""
+    parts: List[str] = []
+    current = ''
+    depth = 0
+    quote = ''
+    for c in selector.strip():
+        if quote:
+            current += c
+            if c == quote:
+                quote = ''
+        elif c in '"\'':
+            quote = c
+            current += c
+        elif c in '([':
+            depth += 1
+            current += c
+        elif c in ')]':
+            depth -= 1
+            current += c
+        elif depth == 0 and (c.isspace() or c in '>+~'):
+            if current:
+                parts.append(current)
+                current = ''
+            if c in '>+~':
+                if parts and parts[-1] == ' ':
+                    parts[-1] = c
+                else:
+                    parts.append(c)
+            elif parts and parts[-1] not in (' ', '>', '+', '~'):
+                parts.append(' ')
+        else:
+            current += c
+    if current:
+        parts.append(current)
+    if parts and parts[-1] in (' ', '>', '+', '~'):
+        parts.pop()
+    return parts
+
+
+def _matches_compound(compound: str, element: Element) -> Optional[bool]:
+    """
+    Match one compound selector, e.g. ``a.nav-link[href^="#"]:first-child``.
+
+    Returns:
+        Optional[bool]: None if the compound only applies after interaction
+    """
+    position = 0
+    while position < len(compound):
+        match = _COMPOUND_PART.match(compound, position)
+        if match is None:
+            # Syntax this matcher does not know; assume it matches
+            return True
+        position = match.end()
+        tag, element_id, cls, attr, op = match.group(1, 2, 3, 4, 5)
+        if tag is not None:
+            if tag != '*' and tag.lower() != element.tag:
+                return False
+        elif element_id is not None:
+            if element.attrs.get('id') != element_id:
+                return False
+        elif cls is not None:
+            if cls not in element.classes:
+                return False
+        elif attr is not None:
+            if attr.lower() not in element.attrs:
+                return False
+            if op:
+                expected = next(v for v in match.group(6, 7, 8) if v is not None)
+                value = element.attrs[attr.lower()]
+                if not {
+                    '=': value == expected,
+                    '~=': expected in value.split(),
+                    '|=': value == expected or value.startswith(expected + '-'),
+                    '^=': value.startswith(expected),
+                    '$=': value.endswith(expected),
+                    '*=': expected in value,
+                }[op]:
+                    return False
+        elif match.group(9) == ':':
+            name = match.group(10).lower()
+            if name in STATE_PSEUDO_CLASSES:
+                return None
+            if name == 'root' and element.tag != 'html':
+                return False
+            # Structural and logical pseudo-classes are assumed to match
+        # Pseudo-elements such as ::before style the element they belong to
+    return True
+
+
+def _matches(parts: List[str], index: int, element: Element) -> Optional[bool]:
+    result = _matches_compound(parts[index], element)
+    if not result or index == 0:
+        return result
+    combinator = parts[index - 1]
+    if combinator == '>':
+        candidates = [element.parent] if element.parent is not None else []
+    elif combinator == ' ':
+        candidates = []
+        ancestor = element.parent
+        while ancestor is not None:
+            candidates.append(ancestor)
+            ancestor = ancestor.parent
+    elif combinator == '+':
+        candidates = element.previous_siblings()[:1]
+    else:
+        candidates = element.previous_siblings()
+    outcome: Optional[bool] = False
+    for candidate in candidates:
+        result = _matches(parts, index - 2, candidate)
+        if result:
+            return True
+        if result is None:
+            outcome = None
+    return outcome
+
+
+def selector_matches(selector: str, elements: List[Element]) -> bool:
+    """
+    Check whether a selector styles any of the elements on first paint.
+
+    Args:
+        selector (str): A single complex selector
+        elements (List[Element]): Elements to match
+
+    Returns:
+        bool: True if the selector matches one of them without user interaction
+    """
+    parts = _split_selector(selector)
+    if not parts:
+        return False
+    return any(_matches(parts, len(parts) - 1, element) for element in elements)
+
+
+def split_selectors(prelude: str) -> List[str]:
+    """Split a selector list on its top-level commas."""
+    selectors, current, depth = [], '', 0
+    for c in prelude:
+        if c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        if c == ',' and depth == 0:
+            selectors.append(current.strip())
+            current = ''
+        else:
+            current += c
+    if current.strip():
+        selectors.append(current.strip())
+    return selectors
+
+
+def parse_css(css: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Split a stylesheet into its top-level statements.
+
+    Args:
+        css (str): The stylesheet
+
+    Returns:
+        List[Tuple[str, Optional[str]]]: (prelude, block) pairs; the block is None for
+            statements such as ``@import url(...)``
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    statements = []
+    i, n = 0, len(css)
+    start = 0
+    while i < n:
+        c = css[i]
+        if c in '"\'':
+            end = css.find(c, i + 1)
+            i = n if end == -1 else end + 1
+            continue
+        if c == ';':
+            statement = css[start:i].strip()
+            if statement:
+                statements.append((statement, None))
+            start = i = i + 1
+            continue
+        if c == '{':
+            depth, j = 1, i + 1
+            while j < n and depth:
+                if css[j] in '"\'':
+                    end = css.find(css[j], j + 1)
+                    j = n if end == -1 else end + 1
+                    continue
+                depth += {'{': 1, '}': -1}.get(css[j], 0)
+                j += 1
+            statements.append((css[start:i].strip(), css[i + 1:j - 1]))
+            start = i = j
+            continue
+        i += 1
+    return statements
+
+
+def extract_critical_css(css: str, elements: List[Element]) -> str:
+    """
+    Keep the rules of a stylesheet that style any of the elements on first paint.
+
+    Rules nested in ``@media``, ``@supports`` and similar blocks are kept
+    inside their block; fonts, keyframes and imports are left to the full
+    stylesheet.
+
+    Args:
+        css (str): The stylesheet
+        elements (List[Element]): Elements rendered in the first viewport
+
+    Returns:
+        str: The critical rules, in stylesheet order
+    """
+    critical = []
+    for prelude, block in parse_css(css):
+        if block is None:
+            continue
+        if prelude.startswith('@'):
+            name = re.match(r'@([\w-]+)', prelude)
+            if name is None or name.group(1).lower() in NON_CRITICAL_AT_RULES:
+                continue
+            inner = extract_critical_css(block, elements)
+            if inner:
+                critical.append(f"{prelude} {{\n{inner}\n}}")
+        elif any(selector_matches(selector, elements) for selector in split_selectors(prelude)):
+            critical.append(f"{prelude} {{{block}}}")
+    return '\n'.join(critical)
+
+
+def rebase_urls(css: str, stylesheet: str, page: str) -> str:
+    """
+    Rewrite the relative ``url()`` references of a stylesheet's rules to resolve from a page.
+
+    Relative URLs in CSS resolve against the stylesheet; once its rules
+    are inlined into a page they would resolve against the page instead.
+    Absolute URLs, root-relative paths, ``data:`` URIs and fragments are
+    left as they are; query strings and fragments are kept.
+
+    Args:
+        css (str): Rules taken from the stylesheet
+        stylesheet (str): POSIX path of the stylesheet within the site
+        page (str): POSIX path of the page within the site
+
+    Returns:
+        str: The rules with their relative references rebased
+    """
+    base = posixpath.dirname(page) or '.'
+
+    def replace(match: 're.Match') -> str:
+        quote = '"' if match.group(1) is not None else "'" if match.group(2) is not None else ''
+        url = next(value for value in match.group(1, 2, 3) if value is not None)
+        if not url or re.match(r'^(?:[a-z][a-z0-9+.-]*:|//|/|#)', url, re.IGNORECASE):
+            return match.group(0)
+        path = re.match(r'[^?#]*', url).group(0)
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(stylesheet), path))
+        return f"url({quote}{posixpath.relpath(target, base)}{url[len(path):]}{quote})"
+
+    return _CSS_URL.sub(replace, css)
+
+
+def _attributes(tag: str) -> Dict[str, str]:
+    inner = re.sub(r'^<\s*\w+|/?>$', '', tag)
+    return {match.group(1).lower(): next((v for v in match.group(2, 3, 4) if v is not None), '')
+            for match in _ATTRIBUTE.finditer(inner)}
+
+
+def _is_blocking_stylesheet(attrs: Dict[str, str]) -> bool:
+    rel = attrs.get('rel', '').lower().split()
+    media = attrs.get('media', 'all').strip().lower()
+    return 'stylesheet' in rel and 'disabled' not in attrs and media in ('', 'all', 'screen')
+
+
+def _is_blocking_script(attrs: Dict[str, str]) -> bool:
+    return 'src' in attrs and 'async' not in attrs and 'defer' not in attrs and \
+        attrs.get('type', '').lower() != 'module'
+
+
+def render_blocking_resources(html: str, page: str, sizes: Dict[str, int]) -> Dict[str, object]:
+    """
+    Count the requests a browser must finish before it can render a page.
+
+    Blocking resources are stylesheets for all or screen media and
+    external scripts without ``async``, ``defer`` or ``type="module"``;
+    ``<noscript>`` fallbacks are ignored.
+    Sizes of resources that are not site assets are unknown and count as 0.
+
+    Args:
+        html (str): The page
+        page (str): POSIX path of the page within the site
+        sizes (Dict[str, int]): Size in bytes of each site asset, by path
+
+    Returns:
+        Dict[str, object]: 'requests', 'bytes' and the blocking 'resources'
+    """
+    resources = []
+    # Fallbacks in <noscript> only load with scripting disabled
+    html = _NOSCRIPT.sub('', html)
+    for match in _LINK_TAG.finditer(html):
+        attrs = _attributes(match.group(0))
+        if _is_blocking_stylesheet(attrs):
+            resources.append(resolve_reference(attrs.get('href', ''), page, sizes) or attrs.get('href', ''))
+    for match in _SCRIPT_TAG.finditer(html):
+        attrs = _attributes(f"<script {match.group(1)}>")
+        if _is_blocking_script(attrs):
+            resources.append(resolve_reference(attrs['src'], page, sizes) or attrs['src'])
+    return {
+        'requests': len(resources),
+        'bytes': sum(sizes.get(resource, 0) for resource in resources),
+        'resources': resources,
+    }
+
+
+def inline_critical_css(html: str, page: str, stylesheets: Dict[str, str],
+                        fold_elements: int = DEFAULT_FOLD_ELEMENTS) -> str:
+    """
+    Inline a page's above-the-fold CSS and stop stylesheets and scripts from blocking rendering.
+
+    The critical rules of the site stylesheets the page links are inlined
+    in a ``<style>`` where the first of those links was, with their
+    relative ``url()`` references rebased onto the page; each link is then
+    turned into a preload that applies the full stylesheet once loaded,
+    with a ``<noscript>`` fallback, so the cascade order is unchanged.
+    External scripts get ``defer`` unless an inline script that may
+    depend on them runs later in the page.
+
+    Args:
+        html (str): The page
+        page (str): POSIX path of the page within the site
+        stylesheets (Dict[str, str]): Content of each site stylesheet, by path
+        fold_elements (int): Body elements counted as above the fold
+
+    Returns:
+        str: The rewritten page
+    """
+    elements = above_the_fold(parse_html(html), fold_elements)
+    critical: List[str] = []
+
+    def defer_stylesheet(match: 're.Match') -> str:
+        tag = match.group(0)
+        attrs = _attributes(tag)
+        if not _is_blocking_stylesheet(attrs):
+            return tag
+        stylesheet = resolve_reference(attrs.get('href', ''), page, stylesheets)
+        if stylesheet is None:
+            return tag
+        first = not critical
+        critical.append(rebase_urls(extract_critical_css(stylesheets[stylesheet], elements), stylesheet, page))
+        href = attrs['href'].replace('"', '&quot;')
+        replacement = (f'<link rel="preload" href="{href}" as="style" '
+                       f'onload="this.onload=null;this.rel=\'stylesheet\'">'
+                       f'<noscript><link rel="stylesheet" href="{href}"></noscript>')
+        # The placeholder marks where the inlined rules go once all links are processed
+        return ('\0critical\0' if first else '') + replacement
+
+    html = _LINK_TAG.sub(defer_stylesheet, html)
+    if critical:
+        html = html.replace('\0critical\0', f"<style>\n{chr(10).join(c for c in critical if c)}\n</style>", 1)
+
+    scripts = list(_SCRIPT_TAG.finditer(html))
+    last_inline = max((index for index, match in enumerate(scripts)
+                       if 'src' not in _attributes(f"<script {match.group(1)}>")
+                       and _attributes(f"<script {match.group(1)}>").get('type', '').lower()
+                       in ('', 'text/javascript', 'application/javascript')), default=-1)
+    parts, position = [], 0
+    for index, match in enumerate(scripts):
+        if index > last_inline and _is_blocking_script(_attributes(f"<script {match.group(1)}>")):
+            parts.append(html[position:match.start(1)])
+            parts.append(match.group(1).rstrip() + ' defer')
+            position = match.end(1)
+    parts.append(html[position:])
+    return ''.join(parts)
@@ -1,25 +1,77 @@
+from contextlib import contextmanager
 from pathlib import Path
-import os
-import shutil
-from datetime import datetime
-from typing import Optional, List
+import hashlib
 import json
+import os
+import threading
+from typing import Callable, Dict, Iterator, Optional, List, Tuple
+from .backup_archive import BackupArchive
+from .version_store import VersionStore
+from .metrics import current_metrics
+from .streaming import StreamingOutput
+
+class FileTransaction:
+    """Files staged by ``FileManager.transaction`` until it commits."""
+    
+    def __init__(self):
+        self._files: Dict[str, Tuple[str, bool]] = {}
+        self._lock = threading.Lock()
+    
+    def stage(self, filename: str, content: str, create_backup: bool) -> None:
+        """Stage the new content of a file, replacing any earlier staged content."""
+        with self._lock:
+            self._files[filename] = (content, create_backup)
+    
+    def get(self, filename: str) -> Optional[str]:
+        """Return the staged content of a file, or None if it is not staged."""
+        with self._lock:
+            staged = self._files.get(filename)
+        return staged[0] if staged is not None else None
+    
+    def files(self) -> List[Tuple[str, str, bool]]:
+        """Return the staged (filename, content, create_backup) triples in staging order."""
+        with self._lock:
+            return [(filename, content, backup) for filename, (content, backup) in self._files.items()]
 
 class FileManager:
     """Utility class for managing output files in the website builder."""
     
-    def __init__(self, output_dir: Optional[str] = None):
+    # Backups kept per file unless the caller chooses otherwise
+    DEFAULT_BACKUP_RETENTION = 20
+    # Written before a transaction's files are moved into place, removed after
+    JOURNAL_FILENAME = '.transaction.journal'
+    
+    def __init__(self, output_dir: Optional[str] = None, backup_retention: Optional[int] = DEFAULT_BACKUP_RETENTION,
+                 backup_max_age: Optional[float] = None):
         """
         Initialize the FileManager.
         
         Args:
             output_dir (Optional[str]): Directory to store output files. If None, uses 'output' in current directory.
+            backup_retention (Optional[int]): Most recent backups kept per file; None keeps all
+            backup_max_age (Optional[float]): Seconds after which backups are dropped; None keeps them
         """
         self.output_dir = Path(output_dir) if output_dir else Path.cwd() / 'output'
         self.backup_dir = self.output_dir / 'backups'
         self.version_dir = self.output_dir / 'versions'
+        self.journal_file = self.output_dir / self.JOURNAL_FILENAME
+        self._directories = set()
+        self._transaction: Optional[FileTransaction] = None
+        self._transaction_lock = threading.Lock()
         self._ensure_directories()
         self._load_version_history()
+        self._load_backups(backup_retention, backup_max_age)
+        self._recover_transaction()
+    
+    def __enter__(self) -> 'FileManager':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the open backup pack; it is reopened if the manager is used again."""
+        self.backup_archive.close()
     
     def _ensure_directories(self) -> None:
         """Ensure all necessary directories exist."""
@@ -32,18 +84,19 @@ class FileManager:
         (self.output_dir / 'js').mkdir(parents=True, exist_ok=True)
     
     def _load_version_history(self) -> None:
-        """Load version history from JSON file."""
+        """Open the version store, migrating a legacy JSON history once."""
+        self.version_store = VersionStore(self.version_dir)
         self.version_file = self.version_dir / 'version_history.json'
         if self.version_file.exists():
-            with open(self.version_file, 'r') as f:
-                self.version_history = json.load(f)
-        else:
-            self.version_history = {}
+            self.version_store.migrate_json(self.version_file)
+            self.version_file.rename(self.version_file.with_name('version_history.json.migrated'))
     
-    def _save_version_history(self) -> None:
-        """Save version history to JSON file."""
-        with open(self.version_file, 'w') as f:
-            json.dump(self.version_history, f, indent=2)
+    def _load_backups(self, keep: Optional[int], max_age: Optional[float]) -> None:
+        """Open the backup archive, moving legacy backup copies into it once."""
+        self.backup_archive = BackupArchive(self.backup_dir, keep=keep, max_age=max_age)
+        self.backup_archive.import_legacy(self.backup_dir)
+        if max_age is not None:
+            self.backup_archive.apply_retention()
     
     def get_file_path(self, filename: str) -> Path:
         """
@@ -56,18 +109,163 @@ class FileManager:
             Path: Full path to the file
         """
         file_path = self.output_dir / filename
-        # Ensure parent directory exists
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        # Ensure parent directory exists, once per directory
+        if file_path.parent not in self._directories:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            self._directories.add(file_path.parent)
         return file_path
     
+    @contextmanager
+    def transaction(self) -> Iterator[FileTransaction]:
+        """
+        Stage every file written in the block and commit them together at its end.
+        
+        Inside the block ``write_file`` and ``commit_stream`` only stage
+        content, which ``read_file`` and ``file_exists`` already see. When
+        the block exits normally the staged files are written to a journal,
+        flushed to disk with a single fsync, and then moved into place with
+        atomic renames; backups and version history are recorded once for
+        the whole commit. The journal is removed only after the renamed
+        files were flushed to disk in turn. If the block raises, nothing is
+        written.
+        
+        A commit interrupted by a crash is completed from the journal the
+        next time a FileManager opens the output directory. Nested
+        transactions join the outermost one.
+        
+        Yields:
+            FileTransaction: The staged files
+            
+        Raises:
+            IOError: If the transaction cannot be committed
+        """
+        with self._transaction_lock:
+            outer = self._transaction
+            if outer is None:
+                self._transaction = FileTransaction()
+            transaction = self._transaction
+        if outer is not None:
+            yield transaction
+            return
+        try:
+            yield transaction
+        finally:
+            with self._transaction_lock:
+                self._transaction = None
+        self._commit(transaction.files())
+    
+    def _commit(self, files: List[Tuple[str, str, bool]]) -> None:
+        """Journal staged files durably, then apply them."""
+        if not files:
+            return
+        payload = json.dumps([[filename, content] for filename, content, _ in files])
+        try:
+            with open(self.journal_file, 'w', encoding='utf-8') as f:
+                f.write(hashlib.sha256(payload.encode('utf-8')).hexdigest() + '\n' + payload)
+                f.flush()
+                os.fsync(f.fileno())
+        except (IOError, OSError) as e:
+            raise IOError(f"Error writing transaction journal: {str(e)}")
+        self._flush(self._apply(files))
+        self.journal_file.unlink()
+    
+    @staticmethod
+    def _flush(paths: List[Path]) -> None:
+        """
+        Flush written files to disk before their journal is removed.
+        
+        Where the platform has ``os.sync`` this is one call for the whole
+        commit, which also flushes the renames and the build's checkpoints;
+        elsewhere each file is fsynced.
+        
+        Raises:
+            IOError: If the files cannot be flushed; the journal is kept so the commit is replayed
+        """
+        try:
+            if hasattr(os, 'sync'):
+                os.sync()
+                return
+            for path in paths:
+                fd = os.open(path, os.O_RDWR)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+        except OSError as e:
+            raise IOError(f"Error flushing committed files: {str(e)}")
+    
+    def _recover_transaction(self) -> None:
+        """Finish a commit interrupted after its journal was written; drop a torn journal."""
+        if not self.journal_file.exists():
+            return
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            digest, _, payload = f.read().partition('\n')
+        if hashlib.sha256(payload.encode('utf-8')).hexdigest() == digest:
+            files = [(filename, content, False) for filename, content in json.loads(payload)]
+            print(f"Completing interrupted write of {len(files)} file(s) in {self.output_dir}")
+            self._flush(self._apply(files))
+        self.journal_file.unlink()
+    
+    def _apply(self, files: List[Tuple[str, str, bool]]) -> List[Path]:
+        """
+        Write files next to their targets and rename them into place.
+        
+        All temporary files are written before the first rename, so the
+        targets change together. Files already recorded with the same
+        content are not versioned again, which keeps replaying a journal
+        idempotent.
+        
+        Args:
+            files (List[Tuple[str, str, bool]]): (filename, content, create_backup) triples
+            
+        Returns:
+            List[Path]: Paths of the written files
+            
+        Raises:
+            IOError: If there's an error writing a file
+        """
+        staged = []
+        try:
+            for filename, content, create_backup in files:
+                file_path = self.get_file_path(filename)
+                # The version store already holds anything written through write_file,
+                # so only files changed outside the FileManager need a full backup copy.
+                if create_backup and file_path.exists() and not self._is_versioned(filename, file_path):
+                    self.create_backup(filename)
+                tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                staged.append((filename, tmp_path, file_path))
+            for filename, tmp_path, file_path in staged:
+                os.replace(tmp_path, file_path)
+        except (IOError, OSError) as e:
+            for _, tmp_path, _ in staged:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+            raise IOError(f"Error writing file {filename}: {str(e)}")
+        
+        self.version_store.append_many([
+            (filename, content) for filename, content, _ in files
+            if self.version_store.latest_hash(filename) != hashlib.sha256(content.encode('utf-8')).hexdigest()
+        ])
+        return [file_path for _, _, file_path in staged]
+    
     def write_file(self, filename: str, content: str, create_backup: bool = True) -> Path:
         """
         Write content to a file in the output directory.
         
+        The file is replaced atomically. Inside ``transaction`` the content
+        is only staged and written when the transaction commits.
+        
+        With ``create_backup`` a backup is only taken when the content on
+        disk is not already the file's latest recorded version, i.e. when
+        it was changed outside the FileManager; otherwise that content can
+        be restored from the version history and no backup is created.
+        
         Args:
             filename (str): Name of the file
             content (str): Content to write
-            create_backup (bool): Whether to create a backup before writing
+            create_backup (bool): Whether to back up content changed outside the FileManager before writing
             
         Returns:
             Path: Path to the written file
@@ -75,20 +273,70 @@ class FileManager:
         Raises:
             IOError: If there's an error writing the file
         """
-        file_path = self.get_file_path(filename)
+        transaction = self._transaction
+        if transaction is not None:
+            transaction.stage(filename, content, create_backup)
+            self._record_write(filename, content)
+            return self.get_file_path(filename)
         
-        if create_backup and file_path.exists():
-            self.create_backup(filename)
+        file_path = self._apply([(filename, content, create_backup)])[0]
+        self._record_write(filename, content)
+        return file_path
+    
+    def open_stream(self, filename: str,
+                    on_progress: Optional[Callable[[StreamingOutput], None]] = None) -> StreamingOutput:
+        """
+        Start writing a file incrementally.
         
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+        Text fed to the stream lands in ``<filename>.partial``; the file
+        itself is only replaced when ``commit_stream`` is called.
+        
+        Args:
+            filename (str): Name of the file
+            on_progress (Optional[Callable]): Called after each chunk is written
+            
+        Returns:
+            StreamingOutput: The stream to feed
+        """
+        return StreamingOutput(self.get_file_path(filename), on_progress=on_progress)
+    
+    def commit_stream(self, filename: str, stream: StreamingOutput, content: str, create_backup: bool = True) -> Path:
+        """
+        Atomically move a streamed file into place and record it like ``write_file``.
+        
+        Inside ``transaction`` the partial file is discarded and the content
+        is staged with the rest of the transaction.
+        
+        Args:
+            filename (str): Name of the file
+            stream (StreamingOutput): Stream returned by ``open_stream``
+            content (str): Final content of the file
+            create_backup (bool): Whether to back up content changed outside the FileManager, as in ``write_file``
             
-            self._update_version_history(filename, content)
+        Returns:
+            Path: Path to the written file
             
-            return file_path
-        except IOError as e:
-            raise IOError(f"Error writing file {filename}: {str(e)}")
+        Raises:
+            IOError: If there's an error writing the file
+        """
+        if self._transaction is not None:
+            stream.abort()
+            return self.write_file(filename, content, create_backup)
+        
+        file_path = self.get_file_path(filename)
+        if create_backup and file_path.exists() and not self._is_versioned(filename, file_path):
+            self.create_backup(filename)
+        
+        stream.finalize(content)
+        self._update_version_history(filename, content)
+        self._record_write(filename, content)
+        return file_path
+    
+    def _record_write(self, filename: str, content: str) -> None:
+        """Count the bytes written in the active run metrics, if any."""
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.record_write(filename, len(content.encode('utf-8')))
     
     def read_file(self, filename: str) -> str:
         """
@@ -103,6 +351,10 @@ class FileManager:
         Raises:
             IOError: If there's an error reading the file
         """
+        transaction = self._transaction
+        staged = transaction.get(filename) if transaction is not None else None
+        if staged is not None:
+            return staged
         file_path = self.get_file_path(filename)
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -120,41 +372,38 @@ class FileManager:
         Returns:
             bool: True if file exists, False otherwise
         """
+        transaction = self._transaction
+        if transaction is not None and transaction.get(filename) is not None:
+            return True
         return self.get_file_path(filename).exists()
     
-    def create_backup(self, filename: str) -> Path:
+    def create_backup(self, filename: str) -> Optional[str]:
         """
-        Create a backup of a file.
+        Back up the current content of a file into the backup archive.
+        
+        Older backups of the file beyond the retention policy are dropped.
+        Backups are entries of the archive, not separate files: the returned
+        name is what ``restore_backup`` and ``backup_archive.read`` take.
         
         Args:
             filename (str): Name of the file to backup
             
         Returns:
-            Path: Path to the backup file
+            Optional[str]: Name of the backup in the archive, or None if the file does not exist
             
         Raises:
             IOError: If there's an error creating the backup
         """
         if not self.file_exists(filename):
             return None
-            
-        source_path = self.get_file_path(filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_filename = f"{filename}.{timestamp}.bak"
-        backup_path = self.backup_dir / backup_filename
-        
-        try:
-            shutil.copy2(source_path, backup_path)
-            return backup_path
-        except IOError as e:
-            raise IOError(f"Error creating backup for {filename}: {str(e)}")
+        return self.backup_archive.add(filename, self.get_file_path(filename))
     
     def restore_backup(self, backup_filename: str) -> Path:
         """
         Restore a file from a backup.
         
         Args:
-            backup_filename (str): Name of the backup file
+            backup_filename (str): Name of the backup, as returned by ``list_backups``
             
         Returns:
             Path: Path to the restored file
@@ -162,50 +411,50 @@ class FileManager:
         Raises:
             IOError: If there's an error restoring the backup
         """
-        backup_path = self.backup_dir / backup_filename
-        if not backup_path.exists():
+        entry = self.backup_archive.entry(backup_filename)
+        if entry is None:
             raise IOError(f"Backup file {backup_filename} not found")
-            
-        original_filename = backup_filename.split('.')[0]
-        target_path = self.get_file_path(original_filename)
-        
-        try:
-            shutil.copy2(backup_path, target_path)
-            return target_path
-        except IOError as e:
-            raise IOError(f"Error restoring backup {backup_filename}: {str(e)}")
+        return self.backup_archive.restore(backup_filename, self.get_file_path(entry['file']))
     
     def list_backups(self, filename: Optional[str] = None) -> List[str]:
         """
-        List all backup files or backups for a specific file.
+        List all backups or the backups of a specific file, oldest first.
         
         Args:
             filename (Optional[str]): Name of the file to list backups for
             
         Returns:
-            List[str]: List of backup filenames
+            List[str]: List of backup names
         """
-        if filename:
-            return [f for f in os.listdir(self.backup_dir) if f.startswith(f"{filename}.")]
-        return os.listdir(self.backup_dir)
+        return self.backup_archive.names(filename)
     
     def _update_version_history(self, filename: str, content: str) -> None:
         """
-        Update version history for a file.
+        Update version history for a file, unless the content is already its latest version.
         
         Args:
             filename (str): Name of the file
             content (str): Content of the file
         """
-        if filename not in self.version_history:
-            self.version_history[filename] = []
+        if self.version_store.latest_hash(filename) != hashlib.sha256(content.encode('utf-8')).hexdigest():
+            self.version_store.append(filename, content)
+    
+    def _is_versioned(self, filename: str, file_path: Path) -> bool:
+        """
+        Check whether the current on-disk content matches the latest recorded version.
+        
+        Args:
+            filename (str): Name of the file
+            file_path (Path): Full path to the file
             
-        version = {
-            'timestamp': datetime.now().isoformat(),
-            'content': content
-        }
-        self.version_history[filename].append(version)
-        self._save_version_history()
+        Returns:
+            bool: True if the content on disk is already in the version history
+        """
+        latest = self.version_store.latest_hash(filename)
+        if latest is None:
+            return False
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest() == latest
     
     def get_file_versions(self, filename: str) -> List[dict]:
         """
@@ -215,9 +464,9 @@ class FileManager:
             filename (str): Name of the file
             
         Returns:
-            List[dict]: List of version information
+            List[dict]: List of version information; each entry's 'content' is read on access
         """
-        return self.version_history.get(filename, [])
+        return self.version_store.versions(filename)
     
     def restore_version(self, filename: str, version_index: int) -> Path:
         """
@@ -233,12 +482,5 @@ class FileManager:
         Raises:
             ValueError: If version index is invalid
         """
-        if filename not in self.version_history:
-            raise ValueError(f"No version history found for {filename}")
-            
-        versions = self.version_history[filename]
-        if not 0 <= version_index < len(versions):
-            raise ValueError(f"Invalid version index: {version_index}")
-            
-        version = versions[version_index]
-        return self.write_file(filename, version['content'], create_backup=False) 
\ No newline at end of file
+        content = self.version_store.read(filename, version_index)
+        return self.write_file(filename, content, create_backup=False) 
\ No newline at end of file
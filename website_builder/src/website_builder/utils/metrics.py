@@ -0,0 +1,345 @@
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import contextvars
+import json
+import threading
+import time
+
+_current_metrics: contextvars.ContextVar = contextvars.ContextVar('website_builder_metrics', default=None)
+_current_stage: contextvars.ContextVar = contextvars.ContextVar('website_builder_stage', default=None)
+
+STAGE_FIELDS = (
+    'wall_seconds', 'llm_calls', 'llm_seconds', 'prompt_tokens', 'completion_tokens',
+    'llm_errors', 'retries', 'throttle_seconds', 'tool_calls', 'tool_seconds', 'bytes_written',
+    'context_tokens', 'context_tokens_saved', 'compress_seconds',
+)
+
+
+def current_metrics() -> Optional['RunMetrics']:
+    """Return the metrics collector active in the current context, if any."""
+    return _current_metrics.get()
+
+
+def current_stage() -> Optional[str]:
+    """Return the name of the pipeline stage running in the current context, if any."""
+    return _current_stage.get()
+
+
+def estimate_tokens(value: Any) -> int:
+    """
+    Estimate the token count of a prompt or response.
+
+    Uses the common four-characters-per-token approximation for providers
+    that do not report usage.
+
+    Args:
+        value (Any): A string, or a list of chat messages
+
+    Returns:
+        int: Estimated number of tokens
+    """
+    if isinstance(value, list):
+        text = ''.join(str(m.get('content', '')) if isinstance(m, dict) else str(m) for m in value)
+    else:
+        text = str(value or '')
+    return (len(text) + 3) // 4
+
+
+class RunMetrics:
+    """
+    Thread-safe collector of per-stage timings and counters for one build.
+
+    Activate it around a build; LLM calls, tool calls and FileManager writes
+    made in that context are attributed to the current stage.
+    """
+
+    REPORT_FILENAME = 'run_report.json'
+
+    def __init__(self, topic: Optional[str] = None):
+        """
+        Initialize the RunMetrics.
+
+        Args:
+            topic (Optional[str]): Topic of the build, used as a label in reports
+        """
+        self.topic = topic
+        self.started_at = datetime.now().isoformat()
+        self.status = 'running'
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+        self.wall_seconds: Optional[float] = None
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.tools: Dict[str, Dict[str, float]] = {}
+        self.files: Dict[str, int] = {}
+        self.first_byte: Dict[str, float] = {}
+        self._failed_stages = set()
+        self._lock = threading.Lock()
+
+    def _stage(self, name: Optional[str]) -> Dict[str, float]:
+        name = name or 'unattributed'
+        if name not in self.stages:
+            self.stages[name] = {field: 0 for field in STAGE_FIELDS}
+        return self.stages[name]
+
+    @contextmanager
+    def activate(self) -> Iterator['RunMetrics']:
+        """Make this collector the active one for the current context."""
+        token = _current_metrics.set(self)
+        try:
+            yield self
+        finally:
+            _current_metrics.reset(token)
+
+    @contextmanager
+    def track(self, output_dir: Path) -> Iterator['RunMetrics']:
+        """
+        Activate this collector for a whole build and write its report on exit.
+
+        The report is written to ``output_dir/run_report.json`` whether the
+        build succeeds or fails.
+
+        Args:
+            output_dir (Path): Output directory of the build
+        """
+        error = None
+        try:
+            with self.activate():
+                yield self
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.finish(error)
+            self.write_json(Path(output_dir) / self.REPORT_FILENAME)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator['RunMetrics']:
+        """
+        Activate this collector and time a pipeline stage.
+
+        Args:
+            name (str): Stage name, usually the task name
+        """
+        metrics_token = _current_metrics.set(self)
+        stage_token = _current_stage.set(name)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._stage(name)['wall_seconds'] += elapsed
+            _current_stage.reset(stage_token)
+            _current_metrics.reset(metrics_token)
+
+    def record_llm_call(self, stage: Optional[str], seconds: float, prompt_tokens: int = 0,
+                        completion_tokens: int = 0, error: bool = False) -> None:
+        """
+        Record one LLM round-trip.
+
+        A call made after a failed call in the same stage counts as a retry.
+
+        Args:
+            stage (Optional[str]): Stage the call belongs to
+            seconds (float): Latency of the call
+            prompt_tokens (int): Prompt tokens used
+            completion_tokens (int): Completion tokens produced
+            error (bool): Whether the call failed
+        """
+        with self._lock:
+            counters = self._stage(stage)
+            if stage in self._failed_stages:
+                counters['retries'] += 1
+                self._failed_stages.discard(stage)
+            counters['llm_calls'] += 1
+            counters['llm_seconds'] += seconds
+            counters['prompt_tokens'] += prompt_tokens
+            counters['completion_tokens'] += completion_tokens
+            if error:
+                counters['llm_errors'] += 1
+                self._failed_stages.add(stage)
+
+    def record_retry(self, stage: Optional[str]) -> None:
+        """Record a retry made inside a single LLM call, such as a rate-limit backoff."""
+        with self._lock:
+            self._stage(stage)['retries'] += 1
+
+    def record_throttle(self, stage: Optional[str], seconds: float) -> None:
+        """Record time a call waited for a provider's rate limit before starting."""
+        with self._lock:
+            self._stage(stage)['throttle_seconds'] += seconds
+
+    def record_tool_call(self, stage: Optional[str], tool: str, seconds: float, error: bool = False) -> None:
+        """
+        Record one tool call.
+
+        Args:
+            stage (Optional[str]): Stage the call belongs to
+            tool (str): Tool name
+            seconds (float): Duration of the call
+            error (bool): Whether the call failed
+        """
+        with self._lock:
+            counters = self._stage(stage)
+            counters['tool_calls'] += 1
+            counters['tool_seconds'] += seconds
+            per_tool = self.tools.setdefault(tool, {'calls': 0, 'seconds': 0.0, 'errors': 0})
+            per_tool['calls'] += 1
+            per_tool['seconds'] += seconds
+            per_tool['errors'] += int(error)
+
+    def record_context(self, stage: Optional[str], tokens: int, saved_tokens: int, seconds: float) -> None:
+        """
+        Record the upstream context given to a task after compression.
+
+        Args:
+            stage (Optional[str]): Stage the context belongs to
+            tokens (int): Estimated tokens of the context the task received
+            saved_tokens (int): Estimated tokens removed by compression
+            seconds (float): Time spent compressing the context
+        """
+        with self._lock:
+            counters = self._stage(stage)
+            counters['context_tokens'] += tokens
+            counters['context_tokens_saved'] += saved_tokens
+            counters['compress_seconds'] += seconds
+
+    def record_write(self, filename: str, size: int) -> None:
+        """
+        Record bytes written to an output file.
+
+        Args:
+            filename (str): Name of the file relative to the output directory
+            size (int): Number of bytes written
+        """
+        with self._lock:
+            self._stage(current_stage())['bytes_written'] += size
+            self.files[filename] = self.files.get(filename, 0) + size
+
+    def record_first_byte(self, filename: str, seconds: float) -> None:
+        """
+        Record how long a streamed output file took to receive its first byte.
+
+        Args:
+            filename (str): Name of the file relative to the output directory
+            seconds (float): Time from the start of its task to the first byte
+        """
+        with self._lock:
+            self.first_byte[filename] = seconds
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Mark the build as finished, successfully or with an error."""
+        self.wall_seconds = time.perf_counter() - self._start
+        self.status = 'error' if error else 'ok'
+        self.error = str(error) if error else None
+
+    def totals(self) -> Dict[str, float]:
+        """Sum the counters of every stage."""
+        with self._lock:
+            return {field: sum(s[field] for s in self.stages.values()) for field in STAGE_FIELDS}
+
+    def to_report(self) -> Dict[str, Any]:
+        """
+        Build the machine-readable run report.
+
+        Returns:
+            Dict[str, Any]: Report with per-stage, per-tool and per-file figures
+        """
+        totals = self.totals()
+        totals['wall_seconds'] = self.wall_seconds if self.wall_seconds is not None else time.perf_counter() - self._start
+        with self._lock:
+            return {
+                'topic': self.topic,
+                'started_at': self.started_at,
+                'status': self.status,
+                'error': self.error,
+                'totals': totals,
+                'stages': {name: dict(counters) for name, counters in self.stages.items()},
+                'tools': {name: dict(counters) for name, counters in self.tools.items()},
+                'files': dict(self.files),
+                'first_byte_seconds': dict(self.first_byte),
+            }
+
+    def write_json(self, path: Path) -> Path:
+        """
+        Write the run report as JSON.
+
+        Args:
+            path (Path): Destination file
+
+        Returns:
+            Path: The written file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_report(), f, indent=2)
+        return path
+
+
+def _label(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def to_prometheus(runs: List[RunMetrics]) -> str:
+    """
+    Render run metrics in the Prometheus text exposition format.
+
+    Args:
+        runs (List[RunMetrics]): Builds to include, labelled by topic
+
+    Returns:
+        str: Metrics text
+    """
+    descriptions = {
+        'wall_seconds': ('gauge', 'Wall time per pipeline stage in seconds.'),
+        'llm_calls': ('counter', 'LLM calls per pipeline stage.'),
+        'llm_seconds': ('counter', 'Time spent waiting on the LLM per stage in seconds.'),
+        'prompt_tokens': ('counter', 'Prompt tokens per pipeline stage.'),
+        'completion_tokens': ('counter', 'Completion tokens per pipeline stage.'),
+        'llm_errors': ('counter', 'Failed LLM calls per pipeline stage.'),
+        'retries': ('counter', 'Retried LLM calls per pipeline stage.'),
+        'throttle_seconds': ('counter', 'Time spent waiting for provider rate limits per stage in seconds.'),
+        'tool_calls': ('counter', 'Tool calls per pipeline stage.'),
+        'tool_seconds': ('counter', 'Time spent in tools per stage in seconds.'),
+        'bytes_written': ('counter', 'Bytes written to output files per stage.'),
+        'context_tokens': ('counter', 'Estimated tokens of upstream context per stage, after compression.'),
+        'context_tokens_saved': ('counter', 'Estimated upstream context tokens removed by compression per stage.'),
+        'compress_seconds': ('counter', 'Time spent compressing upstream context per stage in seconds.'),
+    }
+    lines = []
+    for field, (kind, help_text) in descriptions.items():
+        metric = f"website_builder_stage_{field}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for run in runs:
+            for stage, counters in run.to_report()['stages'].items():
+                lines.append(f'{metric}{{topic="{_label(run.topic)}",stage="{_label(stage)}"}} {counters[field]}')
+
+    lines.append("# HELP website_builder_run_seconds Wall time of each build in seconds.")
+    lines.append("# TYPE website_builder_run_seconds gauge")
+    for run in runs:
+        report = run.to_report()
+        lines.append(f'website_builder_run_seconds{{topic="{_label(run.topic)}",status="{report["status"]}"}} '
+                     f'{report["totals"]["wall_seconds"]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: Path, runs: List[RunMetrics]) -> Path:
+    """
+    Write run metrics to a Prometheus text file, e.g. for the node exporter's textfile collector.
+
+    Args:
+        path (Path): Destination file
+        runs (List[RunMetrics]): Builds to include
+
+    Returns:
+        Path: The written file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(to_prometheus(runs))
+    return path
@@ -0,0 +1,599 @@
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+
+import yaml
+
+from .metrics import current_metrics, current_stage
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+T = TypeVar('T')
+
+# Seconds between attempts to take an in-flight slot held by another process or coroutine
+SLOT_POLL_INTERVAL = 0.01
+
+# After a rate-limit error the request rate is halved, down to this fraction of the quota,
+# and recovers by RATE_RECOVERY of the quota with every successful call
+MIN_RATE_FACTOR = 0.1
+RATE_RECOVERY = 0.1
+
+# A bare "quota" is not enough: billing and quota-exceeded errors are permanent and should fail fast
+RATE_LIMIT_PATTERN = re.compile(r'\b429\b|rate.?limit|resource.?exhausted', re.IGNORECASE)
+RETRY_AFTER_PATTERN = re.compile(r'retry (?:in|after) (\d+(?:\.\d+)?)\s*s', re.IGNORECASE)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Tell whether an exception from an LLM or search provider means "slow down".
+
+    Recognizes HTTP 429 responses, rate-limit exception classes and the
+    "429", "rate limit" and "RESOURCE_EXHAUSTED" messages used by Gemini,
+    litellm and Serper. An error with any other HTTP status, such as a 403
+    for an exhausted billing quota, is not retried.
+
+    Args:
+        error (BaseException): Exception raised by a provider call
+
+    Returns:
+        bool: True if the call should be retried after backing off
+    """
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    if status == 429:
+        return True
+    if isinstance(status, int):
+        return False
+    if 'ratelimit' in type(error).__name__.lower():
+        return True
+    return bool(RATE_LIMIT_PATTERN.search(str(error)))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Read the delay a provider asked for in a rate-limit error, if any.
+
+    Args:
+        error (BaseException): Rate-limit exception
+
+    Returns:
+        Optional[float]: Seconds to wait, from a ``retry_after`` attribute, a
+            Retry-After header or a "retry in Ns" message
+    """
+    value = getattr(error, 'retry_after', None)
+    if value is None:
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+        if headers is not None:
+            try:
+                value = headers.get('retry-after')
+            except AttributeError:
+                value = None
+    if value is not None:
+        try:
+            return max(float(value), 0.0)
+        except (TypeError, ValueError):
+            pass
+    match = RETRY_AFTER_PATTERN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+@dataclass(frozen=True)
+class ProviderLimits:
+    """Quota of one provider, as configured in rate_limits.yaml."""
+
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    max_in_flight: Optional[int] = None
+    burst_seconds: float = 10.0
+    max_retries: int = 5
+    initial_backoff: float = 1.0
+    max_backoff: float = 60.0
+
+    @classmethod
+    def from_dict(cls, name: str, data: Optional[Dict[str, Any]]) -> 'ProviderLimits':
+        """
+        Create limits from one provider's section of the YAML config.
+
+        Args:
+            name (str): Provider name, used in error messages
+            data (Optional[Dict[str, Any]]): The section; None means unlimited
+
+        Returns:
+            ProviderLimits: The limits
+
+        Raises:
+            ValueError: If the section has unknown keys or non-positive values
+        """
+        data = data or {}
+        if not isinstance(data, dict):
+            raise ValueError(f"Rate limits of '{name}' must be a mapping")
+        known = {f.name for f in fields(cls)}
+        unknown = sorted(set(data) - known)
+        if unknown:
+            raise ValueError(f"Unknown rate limit setting(s) for '{name}': {', '.join(unknown)}")
+        for key, value in data.items():
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Rate limit setting '{name}.{key}' must be a number")
+            if value < 0 or (value == 0 and key != 'max_retries'):
+                raise ValueError(f"Rate limit setting '{name}.{key}' must be positive")
+        settings = {k: v for k, v in data.items() if v is not None}
+        for key in ('max_in_flight', 'max_retries'):
+            if key in settings:
+                if not float(settings[key]).is_integer():
+                    raise ValueError(f"Rate limit setting '{name}.{key}' must be a whole number")
+                settings[key] = int(settings[key])
+        return cls(**settings)
+
+
+def load_rate_limits(path: str) -> Dict[str, ProviderLimits]:
+    """
+    Load per-provider limits from a YAML file.
+
+    Args:
+        path (str): Path to rate_limits.yaml
+
+    Returns:
+        Dict[str, ProviderLimits]: Provider name to limits
+
+    Raises:
+        IOError: If the file cannot be read
+        ValueError: If the file is not a mapping of valid provider limits
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+    except IOError as e:
+        raise IOError(f"Error reading rate limits file {path}: {str(e)}")
+    except yaml.YAMLError as e:
+        raise ValueError(f"Error parsing YAML in {path}: {str(e)}")
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError(f"Rate limits file {path} must map provider names to limits")
+    return {str(name): ProviderLimits.from_dict(str(name), section) for name, section in data.items()}
+
+
+def _take(state: Optional[Tuple[float, float]], rate: float, capacity: float, amount: float,
+          now: float) -> Tuple[Tuple[float, float], float]:
+    """
+    Reserve ``amount`` from a token bucket.
+
+    The level may go negative: the reservation is granted immediately and
+    the caller waits until the bucket has refilled to zero, so waiting
+    callers are served in order instead of racing for each new token.
+
+    Returns:
+        Tuple: The new (level, updated) state and the seconds to wait
+    """
+    level, updated = state if state else (capacity, now)
+    level = min(capacity, level + max(now - updated, 0.0) * rate) - amount
+    return (level, now), max(-level, 0.0) / rate
+
+
+class LocalCoordinator:
+    """Shares limiter state between the threads and coroutines of one process."""
+
+    _shared: Optional['LocalCoordinator'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._slots: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+
+    @classmethod
+    def shared(cls) -> 'LocalCoordinator':
+        """Return the process-wide coordinator, so every builder in a process shares one quota."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def reserve(self, key: str, buckets: Dict[str, Tuple[float, float, float]]) -> float:
+        """
+        Reserve capacity from several buckets at once.
+
+        Args:
+            key (str): Provider name
+            buckets (Dict[str, Tuple[float, float, float]]): Bucket name to
+                (refill rate per second, capacity, amount to take)
+
+        Returns:
+            float: Seconds to wait before the call may start
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = max(self._blocked_until.get(key, 0.0) - now, 0.0)
+            for bucket, (rate, capacity, amount) in buckets.items():
+                state, wait = _take(self._buckets.get((key, bucket)), rate, capacity, amount, now)
+                self._buckets[(key, bucket)] = state
+                delay = max(delay, wait)
+            return delay
+
+    def block(self, key: str, seconds: float) -> None:
+        """Hold back every call to a provider for ``seconds``."""
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._blocked_until[key] = max(self._blocked_until.get(key, 0.0), until)
+
+    def blocked_for(self, key: str) -> float:
+        """Return the seconds left until calls to a provider may resume."""
+        with self._lock:
+            return max(self._blocked_until.get(key, 0.0) - time.monotonic(), 0.0)
+
+    def try_acquire_slot(self, key: str, limit: int) -> Optional[str]:
+        """Take an in-flight slot if one is free; returns a handle for ``release_slot``."""
+        with self._lock:
+            if self._slots.get(key, 0) >= limit:
+                return None
+            self._slots[key] = self._slots.get(key, 0) + 1
+            return key
+
+    def acquire_slot(self, key: str, limit: int) -> str:
+        """Wait for and take an in-flight slot."""
+        with self._released:
+            while self._slots.get(key, 0) >= limit:
+                self._released.wait()
+            self._slots[key] = self._slots.get(key, 0) + 1
+            return key
+
+    def release_slot(self, handle: str) -> None:
+        """Give back a slot taken with ``acquire_slot`` or ``try_acquire_slot``."""
+        with self._released:
+            self._slots[handle] -= 1
+            self._released.notify()
+
+
+class FileCoordinator:
+    """
+    Shares limiter state between processes through lock files in a directory.
+
+    Bucket levels and backoff deadlines live in ``<provider>.state`` and are
+    updated under an exclusive ``flock``. Each in-flight slot is a
+    ``<provider>.slot<N>`` file held locked for the duration of a call, so
+    slots of a crashed process are released by the operating system.
+    Requires POSIX file locking.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize the FileCoordinator.
+
+        Args:
+            directory (str): Directory shared by the cooperating processes
+
+        Raises:
+            IOError: If file locking is unavailable or the directory cannot be created
+        """
+        if fcntl is None:
+            raise IOError("Coordinating rate limits across processes requires POSIX file locking")
+        self.directory = Path(directory)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            raise IOError(f"Error creating rate limit directory {directory}: {str(e)}")
+
+    @contextmanager
+    def _state(self, key: str) -> Iterator[Dict[str, Any]]:
+        """Lock a provider's state file and yield its contents; changes are written back."""
+        with open(self.directory / f"{key}.state", 'a+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except ValueError:
+                    # A torn write only loses the bucket levels
+                    state = {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def reserve(self, key: str, buckets: Dict[str, Tuple[float, float, float]]) -> float:
+        """See ``LocalCoordinator.reserve``."""
+        with self._state(key) as state:
+            now = time.time()
+            delay = max(state.get('blocked_until', 0.0) - now, 0.0)
+            levels = state.setdefault('buckets', {})
+            for bucket, (rate, capacity, amount) in buckets.items():
+                current = levels.get(bucket)
+                new_state, wait = _take(tuple(current) if current else None, rate, capacity, amount, now)
+                levels[bucket] = list(new_state)
+                delay = max(delay, wait)
+            return delay
+
+    def block(self, key: str, seconds: float) -> None:
+        """See ``LocalCoordinator.block``."""
+        with self._state(key) as state:
+            state['blocked_until'] = max(state.get('blocked_until', 0.0), time.time() + seconds)
+
+    def blocked_for(self, key: str) -> float:
+        """See ``LocalCoordinator.blocked_for``."""
+        with self._state(key) as state:
+            return max(state.get('blocked_until', 0.0) - time.time(), 0.0)
+
+    def try_acquire_slot(self, key: str, limit: int) -> Optional[Any]:
+        """See ``LocalCoordinator.try_acquire_slot``."""
+        start = random.randrange(limit)
+        for offset in range(limit):
+            f = open(self.directory / f"{key}.slot{(start + offset) % limit}", 'a')
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                continue
+            return f
+        return None
+
+    def acquire_slot(self, key: str, limit: int) -> Any:
+        """See ``LocalCoordinator.acquire_slot``."""
+        while True:
+            handle = self.try_acquire_slot(key, limit)
+            if handle is not None:
+                return handle
+            time.sleep(SLOT_POLL_INTERVAL)
+
+    def release_slot(self, handle: Any) -> None:
+        """See ``LocalCoordinator.release_slot``."""
+        try:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+        finally:
+            handle.close()
+
+
+class RateLimiter:
+    """
+    Token-bucket and concurrency limiter for one provider.
+
+    Calls are admitted at the configured requests and tokens per minute,
+    with at most ``max_in_flight`` running at once. A rate-limit error
+    pauses every caller sharing the coordinator for an exponentially growing,
+    jittered backoff (or the delay the provider asked for) and halves the
+    admitted rate, which then recovers gradually with successful calls.
+    """
+
+    def __init__(self, name: str, limits: ProviderLimits, coordinator: Any = None):
+        """
+        Initialize the RateLimiter.
+
+        Args:
+            name (str): Provider name; limiters with the same name and coordinator share a quota
+            limits (ProviderLimits): Quota of the provider
+            coordinator (Any): LocalCoordinator or FileCoordinator holding the shared
+                state. If None, the process-wide LocalCoordinator is used.
+        """
+        self.name = name
+        self.limits = limits
+        self.coordinator = coordinator if coordinator is not None else LocalCoordinator.shared()
+        self.rate_limited = 0
+        self.throttled_seconds = 0.0
+        self._backoff = limits.initial_backoff
+        self._rate_factor = 1.0
+        self._lock = threading.Lock()
+
+    @property
+    def rate_factor(self) -> float:
+        """Fraction of the configured rate currently admitted."""
+        return self._rate_factor
+
+    def _buckets(self, tokens: float) -> Dict[str, Tuple[float, float, float]]:
+        buckets = {}
+        for bucket, per_minute, amount in (('requests', self.limits.requests_per_minute, 1),
+                                           ('tokens', self.limits.tokens_per_minute, tokens)):
+            if per_minute and amount:
+                rate = per_minute * self._rate_factor / 60
+                capacity = max(per_minute / 60 * self.limits.burst_seconds, 1.0)
+                buckets[bucket] = (rate, capacity, amount)
+        return buckets
+
+    def _reserve(self, tokens: float) -> float:
+        buckets = self._buckets(tokens)
+        if buckets:
+            return self.coordinator.reserve(self.name, buckets)
+        return self.coordinator.blocked_for(self.name)
+
+    def _record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.throttled_seconds += seconds
+        metrics = current_metrics()
+        if metrics is not None and seconds > 0:
+            metrics.record_throttle(current_stage(), seconds)
+
+    @contextmanager
+    def acquire(self, tokens: float = 0) -> Iterator[float]:
+        """
+        Wait until a call may start, and hold an in-flight slot while it runs.
+
+        The call's share of the buckets is reserved and waited for first; the
+        slot is only taken once the call is ready to start.
+
+        Args:
+            tokens (float): Tokens the call is expected to use
+
+        Yields:
+            float: Seconds spent waiting
+        """
+        start = time.perf_counter()
+        # Wait for the buckets before taking a slot, so waiting callers do not hold slots
+        delay = self._reserve(tokens)
+        while delay > 0:
+            time.sleep(delay)
+            # A rate-limit error elsewhere may have paused the provider meanwhile
+            delay = self.coordinator.blocked_for(self.name)
+        slot = None
+        if self.limits.max_in_flight:
+            slot = self.coordinator.acquire_slot(self.name, self.limits.max_in_flight)
+        try:
+            delay = self.coordinator.blocked_for(self.name)
+            while delay > 0:
+                time.sleep(delay)
+                delay = self.coordinator.blocked_for(self.name)
+            waited = time.perf_counter() - start
+            self._record_wait(waited)
+            yield waited
+        finally:
+            if slot is not None:
+                self.coordinator.release_slot(slot)
+
+    @asynccontextmanager
+    async def aacquire(self, tokens: float = 0) -> AsyncIterator[float]:
+        """Like ``acquire``, but waits without blocking the event loop."""
+        start = time.perf_counter()
+        delay = self._reserve(tokens)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.coordinator.blocked_for(self.name)
+        slot = None
+        if self.limits.max_in_flight:
+            while True:
+                slot = self.coordinator.try_acquire_slot(self.name, self.limits.max_in_flight)
+                if slot is not None:
+                    break
+                await asyncio.sleep(SLOT_POLL_INTERVAL)
+        try:
+            delay = self.coordinator.blocked_for(self.name)
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self.coordinator.blocked_for(self.name)
+            waited = time.perf_counter() - start
+            self._record_wait(waited)
+            yield waited
+        finally:
+            if slot is not None:
+                self.coordinator.release_slot(slot)
+
+    def charge(self, tokens: float) -> None:
+        """Account for tokens only known after a call, such as the completion."""
+        if self.limits.tokens_per_minute and tokens:
+            self.coordinator.reserve(self.name, {k: v for k, v in self._buckets(tokens).items() if k == 'tokens'})
+
+    def record_success(self) -> None:
+        """Reset the backoff and let the admitted rate recover after a successful call."""
+        with self._lock:
+            self._backoff = self.limits.initial_backoff
+            self._rate_factor = min(self._rate_factor + RATE_RECOVERY, 1.0)
+
+    def record_rate_limited(self, delay: Optional[float] = None) -> float:
+        """
+        Back off after a rate-limit error.
+
+        Args:
+            delay (Optional[float]): Delay requested by the provider, if any
+
+        Returns:
+            float: Seconds every caller of this provider is paused for
+        """
+        with self._lock:
+            backoff = self._backoff * random.uniform(0.5, 1.0)
+            self._backoff = min(self._backoff * 2, self.limits.max_backoff)
+            self._rate_factor = max(self._rate_factor / 2, MIN_RATE_FACTOR)
+            self.rate_limited += 1
+        pause = max(delay or 0.0, backoff)
+        self.coordinator.block(self.name, pause)
+        return pause
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        return is_rate_limit_error(error) and attempt < self.limits.max_retries
+
+    def _announce_retry(self, error: Exception, attempt: int,
+                        on_retry: Optional[Callable[[int, float, Exception], None]]) -> None:
+        pause = self.record_rate_limited(retry_after(error))
+        print(f"Rate limited by {self.name}; retrying in {pause:.1f}s (attempt {attempt})")
+        if on_retry is not None:
+            on_retry(attempt, pause, error)
+
+    def run(self, func: Callable[[], T], tokens: float = 0,
+            on_retry: Optional[Callable[[int, float, Exception], None]] = None) -> T:
+        """
+        Call ``func`` within the limits, retrying it on rate-limit errors.
+
+        Args:
+            func (Callable[[], T]): The provider call
+            tokens (float): Tokens the call is expected to use
+            on_retry (Optional[Callable]): Called with the attempt number, the pause
+                and the error before each retry
+
+        Returns:
+            T: Result of ``func``
+
+        Raises:
+            Exception: The error of the last attempt, or any error that is not a rate limit
+        """
+        attempt = 0
+        while True:
+            with self.acquire(tokens):
+                try:
+                    result = func()
+                except Exception as e:
+                    if not self._should_retry(e, attempt):
+                        raise
+                    error = e
+                else:
+                    self.record_success()
+                    return result
+            attempt += 1
+            self._announce_retry(error, attempt, on_retry)
+
+    async def arun(self, func: Callable[[], Awaitable[T]], tokens: float = 0,
+                   on_retry: Optional[Callable[[int, float, Exception], None]] = None) -> T:
+        """Like ``run``, for a coroutine function."""
+        attempt = 0
+        while True:
+            async with self.aacquire(tokens):
+                try:
+                    result = await func()
+                except Exception as e:
+                    if not self._should_retry(e, attempt):
+                        raise
+                    error = e
+                else:
+                    self.record_success()
+                    return result
+            attempt += 1
+            self._announce_retry(error, attempt, on_retry)
+
+    def stats(self) -> Dict[str, float]:
+        """Summarize throttling and rate-limit errors so far."""
+        with self._lock:
+            return {
+                'rate_limited': self.rate_limited,
+                'throttled_seconds': self.throttled_seconds,
+                'rate_factor': self._rate_factor,
+            }
+
+
+def build_rate_limiters(limits: Dict[str, ProviderLimits],
+                        coordinator_dir: Optional[str] = None) -> Dict[str, RateLimiter]:
+    """
+    Create a limiter for every configured provider.
+
+    Args:
+        limits (Dict[str, ProviderLimits]): Provider name to limits
+        coordinator_dir (Optional[str]): Directory for sharing the limits with other
+            processes. If None, they are shared within this process only.
+
+    Returns:
+        Dict[str, RateLimiter]: Provider name to limiter
+
+    Raises:
+        IOError: If the directory cannot be used for coordination
+    """
+    coordinator = FileCoordinator(coordinator_dir) if coordinator_dir else LocalCoordinator.shared()
+    return {name: RateLimiter(name, provider_limits, coordinator) for name, provider_limits in limits.items()}
@@ -0,0 +1,187 @@
+from pathlib import Path
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    On-disk key/value cache with TTL expiry and size-bounded LRU eviction.
+
+    Entries live in a single SQLite file so the cache can be shared by the
+    threads of one process and by concurrent processes. The total size of
+    the stored values is kept up to date by triggers, so a write only
+    evicts, expired entries first, when the cache is over budget. Hits
+    record their access time in memory; the times are written in batches
+    with the next store, so lookups do not write to the database.
+    """
+
+    DEFAULT_TTL = 7 * 24 * 3600
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    # Access times buffered by hits before they are written without waiting for a store
+    TOUCH_BATCH = 1000
+
+    def __init__(self, path: str, ttl: Optional[float] = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the ResponseCache.
+
+        Args:
+            path (str): SQLite database file, created if missing
+            ttl (Optional[float]): Default time-to-live of an entry in seconds; None never expires
+            max_bytes (int): Total size of stored values above which least recently used entries are evicted
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " expires_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires_at)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            # Caches created before the running total existed are summed once
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value)"
+                               " SELECT 'bytes', COALESCE(SUM(size), 0) FROM entries")
+            for event, change in (('INSERT', 'NEW.size'), ('DELETE', '-OLD.size'),
+                                  ('UPDATE OF size', 'NEW.size - OLD.size')):
+                self._conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS entries_bytes_{event.split()[0].lower()} AFTER {event} ON entries"
+                    f" BEGIN UPDATE meta SET value = value + {change} WHERE key = 'bytes'; END"
+                )
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key from JSON-serializable parts.
+
+        Returns:
+            str: SHA-256 hex digest of the canonical JSON encoding of the parts
+        """
+        encoded = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a value.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            Optional[str]: The cached value, or None if missing or expired
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.TOUCH_BATCH:
+                self._flush_touches()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting least recently used entries if the cache is full.
+
+        Args:
+            key (str): Cache key
+            value (str): Value to store
+            ttl (Optional[float]): Time-to-live in seconds, overriding the cache default
+        """
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        size = len(value.encode('utf-8'))
+        with self._lock, self._conn:
+            # An upsert rather than a replace, so the size trigger sees the old size
+            self._conn.execute(
+                "INSERT INTO entries (key, value, size, created_at, accessed_at, expires_at)"
+                " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value,"
+                " size = excluded.size, created_at = excluded.created_at, accessed_at = excluded.accessed_at,"
+                " expires_at = excluded.expires_at",
+                (key, value, size, now, now, expires_at)
+            )
+            self._touched.pop(key, None)
+            self._flush_touches()
+            if self._total_bytes() > self.max_bytes:
+                self._evict(now)
+
+    def _flush_touches(self) -> None:
+        """Write the access times buffered by hits."""
+        if self._touched:
+            self._conn.executemany("UPDATE entries SET accessed_at = ? WHERE key = ?",
+                                   [(accessed_at, key) for key, accessed_at in self._touched.items()])
+            self._touched.clear()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT value FROM meta WHERE key = 'bytes'").fetchone()[0]
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the least recently used ones until under max_bytes."""
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._touched.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache usage for this process.
+
+        Returns:
+            Dict[str, Any]: hits, misses, hit_ratio, entries and bytes stored
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            total = self._total_bytes()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': total,
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            with self._conn:
+                self._flush_touches()
+            self._conn.close()
@@ -0,0 +1,157 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+import contextvars
+import os
+import threading
+import time
+
+_current_stream: contextvars.ContextVar = contextvars.ContextVar('website_builder_stream', default=None)
+
+FINAL_ANSWER_MARKER = 'Final Answer:'
+
+
+def current_stream() -> Optional['StreamingOutput']:
+    """Return the streaming output the current task writes to, if any."""
+    return _current_stream.get()
+
+
+class StreamingOutput:
+    """
+    Incremental writer for one task's output file.
+
+    Agents answer in the ReAct format, so each LLM response is scanned for
+    the ``Final Answer:`` marker and only the text after it is written.
+    Text goes to ``<file>.partial`` next to the target, which can be
+    previewed while the task runs; ``finalize`` moves it into place
+    atomically once the task's final output is known.
+    """
+
+    def __init__(self, path: Path, on_progress: Optional[Callable[['StreamingOutput'], None]] = None):
+        """
+        Initialize the StreamingOutput.
+
+        Args:
+            path (Path): Final location of the output file
+            on_progress (Optional[Callable]): Called after each chunk is written
+        """
+        self.path = Path(path)
+        self.partial_path = self.path.with_name(f"{self.path.name}.partial")
+        self.on_progress = on_progress
+        self.bytes_written = 0
+        self.started_at = time.perf_counter()
+        self.first_byte_seconds: Optional[float] = None
+        self._response_id = None
+        self._pending = ''
+        self._in_answer = False
+        self._file = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self) -> Iterator['StreamingOutput']:
+        """Route LLM chunks produced in the current context to this output."""
+        token = _current_stream.set(self)
+        try:
+            yield self
+        finally:
+            _current_stream.reset(token)
+
+    def _open(self) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.partial_path, 'w', encoding='utf-8')
+
+    def begin_response(self, response_id: Optional[str] = None) -> None:
+        """
+        Start a new LLM response, discarding text streamed for the previous one.
+
+        Args:
+            response_id (Optional[str]): Identifier shared by the chunks of one response
+        """
+        with self._lock:
+            self._response_id = response_id
+            self._pending = ''
+            self._in_answer = False
+            if self._file is not None and self.bytes_written:
+                self._file.seek(0)
+                self._file.truncate()
+                self.bytes_written = 0
+
+    def feed(self, chunk: str, response_id: Optional[str] = None) -> None:
+        """
+        Process one streamed chunk.
+
+        Args:
+            chunk (str): Text of the chunk
+            response_id (Optional[str]): Identifier of the response the chunk belongs to;
+                a new identifier starts a new response
+        """
+        if response_id is not None and response_id != self._response_id:
+            self.begin_response(response_id)
+        with self._lock:
+            if not self._in_answer:
+                self._pending += chunk
+                index = self._pending.find(FINAL_ANSWER_MARKER)
+                if index < 0:
+                    # Keep just enough text to find a marker split across chunks
+                    self._pending = self._pending[-len(FINAL_ANSWER_MARKER):]
+                    return
+                self._in_answer = True
+                chunk = self._pending[index + len(FINAL_ANSWER_MARKER):].lstrip()
+                self._pending = ''
+                if not chunk:
+                    return
+            elif self.bytes_written == 0:
+                chunk = chunk.lstrip()
+                if not chunk:
+                    return
+            self._open()
+            self._file.write(chunk)
+            self._file.flush()
+            if self.first_byte_seconds is None:
+                self.first_byte_seconds = time.perf_counter() - self.started_at
+            self.bytes_written += len(chunk.encode('utf-8'))
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+    def finalize(self, content: str) -> Path:
+        """
+        Move the streamed file into place, making sure it holds ``content``.
+
+        The streamed text is replaced by ``content`` if they differ, e.g.
+        when the answer came from a cache and nothing was streamed.
+
+        Args:
+            content (str): Final output of the task
+
+        Returns:
+            Path: Path to the output file
+
+        Raises:
+            IOError: If the file cannot be written
+        """
+        with self._lock:
+            try:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                streamed = None
+                if self.partial_path.exists():
+                    with open(self.partial_path, 'r', encoding='utf-8') as f:
+                        streamed = f.read()
+                if streamed != content:
+                    with open(self.partial_path, 'w', encoding='utf-8') as f:
+                        f.write(content)
+                os.replace(self.partial_path, self.path)
+                return self.path
+            except (IOError, OSError) as e:
+                raise IOError(f"Error writing file {self.path.name}: {str(e)}")
+
+    def abort(self) -> None:
+        """Discard the partial file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self.partial_path.exists():
+                self.partial_path.unlink()
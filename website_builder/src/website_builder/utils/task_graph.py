@@ -0,0 +1,171 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+class TaskGraph:
+    """Dependency graph of pipeline tasks with a bounded parallel executor."""
+
+    def __init__(self, dependencies: Dict[str, List[str]]):
+        """
+        Initialize the TaskGraph.
+
+        Args:
+            dependencies (Dict[str, List[str]]): Mapping of task name to the names it depends on
+
+        Raises:
+            ValueError: If a task depends on an unknown task
+        """
+        self.dependencies = {name: list(dict.fromkeys(deps)) for name, deps in dependencies.items()}
+        for name, deps in self.dependencies.items():
+            for dep in deps:
+                if dep not in self.dependencies:
+                    raise ValueError(f"Task '{name}' depends on unknown task '{dep}'")
+
+        self.dependents: Dict[str, List[str]] = {name: [] for name in self.dependencies}
+        for name, deps in self.dependencies.items():
+            for dep in deps:
+                self.dependents[dep].append(name)
+
+    @classmethod
+    def from_tasks_config(cls, tasks_config: Dict[str, Any]) -> 'TaskGraph':
+        """
+        Build a graph from a tasks configuration.
+
+        Both ``dependencies`` and ``context`` entries order a task after the
+        tasks they name.
+
+        Args:
+            tasks_config (Dict[str, Any]): Tasks configuration dictionary
+
+        Returns:
+            TaskGraph: The dependency graph
+        """
+        dependencies = {}
+        for task_name, task_config in tasks_config.items():
+            deps = list(task_config.get('dependencies') or [])
+            deps += [c for c in task_config.get('context') or [] if isinstance(c, str)]
+            dependencies[task_name] = deps
+        return cls(dependencies)
+
+    def find_cycle(self) -> Optional[List[str]]:
+        """
+        Find a dependency cycle, if there is one.
+
+        Returns:
+            Optional[List[str]]: Task names forming the cycle, first name repeated at the end
+        """
+        WHITE, GREY, BLACK = 0, 1, 2
+        state = {name: WHITE for name in self.dependencies}
+        for root in self.dependencies:
+            if state[root] != WHITE:
+                continue
+            path = [root]
+            stack = [iter(self.dependencies[root])]
+            state[root] = GREY
+            while stack:
+                dep = next(stack[-1], None)
+                if dep is None:
+                    state[path.pop()] = BLACK
+                    stack.pop()
+                elif state[dep] == GREY:
+                    return path[path.index(dep):] + [dep]
+                elif state[dep] == WHITE:
+                    state[dep] = GREY
+                    path.append(dep)
+                    stack.append(iter(self.dependencies[dep]))
+        return None
+
+    def topological_order(self) -> List[str]:
+        """
+        Order the tasks so that every task comes after its dependencies.
+
+        Returns:
+            List[str]: Task names in execution order
+
+        Raises:
+            ValueError: If the graph contains a cycle
+        """
+        cycle = self.find_cycle()
+        if cycle:
+            raise ValueError(f"Task dependency cycle detected: {' -> '.join(cycle)}")
+
+        remaining = {name: len(deps) for name, deps in self.dependencies.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for dependent in self.dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        return order
+
+    def ancestors(self, name: str) -> Set[str]:
+        """
+        Find every task a task depends on, directly or indirectly.
+
+        Args:
+            name (str): Task name
+
+        Returns:
+            Set[str]: Names of the task's transitive dependencies
+        """
+        found: Set[str] = set()
+        stack = list(self.dependencies[name])
+        while stack:
+            dep = stack.pop()
+            if dep not in found:
+                found.add(dep)
+                stack.extend(self.dependencies[dep])
+        return found
+
+    def run(self, execute: Callable[[str, Dict[str, Any]], Any], max_workers: int = 1) -> Dict[str, Any]:
+        """
+        Execute every task, running independent tasks concurrently.
+
+        A task is submitted as soon as all of its dependencies have finished,
+        and at most ``max_workers`` tasks run at once.
+
+        Args:
+            execute (Callable[[str, Dict[str, Any]], Any]): Called with a task name and
+                the results of its dependencies; returns the task's result
+            max_workers (int): Maximum number of tasks running at the same time
+
+        Returns:
+            Dict[str, Any]: Result of each task
+
+        Raises:
+            ValueError: If the graph contains a cycle or max_workers is not positive
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        order = self.topological_order()
+
+        results: Dict[str, Any] = {}
+        remaining = {name: len(deps) for name, deps in self.dependencies.items()}
+        ready = [name for name in order if remaining[name] == 0]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while ready or running:
+                while ready:
+                    name = ready.pop(0)
+                    upstream = {dep: results[dep] for dep in self.dependencies[name]}
+                    running[executor.submit(execute, name, upstream)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception:
+                        # Let in-flight siblings finish, but start nothing new.
+                        for other in running:
+                            other.cancel()
+                        raise
+                    for dependent in self.dependents[name]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            ready.append(dependent)
+        return results
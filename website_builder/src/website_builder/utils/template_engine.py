@@ -0,0 +1,171 @@
+from html import escape as _escape_html
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import os
+import re
+import threading
+
+
+# A slot is an identifier in single braces; CSS and JS blocks such as
+# ``{ margin: 0 }`` never match, so stylesheets and scripts need no escaping.
+SLOT_PATTERN = re.compile(r'\{([A-Za-z_][A-Za-z0-9_]*)\}')
+# Templates whose slot values are HTML-escaped unless marked safe
+AUTOESCAPE_SUFFIXES = {'.html', '.htm', '.xml'}
+
+
+class Markup(str):
+    """Text that is already safe HTML and is inserted into templates unescaped."""
+
+
+def escape(value: Any) -> Markup:
+    """
+    Escape a value for HTML text or attribute content.
+
+    Args:
+        value (Any): Value to escape; Markup is returned as is
+
+    Returns:
+        Markup: The escaped text
+    """
+    if isinstance(value, Markup):
+        return value
+    return Markup(_escape_html(str(value), quote=True))
+
+
+class Template:
+    """
+    A template parsed once into literal text and slots.
+
+    Rendering fills a copy of the pre-split parts and joins them, so it
+    does no parsing and a single string concatenation per render.
+    """
+
+    def __init__(self, source: str, name: str = '<string>', autoescape: bool = False):
+        """
+        Compile a template.
+
+        Args:
+            source (str): Template text with ``{slot}`` placeholders
+            name (str): Name used in error messages
+            autoescape (bool): Whether to HTML-escape slot values that are not Markup
+        """
+        self.name = name
+        self.autoescape = autoescape
+        parts: List[str] = []
+        positions: List[Tuple[int, str]] = []
+        position = 0
+        for match in SLOT_PATTERN.finditer(source):
+            parts.append(source[position:match.start()])
+            positions.append((len(parts), match.group(1)))
+            parts.append('')
+            position = match.end()
+        parts.append(source[position:])
+        self._parts = parts
+        self._positions = positions
+        self.slots = tuple(dict.fromkeys(name for _, name in positions))
+
+    def render(self, context: Optional[Mapping[str, Any]] = None, **slots: Any) -> str:
+        """
+        Fill the template's slots.
+
+        Args:
+            context (Optional[Mapping[str, Any]]): Slot values
+            **slots: More slot values, overriding ``context``
+
+        Returns:
+            str: The rendered text
+
+        Raises:
+            ValueError: If a slot has no value
+        """
+        values = dict(context or {}, **slots)
+        missing = [name for name in self.slots if name not in values]
+        if missing:
+            raise ValueError(f"Template {self.name} is missing values for: {', '.join(missing)}")
+        if self.autoescape:
+            values = {name: escape(values[name]) for name in self.slots}
+        parts = list(self._parts)
+        for index, name in self._positions:
+            parts[index] = str(values[name])
+        return ''.join(parts)
+
+
+class TemplateEngine:
+    """
+    Loads templates from a directory and keeps them compiled.
+
+    A template is compiled on first use and recompiled only when its file
+    changes; ``.html`` templates autoescape their slot values.
+    """
+
+    _shared: Optional['TemplateEngine'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize the TemplateEngine.
+
+        Args:
+            directory (Optional[str]): Template directory. If None, uses the package's templates.
+        """
+        self.directory = Path(directory) if directory else Path(__file__).parent.parent / 'templates'
+        self._cache: Dict[str, Tuple[Tuple[int, int], Template]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'TemplateEngine':
+        """Return the process-wide engine for the package's templates."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def get(self, name: str) -> Template:
+        """
+        Return a compiled template.
+
+        Args:
+            name (str): Path of the template relative to the template directory
+
+        Returns:
+            Template: The compiled template
+
+        Raises:
+            IOError: If the template cannot be read
+        """
+        path = self.directory / name
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise IOError(f"Error reading template {name}: {str(e)}")
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+        try:
+            source = path.read_text(encoding='utf-8')
+        except OSError as e:
+            raise IOError(f"Error reading template {name}: {str(e)}")
+        template = Template(source, name=name, autoescape=path.suffix.lower() in AUTOESCAPE_SUFFIXES)
+        with self._lock:
+            self._cache[name] = (signature, template)
+        return template
+
+    def render(self, name: str, context: Optional[Mapping[str, Any]] = None, **slots: Any) -> str:
+        """
+        Render a template by name.
+
+        Args:
+            name (str): Path of the template relative to the template directory
+            context (Optional[Mapping[str, Any]]): Slot values
+            **slots: More slot values, overriding ``context``
+
+        Returns:
+            str: The rendered text
+
+        Raises:
+            IOError: If the template cannot be read
+            ValueError: If a slot has no value
+        """
+        return self.get(name).render(context, **slots)
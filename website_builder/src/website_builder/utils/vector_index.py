@@ -0,0 +1,463 @@
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # pragma: no cover - optional dependency
+    SentenceTransformer = None
+
+
+# Characters per indexed chunk; paragraphs are packed up to this size
+CHUNK_SIZE = 800
+# Files of a knowledge directory that are indexed
+KNOWLEDGE_SUFFIXES = {'.txt', '.md', '.markdown'}
+_WORD = re.compile(r'[a-z0-9]+(?:[\'-][a-z0-9]+)*')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+STOPWORDS = frozenset((
+    'a about an and are as at be by can for from has have how in into is it its of on or that the their '
+    'this to was what when where which who why will with'
+).split())
+
+# A sparse vector: dimension to weight
+Vector = Dict[int, float]
+
+
+def content_words(text: str) -> List[str]:
+    """
+    Split text into lowercased words, without stopwords.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        List[str]: The words, in order
+    """
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _normalize(vector: Vector) -> Vector:
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {i: v / norm for i, v in vector.items()} if norm else vector
+
+
+class HashingEmbedder:
+    """
+    Embeds text offline by hashing its words and word pairs into a sparse vector.
+
+    Needs no model and no network; texts sharing vocabulary get similar
+    vectors, which is enough to find earlier research on the same topic.
+    """
+
+    # Similarity above which a chunk is taken to cover a query
+    MIN_SCORE = 0.12
+    # Strongest dimensions a chunk is indexed under, and a query looks up
+    POSTINGS = 256
+    PROBES = 64
+
+    def __init__(self, dimensions: int = 1 << 18):
+        """
+        Initialize the HashingEmbedder.
+
+        Args:
+            dimensions (int): Number of hash buckets; large enough that distinct words rarely collide
+        """
+        self.dimensions = dimensions
+        self.signature = f"hashing-{dimensions}"
+
+    def embed(self, texts: Sequence[str]) -> List[Vector]:
+        """
+        Embed texts.
+
+        Args:
+            texts (Sequence[str]): Texts to embed
+
+        Returns:
+            List[Vector]: One unit-length sparse vector per text (empty for a text without words)
+        """
+        vectors = []
+        for text in texts:
+            words = content_words(text)
+            counts: Dict[str, int] = {}
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                counts[feature] = counts.get(feature, 0) + 1
+            vector: Vector = {}
+            for feature, count in counts.items():
+                value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+                index = value % self.dimensions
+                # Word pairs count half, so shared vocabulary dominates
+                weight = (1 + math.log(count)) * (0.5 if ' ' in feature else 1.0)
+                vector[index] = vector.get(index, 0.0) + (weight if value >> 63 else -weight)
+            vectors.append(_normalize(vector))
+        return vectors
+
+
+class SentenceTransformerEmbedder:
+    """Embeds text with a local sentence-transformers model, e.g. one downloaded ahead of time."""
+
+    MIN_SCORE = 0.5
+    POSTINGS = 32
+    PROBES = 32
+
+    def __init__(self, model: str = 'all-MiniLM-L6-v2'):
+        """
+        Load the model.
+
+        Args:
+            model (str): Name or path of a sentence-transformers model
+
+        Raises:
+            ValueError: If sentence-transformers is not installed or the model cannot be loaded
+        """
+        if SentenceTransformer is None:
+            raise ValueError("The sentence-transformers package is needed for model embeddings; "
+                             "use the hashing embedder instead")
+        try:
+            self._model = SentenceTransformer(model)
+        except Exception as e:
+            raise ValueError(f"Failed to load embedding model {model}: {str(e)}")
+        self.dimensions = self._model.get_sentence_embedding_dimension()
+        self.signature = f"sentence-transformers-{model}-{self.dimensions}"
+
+    def embed(self, texts: Sequence[str]) -> List[Vector]:
+        """Embed texts as unit-length vectors."""
+        return [{i: float(v) for i, v in enumerate(vector)}
+                for vector in self._model.encode(list(texts), normalize_embeddings=True)]
+
+
+def build_embedder(spec: str = 'hashing'):
+    """
+    Create an embedder from its command-line name.
+
+    Args:
+        spec (str): ``hashing``, ``hashing:<dimensions>`` or ``sentence-transformers[:<model>]``
+
+    Returns:
+        HashingEmbedder or SentenceTransformerEmbedder: The embedder
+
+    Raises:
+        ValueError: If the name is unknown or the model cannot be loaded
+    """
+    kind, _, argument = spec.partition(':')
+    if kind == 'hashing':
+        if argument and not argument.isdigit():
+            raise ValueError(f"Invalid hashing embedder dimensions: {argument}")
+        return HashingEmbedder(int(argument)) if argument else HashingEmbedder()
+    if kind == 'sentence-transformers':
+        return SentenceTransformerEmbedder(argument) if argument else SentenceTransformerEmbedder()
+    raise ValueError(f"Unknown embedder '{spec}'; use 'hashing' or 'sentence-transformers:<model>'")
+
+
+def chunk_text(text: str, size: int = CHUNK_SIZE) -> List[str]:
+    """
+    Split a document into chunks of about ``size`` characters.
+
+    Paragraphs are kept whole where they fit; longer ones are split into
+    sentences, and sentences longer than a chunk at word boundaries.
+
+    Args:
+        text (str): The document
+        size (int): Target chunk length in characters
+
+    Returns:
+        List[str]: The chunks, in document order
+    """
+    pieces: List[str] = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= size:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            while len(sentence) > size:
+                cut = sentence.rfind(' ', 0, size)
+                cut = cut if cut > 0 else size
+                pieces.append(sentence[:cut])
+                sentence = sentence[cut:].strip()
+            pieces.append(sentence)
+    chunks: List[str] = []
+    current = ''
+    for piece in filter(None, pieces):
+        if current and len(current) + 2 + len(piece) > size:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _features(vector: Vector, limit: int) -> List[int]:
+    """Return the vector's ``limit`` strongest dimensions, each signed by the direction of its weight."""
+    strongest = sorted(vector.items(), key=lambda item: -abs(item[1]))[:limit]
+    return [index * 2 + (weight < 0) for index, weight in strongest]
+
+
+def _pack(vector: Vector) -> Tuple[bytes, bytes]:
+    return array('I', vector.keys()).tobytes(), array('f', vector.values()).tobytes()
+
+
+@dataclass
+class SearchHit:
+    """A chunk found by a search, with the document it belongs to."""
+
+    source: str
+    title: str
+    link: Optional[str]
+    text: str
+    score: float
+    # When the document was last added or seen unchanged
+    updated_at: float = 0.0
+
+
+class VectorIndex:
+    """
+    On-disk approximate nearest-neighbour index of text chunks.
+
+    Documents are split into chunks, embedded and stored in a single SQLite
+    file. Each chunk is posted in an inverted index under the strongest
+    dimensions of its vector, signed; a search looks up the chunks posted
+    under the query's strongest dimensions, keeps the CANDIDATES whose
+    postings carry most of the query's weight and ranks only those by
+    cosine similarity. It is approximate because chunks sharing only weak
+    dimensions with the query are not considered. Indexes of up to
+    EXACT_SEARCH_LIMIT chunks are searched exhaustively instead.
+
+    Upserts are incremental: an unchanged document is skipped, and of a
+    changed one only new or edited chunks are embedded.
+    """
+
+    EXACT_SEARCH_LIMIT = 500
+    CANDIDATES = 200
+
+    def __init__(self, path: str, embedder=None):
+        """
+        Open or create the index.
+
+        An index built with a different embedder is emptied, since its
+        vectors cannot be compared with new ones.
+
+        Args:
+            path (str): SQLite database file, created if missing
+            embedder: Embedder with ``embed`` and ``signature``; a HashingEmbedder if None
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder if embedder is not None else HashingEmbedder()
+        self.min_score = getattr(self.embedder, 'MIN_SCORE', HashingEmbedder.MIN_SCORE)
+        self.postings = getattr(self.embedder, 'POSTINGS', HashingEmbedder.POSTINGS)
+        self.probes = getattr(self.embedder, 'PROBES', HashingEmbedder.PROBES)
+        self._lock = threading.Lock()
+        # Held for a whole upsert, so concurrent upserts of a document do not interleave
+        self._write_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        layout = f"{self.embedder.signature}/{self.postings}"
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " source TEXT PRIMARY KEY,"
+                " digest TEXT NOT NULL,"
+                " title TEXT NOT NULL,"
+                " link TEXT,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " id INTEGER PRIMARY KEY,"
+                " source TEXT NOT NULL,"
+                " digest TEXT NOT NULL,"
+                " text TEXT NOT NULL,"
+                " dims BLOB NOT NULL,"
+                " weights BLOB NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                " feature INTEGER NOT NULL,"
+                " chunk_id INTEGER NOT NULL,"
+                " PRIMARY KEY (feature, chunk_id)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS postings_chunk ON postings (chunk_id)")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'layout'").fetchone()
+            if row is not None and row[0] != layout:
+                print(f"Knowledge index {self.path} was built with {row[0]}; rebuilding it for {layout}")
+                for table in ('documents', 'chunks', 'postings'):
+                    self._conn.execute(f"DELETE FROM {table}")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('layout', ?)", (layout,))
+
+    def upsert(self, source: str, text: str, title: Optional[str] = None, link: Optional[str] = None) -> int:
+        """
+        Add a document, or update it if its text or title changed.
+
+        Each chunk is embedded together with the title, so chunks far from
+        the document's heading still match queries on its subject.
+
+        Args:
+            source (str): Identifier of the document, e.g. its path or URL
+            text (str): The document's text
+            title (Optional[str]): Title shown in search results; the source if None
+            link (Optional[str]): URL of the document, if it has one
+
+        Returns:
+            int: Number of chunks embedded; 0 if the document was unchanged, in which case
+                only the time it was last seen is updated
+        """
+        title = title or source
+        digest = hashlib.sha256(f"{title}\0{text}".encode('utf-8')).hexdigest()
+        with self._write_lock:
+            with self._lock:
+                row = self._conn.execute("SELECT digest FROM documents WHERE source = ?", (source,)).fetchone()
+            if row is not None and row[0] == digest:
+                with self._lock, self._conn:
+                    self._conn.execute("UPDATE documents SET updated_at = ? WHERE source = ?", (time.time(), source))
+                return 0
+            with self._lock:
+                existing = dict(self._conn.execute("SELECT digest, id FROM chunks WHERE source = ?", (source,)))
+
+            chunks = {hashlib.sha256(f"{title}\0{chunk}".encode('utf-8')).hexdigest(): chunk
+                      for chunk in chunk_text(text)}
+            added = [(key, chunk) for key, chunk in chunks.items() if key not in existing]
+            # Embedding is the slow part; searches may go on meanwhile
+            vectors = self.embedder.embed([f"{title}\n{chunk}" for _, chunk in added]) if added else []
+            stale = [(chunk_id,) for key, chunk_id in existing.items() if key not in chunks]
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM chunks WHERE id = ?", stale)
+                self._conn.executemany("DELETE FROM postings WHERE chunk_id = ?", stale)
+                for (key, chunk), vector in zip(added, vectors):
+                    cursor = self._conn.execute(
+                        "INSERT INTO chunks (source, digest, text, dims, weights) VALUES (?, ?, ?, ?, ?)",
+                        (source, key, chunk, *_pack(vector))
+                    )
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO postings (feature, chunk_id) VALUES (?, ?)",
+                        [(feature, cursor.lastrowid) for feature in _features(vector, self.postings)]
+                    )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents (source, digest, title, link, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (source, digest, title, link, time.time())
+                )
+            return len(added)
+
+    def remove(self, source: str) -> None:
+        """Remove a document and its chunks."""
+        with self._write_lock, self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM postings WHERE chunk_id IN (SELECT id FROM chunks WHERE source = ?)", (source,))
+            self._conn.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            self._conn.execute("DELETE FROM documents WHERE source = ?", (source,))
+
+    def sync_directory(self, directory: str, names: Optional[Iterable[str]] = None) -> int:
+        """
+        Index the text files under a directory, and drop the ones since deleted.
+
+        Args:
+            directory (str): Directory to scan recursively
+            names (Optional[Iterable[str]]): File names to index, e.g. ``['research.md']``;
+                if None, every .txt and .md file
+
+        Returns:
+            int: Number of chunks embedded
+        """
+        root = Path(directory).resolve()
+        wanted = set(names) if names is not None else None
+        found = set()
+        embedded = 0
+        for path in sorted(root.rglob('*')):
+            if not path.is_file() or (path.name not in wanted if wanted is not None
+                                      else path.suffix.lower() not in KNOWLEDGE_SUFFIXES):
+                continue
+            try:
+                text = path.read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError):
+                continue
+            found.add(str(path))
+            embedded += self.upsert(str(path), text, title=str(path.relative_to(root)))
+        with self._lock:
+            indexed = [source for (source,) in self._conn.execute(
+                "SELECT source FROM documents WHERE substr(source, 1, ?) = ?", (len(str(root)) + 1, f"{root}/"))]
+        for source in indexed:
+            if source not in found and not Path(source).exists():
+                self.remove(source)
+        return embedded
+
+    def search(self, query: str, k: int = 5, exclude: Iterable[str] = ()) -> List[SearchHit]:
+        """
+        Find the chunks most similar to a query.
+
+        Args:
+            query (str): Text to search for
+            k (int): Maximum number of hits
+            exclude (Iterable[str]): Sources to leave out, e.g. the document being written
+
+        Returns:
+            List[SearchHit]: Hits, most similar first
+        """
+        vector = self.embedder.embed([query])[0]
+        if not vector:
+            return []
+        excluded = set(exclude)
+        columns = "SELECT source, text, dims, weights FROM chunks"
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            if count <= self.EXACT_SEARCH_LIMIT:
+                rows = self._conn.execute(columns).fetchall()
+            else:
+                # Chunks posted under the query's strongest dimensions, by the query weight they share
+                features = [(feature, abs(vector[feature // 2])) for feature in _features(vector, self.probes)]
+                rows = self._conn.execute(
+                    f"WITH query (feature, weight) AS (VALUES {','.join(['(?, ?)'] * len(features))}) "
+                    f"{columns} JOIN (SELECT chunk_id FROM postings JOIN query USING (feature) "
+                    "GROUP BY chunk_id ORDER BY SUM(weight) DESC LIMIT ?) ON id = chunk_id",
+                    [value for feature in features for value in feature]
+                    + [max(self.CANDIDATES, k + len(excluded))]).fetchall()
+
+        scored = []
+        for source, text, dims, weights in rows:
+            if source in excluded:
+                continue
+            indexes, values = array('I'), array('f')
+            indexes.frombytes(dims)
+            values.frombytes(weights)
+            stored = dict(zip(indexes, values))
+            score = sum(weight * stored.get(i, 0.0) for i, weight in vector.items())
+            scored.append((score, source, text))
+        top = sorted(scored, key=lambda hit: -hit[0])[:k]
+        if not top:
+            return []
+        with self._lock:
+            documents = {source: (title, link, updated_at) for source, title, link, updated_at in self._conn.execute(
+                f"SELECT source, title, link, updated_at FROM documents WHERE source IN ({','.join('?' * len(top))})",
+                [source for _, source, _ in top])}
+        hits = []
+        for score, source, text in top:
+            title, link, updated_at = documents.get(source, (source, None, 0.0))
+            hits.append(SearchHit(source, title, link, text, score, updated_at))
+        return hits
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report the size of the index.
+
+        Returns:
+            Dict[str, int]: documents and chunks stored
+        """
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            chunks = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return {'documents': documents, 'chunks': chunks}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,411 @@
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Iterator, Tuple
+from collections.abc import Mapping
+import difflib
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+class StoredVersion(Mapping):
+    """
+    A single entry of a file's version history.
+
+    Behaves like the ``{'timestamp': ..., 'content': ...}`` dictionaries the
+    old JSON history returned, but the content is only read from the blob
+    store when the ``'content'`` key is accessed.
+    """
+
+    def __init__(self, store: 'VersionStore', filename: str, position: int):
+        self._store = store
+        self._filename = filename
+        self._position = position
+        self._entry = store._index[filename][position]
+
+    def __getitem__(self, key: str):
+        if key == 'content':
+            return self._store.read(self._filename, self._position)
+        return self._entry[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from ('timestamp', 'hash', 'size', 'content')
+
+    def __len__(self) -> int:
+        return 4
+
+    def __repr__(self) -> str:
+        return f"StoredVersion(timestamp={self._entry['timestamp']!r}, hash={self._entry['hash'][:12]!r})"
+
+
+class VersionStore:
+    """
+    Content-addressed, append-only storage for file versions.
+
+    Blobs are stored once per distinct SHA-256 digest under
+    ``objects/<xx>/<digest>``, optionally compressed. Every recorded version
+    is a single line appended to ``index.log``, so recording a version costs
+    O(size of the new content) rather than O(size of the whole history).
+
+    Versions are kept as delta chains: every ``keyframe_interval`` versions a
+    file is stored in full (a keyframe), and the versions in between are
+    stored as line-level deltas against their predecessor. Reading a version
+    replays at most ``keyframe_interval - 1`` deltas from the nearest keyframe.
+    """
+
+    INDEX_FILENAME = 'index.log'
+    COMPRESSIONS = ('none', 'zlib', 'zstd')
+    DEFAULT_KEYFRAME_INTERVAL = 32
+
+    _MAGIC = {'none': b'-', 'zlib': b'z', 'zstd': b'Z'}
+
+    def __init__(self, root: Path, compression: str = 'zlib', keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        """
+        Initialize the VersionStore.
+
+        Args:
+            root (Path): Directory holding the blob objects and the index log
+            compression (str): One of 'none', 'zlib' or 'zstd'
+            keyframe_interval (int): Store a full copy every this many versions; 1 disables deltas
+
+        Raises:
+            ValueError: If the compression scheme is unknown or unavailable
+        """
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {self.COMPRESSIONS}")
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.index_file = self.root / self.INDEX_FILENAME
+        self.compression = compression
+        self.keyframe_interval = keyframe_interval
+        self._lock = threading.Lock()
+        self._index: Dict[str, List[dict]] = {}
+        # Latest content of each file as lines, so the next delta can be
+        # computed without replaying the chain. Bounded to one version per file.
+        self._tips: Dict[str, List[str]] = {}
+
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Load the version index from the append-only log."""
+        if not self.index_file.exists():
+            return
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted append; skip it.
+                    continue
+                self._index.setdefault(entry['file'], []).append(entry)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def _encode(self, data: bytes) -> bytes:
+        if self.compression == 'zlib':
+            data = zlib.compress(data)
+        elif self.compression == 'zstd':
+            data = zstandard.ZstdCompressor().compress(data)
+        return self._MAGIC[self.compression] + data
+
+    @staticmethod
+    def _decode(raw: bytes) -> bytes:
+        magic, data = raw[:1], raw[1:]
+        if magic == b'z':
+            return zlib.decompress(data)
+        if magic == b'Z':
+            if zstandard is None:
+                raise IOError("Blob is zstd-compressed but 'zstandard' is not installed")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return data
+
+    def _write_bytes(self, data: bytes, digest: Optional[str] = None) -> str:
+        digest = digest or hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+        if blob_path.exists():
+            return digest
+
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = blob_path.with_name(f"{blob_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(self._encode(data))
+        os.replace(tmp_path, blob_path)
+        return digest
+
+    def _read_bytes(self, digest: str) -> bytes:
+        blob_path = self._blob_path(digest)
+        try:
+            with open(blob_path, 'rb') as f:
+                return self._decode(f.read())
+        except (IOError, zlib.error) as e:
+            raise IOError(f"Error reading version blob {digest}: {str(e)}")
+
+    def has_blob(self, digest: str) -> bool:
+        """Return True if a blob with this digest is stored."""
+        return self._blob_path(digest).exists()
+
+    def write_blob(self, content: str) -> str:
+        """
+        Store content in the blob store if it is not already present.
+
+        Args:
+            content (str): Content to store
+
+        Returns:
+            str: SHA-256 hex digest identifying the content
+        """
+        return self._write_bytes(content.encode('utf-8'))
+
+    def read_blob(self, digest: str) -> str:
+        """
+        Read content from the blob store.
+
+        Args:
+            digest (str): SHA-256 hex digest of the content
+
+        Returns:
+            str: Stored content
+
+        Raises:
+            IOError: If the blob is missing or unreadable
+        """
+        return self._read_bytes(digest).decode('utf-8')
+
+    @staticmethod
+    def make_delta(base: List[str], target: List[str]) -> list:
+        """
+        Compute a line-level delta between two versions.
+
+        Args:
+            base (List[str]): Lines of the base version, with line endings
+            target (List[str]): Lines of the new version, with line endings
+
+        Returns:
+            list: Operations; ``[i, j]`` copies ``base[i:j]``, a string inserts text
+        """
+        ops: list = []
+        matcher = difflib.SequenceMatcher(None, base, target, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                ops.append([i1, i2])
+            elif j2 > j1:
+                ops.append(''.join(target[j1:j2]))
+        return ops
+
+    @staticmethod
+    def apply_delta(base: List[str], ops: list) -> List[str]:
+        """
+        Apply a delta produced by ``make_delta``.
+
+        Args:
+            base (List[str]): Lines of the base version
+            ops (list): Delta operations
+
+        Returns:
+            List[str]: Lines of the reconstructed version
+        """
+        lines: List[str] = []
+        for op in ops:
+            if isinstance(op, str):
+                lines.extend(op.splitlines(keepends=True))
+            else:
+                lines.extend(base[op[0]:op[1]])
+        return lines
+
+    def _encode_entry(self, filename: str, content: str) -> dict:
+        """Choose between a keyframe and a delta for the next version of a file."""
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        entries = self._index.get(filename, [])
+        position = len(entries)
+
+        since_keyframe = 0
+        for entry in reversed(entries):
+            if entry.get('kind', 'key') == 'key':
+                break
+            since_keyframe += 1
+
+        # Content already stored in full (a restore, or a file shared between
+        # sites) costs nothing as a keyframe.
+        if not entries or self.has_blob(digest) or since_keyframe + 1 >= self.keyframe_interval:
+            return {'kind': 'key', 'blob': self._write_bytes(data, digest), 'hash': digest}
+
+        lines = content.splitlines(keepends=True)
+        ops = self.make_delta(self._tip_lines(filename), lines)
+        inserted = sum(len(op) for op in ops if isinstance(op, str))
+        if inserted * 2 > len(content):
+            # Mostly rewritten; a delta would not be smaller than the content.
+            return {'kind': 'key', 'blob': self._write_bytes(data, digest), 'hash': digest}
+
+        delta = json.dumps(ops, separators=(',', ':')).encode('utf-8')
+        return {'kind': 'delta', 'blob': self._write_bytes(delta), 'hash': digest, 'base': position - 1}
+
+    def _tip_lines(self, filename: str) -> List[str]:
+        if filename not in self._tips:
+            last = len(self._index[filename]) - 1
+            self._tips[filename] = self._read_lines(filename, last)
+        return self._tips[filename]
+
+    def _read_lines(self, filename: str, version_index: int) -> List[str]:
+        """Rebuild a version by replaying deltas from the nearest keyframe."""
+        entries = self._index[filename]
+        chain = []
+        position = version_index
+        while entries[position].get('kind', 'key') == 'delta':
+            chain.append(entries[position])
+            position = entries[position]['base']
+
+        keyframe = entries[position]
+        lines = self.read_blob(keyframe.get('blob', keyframe['hash'])).splitlines(keepends=True)
+        for entry in reversed(chain):
+            lines = self.apply_delta(lines, json.loads(self._read_bytes(entry['blob'])))
+            # Re-split so line numbering matches the one the delta was made against
+            lines = ''.join(lines).splitlines(keepends=True)
+        return lines
+
+    def append(self, filename: str, content: str, timestamp: Optional[str] = None) -> dict:
+        """
+        Record a new version of a file.
+
+        Args:
+            filename (str): Name of the file
+            content (str): Content of the file
+            timestamp (Optional[str]): ISO timestamp, defaults to now
+
+        Returns:
+            dict: The index entry that was appended
+        """
+        with self._lock:
+            entry = {
+                'file': filename,
+                'timestamp': timestamp or datetime.now().isoformat(),
+                'size': len(content),
+            }
+            entry.update(self._encode_entry(filename, content))
+            with open(self.index_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+            self._index.setdefault(filename, []).append(entry)
+            self._tips[filename] = content.splitlines(keepends=True)
+        return entry
+
+    def append_many(self, versions: List[Tuple[str, str]], timestamp: Optional[str] = None) -> List[dict]:
+        """
+        Record new versions of several files with a single append to the index.
+
+        Args:
+            versions (List[Tuple[str, str]]): (filename, content) pairs
+            timestamp (Optional[str]): ISO timestamp shared by the versions, defaults to now
+
+        Returns:
+            List[dict]: The index entries that were appended
+        """
+        timestamp = timestamp or datetime.now().isoformat()
+        with self._lock:
+            entries = []
+            for filename, content in versions:
+                entry = {'file': filename, 'timestamp': timestamp, 'size': len(content)}
+                entry.update(self._encode_entry(filename, content))
+                self._index.setdefault(filename, []).append(entry)
+                self._tips[filename] = content.splitlines(keepends=True)
+                entries.append(entry)
+            if entries:
+                with open(self.index_file, 'a', encoding='utf-8') as f:
+                    f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+        return entries
+
+    def files(self) -> List[str]:
+        """Return the names of all files with recorded versions."""
+        return list(self._index)
+
+    def versions(self, filename: str) -> List[StoredVersion]:
+        """
+        Get the recorded versions of a file, oldest first.
+
+        Args:
+            filename (str): Name of the file
+
+        Returns:
+            List[StoredVersion]: Lazily loaded version entries
+        """
+        return [StoredVersion(self, filename, i) for i in range(len(self._index.get(filename, [])))]
+
+    def read(self, filename: str, version_index: int) -> str:
+        """
+        Read the content of a specific version of a file.
+
+        Args:
+            filename (str): Name of the file
+            version_index (int): Index of the version
+
+        Returns:
+            str: Content of that version
+
+        Raises:
+            ValueError: If the file has no history or the index is invalid
+        """
+        entries = self._index.get(filename)
+        if not entries:
+            raise ValueError(f"No version history found for {filename}")
+        if not 0 <= version_index < len(entries):
+            raise ValueError(f"Invalid version index: {version_index}")
+        return ''.join(self._read_lines(filename, version_index))
+
+    def latest_hash(self, filename: str) -> Optional[str]:
+        """
+        Get the content digest of the most recent version of a file.
+
+        Args:
+            filename (str): Name of the file
+
+        Returns:
+            Optional[str]: SHA-256 hex digest, or None if the file has no history
+        """
+        entries = self._index.get(filename)
+        return entries[-1]['hash'] if entries else None
+
+    def stored_bytes(self) -> int:
+        """Return the number of bytes used on disk by blobs and the index log."""
+        total = self.index_file.stat().st_size if self.index_file.exists() else 0
+        return total + sum(p.stat().st_size for p in self.objects_dir.rglob('*') if p.is_file())
+
+    def migrate_json(self, json_path: Path) -> int:
+        """
+        Import a legacy ``version_history.json`` into the store.
+
+        Versions of a file the store already holds, in the same order, are
+        skipped, so a migration interrupted by a crash can simply be run again.
+
+        Args:
+            json_path (Path): Path to the legacy JSON history
+
+        Returns:
+            int: Number of versions imported
+        """
+        with open(json_path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+
+        count = 0
+        for filename, versions in history.items():
+            stored = self._index.get(filename, [])
+            imported = 0
+            while imported < min(len(stored), len(versions)) and stored[imported]['hash'] == \
+                    hashlib.sha256(versions[imported]['content'].encode('utf-8')).hexdigest():
+                imported += 1
+            for version in versions[imported:]:
+                self.append(filename, version['content'], timestamp=version.get('timestamp'))
+                count += 1
+        return count
@@ -9,6 +9,9 @@ def mock_env_vars():
     with pytest.MonkeyPatch.context() as mp:
         mp.setenv('OPENAI_API_KEY', 'test_openai_key')
         mp.setenv('SERPER_API_KEY', 'test_serper_key')
+        # Keep crewai from sending telemetry during tests
+        mp.setenv('OTEL_SDK_DISABLED', 'true')
+        mp.setenv('CREWAI_DISABLE_TELEMETRY', 'true')
         yield
 
 @pytest.fixture
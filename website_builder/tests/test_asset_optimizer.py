@@ -0,0 +1,139 @@
+import pytest
+import gzip
+import json
+import tempfile
+from pathlib import Path
+from website_builder.utils.asset_optimizer import (
+    AssetOptimizer,
+    format_asset_report,
+    minify_css,
+    minify_html,
+    minify_js,
+    rewrite_references,
+)
+
+TEMPLATES = Path(__file__).parent.parent / 'src' / 'website_builder' / 'templates'
+
+@pytest.fixture
+def site_dir():
+    """Create a site laid out like a build's output directory."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        site = Path(tmpdirname)
+        (site / 'html').mkdir()
+        (site / 'css').mkdir()
+        (site / 'js').mkdir()
+        (site / 'versions').mkdir()
+        (site / 'html' / 'index.html').write_text((TEMPLATES / 'base.html').read_text())
+        (site / 'css' / 'style.css').write_text((TEMPLATES / 'base.css').read_text())
+        (site / 'js' / 'script.js').write_text((TEMPLATES / 'base.js').read_text())
+        (site / 'versions' / 'old.js').write_text("var skipped = 1;")
+        yield site
+
+def test_minify_css():
+    """Test that comments and whitespace go while significant spaces stay."""
+    css = """/* theme */
+@media screen and (max-width: 600px) {
+    nav a :hover { width: calc(100% - 2px) ; content: "a  b"; }
+}"""
+    assert minify_css(css) == '@media screen and (max-width:600px){nav a :hover{width:calc(100% - 2px);content:"a  b"}}'
+
+def test_minify_js_keeps_semantics():
+    """Test that strings, regexes and ASI-relevant line breaks survive."""
+    js = """// leading comment
+var a = b
+(c)
+const re = /a\\/b+/g; // trailing
+let s = `x  ${y}` , t = 'it''s' ;
+x = a / b / c;
+i++
++j
+/* block */ return x"""
+    minified = minify_js(js)
+    assert "var a=b\n(c)" in minified
+    assert "const re=/a\\/b+/g;" in minified
+    assert "let s=`x  ${y}`,t='it''s';" in minified
+    assert "x=a/b/c;" in minified
+    assert "i++\n+j" in minified
+    assert "comment" not in minified and "block" not in minified
+
+def test_minify_html():
+    """Test that whitespace collapses around tags and raw text is handled by kind."""
+    html = """<!DOCTYPE html>
+<html>
+<head>
+    <!-- note -->
+    <style> body { color : red ; } </style>
+</head>
+<body>
+    <p>Hello <b>big</b>   <i>world</i></p>
+    <pre>  keep
+  this</pre>
+    <script>
+        // setup
+        var x = 1;
+    </script>
+</body>
+</html>"""
+    assert minify_html(html) == ('<!DOCTYPE html><html><head><style>body{color :red}</style></head><body>'
+                                 '<p>Hello <b>big</b> <i>world</i></p><pre>  keep\n  this</pre>'
+                                 '<script>var x=1;</script></body></html>')
+
+def test_rewrite_references():
+    """Test resolving references relative to the page and by unique filename."""
+    renamed = {'css/style.css': 'css/style.abc.css', 'js/script.js': 'js/script.def.js'}
+    html = ('<link href="../css/style.css?v=1"><script src="script.js"></script>'
+            '<a href="https://example.com/style.css">x</a><img src="logo.png">')
+    assert rewrite_references(html, 'html/index.html', renamed) == (
+        '<link href="../css/style.abc.css?v=1"><script src="../js/script.def.js"></script>'
+        '<a href="https://example.com/style.css">x</a><img src="logo.png">')
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_optimize_site(site_dir, workers):
+    """Test minifying, hashing and compressing a site into dist/."""
+    with AssetOptimizer(workers=workers) as optimizer:
+        reports = optimizer.optimize(str(site_dir))
+
+    dist = site_dir / 'dist'
+    outputs = {report.source: report.output for report in reports}
+    assert set(outputs) == {'html/index.html', 'css/style.css', 'js/script.js'}
+    assert outputs['html/index.html'] == 'html/index.html'
+    assert outputs['css/style.css'].startswith('css/style.') and outputs['css/style.css'] != 'css/style.css'
+
+    page = (dist / 'html' / 'index.html').read_text()
+    assert f'href="../{outputs["css/style.css"]}"' in page
+    assert f'src="../{outputs["js/script.js"]}"' in page
+    for report in reports:
+        assert report.minified_bytes < report.original_bytes
+        data = (dist / report.output).read_bytes()
+        assert gzip.decompress((dist / (report.output + '.gz')).read_bytes()) == data
+    assert json.loads((dist / AssetOptimizer.REPORT_FILENAME).read_text())[0]['source'] == reports[0].source
+    assert 'total' in format_asset_report(reports)
+    # Generated sources are left as they were
+    assert (site_dir / 'css' / 'style.css').read_text() == (TEMPLATES / 'base.css').read_text()
+
+def test_optimize_replaces_dist(site_dir):
+    """Test that optimizing again replaces dist/ rather than accumulating stale hashed files."""
+    optimizer = AssetOptimizer(workers=1)
+    optimizer.optimize(str(site_dir))
+    (site_dir / 'css' / 'style.css').write_text("body { color: blue; }")
+    reports = optimizer.optimize(str(site_dir))
+
+    css = sorted(path.name for path in (site_dir / 'dist' / 'css').iterdir())
+    output = next(report.output for report in reports if report.source == 'css/style.css')
+    assert css == [Path(output).name, Path(output).name + '.gz']
+    assert not list(site_dir.glob('.dist*'))
+
+def test_optimize_with_critical_css(site_dir):
+    """Test that pages get critical CSS inlined and report their render-blocking bytes."""
+    (site_dir / 'html' / 'index.html').write_text(
+        (TEMPLATES / 'base.html').read_text().replace(' defer', ''))
+    reports = AssetOptimizer(workers=1, critical_css=True).optimize(str(site_dir))
+
+    page_report = next(report for report in reports if report.source == 'html/index.html')
+    assert page_report.render_blocking['before']['requests'] == 2
+    assert page_report.render_blocking['after'] == {'requests': 0, 'bytes': 0, 'resources': []}
+    css = next(report.output for report in reports if report.source == 'css/style.css')
+    page = (site_dir / 'dist' / 'html' / 'index.html').read_text()
+    assert '<style>:root{' in page
+    assert f'rel="preload" href="../{css}" as="style"' in page
+    assert 'render-blocking' in format_asset_report(reports)
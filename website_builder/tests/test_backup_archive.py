@@ -0,0 +1,112 @@
+import pytest
+import tempfile
+import time
+from pathlib import Path
+from website_builder.utils.backup_archive import BackupArchive
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for the archive and source files."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield Path(tmpdirname)
+
+def backup(archive, temp_dir, filename, content):
+    """Back up ``content`` as a version of ``filename``."""
+    source = temp_dir / 'source'
+    source.write_bytes(content)
+    return archive.add(filename, source)
+
+def test_add_read_and_restore(temp_dir):
+    """Test that backups are listed per file and read back through the memory map."""
+    archive = BackupArchive(temp_dir / 'backups')
+    first = backup(archive, temp_dir, 'index.html', b'<p>one</p>')
+    second = backup(archive, temp_dir, 'index.html', b'<p>two</p>')
+    other = backup(archive, temp_dir, 'css/style.css', b'')
+
+    assert first != second
+    assert archive.names('index.html') == [first, second]
+    assert archive.names() == [first, second, other]
+    assert archive.read(first) == b'<p>one</p>'
+    assert archive.read(other) == b''
+
+    # Reads after the pack grew remap it
+    third = backup(archive, temp_dir, 'index.html', b'<p>three</p>')
+    assert archive.read(third) == b'<p>three</p>'
+
+    target = temp_dir / 'index.html'
+    archive.restore(second, target)
+    assert target.read_bytes() == b'<p>two</p>'
+    with pytest.raises(IOError):
+        archive.read('missing.bak')
+    archive.close()
+
+def test_index_survives_reopen_and_torn_lines(temp_dir):
+    """Test that the index is rebuilt from its log, skipping a torn last line."""
+    archive = BackupArchive(temp_dir / 'backups')
+    name = backup(archive, temp_dir, 'index.html', b'content')
+    archive.close()
+    with open(archive.index_file, 'a', encoding='utf-8') as f:
+        f.write('{"op": "add", "na')
+
+    reopened = BackupArchive(temp_dir / 'backups')
+    assert reopened.names('index.html') == [name]
+    assert reopened.read(name) == b'content'
+    reopened.close()
+
+def test_corrupt_backup_is_detected(temp_dir):
+    """Test that a backup whose bytes changed in the pack is refused."""
+    archive = BackupArchive(temp_dir / 'backups')
+    name = backup(archive, temp_dir, 'index.html', b'content')
+    with open(archive.pack_file, 'r+b') as f:
+        f.write(b'X')
+    with pytest.raises(IOError):
+        archive.read(name)
+    with pytest.raises(IOError):
+        archive.restore(name, temp_dir / 'index.html')
+    assert not (temp_dir / 'index.html').exists()
+    archive.close()
+
+def test_retention_by_count_and_compaction(temp_dir, monkeypatch):
+    """Test keeping the newest backups per file and reclaiming dropped space."""
+    monkeypatch.setattr(BackupArchive, 'COMPACT_MIN_BYTES', 1)
+    archive = BackupArchive(temp_dir / 'backups', keep=2)
+    names = [backup(archive, temp_dir, 'index.html', f'version {i}'.encode()) for i in range(5)]
+    kept = backup(archive, temp_dir, 'style.css', b'body {}')
+
+    assert archive.names('index.html') == names[-2:]
+    assert archive.names('style.css') == [kept]
+    assert archive.pack_file.stat().st_size == archive.live_bytes()
+    assert archive.read(names[-1]) == b'version 4'
+    assert list((temp_dir / 'backups').glob('*.pack')) == [archive.pack_file]
+    archive.close()
+
+    reopened = BackupArchive(temp_dir / 'backups', keep=2)
+    assert reopened.names('index.html') == names[-2:]
+    assert reopened.read(kept) == b'body {}'
+    reopened.close()
+
+def test_retention_by_age(temp_dir):
+    """Test dropping backups older than max_age."""
+    archive = BackupArchive(temp_dir / 'backups')
+    old = backup(archive, temp_dir, 'index.html', b'old')
+    time.sleep(0.05)
+    new = backup(archive, temp_dir, 'index.html', b'new')
+
+    aged = BackupArchive(temp_dir / 'backups', max_age=0.03)
+    assert aged.apply_retention() == [old]
+    assert aged.names('index.html') == [new]
+    assert BackupArchive(temp_dir / 'backups').names() == [new]
+
+def test_import_legacy_copies(temp_dir):
+    """Test moving loose backup copies into the archive under their old names."""
+    backups = temp_dir / 'backups'
+    backups.mkdir()
+    (backups / 'index.html.20240101_120000.bak').write_text('legacy', encoding='utf-8')
+    (backups / 'notes.txt').write_text('not a backup', encoding='utf-8')
+
+    archive = BackupArchive(backups)
+    assert archive.import_legacy(backups) == 1
+    assert archive.names('index.html') == ['index.html.20240101_120000.bak']
+    assert archive.entry('index.html.20240101_120000.bak')['created'] == '2024-01-01T12:00:00'
+    assert not (backups / 'index.html.20240101_120000.bak').exists()
+    assert (backups / 'notes.txt').exists()
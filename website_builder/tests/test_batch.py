@@ -0,0 +1,94 @@
+import io
+import pytest
+import tempfile
+from pathlib import Path
+from website_builder.batch import BatchJob, BatchJournal, BatchResult, slugify, read_topics, run_batch, async_batch, format_summary
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for batch output."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield tmpdirname
+
+def test_slugify():
+    """Test conversion of topics to directory names."""
+    assert slugify("Machine Learning 101!") == "machine-learning-101"
+    assert slugify("../../etc") == "etc"
+    assert slugify("???") == "site"
+
+def test_read_topics_plain_and_jsonl():
+    """Test reading plain-text and JSONL topics with unique slugs."""
+    stream = io.StringIO(
+        "Rust\n"
+        "\n"
+        "# a comment\n"
+        '{"topic": "Rust", "slug": "rust"}\n'
+        '{"topic": "Quantum Computing"}\n'
+    )
+    jobs = read_topics(stream)
+    assert [j.topic for j in jobs] == ["Rust", "Rust", "Quantum Computing"]
+    assert [j.slug for j in jobs] == ["rust", "rust-2", "quantum-computing"]
+
+def test_read_topics_invalid_json():
+    """Test that a JSON line without a topic is rejected."""
+    with pytest.raises(ValueError) as exc_info:
+        read_topics(io.StringIO('{"slug": "x"}\n'))
+    assert 'Line 1' in str(exc_info.value)
+
+def test_run_batch_isolates_failures(temp_dir):
+    """Test that one failing topic does not stop the batch."""
+    jobs = [BatchJob("Good", "good"), BatchJob("Bad", "bad"), BatchJob("Also Good", "also-good")]
+
+    def build(job, output_dir):
+        if job.slug == "bad":
+            raise RuntimeError("quota exceeded")
+        output_dir.mkdir(parents=True)
+        (output_dir / "index.html").write_text(job.topic)
+
+    results = run_batch(jobs, build, temp_dir, workers=2)
+    assert [r.status for r in results] == ["ok", "error", "ok"]
+    assert results[1].error == "quota exceeded"
+    assert (Path(temp_dir) / "also-good" / "index.html").read_text() == "Also Good"
+
+    summary = format_summary(results)
+    assert "2/3 topics built" in summary
+    assert "quota exceeded" in summary
+
+def test_async_batch_bounds_concurrency(temp_dir):
+    """Test that async builds are multiplexed up to the concurrency limit."""
+    import asyncio
+    jobs = [BatchJob(f"Topic {i}", f"topic-{i}") for i in range(6)]
+    in_flight = []
+    peak = []
+
+    async def build(job, output_dir):
+        in_flight.append(job.slug)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(job.slug)
+        if job.slug == "topic-3":
+            raise RuntimeError("timeout")
+
+    results = asyncio.run(async_batch(jobs, build, temp_dir, concurrency=3))
+    assert [r.slug for r in results] == [j.slug for j in jobs]
+    assert [r.status for r in results].count("error") == 1
+    assert max(peak) == 3
+
+def test_batch_journal_resumes_after_crash(temp_dir):
+    """Test that the journal reports topics whose latest build succeeded."""
+    journal = BatchJournal(temp_dir)
+    assert journal.completed() == {}
+
+    journal.record(BatchResult("Rust", "rust", "out/rust", "ok", 1.0))
+    journal.record(BatchResult("Go", "go", "out/go", "error", 1.0, error="quota exceeded"))
+    journal.record(BatchResult("Zig", "zig", "out/zig", "ok", 1.0))
+    journal.record(BatchResult("Zig", "zig", "out/zig", "error", 1.0, error="disk full"))
+    # A crash while appending leaves a torn last line
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"topic": "Elm", "slu')
+
+    journal.record(BatchResult("Elm", "elm", "out/elm", "ok", 1.0))
+
+    completed = BatchJournal(temp_dir).completed()
+    assert set(completed) == {"rust", "elm"}
+    assert completed["rust"]["topic"] == "Rust"
@@ -0,0 +1,30 @@
+import pytest
+import tempfile
+from pathlib import Path
+from website_builder.utils.build_manifest import BuildManifest
+
+@pytest.fixture
+def output_dir():
+    """Create a temporary output directory."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield Path(tmpdirname)
+
+def test_fingerprint_is_order_insensitive_for_dicts():
+    """Test that fingerprints depend on content, not dict ordering."""
+    assert BuildManifest.fingerprint({'a': 1, 'b': 2}) == BuildManifest.fingerprint({'b': 2, 'a': 1})
+    assert BuildManifest.fingerprint('x', 'y') != BuildManifest.fingerprint('y', 'x')
+
+def test_record_and_lookup(output_dir):
+    """Test that recorded fingerprints persist across instances."""
+    manifest = BuildManifest(output_dir)
+    manifest.record('html_creation_task', 'abc', 'html/index.html')
+
+    reloaded = BuildManifest(output_dir)
+    assert reloaded.lookup('html_creation_task', 'abc')['output_file'] == 'html/index.html'
+    assert reloaded.lookup('html_creation_task', 'changed') is None
+    assert reloaded.lookup('css_design_task', 'abc') is None
+
+def test_corrupt_manifest_is_ignored(output_dir):
+    """Test that a corrupt manifest forces a rebuild instead of failing."""
+    (output_dir / BuildManifest.FILENAME).write_text('{not json')
+    assert BuildManifest(output_dir).entries == {}
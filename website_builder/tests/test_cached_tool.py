@@ -0,0 +1,55 @@
+import pytest
+import tempfile
+from pathlib import Path
+from pydantic import BaseModel
+from crewai.tools import BaseTool
+from website_builder.tools.cached_tool import CachedTool, normalize_query, normalize_url
+from website_builder.utils.response_cache import ResponseCache
+
+class SearchArgs(BaseModel):
+    search_query: str
+
+class FakeSearchTool(BaseTool):
+    name: str = "Search the internet"
+    description: str = "Fake search tool for testing."
+    args_schema: type = SearchArgs
+    calls: int = 0
+
+    def _run(self, search_query: str) -> dict:
+        self.calls += 1
+        return {"query": search_query, "organic": [{"title": "Result"}]}
+
+@pytest.fixture
+def cache():
+    """Create a research cache in a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield ResponseCache(str(Path(tmpdirname) / 'research.sqlite3'))
+
+def test_normalize_query():
+    """Test that whitespace, case and trailing punctuation are ignored."""
+    assert normalize_query("  What is   Rust? ") == normalize_query("what is rust")
+
+def test_normalize_url():
+    """Test that equivalent URLs normalize to the same key."""
+    assert normalize_url("HTTPS://Example.com/docs/?b=2&a=1&utm_source=x#intro") == \
+        normalize_url("https://example.com/docs?a=1&b=2")
+
+def test_repeated_queries_hit_cache(cache):
+    """Test that overlapping queries are served from the cache."""
+    inner = FakeSearchTool()
+    tool = CachedTool.wrap(inner, cache, ttl=60)
+    assert tool.name == inner.name
+
+    first = tool.run(search_query="What is Rust?")
+    second = tool.run(search_query="what is rust")
+    assert first == second
+    assert inner.calls == 1
+    assert cache.stats()['hits'] == 1
+
+def test_per_entry_freshness(cache):
+    """Test that a freshness function can expire entries immediately."""
+    inner = FakeSearchTool()
+    tool = CachedTool.wrap(inner, cache, ttl=lambda arguments: 0)
+    tool.run(search_query="rust")
+    tool.run(search_query="rust")
+    assert inner.calls == 2
@@ -0,0 +1,43 @@
+import pytest
+import json
+import tempfile
+from pathlib import Path
+from website_builder.utils.checkpoint import CheckpointStore, write_durably
+
+@pytest.fixture
+def store():
+    """Create a checkpoint store in a temporary output directory."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield CheckpointStore(Path(tmpdirname))
+
+def test_save_and_lookup(store):
+    """Test that a checkpoint is found only for the same inputs."""
+    path = store.save('research_task', 'abc', 'Research output', 'research.md')
+    assert path.parent.name == CheckpointStore.DIRNAME
+
+    checkpoint = store.lookup('research_task', 'abc')
+    assert checkpoint['output'] == 'Research output'
+    assert checkpoint['output_file'] == 'research.md'
+    assert store.lookup('research_task', 'changed') is None
+    assert store.lookup('html_creation_task', 'abc') is None
+    assert store.completed() == ['research_task']
+
+def test_corrupt_checkpoints_are_ignored(store):
+    """Test that torn or tampered checkpoints make the task run again."""
+    path = store.save('research_task', 'abc', 'Research output')
+    data = json.loads(path.read_text(encoding='utf-8'))
+    data['output'] = 'Truncated'
+    path.write_text(json.dumps(data), encoding='utf-8')
+    assert store.lookup('research_task', 'abc') is None
+
+    path.write_text('{"task": "research_', encoding='utf-8')
+    assert store.load('research_task') is None
+    assert store.completed() == []
+
+def test_write_durably_replaces_file(store):
+    """Test that durable writes replace the file and leave no temporary files."""
+    path = store.directory / 'state.json'
+    write_durably(path, 'first')
+    write_durably(path, 'second')
+    assert path.read_text(encoding='utf-8') == 'second'
+    assert [p.name for p in store.directory.iterdir()] == ['state.json']
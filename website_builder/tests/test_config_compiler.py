@@ -0,0 +1,128 @@
+import pytest
+import marshal
+import os
+import tempfile
+import yaml
+from pathlib import Path
+from website_builder.utils.config_compiler import COMPILER_VERSION, ConfigCompiler, CompiledConfig
+
+AGENTS = {
+    'writer': {
+        'role': '{topic} Content Writer',
+        'goal': 'Write clear copy about {topic} for the site.',
+        'backstory': 'A writer who has covered {topic} for years and explains it with {{curly}} examples.',
+        'verbose': True,
+    }
+}
+TASKS = {
+    'write_task': {
+        'description': 'Write the landing page copy about {topic}.',
+        'expected_output': 'Landing page copy about {topic} in markdown.',
+        'agent': 'writer',
+        'output_file': 'output/copy.md',
+        'context': [],
+    }
+}
+
+@pytest.fixture
+def config_dir():
+    """Create a temporary directory with valid config files."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname)
+        (path / 'agents.yaml').write_text(yaml.safe_dump(AGENTS))
+        (path / 'tasks.yaml').write_text(yaml.safe_dump(TASKS))
+        yield path
+
+def compile_dir(compiler, config_dir, **kwargs):
+    return compiler.compile(str(config_dir / 'agents.yaml'), str(config_dir / 'tasks.yaml'), **kwargs)
+
+def test_render_matches_str_format(config_dir):
+    """Test that rendering gives the same result as formatting every string."""
+    compiled = compile_dir(ConfigCompiler(), config_dir)
+    agents, tasks = compiled.render(topic="Rust")
+
+    assert agents['writer']['role'] == AGENTS['writer']['role'].format(topic="Rust")
+    assert agents['writer']['backstory'].endswith("with {curly} examples.")
+    assert agents['writer']['verbose'] is True
+    assert tasks['write_task']['description'] == "Write the landing page copy about Rust."
+
+def test_render_returns_independent_copies(config_dir):
+    """Test that mutating a rendered config does not affect later renders."""
+    compiled = compile_dir(ConfigCompiler(), config_dir)
+    agents, tasks = compiled.render(topic="Rust")
+    tasks['write_task']['context'].append('other')
+    agents['writer']['role'] = 'changed'
+
+    agents, tasks = compiled.render(topic="Go")
+    assert tasks['write_task']['context'] == []
+    assert agents['writer']['role'] == "Go Content Writer"
+
+def test_compiles_once_until_files_change(config_dir):
+    """Test that unchanged files are served from memory and edits are picked up."""
+    compiler = ConfigCompiler()
+    first = compile_dir(compiler, config_dir)
+    assert compile_dir(compiler, config_dir) is first
+
+    # Touching a file without changing it is detected by the content hash
+    os.utime(config_dir / 'agents.yaml', ns=(1, 1))
+    assert compile_dir(compiler, config_dir) is first
+    assert compiler.compilations == 1
+
+    tasks = dict(TASKS, write_task=dict(TASKS['write_task'], description='Write a short FAQ about {topic} please.'))
+    (config_dir / 'tasks.yaml').write_text(yaml.safe_dump(tasks))
+    _, rendered = compile_dir(compiler, config_dir).render(topic="Rust")
+    assert rendered['write_task']['description'] == 'Write a short FAQ about Rust please.'
+    assert compiler.compilations == 2
+
+def test_disk_cache_shared_between_compilers(config_dir):
+    """Test that a second compiler, e.g. in a new process, loads the compiled config from disk."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        first = compile_dir(ConfigCompiler(cache_dir), config_dir)
+        second_compiler = ConfigCompiler(cache_dir)
+        second = compile_dir(second_compiler, config_dir)
+
+        assert second_compiler.compilations == 0
+        assert second.render(topic="Rust") == first.render(topic="Rust")
+
+def test_corrupt_disk_cache_is_recompiled(config_dir):
+    """Test that an unreadable cache file falls back to compiling."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        compiled = compile_dir(ConfigCompiler(cache_dir), config_dir)
+        (Path(cache_dir) / 'configs' / f"{compiled.digest}.marshal").write_bytes(b'garbage')
+
+        compiler = ConfigCompiler(cache_dir)
+        assert compile_dir(compiler, config_dir).render(topic="Go") == compiled.render(topic="Go")
+        assert compiler.compilations == 1
+
+def test_unmarshallable_config_skips_the_disk_cache(config_dir):
+    """Test that configs holding values marshal cannot store, like YAML dates, still compile."""
+    (config_dir / 'agents.yaml').write_text(yaml.safe_dump(AGENTS) + "  updated: 2024-01-01\n")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        compiled = compile_dir(ConfigCompiler(cache_dir), config_dir)
+        assert compiled.render(topic="Rust")[0]['writer']['role'] == "Rust Content Writer"
+        assert not list((Path(cache_dir) / 'configs').glob('*'))
+
+def test_digest_covers_the_validation_rules(config_dir, monkeypatch):
+    """Test that configs cached under other validation rules are compiled again."""
+    from website_builder.utils import config_compiler
+    with tempfile.TemporaryDirectory() as cache_dir:
+        first = compile_dir(ConfigCompiler(cache_dir), config_dir)
+        monkeypatch.setattr(config_compiler, 'RULES_FINGERPRINT', config_compiler.RULES_FINGERPRINT + b'+')
+        compiler = ConfigCompiler(cache_dir)
+        assert compile_dir(compiler, config_dir).digest != first.digest
+        assert compiler.compilations == 1
+
+def test_invalid_config_raises(config_dir):
+    """Test that validation errors surface as ValueError."""
+    (config_dir / 'tasks.yaml').write_text(yaml.safe_dump({'write_task': {'agent': 'missing'}}))
+    with pytest.raises(ValueError, match="references non-existent agent 'missing'"):
+        compile_dir(ConfigCompiler(), config_dir)
+
+def test_serialization_round_trip():
+    """Test dumps/loads and rejection of data from another compiler version."""
+    compiled = CompiledConfig(AGENTS, TASKS, 'digest')
+    assert CompiledConfig.loads(compiled.dumps()).render(topic="Go") == compiled.render(topic="Go")
+    with pytest.raises(ValueError, match="version"):
+        CompiledConfig.loads(marshal.dumps((COMPILER_VERSION + 1, 'digest', {}, {}, {}, {})))
+    with pytest.raises(ValueError):
+        CompiledConfig.loads(b'not marshal data')
@@ -118,4 +118,92 @@ def test_invalid_yaml_syntax(temp_config_dir):
         f.write(invalid_yaml)
     
     with pytest.raises(yaml.YAMLError):
-        ConfigValidator.validate_configs(file_path, 'dummy_tasks.yaml') 
\ No newline at end of file
+        ConfigValidator.validate_configs(file_path, 'dummy_tasks.yaml')
+
+
+PACKAGE_CONFIG = os.path.join(os.path.dirname(__file__), '..', 'src', 'website_builder', 'config')
+
+
+def copy_config_set(directory):
+    """Copy the package's agents.yaml and tasks.yaml into a directory."""
+    os.makedirs(directory, exist_ok=True)
+    for name in ('agents.yaml', 'tasks.yaml'):
+        with open(os.path.join(PACKAGE_CONFIG, name), encoding='utf-8') as f:
+            content = f.read()
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+    return os.path.join(directory, 'agents.yaml'), os.path.join(directory, 'tasks.yaml')
+
+
+def test_compiled_schema_messages():
+    """Test that the compiled schema reports every rule violation of an entry."""
+    errors = ConfigValidator.validate_agents_config({
+        'writer': {'role': 'ab', 'goal': 'Too short', 'backstory': 'Short.', 'verbose': 'yes'},
+        'broken': 'not a mapping',
+    })
+    assert errors == [
+        "Agent 'writer' role must be at least 3 characters long",
+        "Agent 'writer' role should contain at least one uppercase letter",
+        "Agent 'writer' goal must be at least 10 characters long",
+        "Agent 'writer' goal should end with a period",
+        "Agent 'writer' backstory must be at least 50 characters long",
+        "Agent 'writer' verbose must be a boolean",
+        "Agent 'broken' configuration must be a dictionary",
+    ]
+
+
+def test_dependency_cycle_detected():
+    """Test that cycles through dependencies and context are reported."""
+    task = {'description': 'Write the page for the site.', 'expected_output': 'A complete page for the site.',
+            'agent': 'writer', 'output_file': 'output/page.md'}
+    tasks = {
+        'a': dict(task, context=[], dependencies=['c']),
+        'b': dict(task, context=['a']),
+        'c': dict(task, context=['b', 'missing']),
+    }
+    assert ConfigValidator.find_dependency_cycle(tasks) == ['a', 'c', 'b', 'a']
+    errors = ConfigValidator.validate_tasks_config(tasks, {'writer': {}})
+    assert errors == ["Task dependency cycle detected: a -> c -> b -> a"]
+
+    tasks['a']['dependencies'] = []
+    assert ConfigValidator.find_dependency_cycle(tasks) is None
+
+
+def test_incremental_validation_reparses_only_changed_entries(temp_config_dir):
+    """Test that unchanged entries are reused and edited ones rechecked."""
+    agents_path, tasks_path = copy_config_set(temp_config_dir)
+    agents, _ = ConfigValidator.validate_files(agents_path, tasks_path)
+
+    with open(agents_path, 'a', encoding='utf-8') as f:
+        f.write("extra_agent:\n  role: x\n")
+    with pytest.raises(ValueError) as exc_info:
+        ConfigValidator.validate_files(agents_path, tasks_path)
+    assert "Agent 'extra_agent' is missing required field 'goal'" in str(exc_info.value)
+    reloaded, _ = ConfigValidator.load_entries('Agent', agents_path)
+    # Unchanged entries are the same parsed objects
+    assert all(reloaded[name] is agents[name] for name in agents)
+
+
+def test_yaml_anchors_fall_back_to_whole_file(temp_config_dir):
+    """Test that entries sharing anchors are parsed as one document."""
+    path = os.path.join(temp_config_dir, 'agents.yaml')
+    with open(path, 'w') as f:
+        f.write("base: &base\n  role: Writer\n  goal: x\n  backstory: y\ncopy: *base\n")
+    config, errors = ConfigValidator.load_entries('Agent', path)
+    assert config['copy'] == config['base']
+    assert len(errors) == 8
+
+
+def test_validate_config_sets(temp_config_dir):
+    """Test that config sets under a directory are found and validated separately."""
+    from website_builder.utils.config_validator import find_config_sets, validate_config_sets
+    copy_config_set(os.path.join(temp_config_dir, 'good'))
+    _, tasks_path = copy_config_set(os.path.join(temp_config_dir, 'bad'))
+    with open(tasks_path, 'a', encoding='utf-8') as f:
+        f.write("\nextra_task: not a mapping\n")
+
+    config_sets = find_config_sets(temp_config_dir)
+    assert [os.path.basename(path) for path in config_sets] == ['bad', 'good']
+    results = validate_config_sets(config_sets, workers=1)
+    assert results[config_sets[1]] is None
+    assert "Task 'extra_task' configuration must be a dictionary" in results[config_sets[0]]
@@ -0,0 +1,93 @@
+import pytest
+import tempfile
+from pathlib import Path
+from website_builder.utils.context_compressor import (
+    ContextBudget, ContextCompressor, css_inventory, extract_facts, html_outline
+)
+from website_builder.utils.metrics import estimate_tokens
+
+RESEARCH = """# Rust
+Rust is a systems programming language focused on memory safety. It has no garbage collector.
+
+## Key Terms
+- **Ownership**: every value has a single owner that frees it.
+- **Borrowing**: references that use a value without owning it.
+
+## Applications
+Rust powers networking services and command-line tools. For example, Discord rewrote its read states service in Rust.
+
+```rust
+fn main() { println!("hello"); }
+```
+"""
+
+def test_extract_facts():
+    """Test that sections, summaries, key terms and examples are recognised."""
+    facts = extract_facts(RESEARCH)
+    assert facts.sections == ['Rust', 'Rust > Key Terms', 'Rust > Applications']
+    kinds = [(fact.kind, fact.section) for fact in facts.facts]
+    assert kinds[0] == ('summary', 'Rust')
+    assert ('term', 'Rust > Key Terms') in kinds
+    assert [f.kind for f in facts.facts if f.section == 'Rust > Applications'] == ['summary', 'example', 'example']
+
+    # Text without punctuation is still split into facts that fit a budget
+    long = extract_facts("word " * 2000)
+    assert len(long.facts) > 1 and all(f.tokens <= 80 for f in long.facts)
+
+def test_select_prefers_relevant_facts_within_budget():
+    """Test that a slice stays within budget and keeps the facts that match the task."""
+    facts = extract_facts(RESEARCH + "\n".join(f"- Filler point number {i} about history." for i in range(200)))
+    text = facts.select("Explain ownership and borrowing", 120)
+    assert estimate_tokens(text) <= 120
+    assert 'Ownership' in text and 'Borrowing' in text and text.startswith('Outline: ')
+    assert 'Outline' not in facts.select("Explain ownership", 120, include=('term',))
+
+def test_outline_and_inventory():
+    """Test that pages keep their structure and stylesheets their selectors and custom properties."""
+    outline = html_outline(
+        "<html><head><link rel='stylesheet' href='style.css'></head><body>"
+        "<ul><li class='item'><a href='#a'>A</a></li><li class='item'><a href='#b'>B</a></li></ul>"
+        "<button id='darkModeToggle'>Dark Mode</button></body></html>")
+    assert 'link[rel="stylesheet"][href="style.css"]' in outline
+    assert 'li.item (x2)' in outline and 'button#darkModeToggle' in outline
+    assert 'Dark Mode' not in outline
+
+    inventory = css_inventory(":root { --primary: #333; }\n.dark-mode { --primary: #eee; }\n"
+                              "body { margin: 0; }\n@media (max-width: 600px) { nav a { display: none; } }")
+    assert ':root { --primary: #333 }' in inventory and '.dark-mode { --primary: #eee }' in inventory
+    assert '@media (max-width: 600px): nav a' in inventory and 'margin' not in inventory
+
+def test_compress_within_budget_and_digests_once():
+    """Test that context over budget is compressed, context within budget is kept and digests are shared."""
+    compressor = ContextCompressor(ContextBudget(budget=150, tasks={'page_*': {'budget': 100000}}))
+    research = RESEARCH * 20
+    page = "<html><body>" + "<section class='card'><h2>Title</h2><p>Text</p></section>" * 50 + "</body></html>"
+    compressed = compressor.compress('js_development_task', 'dark mode toggle',
+                                     [('research.md', research), ('html/index.html', page)])
+    assert compressed.tokens <= 150 < compressed.original_tokens
+    assert compressed.saved_tokens == compressed.original_tokens - compressed.tokens
+    assert 'section.card (x50)' in compressed.text
+
+    first = compressor.digest('research.md', research)
+    assert compressor.digest('research.md', research) is first
+
+    unchanged = compressor.compress('page_index', 'home page', [('research.md', research)])
+    assert unchanged.text == research and unchanged.saved_tokens == 0
+
+def test_context_budget_config():
+    """Test that the packaged budgets load and invalid budgets are rejected."""
+    config_path = Path(__file__).parent.parent / 'src' / 'website_builder' / 'config' / 'context_budget.yaml'
+    budgets = ContextBudget.load(str(config_path))
+    assert budgets.for_task('html_creation_task')[0] == 2500
+    assert budgets.for_task('sitemap_task')[1] == ('outline', 'summary', 'term')
+    assert budgets.for_task('page_about')[0] == 1500
+    assert budgets.for_task('unknown_task') == (budgets.budget, budgets.include)
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname) / 'context_budget.yaml'
+        path.write_text('default:\n  budget: 0\n')
+        with pytest.raises(ValueError, match="budget"):
+            ContextBudget.load(str(path))
+        path.write_text('tasks:\n  html_creation_task:\n    include: [facts]\n')
+        with pytest.raises(ValueError, match="facts"):
+            ContextBudget.load(str(path))
@@ -0,0 +1,220 @@
+import os
+import pytest
+import tempfile
+import time
+from collections import Counter
+from crewai import BaseLLM
+from website_builder.crew import BuilderResources, WebsiteBuilder
+from website_builder.testing import fake_resources
+from website_builder.utils.metrics import RunMetrics
+
+class FakeLLM(BaseLLM):
+    """LLM stand-in that answers immediately and counts calls per agent role."""
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        agent = kwargs.get('from_agent')
+        FakeLLM.calls[getattr(agent, 'role', None)] += 1
+        return f"Thought: I know the answer\nFinal Answer: output of {getattr(agent, 'role', 'agent')}"
+
+FakeLLM.calls = Counter()
+
+@pytest.fixture
+def resources():
+    """Shared resources wired to the fake LLM."""
+    FakeLLM.calls.clear()
+    return BuilderResources(llm=FakeLLM(model='fake-model', temperature=0.7))
+
+@pytest.fixture
+def output_dir():
+    """Create a temporary output directory."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield tmpdirname
+
+def test_run_pipeline_writes_outputs(resources, output_dir):
+    """Test that every task's output is written through the FileManager."""
+    builder = WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=resources)
+    outputs = builder.run_pipeline(max_workers=2)
+
+    assert set(outputs) == {'research_task', 'html_creation_task', 'css_design_task', 'js_development_task'}
+    assert builder.file_manager.read_file('html/index.html') == outputs['html_creation_task']
+    assert builder.file_manager.file_exists('research.md')
+
+def test_incremental_rebuild_reruns_only_changed_tasks(resources, output_dir):
+    """Test that editing one agent's goal reruns only that agent's task."""
+    WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=resources).run_pipeline(incremental=True)
+    assert sum(FakeLLM.calls.values()) == 4
+
+    FakeLLM.calls.clear()
+    WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=resources).run_pipeline(incremental=True)
+    assert sum(FakeLLM.calls.values()) == 0
+
+    FakeLLM.calls.clear()
+    builder = WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=resources)
+    builder.agent_specs['js_developer']['goal'] = "Write tiny, dependency-free JavaScript."
+    builder.run_pipeline(incremental=True)
+    assert list(FakeLLM.calls) == ['Rust JavaScript Functionality Specialist.']
+
+def test_resume_skips_completed_tasks(output_dir):
+    """Test that a run interrupted after two tasks resumes without redoing them."""
+    crashed = fake_resources()
+    llm = crashed.llm()
+    call = llm.call
+
+    def crash_after_two_tasks(messages, *args, **kwargs):
+        if llm.call_count >= 2:
+            raise RuntimeError("process killed")
+        return call(messages, *args, **kwargs)
+
+    llm.call = crash_after_two_tasks
+    with pytest.raises(Exception):
+        WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=crashed).run_pipeline()
+
+    resources = fake_resources()
+    builder = WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=resources)
+    # The failed build committed no files; the checkpoints restore the completed ones
+    assert not builder.file_manager.file_exists('research.md')
+    outputs = builder.run_pipeline(resume=True)
+
+    assert resources.llm().call_count == 2
+    assert builder.file_manager.file_exists('research.md')
+    assert builder.file_manager.read_file('css/style.css') == outputs['css_design_task']
+
+    # Without --resume every task runs again
+    builder.run_pipeline()
+    assert resources.llm().call_count == 6
+
+def test_run_pipeline_records_metrics(resources, output_dir):
+    """Test that each task is timed and its LLM calls and writes are attributed to it."""
+    builder = WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=resources)
+    metrics = RunMetrics("Rust")
+    with metrics.track(builder.file_manager.output_dir):
+        builder.run_pipeline(max_workers=2)
+
+    report = metrics.to_report()
+    assert report['status'] == 'ok'
+    assert set(report['stages']) == {'research_task', 'html_creation_task', 'css_design_task', 'js_development_task'}
+    for stage in report['stages'].values():
+        assert stage['llm_calls'] == 1
+        assert stage['prompt_tokens'] > 0 and stage['completion_tokens'] > 0
+    assert report['stages']['html_creation_task']['bytes_written'] > 0
+    assert builder.file_manager.file_exists(RunMetrics.REPORT_FILENAME)
+
+def test_streamed_pipeline_writes_outputs(output_dir):
+    """Test that a streaming build leaves complete output files and no partial files."""
+    builder = WebsiteBuilder(topic="Rust", output_dir=output_dir,
+                             resources=fake_resources(response_size=500, stream=True))
+    metrics = RunMetrics("Rust")
+    with metrics.activate():
+        outputs = builder.run_pipeline(max_workers=2)
+
+    assert builder.file_manager.read_file('html/index.html') == outputs['html_creation_task']
+    assert len(outputs['html_creation_task']) == 500
+    assert list(builder.file_manager.output_dir.rglob('*.partial')) == []
+    assert set(metrics.first_byte) == {'research.md', 'html/index.html', 'css/style.css', 'js/script.js'}
+
+def test_streamed_files_land_when_their_task_finishes(output_dir):
+    """Test that a streaming build moves each file into place as its task finishes, not at the end."""
+    builder = WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=fake_resources(stream=True))
+    research = builder.file_manager.output_dir / 'research.md'
+    open_stream = builder.file_manager.open_stream
+    research_on_disk = {}
+
+    def record(filename, **kwargs):
+        research_on_disk[filename] = research.exists()
+        return open_stream(filename, **kwargs)
+
+    builder.file_manager.open_stream = record
+    builder.run_pipeline(max_workers=1)
+    assert research_on_disk == {'research.md': False, 'html/index.html': True,
+                                'css/style.css': True, 'js/script.js': True}
+
+def test_template_pipeline_renders_page(output_dir):
+    """Test that a template build renders the LLM's structured content into base.html."""
+    builder = WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=fake_resources())
+    outputs = builder.run_pipeline(template=True)
+
+    page = builder.file_manager.read_file('html/index.html')
+    assert page == outputs['html_creation_task']
+    assert page.startswith('<!DOCTYPE html>')
+    assert '{content}' not in page and '<section id="' in page
+    assert '<title>' in page and 'id="darkModeToggle"' in page
+
+def test_multipage_pipeline_writes_every_page(output_dir):
+    """Test that a multi-page build writes a page per sitemap entry and the CSS and JS once."""
+    builder = WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=fake_resources(sitemap_pages=3))
+    outputs = builder.run_pipeline(pages=True)
+
+    assert set(outputs) == {'research_task', 'sitemap_task', 'page_index', 'page_page-1', 'page_page-2',
+                            'css_design_task', 'js_development_task'}
+    for slug in ('index', 'page-1', 'page-2'):
+        assert builder.file_manager.read_file(f'html/{slug}.html') == outputs[f'page_{slug}']
+    assert builder.file_manager.file_exists('sitemap.json')
+    assert builder.file_manager.file_exists('css/style.css') and builder.file_manager.file_exists('js/script.js')
+
+def test_multipage_pages_run_concurrently(output_dir):
+    """Test that pages are written at once, so the build takes about as long as one page."""
+    builder = WebsiteBuilder(topic="Rust", output_dir=output_dir,
+                             resources=fake_resources(llm_latency=0.3, sitemap_pages=6))
+    start = time.perf_counter()
+    builder.run_pipeline(pages=True, template=True)
+    seconds = time.perf_counter() - start
+
+    # research, sitemap, then CSS and JS in sequence next to the pages: 4 calls deep instead of 10
+    assert seconds < 0.3 * 8
+    home = builder.file_manager.read_file('html/index.html')
+    assert '<a href="page-5.html">' in home and 'aria-current="page"' in home
+
+def test_compressed_context_pipeline_reports_savings(output_dir):
+    """Test that compressed builds give tasks a digest within budget and report the tokens saved."""
+    builder = WebsiteBuilder(topic="Rust", output_dir=output_dir,
+                             resources=fake_resources(response_size=12000, research_sections=8))
+    metrics = RunMetrics("Rust")
+    with metrics.activate():
+        outputs = builder.run_pipeline(compress_context=True)
+
+    assert builder.file_manager.read_file('html/index.html') == outputs['html_creation_task']
+    html_stage = metrics.stages['html_creation_task']
+    assert 0 < html_stage['context_tokens'] <= 2500 < html_stage['context_tokens'] + html_stage['context_tokens_saved']
+    assert metrics.stages['js_development_task']['context_tokens_saved'] > 0
+    assert metrics.stages['research_task']['context_tokens'] == 0
+
+def test_knowledge_index_feeds_later_research():
+    """Test that research and search results of one build are reused by the next one on the topic."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        knowledge_dir = f"{tmpdirname}/knowledge"
+        os.makedirs(knowledge_dir)
+        with open(f"{knowledge_dir}/rust.md", 'w') as f:
+            f.write("Rust guarantees memory safety through ownership and borrowing.")
+        resources = fake_resources(tool_calls=1, research_sections=2, knowledge_index_path=f"{tmpdirname}/knowledge.sqlite3",
+                                   knowledge_dir=knowledge_dir)
+
+        first = WebsiteBuilder(topic="Rust", output_dir=f"{tmpdirname}/first", resources=resources)
+        first.run_pipeline()
+        searched = resources.knowledge_search.stats()['searched']
+        assert searched >= 1
+        research = first.file_manager.read_file('research.md')
+        assert resources.knowledge_index.search(research[:400])[0].source == first._research_source()
+        assert resources.knowledge_index.search(research[:400], exclude=[first._research_source()])[0].score < 0.5
+
+        second = WebsiteBuilder(topic="Rust", output_dir=f"{tmpdirname}/second", resources=resources)
+        assert '[rust.md]' in second._knowledge_notes()
+        second.run_pipeline()
+        assert resources.knowledge_search.stats() == {'answered': searched, 'searched': searched}
+
+def test_incremental_rebuild_with_knowledge_index(output_dir):
+    """Test that a growing knowledge index does not make unchanged tasks rerun."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        knowledge_dir = f"{tmpdirname}/knowledge"
+        os.makedirs(knowledge_dir)
+        resources = fake_resources(tool_calls=1, knowledge_index_path=f"{tmpdirname}/knowledge.sqlite3",
+                                   knowledge_dir=knowledge_dir)
+        llm = resources.llm()
+        WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=resources).run_pipeline(incremental=True)
+        calls = llm.call_count
+
+        # New notes on the topic would change the research prompt, but not its fingerprint
+        resources.knowledge_index.upsert('rust.md', "Rust guarantees memory safety through ownership.")
+        builder = WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=resources)
+        assert builder._knowledge_notes()
+        builder.run_pipeline(incremental=True)
+        assert llm.call_count == calls
@@ -0,0 +1,101 @@
+import pytest
+from website_builder.utils.critical_css import (
+    above_the_fold,
+    extract_critical_css,
+    inline_critical_css,
+    parse_html,
+    rebase_urls,
+    render_blocking_resources,
+    selector_matches,
+)
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+    <link rel="stylesheet" href="style.css">
+    <link rel="stylesheet" href="print.css" media="print">
+    <script src="analytics.js" async></script>
+</head>
+<body>
+    <header><nav id="top"><a class="logo" href="#">Site</a><ul class="nav-links"><li><a href="#a">A</a></li></ul></nav></header>
+    <section class="hero"><h1>Welcome</h1></section>
+    <footer><p class="fine-print">Bye</p></footer>
+    <script src="script.js"></script>
+</body>
+</html>"""
+
+CSS = """@import url("fonts.css");
+:root { --accent: #07f; }
+/* header */
+header > nav#top { display: flex; }
+.nav-links li + li { margin-left: 1em; }
+a.logo:hover { color: red; }
+.hero h1, .missing { font-size: 3em; }
+footer .fine-print { color: gray; }
+@media (max-width: 600px) { .nav-links { display: none; } .gallery { columns: 1; } }
+@font-face { font-family: Inter; src: url(inter.woff2); }
+"""
+
+@pytest.fixture
+def fold():
+    """Elements above the fold of PAGE, which ends before the footer."""
+    return above_the_fold(parse_html(PAGE), fold_elements=8)
+
+def test_above_the_fold(fold):
+    """Test that the fold covers the first body elements and their ancestors."""
+    tags = [element.tag for element in fold]
+    assert tags[:3] == ['html', 'body', 'header']
+    assert 'h1' in tags
+    assert 'footer' not in tags
+
+def test_selector_matching(fold):
+    """Test combinators, attributes and pseudo-classes against the fold."""
+    assert selector_matches('header > nav#top', fold)
+    assert selector_matches('.nav-links li a[href^="#"]', fold)
+    assert selector_matches('section.hero h1::before', fold)
+    assert selector_matches(':root', fold)
+    assert not selector_matches('body > nav', fold)
+    assert not selector_matches('footer .fine-print', fold)
+    # Interaction states are not needed for the first paint
+    assert not selector_matches('a.logo:hover', fold)
+
+def test_extract_critical_css(fold):
+    """Test that only rules styling the fold are kept, in order and inside their media blocks."""
+    critical = extract_critical_css(CSS, fold)
+    assert critical.index(':root') < critical.index('header > nav#top') < critical.index('.hero h1, .missing')
+    assert '@media (max-width: 600px) {\n.nav-links { display: none; }\n}' in critical
+    for excluded in ('@import', ':hover', 'fine-print', '.gallery', '@font-face'):
+        assert excluded not in critical
+
+def test_inline_critical_css_removes_render_blocking():
+    """Test inlining, async stylesheet loading, script deferral and the blocking report."""
+    sizes = {'style.css': len(CSS), 'script.js': 500, 'print.css': 100}
+    before = render_blocking_resources(PAGE, 'index.html', sizes)
+    assert before == {'requests': 2, 'bytes': len(CSS) + 500, 'resources': ['style.css', 'script.js']}
+
+    page = inline_critical_css(PAGE, 'index.html', {'style.css': CSS}, fold_elements=8)
+    assert page.index('<style>') < page.index('rel="preload" href="style.css" as="style"')
+    assert '<noscript><link rel="stylesheet" href="style.css"></noscript>' in page
+    assert '<link rel="stylesheet" href="print.css" media="print">' in page
+    assert '<script src="script.js" defer></script>' in page
+    assert '<script src="analytics.js" async></script>' in page
+    assert render_blocking_resources(page, 'index.html', sizes) == {'requests': 0, 'bytes': 0, 'resources': []}
+
+def test_inlined_rules_keep_their_urls():
+    """Test that relative url() references are rebased from the stylesheet onto the page."""
+    css = ("body { background: url(../img/bg.png?v=2); }\n"
+           "h1 { background: url('icons/h1.svg#a'), url(data:image/png;base64,AAAA), url(\"/logo.png\"); }")
+    page = ('<html><head><link rel="stylesheet" href="../css/style.css"></head>'
+            '<body><h1>Title</h1></body></html>')
+    inlined = inline_critical_css(page, 'html/index.html', {'css/style.css': css})
+    assert 'url(../img/bg.png?v=2)' in inlined
+    assert "url('../css/icons/h1.svg#a')" in inlined
+    assert 'url(data:image/png;base64,AAAA)' in inlined and 'url("/logo.png")' in inlined
+    assert rebase_urls("a { background: url(img/a.png); }", 'css/style.css', 'index.html') == \
+        "a { background: url(css/img/a.png); }"
+
+def test_scripts_used_by_inline_scripts_are_not_deferred():
+    """Test that a script an inline script may depend on keeps running in order."""
+    page = '<script src="lib.js"></script><script>lib.start();</script><script src="late.js"></script>'
+    assert inline_critical_css(page, 'index.html', {}) == \
+        '<script src="lib.js"></script><script>lib.start();</script><script src="late.js" defer></script>'
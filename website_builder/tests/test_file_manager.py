@@ -2,6 +2,7 @@ import pytest
 from pathlib import Path
 import tempfile
 import os
+import json
 from website_builder.utils.file_manager import FileManager
 
 @pytest.fixture
@@ -13,7 +14,8 @@ def temp_dir():
 @pytest.fixture
 def file_manager(temp_dir):
     """Create a FileManager instance with a temporary directory."""
-    return FileManager(output_dir=temp_dir)
+    with FileManager(output_dir=temp_dir) as manager:
+        yield manager
 
 def test_file_manager_initialization(file_manager, temp_dir):
     """Test FileManager initialization."""
@@ -50,4 +52,143 @@ def test_invalid_file_operations(file_manager):
     
     # Test writing to invalid path
     with pytest.raises(IOError):
-        file_manager.write_file("/invalid/path/test.txt", "test") 
\ No newline at end of file
+        file_manager.write_file("/invalid/path/test.txt", "test")
+
+
+def test_versions_and_restore(file_manager):
+    """Test version history and restoring an earlier version."""
+    filename = "index.html"
+    file_manager.write_file(filename, "v1")
+    file_manager.write_file(filename, "v2")
+    
+    versions = file_manager.get_file_versions(filename)
+    assert [v['content'] for v in versions] == ["v1", "v2"]
+    
+    file_manager.restore_version(filename, 0)
+    assert file_manager.read_file(filename) == "v1"
+
+def test_legacy_version_history_migration(temp_dir):
+    """Test that a legacy version_history.json is migrated once."""
+    versions_dir = Path(temp_dir) / 'versions'
+    versions_dir.mkdir(parents=True)
+    legacy = {"index.html": [{"timestamp": "2024-01-01T00:00:00", "content": "old"}]}
+    with open(versions_dir / 'version_history.json', 'w') as f:
+        json.dump(legacy, f)
+    
+    with FileManager(output_dir=temp_dir) as manager:
+        assert [v['content'] for v in manager.get_file_versions("index.html")] == ["old"]
+    assert not (versions_dir / 'version_history.json').exists()
+    
+    # Re-opening must not import the legacy history a second time
+    with FileManager(output_dir=temp_dir) as manager:
+        assert len(manager.get_file_versions("index.html")) == 1
+
+def test_backup_only_for_external_changes(file_manager):
+    """Test that versioned content is not duplicated as a backup copy."""
+    filename = "index.html"
+    file_manager.write_file(filename, "v1")
+    file_manager.write_file(filename, "v2")
+    assert file_manager.list_backups(filename) == []
+    
+    # An edit made outside the FileManager is not in the history yet
+    file_manager.get_file_path(filename).write_text("edited by hand")
+    file_manager.write_file(filename, "v3")
+    assert len(file_manager.list_backups(filename)) == 1
+
+def test_backups_in_the_same_second_are_kept(file_manager):
+    """Test that backups taken in quick succession do not overwrite each other."""
+    filename = "html/index.html"
+    path = file_manager.get_file_path(filename)
+    names = []
+    for i in range(3):
+        path.write_text(f"edit {i}")
+        names.append(file_manager.create_backup(filename))
+    
+    assert file_manager.list_backups(filename) == names
+    path.write_text("broken")
+    assert file_manager.restore_backup(names[1]) == path
+    assert file_manager.read_file(filename) == "edit 1"
+    with pytest.raises(IOError):
+        file_manager.restore_backup("missing.bak")
+
+def test_create_backup_returns_archive_name(file_manager):
+    """Test that create_backup returns a name in the backup archive, not a file path."""
+    assert file_manager.create_backup("missing.html") is None
+    file_manager.get_file_path("index.html").write_text("original")
+    name = file_manager.create_backup("index.html")
+    assert isinstance(name, str) and not (file_manager.backup_dir / name).exists()
+    assert file_manager.list_backups("index.html") == [name]
+    assert file_manager.backup_archive.read(name) == b"original"
+
+def test_backup_retention(temp_dir):
+    """Test that only the configured number of backups is kept per file."""
+    with FileManager(output_dir=temp_dir, backup_retention=2) as manager:
+        path = manager.get_file_path("index.html")
+        for i in range(4):
+            path.write_text(f"edit {i}")
+            manager.create_backup("index.html")
+        
+        backups = manager.list_backups("index.html")
+        assert len(backups) == 2
+        assert manager.backup_archive.read(backups[0]) == b"edit 2"
+
+def test_transaction_commits_files_together(file_manager):
+    """Test that files written in a transaction appear only when it commits."""
+    file_manager.write_file("html/index.html", "old page")
+    with file_manager.transaction():
+        file_manager.write_file("html/index.html", "new page")
+        file_manager.write_file("css/style.css", "body {}")
+        # Staged content is visible through the FileManager but not on disk
+        assert file_manager.read_file("html/index.html") == "new page"
+        assert file_manager.file_exists("css/style.css")
+        assert (file_manager.output_dir / "html" / "index.html").read_text() == "old page"
+        assert not (file_manager.output_dir / "css" / "style.css").exists()
+    
+    assert (file_manager.output_dir / "html" / "index.html").read_text() == "new page"
+    assert (file_manager.output_dir / "css" / "style.css").read_text() == "body {}"
+    assert len(file_manager.get_file_versions("html/index.html")) == 2
+    assert not file_manager.journal_file.exists()
+    assert not list(file_manager.output_dir.rglob("*.tmp"))
+
+def test_failed_transaction_writes_nothing(file_manager):
+    """Test that a transaction that raises leaves the previous files intact."""
+    file_manager.write_file("html/index.html", "old page")
+    with pytest.raises(RuntimeError):
+        with file_manager.transaction():
+            file_manager.write_file("html/index.html", "half a page")
+            raise RuntimeError("build failed")
+    
+    assert file_manager.read_file("html/index.html") == "old page"
+    assert len(file_manager.get_file_versions("html/index.html")) == 1
+
+def test_commit_is_flushed_before_the_journal_is_removed(file_manager, monkeypatch):
+    """Test that committed files reach the disk while the journal can still replay them."""
+    flushes = []
+    monkeypatch.setattr(os, 'sync', lambda: flushes.append(
+        (file_manager.journal_file.exists(), (file_manager.output_dir / "html" / "index.html").exists())))
+    with file_manager.transaction():
+        file_manager.write_file("html/index.html", "new page")
+    assert flushes == [(True, True)]
+    assert not file_manager.journal_file.exists()
+
+def test_interrupted_commit_is_recovered(temp_dir):
+    """Test that a commit interrupted after its journal was written is completed on reopen."""
+    with FileManager(output_dir=temp_dir) as manager:
+        manager._apply = lambda files: (_ for _ in ()).throw(OSError("power lost"))
+        with pytest.raises(OSError):
+            with manager.transaction():
+                manager.write_file("html/index.html", "new page")
+                manager.write_file("js/script.js", "run()")
+        assert manager.journal_file.exists()
+    
+    with FileManager(output_dir=temp_dir) as recovered:
+        assert recovered.read_file("html/index.html") == "new page"
+        assert recovered.read_file("js/script.js") == "run()"
+        assert len(recovered.get_file_versions("js/script.js")) == 1
+        assert not recovered.journal_file.exists()
+    
+    # A torn journal means the commit never happened
+    recovered.journal_file.write_text("0" * 64 + "\n[[\"html/index.html\", \"tor")
+    with FileManager(output_dir=temp_dir) as manager:
+        assert manager.read_file("html/index.html") == "new page"
+    assert not recovered.journal_file.exists()
@@ -0,0 +1,90 @@
+import pytest
+import tempfile
+from pathlib import Path
+from typing import Optional
+from pydantic import BaseModel
+from crewai.tools import BaseTool
+from website_builder.tools.indexed_search_tool import IndexedSearchTool
+from website_builder.utils.vector_index import VectorIndex
+
+class SearchArgs(BaseModel):
+    search_query: str
+    search_type: Optional[str] = None
+
+class FakeSearchTool(BaseTool):
+    name: str = "Search the internet"
+    description: str = "Fake search tool for testing."
+    args_schema: type = SearchArgs
+    calls: int = 0
+
+    def _run(self, search_query: str, search_type: Optional[str] = None) -> dict:
+        self.calls += 1
+        return {"searchParameters": {"q": search_query}, "organic": [
+            {"title": f"Rust guide {i}", "link": f"https://example.com/rust/{i}?utm_source=x",
+             "snippet": f"Rust ownership and borrowing explained, part {i}: memory safety without a garbage collector."}
+            for i in range(4)
+        ]}
+
+@pytest.fixture
+def index():
+    """Create a knowledge index in a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield VectorIndex(str(Path(tmpdirname) / 'knowledge.sqlite3'))
+
+def test_searches_index_before_the_web(index):
+    """Test that results of a search answer a similar later query locally."""
+    inner = FakeSearchTool()
+    tool = IndexedSearchTool.wrap(inner, index, min_hits=3)
+    assert tool.name == inner.name and tool.args_schema is inner.args_schema
+
+    tool.run(search_query="rust ownership")
+    assert inner.calls == 1
+    assert index.stats()['documents'] == 4
+
+    result = tool.run(search_query="Rust ownership and borrowing")
+    assert inner.calls == 1
+    assert result['searchParameters']['source'] == 'knowledge index'
+    assert result['organic'][0]['link'].startswith('https://example.com/rust/')
+    assert tool.stats() == {'answered': 1, 'searched': 1}
+
+def test_gaps_go_to_the_search_tool(index):
+    """Test that queries the index does not cover are searched."""
+    index.upsert('notes.md', "Rust ownership and borrowing make memory safe.")
+    inner = FakeSearchTool()
+    tool = IndexedSearchTool.wrap(inner, index, min_hits=3)
+    tool.run(search_query="rust ownership")
+    tool.run(search_query="sourdough baking temperatures")
+    assert inner.calls == 2
+    assert tool.stats() == {'answered': 0, 'searched': 2}
+
+def test_off_topic_queries_go_to_the_search_tool(index):
+    """Test that sharing a few words with indexed text does not count as covering a query."""
+    for i in range(5):
+        index.upsert(f"https://cars.example.com/{i}", f"The best electric car of 2026, review {i}: range, "
+                     f"charging speed and price of the new electric car models.", title=f"Best electric car {i}",
+                     link=f"https://cars.example.com/{i}")
+    inner = FakeSearchTool()
+    tool = IndexedSearchTool.wrap(inner, index, min_hits=3)
+    tool.run(search_query="best electric car 2026 recall news")
+    assert inner.calls == 1
+    tool.run(search_query="best electric car 2026 range charging")
+    assert inner.calls == 1
+
+def test_news_and_stale_results_are_not_answered_locally(index):
+    """Test that news searches always go live, and that expired search results do not count."""
+    inner = FakeSearchTool()
+    tool = IndexedSearchTool.wrap(inner, index, min_hits=3, max_age=lambda arguments: 60)
+    tool.run(search_query="rust ownership", search_type="news")
+    assert index.stats()['documents'] == 0
+    tool.run(search_query="rust ownership")
+    tool.run(search_query="rust ownership", search_type="news")
+    assert inner.calls == 3
+
+    tool.run(search_query="Rust ownership and borrowing")
+    assert inner.calls == 3
+    index._conn.execute("UPDATE documents SET updated_at = updated_at - 120")
+    tool.run(search_query="Rust ownership and borrowing")
+    assert inner.calls == 4
+    # Seeing the results again makes them fresh
+    tool.run(search_query="Rust ownership and borrowing")
+    assert inner.calls == 4
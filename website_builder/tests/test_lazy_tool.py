@@ -0,0 +1,57 @@
+import pytest
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+from typing import ClassVar, Type
+from website_builder.tools.lazy_tool import LazyTool
+
+class EchoInput(BaseModel):
+    """Input of the echo tool."""
+    text: str = Field(..., description="Text to echo")
+
+class EchoTool(BaseTool):
+    """Tool that counts how often it is constructed."""
+    name: str = "Echo"
+    description: str = "Echoes its input."
+    args_schema: Type[BaseModel] = EchoInput
+    instances: ClassVar[int] = 0
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        EchoTool.instances += 1
+
+    def _run(self, text: str) -> str:
+        return f"{self.name}: {text}"
+
+@pytest.fixture(autouse=True)
+def reset_instances():
+    EchoTool.instances = 0
+
+def test_lazy_tool_defers_construction():
+    """Test that the tool is only created on its first call, and only once."""
+    tool = LazyTool.of(EchoTool, name="Loud echo")
+    assert EchoTool.instances == 0
+    assert not tool.created
+    assert tool.name == "Echo"
+    assert tool.args_schema is EchoInput
+
+    assert tool.run(text="hi") == "Loud echo: hi"
+    assert tool.run(text="again") == "Loud echo: again"
+    assert tool.created
+    assert EchoTool.instances == 1
+
+def test_builder_resources_do_not_create_search_tools(monkeypatch):
+    """Test that the search tools are not constructed until an agent calls them."""
+    from website_builder.crew import BuilderResources
+
+    # WebsiteSearchTool refuses to construct without an embedding API key
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    resources = BuilderResources()
+
+    def lazy(tool):
+        # Unwrap the caching, rate limiting and timing wrappers
+        while not isinstance(tool, LazyTool):
+            tool = tool.tool
+        return tool
+
+    assert not lazy(resources.web_tool).created
+    assert not lazy(resources.search_tool).created
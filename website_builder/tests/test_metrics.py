@@ -0,0 +1,97 @@
+import pytest
+import json
+import tempfile
+import threading
+from pathlib import Path
+from website_builder.utils.metrics import RunMetrics, current_metrics, current_stage, estimate_tokens, to_prometheus
+from website_builder.utils.file_manager import FileManager
+
+@pytest.fixture
+def output_dir():
+    """Create a temporary output directory."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield Path(tmpdirname)
+
+def test_stage_activates_collector_and_times_stage():
+    """Test that a stage activates the collector and records its wall time."""
+    metrics = RunMetrics("Rust")
+    assert current_metrics() is None
+
+    with metrics.stage('research_task'):
+        assert current_metrics() is metrics
+        assert current_stage() == 'research_task'
+        metrics.record_llm_call(current_stage(), 0.5, prompt_tokens=10, completion_tokens=5)
+
+    assert current_metrics() is None
+    stage = metrics.stages['research_task']
+    assert stage['wall_seconds'] > 0
+    assert (stage['llm_calls'], stage['prompt_tokens'], stage['completion_tokens']) == (1, 10, 5)
+
+def test_call_after_failure_counts_as_retry():
+    """Test that a call following a failed call in the same stage is a retry."""
+    metrics = RunMetrics()
+    metrics.record_llm_call('html', 0.1, error=True)
+    metrics.record_llm_call('html', 0.1)
+    metrics.record_llm_call('html', 0.1)
+
+    assert metrics.stages['html']['llm_errors'] == 1
+    assert metrics.stages['html']['retries'] == 1
+
+def test_concurrent_recording():
+    """Test that counters are consistent when recorded from many threads."""
+    metrics = RunMetrics()
+
+    def worker():
+        for _ in range(500):
+            metrics.record_tool_call('research_task', 'search', 0.001)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.stages['research_task']['tool_calls'] == 4000
+    assert metrics.tools['search']['calls'] == 4000
+
+def test_file_manager_writes_are_recorded(output_dir):
+    """Test that bytes written by the FileManager are attributed to the active stage."""
+    metrics = RunMetrics()
+    with FileManager(str(output_dir)) as file_manager:
+        file_manager.write_file('untracked.txt', 'ignored')
+        with metrics.stage('css_design_task'):
+            file_manager.write_file('style.css', 'body { color: red; }')
+
+        assert metrics.files == {'style.css': 20}
+        assert metrics.stages['css_design_task']['bytes_written'] == 20
+
+def test_track_writes_report_on_failure(output_dir):
+    """Test that the run report is written even when the build fails."""
+    metrics = RunMetrics("Rust")
+    with pytest.raises(RuntimeError):
+        with metrics.track(output_dir):
+            metrics.record_llm_call('research_task', 0.2, prompt_tokens=3)
+            raise RuntimeError("LLM unavailable")
+
+    report = json.loads((output_dir / RunMetrics.REPORT_FILENAME).read_text())
+    assert report['status'] == 'error'
+    assert report['error'] == "LLM unavailable"
+    assert report['totals']['llm_calls'] == 1
+    assert report['totals']['wall_seconds'] > 0
+
+def test_prometheus_output():
+    """Test the Prometheus text rendering."""
+    metrics = RunMetrics('Say "hi"')
+    metrics.record_llm_call('html', 0.25, prompt_tokens=7)
+    metrics.finish()
+    text = to_prometheus([metrics])
+
+    assert '# TYPE website_builder_stage_prompt_tokens counter' in text
+    assert 'website_builder_stage_prompt_tokens{topic="Say \\"hi\\"",stage="html"} 7' in text
+    assert 'website_builder_run_seconds{topic="Say \\"hi\\"",status="ok"}' in text
+
+def test_estimate_tokens():
+    """Test the token estimate for strings and message lists."""
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens([{'role': 'user', 'content': 'abcd'}, {'role': 'system', 'content': 'efgh'}]) == 2
+    assert estimate_tokens(None) == 0
@@ -0,0 +1,99 @@
+import pytest
+import json
+import tempfile
+from pathlib import Path
+from website_builder.pages import (
+    MultiPageConfig, PageContent, PageTemplateConfig, SitemapPage, parse_page_content, parse_sitemap, render_page
+)
+from website_builder.utils.template_engine import TemplateEngine
+
+CONTENT = {
+    'title': 'Rust <Guide>',
+    'description': 'All about Rust',
+    'sections': [
+        {'id': 'Intro', 'heading': 'Intro & Setup', 'html': '<p>Install <code>rustup</code>.</p>'},
+        {'heading': 'Intro & Setup', 'html': '<p>Again.</p>'},
+    ],
+    'footer_about': 'A site about Rust',
+    'footer_contact': 'rust@example.com',
+}
+
+def test_parse_page_content():
+    """Test that JSON is found inside code fences and section ids are made unique."""
+    content = parse_page_content("Here you go:\n```json\n" + json.dumps(CONTENT) + "\n```")
+    assert content.title == 'Rust <Guide>'
+    assert [s.id for s in content.sections] == ['intro', 'intro-setup']
+
+    with pytest.raises(ValueError):
+        parse_page_content("no json here")
+    with pytest.raises(ValueError):
+        parse_page_content('{"title": "x"')
+    with pytest.raises(ValueError, match="sections"):
+        PageContent.from_dict({'title': 'x', 'description': 'y', 'sections': []})
+
+def test_render_page_escapes_text_but_not_section_html():
+    """Test that titles and headings are escaped and section bodies are kept as HTML."""
+    page = render_page(PageContent.from_dict(CONTENT), 'Rust & Co', year=2024)
+    assert '<title>Rust &lt;Guide&gt;</title>' in page
+    assert '<a href="#intro">Intro &amp; Setup</a>' in page
+    assert '<p>Install <code>rustup</code>.</p>' in page
+    assert '2024' in page and 'Rust &amp; Co' in page
+
+def test_page_template_config():
+    """Test that the packaged config loads and fills the topic into the prompt."""
+    config_path = Path(__file__).parent.parent / 'src' / 'website_builder' / 'config' / 'page_template.yaml'
+    config = PageTemplateConfig.load(str(config_path))
+    assert config.task == 'html_creation_task'
+    assert 'Rust' in config.prompt('Rust')['description']
+    assert len(config.template_digest(TemplateEngine())) == 64
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname) / 'page_template.yaml'
+        path.write_text('task: html_creation_task\n')
+        with pytest.raises(ValueError, match="template"):
+            PageTemplateConfig.load(str(path))
+
+def test_parse_sitemap():
+    """Test that slugs are made unique, the home page comes first and pages are capped."""
+    output = json.dumps({'pages': [
+        {'slug': 'Basics', 'title': 'Basics', 'summary': 'The basics'},
+        {'slug': 'index', 'title': 'Home'},
+        {'title': 'Basics'},
+        {'slug': 'extra', 'title': 'Extra'},
+    ]})
+    pages = parse_sitemap(output, max_pages=3)
+    assert [page.slug for page in pages] == ['index', 'basics', 'basics-2']
+    assert pages[0].title == 'Home' and pages[0].summary == ''
+
+    # Without an index page the first page becomes the home page
+    assert [page.slug for page in parse_sitemap('{"pages": [{"title": "A"}, {"title": "B"}]}')] == ['index', 'b']
+    with pytest.raises(ValueError, match="pages"):
+        parse_sitemap('{"pages": []}')
+    with pytest.raises(ValueError, match="title"):
+        parse_sitemap('{"pages": [{"slug": "x"}]}')
+
+def test_multipage_config_specs():
+    """Test that page specs fill in the page and sitemap, and shared tasks follow the sitemap."""
+    config_path = Path(__file__).parent.parent / 'src' / 'website_builder' / 'config' / 'multipage.yaml'
+    config = MultiPageConfig.load(str(config_path))
+    pages = [SitemapPage('index', 'Home', 'Intro'), SitemapPage('usage', 'Usage', 'How to use it')]
+
+    specs = config.page_specs('Rust', pages)
+    assert list(specs) == ['page_index', 'page_usage']
+    assert specs['page_usage']['output_file'] == 'output/html/usage.html'
+    assert "'Usage'" in specs['page_usage']['description'] and 'index.html' in specs['page_usage']['description']
+    assert '{' not in specs['page_usage']['brief']
+
+    shared = config.shared_specs({'css_design_task': {'description': 'Style it.', 'context': ['html']},
+                                  'js_development_task': {'description': 'Script it.', 'context': ['html']}},
+                                 'Rust')
+    assert shared['css_design_task']['context'] == ['sitemap_task']
+    assert shared['js_development_task']['dependencies'] == ['sitemap_task', 'css_design_task']
+
+def test_render_page_links_site_pages():
+    """Test that multi-page sites link their pages and mark the current one."""
+    pages = [SitemapPage('index', 'Home', ''), SitemapPage('usage', 'Usage & Tips', '')]
+    page = render_page(PageContent.from_dict(CONTENT), 'Rust', year=2024, site_pages=pages, current='usage')
+    assert '<a href="index.html">Home</a>' in page
+    assert '<a href="usage.html" aria-current="page">Usage &amp; Tips</a>' in page
+    assert 'href="#intro"' not in page
@@ -0,0 +1,244 @@
+import pytest
+import asyncio
+import tempfile
+import threading
+import time
+from pathlib import Path
+from website_builder.llm import enable_rate_limit
+from website_builder.testing import fake_resources
+from website_builder.tools.rate_limited_tool import RateLimitedTool
+from website_builder.utils.metrics import RunMetrics
+from website_builder.utils.rate_limiter import (
+    FileCoordinator,
+    LocalCoordinator,
+    ProviderLimits,
+    RateLimiter,
+    is_rate_limit_error,
+    load_rate_limits,
+    retry_after,
+)
+
+class RateLimitError(Exception):
+    """Stand-in for a provider's 429 exception."""
+
+    status_code = 429
+
+class ConcurrencyProbe:
+    """Counts how many calls run at once."""
+
+    def __init__(self, duration=0.02):
+        self.duration = duration
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.duration)
+        with self._lock:
+            self.active -= 1
+        return 'done'
+
+def limiter(**limits):
+    """Create a limiter with its own coordinator."""
+    return RateLimiter('provider', ProviderLimits(**limits), LocalCoordinator())
+
+def test_load_rate_limits():
+    """Test loading the packaged limits and rejecting invalid ones."""
+    config = Path(__file__).parent.parent / 'src' / 'website_builder' / 'config' / 'rate_limits.yaml'
+    limits = load_rate_limits(str(config))
+    assert {'gemini', 'serper', 'website_search'} <= set(limits)
+    assert limits['gemini'].requests_per_minute > 0
+    assert isinstance(limits['gemini'].max_in_flight, int)
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname) / 'limits.yaml'
+        for content, message in (("gemini:\n  requests_per_second: 5\n", "Unknown"),
+                                 ("gemini:\n  requests_per_minute: -1\n", "positive"),
+                                 ("gemini:\n  max_in_flight: 2.5\n", "whole number"),
+                                 ("gemini:\n  max_in_flight: many\n", "number"),
+                                 ("- gemini\n", "must map")):
+            path.write_text(content, encoding='utf-8')
+            with pytest.raises(ValueError, match=message):
+                load_rate_limits(str(path))
+        with pytest.raises(IOError):
+            load_rate_limits(str(Path(tmpdirname) / 'missing.yaml'))
+
+def test_rate_limit_error_detection():
+    """Test recognizing rate-limit errors and the delay they ask for."""
+    assert is_rate_limit_error(RateLimitError("Too many requests"))
+    assert is_rate_limit_error(Exception("429 RESOURCE_EXHAUSTED: Quota exceeded. Please retry in 12.5s."))
+    assert not is_rate_limit_error(ValueError("Invalid API key"))
+    assert not is_rate_limit_error(Exception("Billing quota exceeded for this project"))
+    billing = Exception("Quota exceeded: RESOURCE_EXHAUSTED until the billing account is enabled")
+    billing.status_code = 403
+    assert not is_rate_limit_error(billing)
+
+    assert retry_after(Exception("Please retry in 12.5s.")) == 12.5
+    error = RateLimitError()
+    error.retry_after = '3'
+    assert retry_after(error) == 3.0
+    assert retry_after(Exception("slow down")) is None
+
+def test_requests_per_minute():
+    """Test that calls beyond the burst are spaced at the configured rate."""
+    rate_limiter = limiter(requests_per_minute=600, burst_seconds=0.1)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=rate_limiter.run, args=(lambda: None,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # One call fits in the burst; the other five wait 0.1s each
+    assert time.perf_counter() - start >= 0.45
+    assert rate_limiter.stats()['throttled_seconds'] > 0
+
+def test_tokens_per_minute():
+    """Test that large prompts wait for the token budget."""
+    rate_limiter = limiter(tokens_per_minute=60000, burst_seconds=0.1)
+    with rate_limiter.acquire(tokens=100) as waited:
+        assert waited < 0.05
+    with rate_limiter.acquire(tokens=100) as waited:
+        assert waited >= 0.09
+
+def test_max_in_flight():
+    """Test that no more than max_in_flight calls run at once."""
+    rate_limiter = limiter(max_in_flight=2)
+    probe = ConcurrencyProbe()
+    threads = [threading.Thread(target=rate_limiter.run, args=(probe,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert probe.peak == 2
+
+def test_callers_waiting_for_quota_do_not_hold_slots():
+    """Test that a call waiting for the token bucket leaves its slot to a call that is ready."""
+    rate_limiter = limiter(tokens_per_minute=60000, burst_seconds=0.1, max_in_flight=1)
+    with rate_limiter.acquire(tokens=100):
+        pass
+    started = threading.Event()
+
+    def large_call():
+        started.set()
+        with rate_limiter.acquire(tokens=300):
+            pass
+
+    thread = threading.Thread(target=large_call)
+    thread.start()
+    started.wait()
+    time.sleep(0.02)
+    with rate_limiter.acquire() as waited:
+        assert waited < 0.1
+    thread.join()
+
+def test_async_max_in_flight():
+    """Test that coroutines share the in-flight limit without blocking the loop."""
+    rate_limiter = limiter(max_in_flight=3)
+    state = {'active': 0, 'peak': 0}
+
+    async def call():
+        state['active'] += 1
+        state['peak'] = max(state['peak'], state['active'])
+        await asyncio.sleep(0.02)
+        state['active'] -= 1
+        return 'done'
+
+    async def main():
+        return await asyncio.gather(*(rate_limiter.arun(call) for _ in range(10)))
+
+    assert asyncio.run(main()) == ['done'] * 10
+    assert state['peak'] == 3
+
+def test_backoff_on_rate_limit_errors():
+    """Test retrying with backoff and adapting the admitted rate."""
+    rate_limiter = limiter(requests_per_minute=6000, initial_backoff=0.01, max_backoff=0.05, max_retries=3)
+    attempts = []
+    retries = []
+
+    def flaky():
+        attempts.append(time.perf_counter())
+        if len(attempts) < 3:
+            raise RateLimitError("Too many requests")
+        return 'ok'
+
+    assert rate_limiter.run(flaky, on_retry=lambda attempt, pause, error: retries.append(attempt)) == 'ok'
+    assert retries == [1, 2]
+    assert rate_limiter.stats()['rate_limited'] == 2
+    # The rate was halved twice and recovered once
+    assert rate_limiter.rate_factor == pytest.approx(0.35)
+    assert attempts[1] - attempts[0] >= 0.005
+
+    def always_limited():
+        raise RateLimitError("Too many requests")
+
+    with pytest.raises(RateLimitError):
+        rate_limiter.run(always_limited)
+
+    def broken():
+        attempts.append(None)
+        raise ValueError("Invalid API key")
+
+    count = len(attempts)
+    with pytest.raises(ValueError):
+        rate_limiter.run(broken)
+    assert len(attempts) == count + 1
+
+def test_backoff_pauses_other_callers():
+    """Test that a rate-limit error holds back every caller of the provider."""
+    coordinator = LocalCoordinator()
+    first = RateLimiter('provider', ProviderLimits(initial_backoff=0.2), coordinator)
+    second = RateLimiter('provider', ProviderLimits(), coordinator)
+    first.record_rate_limited(0.2)
+    with second.acquire() as waited:
+        assert waited >= 0.15
+
+def test_file_coordinator_shares_state():
+    """Test that limiters in different processes, here separate coordinators, share quotas and slots."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        limits = ProviderLimits(requests_per_minute=600, burst_seconds=0.1, max_in_flight=1)
+        first = RateLimiter('provider', limits, FileCoordinator(tmpdirname))
+        second = RateLimiter('provider', limits, FileCoordinator(tmpdirname))
+
+        with first.acquire() as waited:
+            assert waited < 0.05
+            assert second.coordinator.try_acquire_slot('provider', 1) is None
+        with second.acquire() as waited:
+            assert waited >= 0.05
+
+        first.record_rate_limited(0.2)
+        assert second.coordinator.blocked_for('provider') > 0.1
+
+def test_enable_rate_limit():
+    """Test LLM calls retried on rate-limit errors and recorded in the metrics."""
+    class FlakyLLM:
+        def __init__(self):
+            self.calls = 0
+
+        def call(self, messages, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise RateLimitError("Too many requests")
+            return "answer"
+
+    llm = enable_rate_limit(FlakyLLM(), limiter(tokens_per_minute=600000, initial_backoff=0.01))
+    metrics = RunMetrics('topic')
+    with metrics.activate(), metrics.stage('research_task'):
+        assert llm.call([{'role': 'user', 'content': 'hello'}]) == "answer"
+    assert llm.calls == 2
+    assert metrics.stages['research_task']['retries'] == 1
+
+def test_builder_resources_apply_limits():
+    """Test that configured providers get limiters and fake resources are unlimited by default."""
+    assert fake_resources().rate_limiters == {}
+
+    resources = fake_resources(rate_limits={
+        'gemini': ProviderLimits(max_in_flight=1),
+        'serper': ProviderLimits(requests_per_minute=60),
+    })
+    assert set(resources.rate_limiters) == {'gemini', 'serper'}
+    assert isinstance(resources.search_tool.tool, RateLimitedTool)
+    assert not isinstance(resources.web_tool.tool, RateLimitedTool)
+    assert resources.search_tool.run(search_query='rust')['organic']
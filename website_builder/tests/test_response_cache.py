@@ -0,0 +1,117 @@
+import pytest
+import tempfile
+import time
+from pathlib import Path
+from website_builder.utils.response_cache import ResponseCache
+from website_builder.llm import enable_response_cache
+
+@pytest.fixture
+def cache_path():
+    """Create a temporary cache database path."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield str(Path(tmpdirname) / 'cache.sqlite3')
+
+class FakeLLM:
+    """Minimal LLM stand-in that counts calls."""
+
+    def __init__(self, model="gemini-pro", temperature=0.7):
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = 4000
+        self.stop = []
+        self.calls = 0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        self.calls += 1
+        return f"response {self.calls}"
+
+def test_get_set_and_stats(cache_path):
+    """Test basic lookups and hit ratio accounting."""
+    cache = ResponseCache(cache_path)
+    key = ResponseCache.make_key("gemini-pro", {"temperature": 0.7}, "prompt")
+    assert cache.get(key) is None
+    cache.set(key, "answer")
+    assert cache.get(key) == "answer"
+
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    assert stats['hit_ratio'] == 0.5
+    assert stats['entries'] == 1
+
+def test_ttl_expiry(cache_path):
+    """Test that expired entries are not returned."""
+    cache = ResponseCache(cache_path, ttl=0.05)
+    cache.set("short", "value")
+    cache.set("long", "value", ttl=60)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    assert cache.get("long") == "value"
+
+def test_lru_eviction(cache_path):
+    """Test that the least recently used entries are evicted first."""
+    cache = ResponseCache(cache_path, max_bytes=30)
+    cache.set("a", "x" * 10)
+    time.sleep(0.01)
+    cache.set("b", "x" * 10)
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", "x" * 15)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+def test_running_byte_total(cache_path):
+    """Test that the stored byte total follows replacements, expiry, eviction and clearing."""
+    cache = ResponseCache(cache_path, max_bytes=40)
+
+    def stored():
+        return cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    cache.set("a", "x" * 10)
+    cache.set("a", "x" * 4)
+    cache.set("b", "x" * 10, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.stats()['bytes'] == stored() == 14
+    cache.set("c", "x" * 30)
+    assert cache.stats()['bytes'] == stored() == 34
+    assert cache.get("b") is None
+    cache.clear()
+    assert cache.stats()['bytes'] == 0
+
+def test_hits_do_not_write(cache_path):
+    """Test that hits are recorded without a write per lookup and still count for eviction."""
+    cache = ResponseCache(cache_path, max_bytes=30)
+    cache.set("a", "x" * 10)
+    cache.set("b", "x" * 10)
+    changes = cache._conn.total_changes
+    for _ in range(5):
+        assert cache.get("a") is not None
+    assert cache._conn.total_changes == changes
+    cache.close()
+
+    reopened = ResponseCache(cache_path, max_bytes=30)
+    reopened.set("c", "x" * 15)
+    assert reopened.get("b") is None
+    assert reopened.get("a") is not None
+
+def test_cache_persists_across_instances(cache_path):
+    """Test that entries survive reopening the cache file."""
+    ResponseCache(cache_path).set("key", "value")
+    assert ResponseCache(cache_path).get("key") == "value"
+
+def test_enable_response_cache(cache_path):
+    """Test that identical calls are served from the cache."""
+    cache = ResponseCache(cache_path)
+    llm = enable_response_cache(FakeLLM(), cache)
+    messages = [{"role": "user", "content": "Build a page about Rust."}]
+
+    assert llm.call(messages) == "response 1"
+    assert llm.call(messages) == "response 1"
+    assert llm.call([{"role": "user", "content": "Build a page about Go."}]) == "response 2"
+
+    # Different sampling parameters must not share entries
+    other = enable_response_cache(FakeLLM(temperature=0.2), cache)
+    assert other.call(messages) == "response 1"
+    assert other.calls == 1
+    assert cache.stats()['hits'] == 1
@@ -0,0 +1,103 @@
+import pytest
+import json
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from website_builder.server import BuildService, QueueFull, make_server
+from website_builder.testing import fake_resources
+
+@pytest.fixture
+def service():
+    """Build service on fake resources, writing into a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        service = BuildService(fake_resources(response_size=300), tmpdirname, workers=2)
+        yield service
+        service.close()
+
+@pytest.fixture
+def base_url(service):
+    """Serve the build service on a free local port."""
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def request(url, payload=None):
+    """Send a GET, or a POST with a JSON payload, and return the status and body."""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def wait_for(base_url, job_id, timeout=60):
+    """Poll a job until it finishes."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        _, body = request(f"{base_url}/jobs/{job_id}")
+        job = json.loads(body)
+        if job['status'] in ('ok', 'error'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+def test_build_job_end_to_end(base_url):
+    """Test submitting a job, polling it and downloading its artifacts."""
+    status, body = request(f"{base_url}/jobs", {'topic': 'Rust'})
+    assert status == 202
+    job = json.loads(body)
+    assert job['status'] in ('queued', 'running')
+
+    job = wait_for(base_url, job['id'])
+    assert job['status'] == 'ok', job['error']
+    assert {'html/index.html', 'css/style.css', 'js/script.js', 'research.md', 'run_report.json'} <= set(job['files'])
+    assert not any(name.startswith(('backups/', 'versions/')) for name in job['files'])
+
+    status, body = request(f"{base_url}{job['links']['files']['html/index.html']}")
+    assert status == 200
+    assert len(body.decode('utf-8')) == 300
+
+def test_jobs_share_warm_resources(service):
+    """Test that consecutive jobs reuse the same LLM client."""
+    first = service.submit('Rust')
+    second = service.submit('Go')
+    llm = service.resources.llm()
+    service.close()
+
+    assert first.status == second.status == 'ok'
+    assert first.output_dir != second.output_dir
+    assert service.resources.llm() is llm
+    assert llm.call_count == 8
+
+def test_invalid_requests(base_url):
+    """Test error responses for bad input, unknown jobs and path traversal."""
+    assert request(f"{base_url}/jobs", {'topic': '  '})[0] == 400
+    assert request(f"{base_url}/jobs", ['not', 'an', 'object'])[0] == 400
+    assert request(f"{base_url}/jobs", {'topic': 123})[0] == 400
+    assert request(f"{base_url}/jobs", {'topic': ['Rust']})[0] == 400
+    assert request(f"{base_url}/jobs/unknown")[0] == 404
+    assert request(f"{base_url}/nothing")[0] == 404
+
+    _, body = request(f"{base_url}/jobs", {'topic': 'Rust'})
+    job = wait_for(base_url, json.loads(body)['id'])
+    assert request(f"{base_url}/jobs/{job['id']}/files/../../etc/passwd")[0] == 404
+    assert request(f"{base_url}/jobs/{job['id']}/files/versions/index.log")[0] == 404
+
+def test_queue_is_bounded():
+    """Test that submissions are refused once max_queued jobs are waiting."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        service = BuildService(fake_resources(llm_latency=0.2), tmpdirname, workers=1, max_queued=1)
+        service.submit('Rust')
+        # Wait for the first job to leave the queue, then fill it
+        while service.stats()['queued']:
+            time.sleep(0.01)
+        service.submit('Go')
+        with pytest.raises(QueueFull):
+            service.submit('Zig')
+        service.close()
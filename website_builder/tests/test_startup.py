@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+# Budget for importing the CLI module, excluding interpreter startup
+IMPORT_BUDGET_US = 150_000
+HEAVY_MODULES = ('crewai', 'crewai_tools', 'langchain', 'google', 'openai', 'litellm', 'dotenv')
+
+def import_times(module: str) -> dict:
+    """Import a module in a fresh interpreter and return the cumulative import time of each module."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+def test_cli_import_skips_heavy_dependencies():
+    """Test that importing the CLI does not pull in crewai, the provider SDKs or dotenv."""
+    times = import_times('website_builder.main')
+    loaded = [name for name in times if name.split('.')[0] in HEAVY_MODULES]
+    assert loaded == []
+
+def test_cli_import_time_budget():
+    """Test that importing the CLI stays within its startup budget."""
+    times = import_times('website_builder.main')
+    assert times['website_builder.main'] < IMPORT_BUDGET_US
+
+def test_help_runs_without_crewai():
+    """Test that --help succeeds in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, '-m', 'website_builder.main', '--help'],
+        capture_output=True, text=True, check=True
+    )
+    assert 'run' in result.stdout and 'batch' in result.stdout
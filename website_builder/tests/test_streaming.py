@@ -0,0 +1,82 @@
+import pytest
+import tempfile
+from pathlib import Path
+from website_builder.utils.file_manager import FileManager
+from website_builder.utils.streaming import StreamingOutput, current_stream
+
+@pytest.fixture
+def output_dir():
+    """Create a temporary output directory."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield Path(tmpdirname)
+
+def test_only_final_answer_is_written(output_dir):
+    """Test that ReAct scaffolding is skipped, even with the marker split across chunks."""
+    stream = StreamingOutput(output_dir / 'index.html')
+    for chunk in ["Thought: done\nFinal An", "swer:  <html>", "</html>"]:
+        stream.feed(chunk, response_id='r1')
+
+    assert stream.partial_path.read_text() == "<html></html>"
+    assert not (output_dir / 'index.html').exists()
+    assert stream.first_byte_seconds is not None
+    stream.abort()
+
+def test_new_response_discards_previous_text(output_dir):
+    """Test that a later LLM response replaces text streamed for an earlier one."""
+    stream = StreamingOutput(output_dir / 'style.css')
+    stream.feed("Final Answer: body {}", response_id='r1')
+    stream.feed("Thought: no marker yet", response_id='r2')
+    assert stream.partial_path.read_text() == ""
+
+    stream.feed("Final Answer: p {}", response_id='r2')
+    assert stream.partial_path.read_text() == "p {}"
+    assert stream.bytes_written == 4
+    stream.abort()
+
+def test_finalize_renames_and_corrects_content(output_dir):
+    """Test that finalize moves the partial file into place with the final content."""
+    stream = StreamingOutput(output_dir / 'script.js')
+    stream.feed("Final Answer: let a = 1;  ", response_id='r1')
+    path = stream.finalize("let a = 1;")
+
+    assert path.read_text() == "let a = 1;"
+    assert not stream.partial_path.exists()
+
+def test_abort_removes_partial_file(output_dir):
+    """Test that an aborted stream leaves no partial file behind."""
+    stream = StreamingOutput(output_dir / 'index.html')
+    stream.feed("Final Answer: <p>", response_id='r1')
+    stream.abort()
+    assert not stream.partial_path.exists()
+
+def test_activate_sets_current_stream(output_dir):
+    """Test that activate routes the current context to the stream."""
+    stream = StreamingOutput(output_dir / 'index.html')
+    with stream.activate():
+        assert current_stream() is stream
+    assert current_stream() is None
+
+def test_file_manager_commit_stream(output_dir):
+    """Test that committed streams are versioned and only replace the file at the end."""
+    with FileManager(str(output_dir)) as file_manager:
+        file_manager.write_file('index.html', '<p>old</p>')
+
+        seen = []
+        stream = file_manager.open_stream(
+            'index.html', on_progress=lambda s: seen.append(file_manager.read_file('index.html')))
+        stream.feed("Final Answer: <p>new</p>", response_id='r1')
+        file_manager.commit_stream('index.html', stream, '<p>new</p>')
+
+        assert seen == ['<p>old</p>']
+        assert file_manager.read_file('index.html') == '<p>new</p>'
+        assert [v['content'] for v in file_manager.get_file_versions('index.html')] == ['<p>old</p>', '<p>new</p>']
+        assert file_manager.list_backups('index.html') == []
+
+def test_identical_streamed_rewrite_is_not_versioned(output_dir):
+    """Test that streaming unchanged content adds no version, like write_file."""
+    with FileManager(str(output_dir)) as file_manager:
+        file_manager.write_file('index.html', '<p>same</p>')
+        stream = file_manager.open_stream('index.html')
+        stream.feed("Final Answer: <p>same</p>", response_id='r1')
+        file_manager.commit_stream('index.html', stream, '<p>same</p>')
+        assert len(file_manager.get_file_versions('index.html')) == 1
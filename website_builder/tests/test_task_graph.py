@@ -0,0 +1,83 @@
+import pytest
+import threading
+import time
+from website_builder.utils.task_graph import TaskGraph
+
+@pytest.fixture
+def tasks_config():
+    """A pipeline where SEO metadata and CSS are siblings after the HTML task."""
+    return {
+        'research_task': {'context': [], 'dependencies': []},
+        'html_creation_task': {'context': ['research_task'], 'dependencies': ['research_task']},
+        'seo_task': {'context': ['html_creation_task'], 'dependencies': ['html_creation_task']},
+        'css_design_task': {'context': ['html_creation_task'], 'dependencies': ['html_creation_task']},
+        'js_development_task': {'context': ['css_design_task'], 'dependencies': ['html_creation_task']},
+    }
+
+def test_topological_order(tasks_config):
+    """Test that every task is ordered after its dependencies and context."""
+    order = TaskGraph.from_tasks_config(tasks_config).topological_order()
+    assert order[:2] == ['research_task', 'html_creation_task']
+    assert order.index('css_design_task') < order.index('js_development_task')
+
+def test_cycle_detection():
+    """Test that dependency cycles are reported."""
+    graph = TaskGraph({'a': ['c'], 'b': ['a'], 'c': ['b'], 'd': []})
+    assert graph.find_cycle() == ['a', 'c', 'b', 'a']
+    with pytest.raises(ValueError) as exc_info:
+        graph.topological_order()
+    assert 'cycle' in str(exc_info.value)
+
+def test_ancestors(tasks_config):
+    """Test that transitive dependencies are found through context too."""
+    graph = TaskGraph.from_tasks_config(tasks_config)
+    assert graph.ancestors('js_development_task') == {'research_task', 'html_creation_task', 'css_design_task'}
+    assert graph.ancestors('research_task') == set()
+
+def test_unknown_dependency():
+    """Test that a dependency on an undeclared task is rejected."""
+    with pytest.raises(ValueError):
+        TaskGraph({'a': ['missing']})
+
+def test_run_passes_upstream_results(tasks_config):
+    """Test that each task receives the results of its dependencies."""
+    graph = TaskGraph.from_tasks_config(tasks_config)
+    results = graph.run(lambda name, upstream: f"{name}({','.join(sorted(upstream))})", max_workers=2)
+    assert results['html_creation_task'] == 'html_creation_task(research_task)'
+    assert results['js_development_task'] == 'js_development_task(css_design_task,html_creation_task)'
+
+def test_run_overlaps_sibling_tasks(tasks_config):
+    """Test that independent tasks run concurrently up to max_workers."""
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def execute(name, upstream):
+        with lock:
+            active.append(name)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(name)
+        return name
+
+    TaskGraph.from_tasks_config(tasks_config).run(execute, max_workers=3)
+    assert max(peak) >= 2
+
+    peak.clear()
+    TaskGraph.from_tasks_config(tasks_config).run(execute, max_workers=1)
+    assert max(peak) == 1
+
+def test_run_propagates_failure(tasks_config):
+    """Test that a failing task stops the run and raises its error."""
+    ran = []
+
+    def execute(name, upstream):
+        ran.append(name)
+        if name == 'html_creation_task':
+            raise RuntimeError("LLM failed")
+        return name
+
+    with pytest.raises(RuntimeError):
+        TaskGraph.from_tasks_config(tasks_config).run(execute, max_workers=2)
+    assert 'css_design_task' not in ran
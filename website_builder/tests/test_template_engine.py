@@ -0,0 +1,44 @@
+import pytest
+import os
+import tempfile
+from pathlib import Path
+from website_builder.utils.template_engine import Markup, Template, TemplateEngine, escape
+
+def test_template_slots_and_render():
+    """Test that identifier slots are filled and CSS/JS braces are left alone."""
+    template = Template("a { color: red; }\n<h1>{title}</h1>{title}{n}")
+    assert template.slots == ('title', 'n')
+    assert template.render({'title': 'Hi'}, n=3) == "a { color: red; }\n<h1>Hi</h1>Hi3"
+    with pytest.raises(ValueError, match="n"):
+        template.render(title='Hi')
+
+def test_autoescape():
+    """Test that HTML templates escape values unless they are Markup."""
+    template = Template('<p title="{title}">{body}</p>', autoescape=True)
+    assert template.render(title='"x" & <y>', body=Markup('<b>ok</b>')) == \
+        '<p title="&quot;x&quot; &amp; &lt;y&gt;"><b>ok</b></p>'
+    assert escape(Markup('<i>')) == '<i>'
+
+def test_engine_caches_until_the_file_changes():
+    """Test that templates are compiled once and recompiled after an edit."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname) / 'page.html'
+        path.write_text('<p>{text}</p>')
+        engine = TemplateEngine(tmpdirname)
+        first = engine.get('page.html')
+        assert engine.get('page.html') is first
+        assert engine.render('page.html', text='<hi>') == '<p>&lt;hi&gt;</p>'
+
+        path.write_text('<div>{text}</div>')
+        mtime = path.stat().st_mtime_ns + 10**9
+        os.utime(path, ns=(mtime, mtime))
+        assert engine.render('page.html', text='x') == '<div>x</div>'
+        with pytest.raises(IOError):
+            engine.get('missing.html')
+
+def test_packaged_templates():
+    """Test that the shipped templates compile and only base.html has slots."""
+    engine = TemplateEngine()
+    assert {'title', 'description', 'nav_links', 'content', 'year'} <= set(engine.get('base.html').slots)
+    assert engine.get('base.css').slots == ()
+    assert engine.get('base.js').slots == ()
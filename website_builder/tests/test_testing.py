@@ -0,0 +1,40 @@
+import pytest
+import tempfile
+from website_builder.crew import WebsiteBuilder
+from website_builder.testing import FakeLLM, FakeSearchTool, FakeWebsiteSearchTool, fake_resources
+from website_builder.utils.metrics import RunMetrics
+
+def test_fake_llm_is_deterministic():
+    """Test that the fake LLM answers the same prompt identically with the requested size."""
+    llm = FakeLLM(response_size=50)
+    messages = [{'role': 'user', 'content': 'Describe Rust.'}]
+
+    first = llm.call(messages)
+    assert first == llm.call(messages)
+    assert first != llm.call([{'role': 'user', 'content': 'Describe Go.'}])
+    assert len(first.split("Final Answer: ", 1)[1]) == 50
+    assert llm.call_count == 3
+
+def test_fake_tools_payload_size():
+    """Test the configurable payload size of the fake search tools."""
+    search = FakeSearchTool(results=3, snippet_size=20)
+    result = search.run(search_query="rust")
+    assert len(result['organic']) == 3
+    assert all(len(item['snippet']) == 20 for item in result['organic'])
+
+    web = FakeWebsiteSearchTool(payload_size=100)
+    page = web.run(search_query="rust", website="https://example.com")
+    assert page.startswith("Relevant content from https://example.com")
+    assert len(page.split("\n", 1)[1]) == 100
+
+def test_fake_resources_exercise_tools():
+    """Test that a build on the fake resources calls each agent's first tool once."""
+    resources = fake_resources(tool_calls=1)
+    metrics = RunMetrics("Rust")
+    with tempfile.TemporaryDirectory() as output_dir, metrics.activate():
+        WebsiteBuilder(topic="Rust", output_dir=output_dir, resources=resources).run_pipeline()
+
+    totals = metrics.totals()
+    assert totals['llm_calls'] == 8
+    assert totals['tool_calls'] == 4
+    assert metrics.tools['Search the internet with Serper']['calls'] == 1
@@ -0,0 +1,105 @@
+import pytest
+import tempfile
+from pathlib import Path
+from website_builder.utils.vector_index import HashingEmbedder, VectorIndex, build_embedder, chunk_text
+
+DOCUMENTS = {
+    'rust': "Rust is a systems programming language. Ownership and borrowing make memory safe without a garbage collector.",
+    'python': "Python is a dynamic language with a garbage collector, popular for data science and scripting.",
+    'baking': "Sourdough bread rises with a starter of wild yeast; bake it in a hot dutch oven.",
+}
+
+class CountingEmbedder(HashingEmbedder):
+    """Hashing embedder that counts the texts it embeds."""
+
+    def __init__(self):
+        super().__init__()
+        self.embedded = 0
+
+    def embed(self, texts):
+        self.embedded += len(texts)
+        return super().embed(texts)
+
+@pytest.fixture
+def index_path():
+    """Create a path for a knowledge index in a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield str(Path(tmpdirname) / 'knowledge.sqlite3')
+
+def test_search_ranks_similar_documents_first(index_path):
+    """Test that the most similar document is returned first."""
+    index = VectorIndex(index_path)
+    for source, text in DOCUMENTS.items():
+        index.upsert(source, text, title=source.title())
+    hits = index.search("memory safety with ownership in rust")
+    assert hits[0].source == 'rust' and hits[0].title == 'Rust'
+    assert hits[0].score > index.min_score
+    assert all(hit.source != 'rust' for hit in index.search("rust ownership", exclude=['rust']))
+    assert index.stats() == {'documents': 3, 'chunks': 3}
+
+def test_upsert_embeds_only_changed_chunks(index_path):
+    """Test that unchanged documents and chunks are not embedded again."""
+    embedder = CountingEmbedder()
+    index = VectorIndex(index_path, embedder)
+    text = "\n\n".join(f"Paragraph {i}: " + "word " * 150 for i in range(4))
+    assert index.upsert('notes', text) == len(chunk_text(text))
+    assert index.upsert('notes', text) == 0
+
+    embedder.embedded = 0
+    changed = text.replace("Paragraph 3:", "Paragraph three:")
+    assert index.upsert('notes', changed) == 1
+    assert embedder.embedded == 1
+    assert index.stats()['chunks'] == len(chunk_text(changed))
+
+    index.remove('notes')
+    assert index.stats() == {'documents': 0, 'chunks': 0}
+
+def test_sync_directory_drops_deleted_files(index_path):
+    """Test that a directory sync indexes text files and forgets deleted ones."""
+    index = VectorIndex(index_path)
+    with tempfile.TemporaryDirectory() as knowledge:
+        (Path(knowledge) / 'rust.md').write_text(DOCUMENTS['rust'])
+        (Path(knowledge) / 'site').mkdir()
+        (Path(knowledge) / 'site' / 'research.md').write_text(DOCUMENTS['python'])
+        (Path(knowledge) / 'logo.png').write_bytes(b'\x89PNG')
+        assert index.sync_directory(knowledge) == 2
+        assert index.sync_directory(knowledge) == 0
+
+        (Path(knowledge) / 'rust.md').unlink()
+        index.sync_directory(knowledge)
+        assert [hit.title for hit in index.search("python garbage collector")] == [str(Path('site') / 'research.md')]
+
+        assert index.sync_directory(knowledge, names=['research.md']) == 0
+        assert index.stats()['documents'] == 1
+
+def test_inverted_search_matches_exhaustive_search(index_path):
+    """Test that the postings lookup used for large indexes finds the same best hits."""
+    index = VectorIndex(index_path)
+    for i in range(60):
+        index.upsert(f"filler-{i}", f"Note {i} about topic{i} and subject{i * 7} with detail{i * 13}.")
+    for source, text in DOCUMENTS.items():
+        index.upsert(source, text)
+    queries = ["ownership and borrowing in rust", "bake sourdough bread", "python for data science"]
+    exhaustive = [[hit.source for hit in index.search(query, k=3)] for query in queries]
+
+    index.EXACT_SEARCH_LIMIT = 0
+    assert [[hit.source for hit in index.search(query, k=3)][0] for query in queries] == \
+        [sources[0] for sources in exhaustive]
+    assert [sources[0] for sources in exhaustive] == ['rust', 'baking', 'python']
+
+def test_changed_embedder_rebuilds_index(index_path):
+    """Test that an index built with other embeddings is cleared instead of searched."""
+    index = VectorIndex(index_path)
+    index.upsert('rust', DOCUMENTS['rust'])
+    index.close()
+
+    rebuilt = VectorIndex(index_path, HashingEmbedder(dimensions=1 << 10))
+    assert rebuilt.stats() == {'documents': 0, 'chunks': 0}
+    assert rebuilt.upsert('rust', DOCUMENTS['rust']) == 1
+
+def test_build_embedder():
+    """Test embedder specs."""
+    assert build_embedder('hashing').signature == HashingEmbedder().signature
+    assert build_embedder('hashing:1024').dimensions == 1024
+    with pytest.raises(ValueError):
+        build_embedder('word2vec')